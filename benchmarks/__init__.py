@@ -0,0 +1,12 @@
+"""
+HTTP benchmark and load-regression suite.
+
+Boots the app through `scripts/entrypoint.sh` (the same gunicorn command used
+in Docker), drives it with an asyncio load generator and compares requests per
+second, latency percentiles and per-worker RSS against a stored JSON baseline.
+
+`python -m benchmarks.serializers` is an in-process micro-benchmark of the
+serializer layer (DRF ModelSerializer vs core.general.api pydantic serializers).
+`python -m benchmarks.cryptography` measures Ed25519 key generation and
+signature verification throughput.
+"""
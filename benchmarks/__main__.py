@@ -0,0 +1,117 @@
+"""
+Run the HTTP benchmark suite.
+
+Usage:
+    python -m benchmarks                      # run and compare against the baseline
+    python -m benchmarks --update-baseline    # run and store a new baseline
+    python -m benchmarks --scenario health --duration 5
+
+Requires a reachable, migrated PostgreSQL (`make up-dev && make migrate`).
+Exits with status 1 when a scenario regresses past --threshold.
+"""
+
+import argparse
+import asyncio
+import sys
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+
+from .loadgen import run_load
+from .report import build_report, find_regressions, format_table, load_report, save_report, summarize
+from .scenarios import get_scenarios, missing_requirement
+from .server import running_server, worker_rss
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "default.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="Scenario name (repeatable)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of measured load per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Seconds of unmeasured load per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel client connections")
+    parser.add_argument("--workers", type=int, default=None, help="GUNICORN_WORKERS (default: entrypoint auto-sizing)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression as a fraction")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to --baseline")
+    return parser.parse_args(argv)
+
+
+def run_scenarios(args, scenarios):
+    host = "127.0.0.1"
+    summaries = {}
+    # Boot one server per rate-limit mode and worker class instead of one per scenario
+    server_mode = attrgetter("ratelimit", "worker_class")
+    for (ratelimit, worker_class), group in groupby(sorted(scenarios, key=server_mode), key=server_mode):
+        extra_env = {"RATELIMIT_ENABLE": str(ratelimit).lower(), "GUNICORN_WORKER_CLASS": worker_class}
+        if args.workers:
+            extra_env["GUNICORN_WORKERS"] = str(args.workers)
+
+        with running_server(host=host, port=args.port, extra_env=extra_env) as master_pid:
+            for scenario in group:
+                print(f"→ {scenario.name} ({scenario.method} {scenario.path})", flush=True)
+                load = {"method": scenario.method, "concurrency": args.concurrency}
+                asyncio.run(run_load(host, args.port, scenario.path, duration=args.warmup, **load))
+                result = asyncio.run(run_load(host, args.port, scenario.path, duration=args.duration, **load))
+                summaries[scenario.name] = summarize(scenario, result, worker_rss(master_pid))
+    return summaries
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = get_scenarios(args.scenarios)
+    # Scenarios needing an optional package that isn't installed would stop the server from booting
+    skipped = {}
+    for scenario in scenarios:
+        reason = missing_requirement(scenario)
+        if reason:
+            skipped[scenario.name] = reason
+            print(f"↷ {scenario.name} skipped: {reason}", flush=True)
+
+    summaries = run_scenarios(args, [scenario for scenario in scenarios if scenario.name not in skipped])
+    report = build_report(
+        summaries,
+        settings={
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+        },
+    )
+    report["skipped"] = skipped
+    save_report(report, args.output)
+    print()
+    print(format_table(report))
+    if skipped:
+        print(f"Skipped: {', '.join(skipped)}")
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        save_report(report, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if args.baseline.exists():
+        baseline = load_report(args.baseline)
+    else:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        baseline = {"scenarios": {}}
+
+    failures = find_regressions(baseline, report, args.threshold)
+    if failures:
+        print(f"\n✗ {len(failures)} regression(s) beyond {args.threshold:.0%}:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
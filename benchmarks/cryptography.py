@@ -0,0 +1,60 @@
+"""
+Ed25519 throughput for core.general.utils.cryptography. No server or database needed.
+
+Usage:
+    python -m benchmarks.cryptography                  # 20k signatures from 100 accounts
+    python -m benchmarks.cryptography --count 100000 --accounts 1000 --processes 8
+
+Reports key pairs generated and signatures verified per second, serially and
+through the process pool, and with a cold vs warm verify key cache.
+"""
+
+import argparse
+import os
+import time
+
+from core.general.utils import cryptography
+
+
+def rate(count, func):
+    started = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.cryptography", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=20_000, help="Signatures to verify")
+    parser.add_argument("--accounts", type=int, default=100, help="Distinct signing keys")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Process pool size")
+    args = parser.parse_args(argv)
+
+    accounts = cryptography.generate_key_pairs(args.accounts, processes=1)
+    items = []
+    for i in range(args.count):
+        account = accounts[i % args.accounts]
+        message = f"transfer {i}"
+        items.append((message, cryptography.sign(message, account.private), account.public))
+
+    # Warm the pool so process start-up isn't counted
+    cryptography.verify_batch(items[: cryptography.PARALLEL_THRESHOLD], processes=args.processes)
+
+    def keygen(processes):
+        return rate(args.count, lambda: cryptography.generate_key_pairs(args.count, processes=processes))
+
+    def verify(processes):
+        return rate(args.count, lambda: cryptography.verify_batch(items, processes=processes))
+
+    results = [("keygen serial", keygen(1)), ("keygen pool", keygen(args.processes))]
+    cryptography.get_verify_key.cache_clear()
+    results.append(("verify serial (cold key cache)", verify(1)))
+    results.append(("verify serial (warm key cache)", verify(1)))
+    results.append(("verify pool", verify(args.processes)))
+
+    print(f"{args.count} signatures, {args.accounts} accounts, {args.processes} processes")
+    for name, per_second in results:
+        print(f"  {name:<32} {per_second:>12,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
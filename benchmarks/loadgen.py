@@ -0,0 +1,133 @@
+"""
+In-process asyncio HTTP/1.1 load generator.
+
+Uses raw asyncio streams so the benchmark suite has no extra dependencies.
+Connections are kept alive when the server allows it and transparently
+re-opened when it answers with `Connection: close` (gunicorn sync workers).
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class LoadResult:
+    """Raw measurements collected during a load run."""
+
+    duration: float
+    latencies: list = field(default_factory=list)  # seconds, one per completed request
+    statuses: dict = field(default_factory=dict)  # status code -> count
+    errors: int = 0
+
+    @property
+    def requests(self):
+        return len(self.latencies)
+
+    @property
+    def rps(self):
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, pct):
+        """Nearest-rank percentile of the request latencies, in milliseconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+        return ordered[rank] * 1000
+
+
+class HTTPConnection:
+    """A single keep-alive capable HTTP/1.1 client connection."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None):
+        """Send one request and return the response status code."""
+        if self.writer is None:
+            await self._connect()
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "User-Agent: benchmarks/loadgen"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split(b" ", 2)[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in (204, 304):
+            pass
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            await self._read_chunked()
+        elif "content-length" in response_headers:
+            await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            await self.reader.read()
+            await self.close()
+            return status
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status
+
+    async def _read_chunked(self):
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            await self.reader.readexactly(size + 2)  # chunk + CRLF
+            if size == 0:
+                return
+
+
+async def _worker(host, port, path, method, headers, deadline, result):
+    connection = HTTPConnection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await connection.request(method, path, headers)
+            except (ConnectionError, OSError, ValueError, asyncio.IncompleteReadError):
+                result.errors += 1
+                await connection.close()
+                continue
+            result.latencies.append(time.perf_counter() - started)
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+    finally:
+        await connection.close()
+
+
+async def run_load(host, port, path, *, method="GET", headers=None, concurrency=16, duration=10.0):
+    """
+    Drive `concurrency` parallel clients against `path` for `duration` seconds.
+    """
+    result = LoadResult(duration=duration)
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(_worker(host, port, path, method, headers, deadline, result) for _ in range(concurrency)))
+    result.duration = time.perf_counter() - started
+    return result
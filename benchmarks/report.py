@@ -0,0 +1,90 @@
+"""
+Summaries, JSON baselines and regression detection for benchmark runs.
+"""
+
+import json
+import platform
+from datetime import UTC, datetime
+
+# Metrics where a higher value is worse, and the single metric where lower is worse
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "p99_ms", "worker_rss_max_mb")
+LOWER_IS_WORSE = ("rps",)
+
+
+def summarize(scenario, result, rss_by_worker):
+    """Reduce a `LoadResult` and per-worker RSS sample to a JSON-friendly dict."""
+    rss_mb = [rss / 1024 / 1024 for rss in rss_by_worker.values()] or [0.0]
+    expected = result.statuses.get(scenario.expected_status, 0)
+    return {
+        "path": scenario.path,
+        "requests": result.requests,
+        "errors": result.errors,
+        "rps": round(result.rps, 2),
+        "p50_ms": round(result.percentile(50), 3),
+        "p95_ms": round(result.percentile(95), 3),
+        "p99_ms": round(result.percentile(99), 3),
+        "expected_status": scenario.expected_status,
+        "expected_status_ratio": round(expected / result.requests, 4) if result.requests else 0.0,
+        "statuses": {str(status): count for status, count in sorted(result.statuses.items())},
+        "workers": len(rss_by_worker),
+        "worker_rss_mb": [round(value, 1) for value in sorted(rss_mb)],
+        "worker_rss_max_mb": round(max(rss_mb), 1),
+    }
+
+
+def build_report(summaries, settings):
+    return {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "settings": settings,
+        "scenarios": summaries,
+    }
+
+
+def save_report(report, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+def load_report(path):
+    return json.loads(path.read_text())
+
+
+def find_regressions(baseline, current, threshold):
+    """
+    Compare `current` against `baseline` and return human-readable failures.
+
+    A scenario regresses when throughput drops, or latency/RSS grows, by more
+    than `threshold` (a fraction, e.g. 0.15 for 15%), or when fewer than 99%
+    of its responses had the expected status code.
+    """
+    failures = []
+    for name, metrics in current["scenarios"].items():
+        if metrics["expected_status_ratio"] < 0.99:
+            failures.append(
+                f"{name}: only {metrics['expected_status_ratio']:.1%} of responses returned "
+                f"{metrics['expected_status']} (statuses: {metrics['statuses']}, errors: {metrics['errors']})"
+            )
+
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        for metric in LOWER_IS_WORSE:
+            if previous[metric] and metrics[metric] < previous[metric] * (1 - threshold):
+                failures.append(f"{name}: {metric} dropped {previous[metric]} -> {metrics[metric]}")
+        for metric in HIGHER_IS_WORSE:
+            if previous[metric] and metrics[metric] > previous[metric] * (1 + threshold):
+                failures.append(f"{name}: {metric} grew {previous[metric]} -> {metrics[metric]}")
+    return failures
+
+
+def format_table(report):
+    header = f"{'scenario':<14}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>10}{'errors':>8}"
+    rows = [header, "-" * len(header)]
+    for name, metrics in report["scenarios"].items():
+        rows.append(
+            f"{name:<14}{metrics['rps']:>10.1f}{metrics['p50_ms']:>10.2f}{metrics['p95_ms']:>10.2f}"
+            f"{metrics['p99_ms']:>10.2f}{metrics['worker_rss_max_mb']:>10.1f}{metrics['errors']:>8}"
+        )
+    return "\n".join(rows)
@@ -0,0 +1,50 @@
+"""
+Benchmark scenarios for the project's endpoints.
+"""
+
+import importlib.util
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    expected_status: int = 200
+    method: str = "GET"
+    # Rate limiting is disabled for throughput scenarios so every request
+    # reaches the view; the 429 scenario needs it on to hit `ratelimit_view`.
+    ratelimit: bool = False
+    # GUNICORN_WORKER_CLASS the server runs with ("gevent" needs the optional gevent package)
+    worker_class: str = "sync"
+
+
+SCENARIOS = [
+    Scenario(name="home", path="/"),
+    Scenario(name="health", path="/health/"),
+    Scenario(name="schema", path="/api/schema/"),
+    # The warm-up phase exhausts RATELIMIT_RATE_DEFAULT, so the measured
+    # requests all take the 429 path through `ratelimit_view`.
+    Scenario(name="ratelimited", path="/", expected_status=429, ratelimit=True),
+    # An endpoint that mostly waits on PostgreSQL (BENCHMARK_VIEWS), under sync
+    # and gevent workers: the pair shows what cooperative workers gain there.
+    Scenario(name="io", path="/bench/io/"),
+    Scenario(name="io-gevent", path="/bench/io/", worker_class="gevent"),
+]
+
+
+def missing_requirement(scenario):
+    """Why `scenario` can't run in this environment, or None when it can."""
+    if scenario.worker_class == "gevent" and importlib.util.find_spec("gevent") is None:
+        return "gevent isn't installed (optional dependency, see pyproject.toml)"
+    return None
+
+
+def get_scenarios(names=None):
+    if not names:
+        return SCENARIOS
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = sorted(set(names) - set(known))
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(known)}")
+    return [known[name] for name in names]
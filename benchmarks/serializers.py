@@ -0,0 +1,109 @@
+"""
+Compare DRF ModelSerializer with the pydantic serializer layer
+(core.general.api) on large list payloads. No server or database needed.
+
+Usage:
+    python -m benchmarks.serializers                 # 10k items, best of 5
+    python -m benchmarks.serializers --items 50000 --repeat 3
+
+Measures, for each implementation:
+- dump:     ORM instances -> JSON bytes (serializer `.data` + renderer)
+- validate: parsed JSON list -> validated data (`many=True`, `is_valid()`)
+"""
+
+import argparse
+import os
+import time
+from datetime import UTC, datetime
+
+
+def build_cases(items):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.backend.settings.test")
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from pydantic import BaseModel, ConfigDict, Field
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    from core.general.api.renderers import PydanticJSONRenderer
+    from core.general.api.serializers import PydanticSerializer
+
+    user_fields = ["id", "first_name", "last_name", "email", "is_staff", "is_active", "date_joined"]
+
+    class UserModelSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = User
+            fields = user_fields
+            read_only_fields = ["id", "date_joined"]
+
+    class UserIn(BaseModel):
+        first_name: str = Field(default="", max_length=150)
+        last_name: str = Field(default="", max_length=150)
+        email: str = Field(default="", max_length=254)
+        is_staff: bool = False
+        is_active: bool = True
+
+    class UserOut(UserIn):
+        model_config = ConfigDict(from_attributes=True)
+
+        id: int
+        date_joined: datetime
+
+    joined = datetime(2025, 1, 1, tzinfo=UTC)
+    users = [
+        User(id=i, first_name=f"First{i}", last_name=f"Last{i}", email=f"user{i}@example.com", date_joined=joined)
+        for i in range(items)
+    ]
+    payload = [
+        {"first_name": f"First{i}", "last_name": f"Last{i}", "email": f"user{i}@example.com"} for i in range(items)
+    ]
+
+    def drf_dump():
+        return JSONRenderer().render(UserModelSerializer(users, many=True).data)
+
+    def drf_validate():
+        serializer = UserModelSerializer(data=payload, many=True)
+        assert serializer.is_valid(), serializer.errors
+
+    def pydantic_dump():
+        return PydanticJSONRenderer().render(PydanticSerializer.of(UserOut)(users, many=True).data)
+
+    def pydantic_validate():
+        serializer = PydanticSerializer.of(UserIn)(data=payload, many=True)
+        assert serializer.is_valid(), serializer.errors
+
+    return {
+        "dump": {"ModelSerializer": drf_dump, "pydantic": pydantic_dump},
+        "validate": {"ModelSerializer": drf_validate, "pydantic": pydantic_validate},
+    }
+
+
+def best_of(func, repeat):
+    func()  # warm up: adapter compilation, field construction
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serializers", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{args.items} items, best of {args.repeat}")
+    print(f"{'operation':<10} {'ModelSerializer':>16} {'pydantic':>10} {'speedup':>8}")
+    for operation, implementations in build_cases(args.items).items():
+        drf = best_of(implementations["ModelSerializer"], args.repeat)
+        fast = best_of(implementations["pydantic"], args.repeat)
+        print(f"{operation:<10} {drf * 1000:14.1f}ms {fast * 1000:8.1f}ms {drf / fast:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Boot the application under the real `scripts/entrypoint.sh` gunicorn command.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ENTRYPOINT = BASE_DIR / "scripts" / "entrypoint.sh"
+
+# Production settings need these; local defaults match docker-compose.dev.yaml
+DEFAULT_ENV = {
+    "DJANGO_ENV": "prod",
+    "SECRET_KEY": "benchmark-secret-key-not-for-production-use-0123456789abcdef",
+    "ALLOWED_HOSTS": "127.0.0.1,localhost",
+    "SKIP_DB_WAIT": "true",
+    "SKIP_MIGRATIONS": "true",
+    "SKIP_COLLECTSTATIC": "true",
+    "GUNICORN_LOG_LEVEL": "warning",
+    "BENCHMARK_VIEWS": "true",
+}
+
+
+def _wait_for_port(host, port, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup (exit code {process.returncode})")
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"Server did not accept connections on {host}:{port} within {timeout}s")
+
+
+def worker_rss(master_pid):
+    """
+    Return {pid: rss_bytes} for the gunicorn workers forked by `master_pid`.
+    Uses `ps` so it works on both Linux and macOS.
+    """
+    output = subprocess.run(["ps", "-axo", "pid=,ppid=,rss="], capture_output=True, text=True, check=True).stdout
+    workers = {}
+    for line in output.splitlines():
+        pid, ppid, rss = (int(value) for value in line.split())
+        if ppid == master_pid:
+            workers[pid] = rss * 1024
+    return workers
+
+
+@contextmanager
+def running_server(host="127.0.0.1", port=8765, extra_env=None, startup_timeout=30):
+    """
+    Start gunicorn through the entrypoint and yield the master PID.
+    The entrypoint `exec`s gunicorn, so the child process PID is the master.
+    """
+    env = {**os.environ, **DEFAULT_ENV, "GUNICORN_BIND": f"{host}:{port}", **(extra_env or {})}
+    process = subprocess.Popen(["bash", str(ENTRYPOINT)], cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+    try:
+        _wait_for_port(host, port, process, startup_timeout)
+        # Workers accept connections slightly after the master binds the socket
+        time.sleep(1)
+        yield process.pid
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
@@ -23,3 +23,32 @@ class BackendConfig(AppConfig):
 
         # Import custom system checks
         from core.backend import checks  # noqa: F401
+
+        # `cached` managers for QUERYSET_CACHE_MODELS, invalidation signals
+        from core.general.db.cache import install
+
+        install()
+
+        # Surrogate-key purges for CACHE_PURGE_MODELS
+        from core.backend import purge
+
+        purge.install()
+
+        # Call-site comments on queries, for the pg_stat_statements report
+        from core.backend import querystats
+
+        querystats.install()
+
+        # Memoized values often derive from settings: drop them when a test overrides one
+        from django.test.signals import setting_changed
+
+        setting_changed.connect(clear_memoized, dispatch_uid="clear_memoized")
+
+
+def clear_memoized(**kwargs):
+    # Checked per signal: `python -m pytest` sets up Django before conftest.py sets PYTEST_RUNNING
+    from core.general.utils.memoize import clear_all
+    from core.general.utils.pytest import is_pytest_running
+
+    if is_pytest_running():
+        clear_all()
@@ -0,0 +1,253 @@
+"""
+Container boot orchestrator.
+
+Replaces the psql polling loop and the separate `manage.py collectstatic` /
+`manage.py migrate` processes in scripts/entrypoint.sh with a single Python
+process:
+
+1. Wait for the database with exponential backoff (DB_WAIT_TIMEOUT seconds).
+2. Skip `migrate` when every migration on disk is already recorded in the
+   django_migrations table (the common case on a rolling restart).
+3. Run collectstatic and migrate concurrently.
+4. Print a per-phase timing report.
+5. Hand off to gunicorn in the same process, so the master starts with Django
+   already imported instead of paying for another interpreter start.
+
+Usage (see scripts/entrypoint.sh; arguments are passed to gunicorn):
+
+    python -m core.backend.boot --bind 0.0.0.0:8000 --workers 4
+
+Each step honours the entrypoint's SKIP_DB_WAIT, SKIP_MIGRATIONS and
+SKIP_COLLECTSTATIC flags.
+"""
+
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+WSGI_APPLICATION = "core.backend.wsgi:application"
+
+
+def env_flag(name):
+    return os.environ.get(name, "false").lower() == "true"
+
+
+class BootTimer:
+    """Records how long each boot phase took."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # [(name, seconds, outcome), ...]
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        outcome = {"status": "done"}
+        try:
+            yield outcome
+        except BaseException:
+            outcome["status"] = "failed"
+            raise
+        finally:
+            self.phases.append((name, time.perf_counter() - started, outcome["status"]))
+
+    def skip(self, name, reason):
+        self.phases.append((name, 0.0, f"skipped ({reason})"))
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [
+            "========================================",
+            "Boot timings",
+            "========================================",
+        ]
+        for name, seconds, status in self.phases:
+            lines.append(f"  {name:<16} {seconds:7.2f}s  {status}")
+        lines.append(f"  {'total':<16} {total:7.2f}s")
+        return "\n".join(lines)
+
+
+def log(message):
+    print(message, flush=True)
+
+
+def wait_for_database(timeout=60.0, initial_delay=0.1, max_delay=5.0, alias="default"):
+    """
+    Open a connection to `alias`, retrying with exponential backoff (doubling
+    from `initial_delay`, capped at `max_delay`) for up to `timeout` seconds.
+    Returns the number of attempts; re-raises the last error on timeout.
+    """
+    from django.db import OperationalError, connections
+
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            connections[alias].ensure_connection()
+            return attempt
+        except OperationalError as exc:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise
+            log(f"PostgreSQL is unavailable ({exc.__class__.__name__}) - retrying in {min(delay, remaining):.1f}s")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+
+def migration_files():
+    """
+    Return sorted (app_label, migration_name) pairs for every migration file on
+    disk. Reads directory listings only, so no migration module is imported.
+    """
+    from importlib.util import find_spec
+
+    from django.apps import apps
+    from django.db.migrations.loader import MigrationLoader
+
+    names = []
+    for app_config in apps.get_app_configs():
+        module_name, _ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            spec = find_spec(module_name)
+        except ModuleNotFoundError:
+            continue
+        if spec is None or not spec.submodule_search_locations:
+            continue
+        for location in spec.submodule_search_locations:
+            for path in Path(location).glob("*.py"):
+                if path.stem != "__init__" and not path.stem.startswith("~"):
+                    names.append((app_config.label, path.stem))
+    return sorted(names)
+
+
+def migration_fingerprint(names):
+    """Short, stable digest of a set of (app_label, migration_name) pairs."""
+    digest = hashlib.sha256("\n".join(f"{app}.{name}" for app, name in sorted(names)).encode())
+    return digest.hexdigest()[:12]
+
+
+def pending_migrations(alias="default"):
+    """
+    Return the migrations on disk that are not recorded in django_migrations.
+    An empty list means `migrate` would have nothing to apply.
+    """
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+
+    recorder = MigrationRecorder(connections[alias])
+    applied = recorder.applied_migrations() if recorder.has_table() else {}
+    return [name for name in migration_files() if name not in applied]
+
+
+def run_migrate(timer):
+    from django.core.management import call_command
+    from django.db import connections
+
+    try:
+        with timer.phase("migrate") as outcome:
+            on_disk = migration_files()
+            pending = pending_migrations()
+            if not pending:
+                outcome["status"] = f"up to date (fingerprint {migration_fingerprint(on_disk)})"
+                return
+            log(f"Applying {len(pending)} pending migration(s)...")
+            call_command("migrate", interactive=False, verbosity=1)
+            outcome["status"] = f"applied {len(pending)} (fingerprint {migration_fingerprint(on_disk)})"
+    finally:
+        # Runs in a worker thread; don't leave its connection behind
+        connections.close_all()
+
+
+def run_collectstatic(timer):
+    from django.core.management import call_command
+
+    with timer.phase("collectstatic"):
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+
+def prepare(timer):
+    """Run the boot steps before the server starts."""
+    if env_flag("SKIP_DB_WAIT"):
+        timer.skip("database", "SKIP_DB_WAIT")
+    else:
+        with timer.phase("database") as outcome:
+            attempts = wait_for_database(timeout=float(os.environ.get("DB_WAIT_TIMEOUT", "60")))
+            outcome["status"] = f"ready after {attempts} attempt(s)"
+
+    steps = []
+    if env_flag("SKIP_COLLECTSTATIC"):
+        timer.skip("collectstatic", "SKIP_COLLECTSTATIC")
+    else:
+        steps.append(run_collectstatic)
+    if env_flag("SKIP_MIGRATIONS"):
+        timer.skip("migrate", "SKIP_MIGRATIONS")
+    else:
+        steps.append(run_migrate)
+
+    # collectstatic only touches the filesystem and migrate only the database
+    with ThreadPoolExecutor(max_workers=max(len(steps), 1), thread_name_prefix="boot") as executor:
+        futures = [executor.submit(step, timer) for step in steps]
+    for future in futures:
+        future.result()
+
+
+def release_resources():
+    """
+    Close everything the boot steps opened. Gunicorn forks its workers from
+    this process, and a shared database socket or cache client would be
+    corrupted by concurrent use from several workers.
+    """
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+
+
+def serve(gunicorn_args):
+    """Replace the boot phase with the gunicorn master, in this process."""
+    from gunicorn.app.wsgiapp import WSGIApplication
+
+    sys.argv = ["gunicorn", *gunicorn_args, WSGI_APPLICATION]
+    WSGIApplication("%(prog)s [OPTIONS] [APP_MODULE]").run()
+
+
+def main(argv=None):
+    from core.backend import green
+
+    # Before Django is imported: gunicorn forks the workers from this process
+    green.patch()
+
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.backend.settings")
+    timer = BootTimer()
+
+    with timer.phase("django setup"):
+        django.setup()
+
+    try:
+        prepare(timer)
+    except Exception as exc:
+        log(timer.report())
+        log(f"❌ Boot failed: {exc.__class__.__name__}: {exc}")
+        sys.exit(1)
+    finally:
+        release_resources()
+
+    log(timer.report())
+    log("Starting application server...")
+    serve(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 """
 Custom Django system checks for security and configuration validation.
 These checks run automatically with `python manage.py check` and during deployment.
+Performance checks are tagged `performance` and only run with `check --deploy`.
 """
 
-from django.core.checks import Error, Warning, register, Tags
+import logging
+import os
+
 from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.urls import get_resolver
+from django.utils.module_loading import import_string
 
 
 @register(Tags.security)
@@ -131,3 +137,361 @@ def check_cache_configuration(app_configs, **kwargs):
             )
 
     return warnings
+
+
+CACHED_AUTH_BACKEND = "core.general.auth.CachedModelBackend"
+
+
+@register(Tags.caches)
+def check_cached_auth_backend(app_configs, **kwargs):
+    """
+    Check that the cached authentication backend's invalidation reaches every process.
+    """
+    errors = []
+
+    if CACHED_AUTH_BACKEND in settings.AUTHENTICATION_BACKENDS:
+        alias = settings.QUERYSET_CACHE_ALIAS
+        backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+        if "locmem" in backend.lower():
+            errors.append(
+                Error(
+                    f"{CACHED_AUTH_BACKEND} uses the per-process LocMemCache '{alias}'",
+                    hint="Other workers would keep serving deactivated users, old passwords and revoked permissions "
+                    "for QUERYSET_CACHE_TIMEOUT. Point QUERYSET_CACHE_ALIAS at Redis (set REDIS_URL) or unset "
+                    "AUTH_CACHED_BACKEND",
+                    id="caches.E001",
+                )
+            )
+
+    return errors
+
+
+# ==============================================================================
+# PERFORMANCE (deploy-only: run with `manage.py check --deploy`)
+# ==============================================================================
+
+PERFORMANCE = "performance"
+
+CACHED_TEMPLATE_LOADER = "django.template.loaders.cached.Loader"
+BROWSABLE_API_RENDERER = "rest_framework.renderers.BrowsableAPIRenderer"
+
+
+def _iter_url_callbacks(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from _iter_url_callbacks(pattern.url_patterns)
+        elif getattr(pattern, "callback", None) is not None:
+            yield pattern.callback
+
+
+@register(PERFORMANCE, deploy=True)
+def check_connection_pooling(app_configs, **kwargs):
+    """
+    Check that persistent connections are not combined with connection pooling.
+    """
+    errors = []
+
+    for alias, database in settings.DATABASES.items():
+        if database.get("OPTIONS", {}).get("pool") and database.get("CONN_MAX_AGE"):
+            errors.append(
+                Error(
+                    f"Database '{alias}' combines CONN_MAX_AGE with OPTIONS['pool']",
+                    hint="Set CONN_MAX_AGE to 0 when using psycopg connection pooling; the pool keeps connections open",
+                    id="performance.E001",
+                )
+            )
+
+    return errors
+
+
+@register(PERFORMANCE, deploy=True)
+def check_atomic_requests_exemptions(app_configs, **kwargs):
+    """
+    Check that ATOMIC_REQUESTS databases exempt at least one read-only view.
+    """
+    warnings = []
+
+    atomic_aliases = [alias for alias, database in settings.DATABASES.items() if database.get("ATOMIC_REQUESTS")]
+    if not atomic_aliases:
+        return warnings
+
+    exempt_aliases = set()
+    for callback in _iter_url_callbacks(get_resolver().url_patterns):
+        exempt_aliases.update(getattr(callback, "_non_atomic_requests", ()))
+
+    for alias in atomic_aliases:
+        if alias not in exempt_aliases:
+            warnings.append(
+                Warning(
+                    f"ATOMIC_REQUESTS is enabled for database '{alias}' but no view is exempt",
+                    hint="Decorate read-only views (health checks, listings) with @transaction.non_atomic_requests "
+                    "to avoid a BEGIN/COMMIT round trip per request",
+                    id="performance.W001",
+                )
+            )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_cached_template_loader(app_configs, **kwargs):
+    """
+    Check that explicitly configured template loaders include the cached loader.
+    """
+    warnings = []
+
+    if not settings.DEBUG:
+        for template in settings.TEMPLATES:
+            if template.get("BACKEND") != "django.template.backends.django.DjangoTemplates":
+                continue
+            # Without explicit loaders Django enables the cached loader itself
+            loaders = template.get("OPTIONS", {}).get("loaders")
+            if loaders is None:
+                continue
+            names = [loader[0] if isinstance(loader, list | tuple) else loader for loader in loaders]
+            if CACHED_TEMPLATE_LOADER not in names:
+                warnings.append(
+                    Warning(
+                        "Templates are re-parsed on every render (no cached template loader)",
+                        hint=f"Wrap the loaders in '{CACHED_TEMPLATE_LOADER}' or remove OPTIONS['loaders']",
+                        id="performance.W002",
+                    )
+                )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_browsable_api_renderer(app_configs, **kwargs):
+    """
+    Check that the DRF browsable API renderer is disabled in production.
+    """
+    warnings = []
+
+    if not settings.DEBUG:
+        renderers = getattr(settings, "REST_FRAMEWORK", {}).get("DEFAULT_RENDERER_CLASSES", [])
+        if BROWSABLE_API_RENDERER in renderers:
+            warnings.append(
+                Warning(
+                    "BrowsableAPIRenderer is enabled in production (DEBUG=False)",
+                    hint="Remove it from REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']; it renders full HTML pages "
+                    "with forms for every API response requested by a browser",
+                    id="performance.W003",
+                )
+            )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_ratelimit_cache(app_configs, **kwargs):
+    """
+    Check that rate limit counters are shared between gunicorn workers.
+    """
+    warnings = []
+
+    if not settings.DEBUG and getattr(settings, "RATELIMIT_ENABLE", True):
+        alias = getattr(settings, "RATELIMIT_USE_CACHE", "default")
+        backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+        # entrypoint.sh always starts at least 2 workers unless told otherwise
+        single_worker = os.environ.get("GUNICORN_WORKERS") == "1"
+        if "locmem" in backend.lower() and not single_worker:
+            warnings.append(
+                Warning(
+                    f"Rate limits use the per-process LocMemCache '{alias}' with multiple workers",
+                    hint="Each gunicorn worker keeps its own counters, so the effective limit is multiplied by the "
+                    "worker count. Point RATELIMIT_USE_CACHE at Redis (set REDIS_URL)",
+                    id="performance.W004",
+                )
+            )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_admission_queue_time(app_configs, **kwargs):
+    """
+    Check that admission control can see queue time, or it disables itself.
+    """
+    from core.backend.middleware.admission import queue_time_observable
+
+    warnings = []
+
+    if settings.ADMISSION_CONTROL_ENABLED and not queue_time_observable():
+        warnings.append(
+            Warning(
+                "Admission control is disabled: sync workers can't see how long requests queued",
+                hint="The backlog waits in the kernel's listen queue, before the worker accepts it. Have the proxy "
+                'set X-Request-Start (nginx: proxy_set_header X-Request-Start "t=${msec}") and set '
+                "ADMISSION_TRUST_QUEUE_HEADER=true, or set ADMISSION_CONTROL_ENABLED=false",
+                id="performance.W007",
+            )
+        )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_sync_file_logging(app_configs, **kwargs):
+    """
+    Check that production logging does not write synchronously to files.
+    """
+    warnings = []
+
+    if not settings.DEBUG:
+        for name, handler in settings.LOGGING.get("handlers", {}).items():
+            try:
+                handler_class = import_string(handler.get("class", ""))
+            except ImportError:
+                continue
+            if isinstance(handler_class, type) and issubclass(handler_class, logging.FileHandler):
+                warnings.append(
+                    Warning(
+                        f"Logging handler '{name}' writes synchronously to a file in production",
+                        hint="Log to the console (captured by Docker) or put the file handler behind "
+                        "logging.handlers.QueueHandler so request threads never block on disk I/O",
+                        id="performance.W005",
+                    )
+                )
+
+    return warnings
+
+
+@register(PERFORMANCE, deploy=True)
+def check_debug_toolbar_installed(app_configs, **kwargs):
+    """
+    Check that django-debug-toolbar is not installed in a deployment.
+    """
+    warnings = []
+
+    if "debug_toolbar" in settings.INSTALLED_APPS:
+        warnings.append(
+            Warning(
+                "django-debug-toolbar is in INSTALLED_APPS",
+                hint="Only add debug_toolbar (and its middleware) in dev.py; it instruments every SQL query and template",
+                id="performance.W006",
+            )
+        )
+
+    return warnings
+
+
+# ==============================================================================
+# GEVENT (GUNICORN_WORKER_CLASS=gevent; also run by each worker, see wsgi.py)
+# ==============================================================================
+
+GEVENT = "gevent"
+
+# C extensions whose calls block the gevent hub, stalling every request of the worker
+GEVENT_UNSAFE_MODULES = {
+    "psycopg2": "psycopg2 waits in C; use psycopg 3, or psycogreen's patch_psycopg()",
+    "MySQLdb": "mysqlclient waits in C; use PyMySQL",
+    "pylibmc": "pylibmc waits in C; use pymemcache",
+    "grpc": "call grpc.experimental.gevent.init_gevent() before creating channels",
+    "zmq": "import zmq.green instead of zmq",
+    "confluent_kafka": "librdkafka calls block; produce from a real thread or a task worker",
+    "cassandra": "set the cluster's connection_class to GeventConnection",
+}
+
+
+@register(GEVENT)
+def check_gevent_worker(app_configs, **kwargs):
+    """
+    Check that gevent workers are configured and patched so that nothing
+    blocks the hub (see core/backend/green.py).
+    """
+    import sys
+    from importlib.util import find_spec
+
+    from core.backend import green
+
+    if settings.GUNICORN_WORKER_CLASS != "gevent":
+        return []
+
+    if find_spec("gevent") is None:
+        return [
+            Error(
+                "GUNICORN_WORKER_CLASS is gevent but gevent is not installed",
+                hint="poetry add gevent (see the optional dependencies in pyproject.toml)",
+                id="gevent.E001",
+            )
+        ]
+
+    errors = []
+    if green.is_patched():
+        # In a gevent worker: everything imported before the patch keeps blocking primitives
+        import psycopg.waiting
+        from django.db import connections
+        from gevent.local import local
+
+        if getattr(psycopg.waiting, "wait_c", None) is psycopg.waiting.wait:
+            errors.append(
+                Error(
+                    "psycopg was imported before gevent monkey-patching and waits in C",
+                    hint="Call core.backend.green.patch() before anything imports psycopg or Django",
+                    id="gevent.E002",
+                )
+            )
+        storage = getattr(connections._connections, "_storage", None)
+        if storage is not None and not isinstance(storage, local):
+            errors.append(
+                Error(
+                    "Django was imported before gevent monkey-patching; greenlets share database connections",
+                    hint="Call core.backend.green.patch() before importing Django (boot.py and wsgi.py do)",
+                    id="gevent.E003",
+                )
+            )
+
+    for alias, database in settings.DATABASES.items():
+        if database["ENGINE"].endswith("postgresql") and not database.get("OPTIONS", {}).get("pool"):
+            errors.append(
+                Warning(
+                    f"Database '{alias}' has no connection pool under gevent",
+                    hint="Every request greenlet would open its own connection; set OPTIONS['pool'] "
+                    "(DB_POOL_MAX_SIZE) and CONN_MAX_AGE = 0",
+                    id="gevent.W001",
+                )
+            )
+
+    for alias, cache in settings.CACHES.items():
+        pool_class = cache.get("OPTIONS", {}).get("CONNECTION_POOL_CLASS")
+        if cache["BACKEND"].startswith("django_redis") and "Blocking" not in (pool_class or ""):
+            errors.append(
+                Warning(
+                    f"Cache '{alias}' uses a non-blocking Redis connection pool under gevent",
+                    hint="More requests than max_connections raise ConnectionError; use "
+                    "core.backend.middleware.deadline.DeadlineBlockingConnectionPool",
+                    id="gevent.W002",
+                )
+            )
+
+    for module, hint in GEVENT_UNSAFE_MODULES.items():
+        if module in sys.modules:
+            errors.append(Warning(f"{module} is not cooperative under gevent", hint=hint, id="gevent.W003"))
+
+    return errors
+
+
+# ==============================================================================
+# MIGRATIONS (run by `migrate` before it applies anything, see core/general/db/lint.py)
+# ==============================================================================
+
+MIGRATIONS = "migrations"
+
+
+@register(MIGRATIONS, Tags.database)
+def check_migration_locks(app_configs, databases=None, **kwargs):
+    """
+    Check that no pending migration takes a long lock on a large table:
+    CREATE INDEX without CONCURRENTLY, validating constraints, table rewrites.
+    """
+    from django.db import connections
+
+    from core.general.db.lint import check_migrations
+
+    if not databases or not settings.MIGRATION_LINT_ENABLED:
+        return []
+    errors = []
+    for alias in databases:
+        errors.extend(check_migrations(connections[alias]))
+    return errors
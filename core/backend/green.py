@@ -0,0 +1,68 @@
+"""
+Cooperative (gevent) worker mode.
+
+With GUNICORN_WORKER_CLASS=gevent, scripts/entrypoint.sh starts gevent
+workers that each serve up to GUNICORN_WORKER_CONNECTIONS requests
+concurrently, one greenlet per request: while one waits on PostgreSQL or
+Redis the others run. Sync workers stay the default; gevent pays off on
+endpoints that mostly wait on I/O, not on CPU-bound ones.
+
+For that to be safe, everything that blocks has to yield to the gevent hub:
+
+- The standard library is monkey-patched by patch() before Django is
+  imported: first thing in core.backend.boot (the gunicorn master, which
+  imports Django before forking) and in core.backend.wsgi. Anything imported
+  before the patch keeps real thread locals and blocking sockets, so Django's
+  connection handler would share one database connection between greenlets.
+- psycopg picks a gevent-friendly wait function when it's imported after the
+  patch; redis-py uses the patched socket module.
+- Database connections come from a psycopg pool capped at DB_POOL_MAX_SIZE per
+  worker instead of one persistent connection per greenlet (settings), and the
+  Redis pool blocks instead of failing when all its connections are busy.
+
+The `gevent` system checks (core/backend/checks.py) report a worker that
+wasn't patched early enough, and C extensions that block the hub.
+
+Nothing here imports Django: patch() must run before it.
+"""
+
+import importlib
+import os
+import sys
+
+WORKER_CLASS_ENV = "GUNICORN_WORKER_CLASS"
+
+
+def enabled():
+    return os.environ.get(WORKER_CLASS_ENV, "sync") == "gevent"
+
+
+def patch():
+    """Monkey-patch the standard library when running gevent workers. Returns whether it did."""
+    if not enabled():
+        return False
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise ImportError(
+            f"{WORKER_CLASS_ENV}=gevent requires gevent: uncomment gevent in pyproject.toml and `poetry install`"
+        ) from None
+
+    if not monkey.is_module_patched("socket"):
+        monkey.patch_all()
+    return True
+
+
+def is_patched(module="socket"):
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched(module)
+
+
+def native(module, name):
+    """
+    The unpatched `module.name` (e.g. `native("_thread", "start_new_thread")`),
+    for code that needs a real OS thread under gevent.
+    """
+    if is_patched(module):
+        return sys.modules["gevent.monkey"].get_original(module, name)
+    return getattr(importlib.import_module(module), name)
@@ -0,0 +1,205 @@
+"""
+WSGI handlers with a per-path middleware fast lane and middleware profiling.
+
+Django builds one middleware chain from settings.MIDDLEWARE. FastLaneWSGIHandler
+builds a second, reduced chain (MIDDLEWARE minus FAST_LANE_SKIP_MIDDLEWARE) and
+routes requests whose path starts with one of FAST_LANE_PATHS through it, so
+stateless endpoints such as /health/ skip sessions, CSRF, auth, messages and
+CORS entirely.
+
+With MIDDLEWARE_PROFILING enabled, a timing probe is inserted between every
+pair of middleware so each one's request phase (before it calls the next
+handler) and response phase (after it returns) are measured separately.
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler, get_path_info
+from django.utils.module_loading import import_string
+
+from core.backend.middleware.admission import ACCEPTED_AT
+
+logger = logging.getLogger(__name__)
+
+VIEW_LABEL = "view"
+
+
+class MiddlewareProfiler:
+    """
+    Collects per-middleware request/response phase timings.
+
+    Probes are numbered by depth: 0 wraps the view, 1 the innermost middleware
+    and so on outwards. Timings for one request are kept on the request
+    object; aggregates are kept per path and logged every `report_every`
+    requests.
+    """
+
+    def __init__(self, lane, report_every=500):
+        self.lane = lane
+        self.report_every = report_every
+        self.labels = {0: VIEW_LABEL}  # depth -> label, filled in while the chain is built
+        self.outer_depth = 0
+        self.requests = defaultdict(int)
+        # path -> label -> [request_seconds, response_seconds]
+        self.totals = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0]))
+
+    def probe(self, depth, label, get_response):
+        """Wrap the handler at `depth` in the chain."""
+        self.labels[depth] = label
+        self.outer_depth = max(self.outer_depth, depth)
+
+        def timed(request):
+            marks = request.__dict__.setdefault("_middleware_marks", {})
+            marks[depth] = [time.perf_counter(), None]
+            try:
+                return get_response(request)
+            finally:
+                marks[depth][1] = time.perf_counter()
+                if depth == self.outer_depth:
+                    self.record(request, marks)
+
+        return timed
+
+    def phases(self, marks):
+        """
+        Return [(label, request_seconds, response_seconds), ...] for one
+        request, outermost first. A middleware that short-circuits (never calls
+        the next handler) has all of its time attributed to the request phase.
+        """
+        result = []
+        for depth in range(self.outer_depth, -1, -1):
+            enter, leave = marks[depth]
+            inner = marks.get(depth - 1)
+            if inner is None:
+                result.append((self.labels[depth], leave - enter, 0.0))
+                break
+            result.append((self.labels[depth], inner[0] - enter, leave - inner[1]))
+        return result
+
+    def record(self, request, marks):
+        path = request.path_info
+        phases = self.phases(marks)
+        request.middleware_timings = phases
+
+        totals = self.totals[path]
+        for label, request_phase, response_phase in phases:
+            totals[label][0] += request_phase
+            totals[label][1] += response_phase
+        self.requests[path] += 1
+
+        if self.requests[path] % self.report_every == 0:
+            self.report(path)
+
+    def report(self, path):
+        count = self.requests[path]
+        lines = [f"Middleware timings for {path} ({self.lane} lane, {count} requests, mean ms request/response):"]
+        for label, (request_total, response_total) in self.totals[path].items():
+            lines.append(f"  {label:<60} {request_total / count * 1000:8.3f} {response_total / count * 1000:8.3f}")
+        logger.info("\n".join(lines))
+
+    def server_timing(self, request):
+        """Format the request's timings as a Server-Timing header value."""
+        entries = []
+        for index, (label, request_phase, response_phase) in enumerate(getattr(request, "middleware_timings", ())):
+            name = label.rsplit(".", 1)[-1]
+            entries.append(f'mw{index};desc="{name}";dur={request_phase * 1000:.3f}')
+            if response_phase:
+                entries.append(f'mw{index}r;desc="{name} response";dur={response_phase * 1000:.3f}')
+        return ", ".join(entries)
+
+
+class LaneHandler(WSGIHandler):
+    """
+    A WSGIHandler whose middleware chain is built from an explicit list of
+    middleware paths instead of settings.MIDDLEWARE.
+    """
+
+    def __init__(self, middleware, lane="full", profile=False):
+        self.middleware_paths = list(middleware)
+        self.lane = lane
+        self.profiler = MiddlewareProfiler(lane, settings.MIDDLEWARE_PROFILING_REPORT_EVERY) if profile else None
+        super().__init__()
+
+    def load_middleware(self, is_async=False):
+        """
+        Synchronous equivalent of BaseHandler.load_middleware() for an explicit
+        middleware list, with optional profiling probes between the links.
+        """
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response)
+        handler_is_async = False
+        depth = 0
+        if self.profiler:
+            handler = self.profiler.probe(depth, VIEW_LABEL, handler)
+
+        for middleware_path in reversed(self.middleware_paths):
+            middleware = import_string(middleware_path)
+            middleware_is_async = not getattr(middleware, "sync_capable", True)
+            try:
+                adapted_handler = self.adapt_method_mode(
+                    middleware_is_async,
+                    handler,
+                    handler_is_async,
+                    debug=settings.DEBUG,
+                    name=f"middleware {middleware_path}",
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed:
+                continue
+
+            if mw_instance is None:
+                raise ImproperlyConfigured(f"Middleware factory {middleware_path} returned None.")
+
+            if hasattr(mw_instance, "process_view"):
+                self._view_middleware.insert(0, self.adapt_method_mode(False, mw_instance.process_view))
+            if hasattr(mw_instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(False, mw_instance.process_template_response)
+                )
+            if hasattr(mw_instance, "process_exception"):
+                self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+            if self.profiler:
+                depth += 1
+                handler = self.profiler.probe(depth, middleware_path, handler)
+
+        self._middleware_chain = self.adapt_method_mode(False, handler, handler_is_async)
+
+    def get_response(self, request):
+        response = super().get_response(request)
+        if self.profiler:
+            response["Server-Timing"] = self.profiler.server_timing(request)
+        return response
+
+
+class FastLaneWSGIHandler(LaneHandler):
+    """
+    Route FAST_LANE_PATHS through a reduced middleware stack and everything
+    else through the full settings.MIDDLEWARE stack.
+    """
+
+    def __init__(self):
+        profile = settings.MIDDLEWARE_PROFILING
+        super().__init__(settings.MIDDLEWARE, lane="full", profile=profile)
+
+        self.fast_lane_paths = tuple(settings.FAST_LANE_PATHS)
+        skipped = set(settings.FAST_LANE_SKIP_MIDDLEWARE)
+        fast_middleware = [path for path in settings.MIDDLEWARE if path not in skipped]
+        self.fast_lane = LaneHandler(fast_middleware, lane="fast", profile=profile)
+
+    def __call__(self, environ, start_response):
+        # Gunicorn doesn't expose when it accepted the connection; this is the nearest (see admission.py)
+        environ.setdefault(ACCEPTED_AT, time.time())
+        if self.fast_lane_paths and get_path_info(environ).startswith(self.fast_lane_paths):
+            return self.fast_lane(environ, start_response)
+        return super().__call__(environ, start_response)
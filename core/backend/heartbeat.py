@@ -0,0 +1,164 @@
+"""
+Per-worker heartbeat files for the container health probe.
+
+Each gunicorn worker runs a daemon thread that atomically rewrites
+HEARTBEAT_DIR/<pid>.beat every HEARTBEAT_INTERVAL seconds with a single
+status line:
+
+    ok 1760000000 database=ok cache=ok inflight=0.0
+    stuck 1760000000 database=ok cache=ok inflight=75.2
+    fail 1760000000 database=error cache=ok inflight=0.0
+
+The database and cache are checked every HEARTBEAT_CHECK_INTERVAL seconds
+(the beats in between repeat the last results), over the thread's own
+persistent connection, recycled like request connections by CONN_MAX_AGE.
+
+`stuck` means a request has been running for longer than
+HEARTBEAT_STUCK_AFTER seconds. The beat thread keeps running while the worker
+is busy, so this is how a hung worker shows up. scripts/healthcheck.sh only
+has to stat() the files and read the first word, so probing costs no Python
+interpreter, no request to the app and no database connection.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+_heartbeat = None
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+
+def check_cache():
+    key = f"heartbeat:{os.getpid()}"
+    cache.set(key, "ok", 30)
+    if cache.get(key) != "ok":
+        raise RuntimeError("cache read-back mismatch")
+
+
+DEPENDENCY_CHECKS = {
+    "database": check_database,
+    "cache": check_cache,
+}
+
+
+class Heartbeat:
+    def __init__(self, directory, interval=10, stuck_after=60, checks=None, check_interval=None):
+        self.path = Path(directory) / f"{os.getpid()}.beat"
+        self.interval = interval
+        self.stuck_after = stuck_after
+        self.checks = DEPENDENCY_CHECKS if checks is None else checks
+        self.check_interval = interval if check_interval is None else check_interval
+        self._results = {}
+        self._next_check = 0.0
+        self._inflight = {}  # thread ident -> monotonic start time
+        self._stop = threading.Event()
+        self._thread = None
+
+    def request_started(self, **kwargs):
+        self._inflight[threading.get_ident()] = time.monotonic()
+
+    def request_finished(self, **kwargs):
+        self._inflight.pop(threading.get_ident(), None)
+
+    def oldest_inflight(self):
+        started = list(self._inflight.values())
+        return time.monotonic() - min(started) if started else 0.0
+
+    def check_dependencies(self):
+        """Run the dependency checks, or return the last results until HEARTBEAT_CHECK_INTERVAL has passed."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._results
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                check()
+                results[name] = "ok"
+            except Exception:
+                logger.warning("Heartbeat dependency check failed: %s", name, exc_info=True)
+                results[name] = "error"
+        self._results = results
+        self._next_check = now + self.check_interval
+        return results
+
+    def status_line(self):
+        results = self.check_dependencies()
+
+        inflight = self.oldest_inflight()
+        if any(result != "ok" for result in results.values()):
+            status = "fail"
+        elif inflight > self.stuck_after:
+            status = "stuck"
+        else:
+            status = "ok"
+
+        details = " ".join(f"{name}={result}" for name, result in results.items())
+        return f"{status} {int(time.time())} {details} inflight={inflight:.1f}\n"
+
+    def beat(self):
+        """Run the checks and atomically replace the heartbeat file."""
+        line = self.status_line()
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(line)
+        os.replace(tmp_path, self.path)
+        return line
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.beat()
+            except Exception:
+                logger.exception("Heartbeat failed")
+            finally:
+                # Keeps the thread's connection between beats, unless it's broken or past CONN_MAX_AGE
+                close_old_connections()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        request_started.connect(self.request_started, weak=False, dispatch_uid="heartbeat_request_started")
+        request_finished.connect(self.request_finished, weak=False, dispatch_uid="heartbeat_request_finished")
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        request_started.disconnect(dispatch_uid="heartbeat_request_started")
+        request_finished.disconnect(dispatch_uid="heartbeat_request_finished")
+        self.path.unlink(missing_ok=True)
+
+
+def start_heartbeat():
+    """
+    Start the heartbeat for this process if HEARTBEAT_ENABLED. Called from
+    wsgi.py, which gunicorn imports in every worker (no --preload).
+    """
+    global _heartbeat
+
+    if not settings.HEARTBEAT_ENABLED or _heartbeat is not None:
+        return _heartbeat
+
+    _heartbeat = Heartbeat(
+        settings.HEARTBEAT_DIR,
+        interval=settings.HEARTBEAT_INTERVAL,
+        stuck_after=settings.HEARTBEAT_STUCK_AFTER,
+        check_interval=settings.HEARTBEAT_CHECK_INTERVAL,
+    )
+    _heartbeat.start()
+    return _heartbeat
@@ -0,0 +1,104 @@
+"""
+Generate the IMAGE_VARIANTS of every image under MEDIA_ROOT (see core/general/variants.py).
+
+    python -m core.manage image_variants                     # the missing variants, resuming an interrupted run
+    python -m core.manage image_variants --prefix avatars/   # only uploads under avatars/
+    python -m core.manage image_variants --processes 8       # decode and encode in 8 processes
+    python -m core.manage image_variants --force             # rewrite existing variants
+    python -m core.manage image_variants --restart           # ignore the checkpoint, start over
+
+Originals are processed in name order and the last one done is checkpointed
+to MEDIA_ROOT/IMAGE_VARIANTS_DIR/.backfill-checkpoint, so an interrupted run
+picks up where it stopped; the checkpoint is removed once every image is done.
+Existing variants are skipped either way.
+"""
+
+import os
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.general.utils.images import get_pool, render_variants_safely
+from core.general.variants import is_image, variant_specs
+
+CHECKPOINT_EVERY = 50  # images
+
+
+class Command(BaseCommand):
+    help = "Generate the image variants of every upload under MEDIA_ROOT, resumably"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="", help="Only images whose name starts with PREFIX")
+        parser.add_argument(
+            "--processes", type=int, default=None, help="Worker processes (default: IMAGE_VARIANTS_PROCESSES)"
+        )
+        parser.add_argument("--force", action="store_true", help="Rewrite variants that already exist")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run")
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        checkpoint = os.path.join(root, settings.IMAGE_VARIANTS_DIR, ".backfill-checkpoint")
+        names = originals(root, options["prefix"])
+        after = None if options["restart"] else read_checkpoint(checkpoint)
+        if after is not None:
+            names = [name for name in names if name > after]
+            self.stdout.write(f"Resuming after {after}")
+
+        render = partial(
+            render_variants_safely,
+            specs=variant_specs(),
+            directory=settings.IMAGE_VARIANTS_DIR,
+            force=options["force"],
+            max_pixels=settings.IMAGE_VARIANTS_MAX_PIXELS,
+        )
+        paths = [os.path.join(root, name) for name in names]
+        processes = options["processes"] or settings.IMAGE_VARIANTS_PROCESSES
+        if processes == 1:
+            results = (render(path, root) for path in paths)
+        else:
+            results = get_pool(processes).map(render, paths, [root] * len(paths))
+
+        written = errors = 0
+        for done, (name, (_, variants, error)) in enumerate(zip(names, results, strict=True), 1):
+            if error:
+                errors += 1
+                self.stderr.write(self.style.ERROR(f"{name}: {error}"))
+            written += len(variants)
+            if done % CHECKPOINT_EVERY == 0:
+                write_checkpoint(checkpoint, name)
+                self.stdout.write(f"{done}/{len(names)} image(s), {written} variant(s) written")
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(f"{len(names)} image(s), {written} variant(s) written, {errors} error(s)")
+
+
+def originals(root, prefix=""):
+    """Names of the images under `root` (relative, sorted), leaving out the variants."""
+    names = []
+    for directory, subdirectories, files in os.walk(root):
+        relative = os.path.relpath(directory, root)
+        if relative == settings.IMAGE_VARIANTS_DIR:
+            subdirectories.clear()
+            continue
+        for file in files:
+            name = file if relative == "." else f"{relative}/{file}".replace(os.sep, "/")
+            if name.startswith(prefix) and is_image(name):
+                names.append(name)
+    return sorted(names)
+
+
+def read_checkpoint(path):
+    try:
+        with open(path) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_checkpoint(path, name):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w") as file:
+        file.write(name)
+    os.replace(f"{path}.tmp", path)
@@ -0,0 +1,36 @@
+"""
+Lint migrations for operations that lock a table while it serves traffic
+(see core/general/db/lint.py).
+
+    python -m core.manage lint_migrations            # the pending migrations, with table sizes
+    python -m core.manage lint_migrations --all      # every migration, as if each table held data (CI)
+    python -m core.manage lint_migrations --strict   # fail on warnings too
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.general.db.lint import lint
+
+
+class Command(BaseCommand):
+    help = "Report migration operations that would block reads or writes on a live database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to lint the pending migrations of")
+        parser.add_argument("--all", action="store_true", help="Lint every migration, not just the pending ones")
+        parser.add_argument("--strict", action="store_true", help="Exit with an error on warnings too")
+
+    def handle(self, *args, **options):
+        findings = lint(connections[options["database"]], all_migrations=options["all"])
+        messages = [finding.to_check_message(settings.MIGRATION_LINT_LARGE_TABLE_ROWS) for finding in findings]
+        for message in messages:
+            style = self.style.ERROR if message.is_serious() else self.style.WARNING
+            self.stdout.write(style(f"{message.id} {message.obj}: {message.msg}"))
+            self.stdout.write(f"    HINT: {message.hint}")
+
+        failures = [message for message in messages if options["strict"] or message.is_serious()]
+        if failures:
+            raise CommandError(f"{len(failures)} migration operation(s) would block a live database")
+        self.stdout.write(f"{len(messages)} warning(s)" if messages else "No blocking migration operations")
@@ -0,0 +1,67 @@
+"""
+Show the memory reports of running workers (see core/backend/memory.py).
+
+    python -m core.manage memory                  # RSS, baseline and growth per worker
+    python -m core.manage memory --growers 20     # and each worker's top growing allocation sites
+    python -m core.manage memory --json
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backend.memory import read_reports
+
+
+class Command(BaseCommand):
+    help = "Show per-worker RSS, growth over baseline and top growing allocation sites"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=None, help=f"Report directory (default: {settings.MEMORY_DIR})")
+        parser.add_argument("--growers", type=int, default=5, help="Top growers shown per worker (MEMORY_TRACEMALLOC)")
+        parser.add_argument("--json", action="store_true", help="Print the raw reports")
+
+    def handle(self, *args, **options):
+        reports = read_reports(options["dir"])
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2))
+            return
+        if not reports:
+            raise CommandError(f"No memory reports in {options['dir'] or settings.MEMORY_DIR}")
+
+        self.stdout.write(
+            f"{'pid':>8} {'requests':>9} {'rss':>9} {'baseline':>9} {'peak':>9} {'growth':>9} {'budget':>9}  status"
+        )
+        for report in reports:
+            self.stdout.write(
+                f"{report['pid']:>8} {report['requests']:>9} {mb(report['rss_mb'])} {mb(report['baseline_mb'])} "
+                f"{mb(report['peak_mb'])} {mb(report['growth_mb'])} {mb(report['budget_mb'])}  {status(report)}"
+            )
+
+        if options["growers"]:
+            for report in reports:
+                if not report["top_growers"]:
+                    continue
+                self.stdout.write(f"\nTop growers in {report['pid']} since its baseline:")
+                for grower in report["top_growers"][: options["growers"]]:
+                    self.stdout.write(
+                        f"  {grower['size_diff_kb']:>10.1f}KB {grower['count_diff']:>+9} blocks  {grower['site']}"
+                    )
+
+        total = sum(report["rss_mb"] or 0 for report in reports if not report["stale"])
+        self.stdout.write(f"\nTotal RSS of live workers: {total:.1f}MB")
+
+
+def mb(value):
+    return f"{'-':>9}" if value is None else f"{value:>7.1f}MB"
+
+
+def status(report):
+    if report["stale"]:
+        return "stale"
+    if report["recycling"]:
+        return "recycling"
+    if report["baseline_mb"] is None:
+        return "warming up"
+    return "ok"
@@ -0,0 +1,50 @@
+"""
+Django's `migrate`, made safe to run against a database that's serving traffic.
+
+- The `migrations` system check (core/general/db/lint.py) runs first, even
+  when called with skip_checks as boot.py's call_command("migrate") is: an
+  operation that would lock a large table stops the migration before anything
+  is applied.
+- On PostgreSQL, DDL waits at most MIGRATION_LOCK_TIMEOUT for its lock. A
+  statement queued behind a long-running query holds up every query queued
+  behind it, so it's better to give up and retry: applied migrations are
+  recorded, so a retry resumes with the one that timed out.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.commands import migrate
+from django.db import OperationalError, connections
+
+
+class Command(migrate.Command):
+    def handle(self, *args, **options):
+        database = options["database"]
+        if options["skip_checks"] and settings.MIGRATION_LINT_ENABLED:
+            self.check(databases=[database], tags=["migrations"])
+
+        connection = connections[database]
+        if connection.vendor != "postgresql" or not settings.MIGRATION_LOCK_TIMEOUT:
+            return super().handle(*args, **options)
+
+        for attempt in range(settings.MIGRATION_LOCK_RETRIES + 1):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('lock_timeout', %s, false)", [settings.MIGRATION_LOCK_TIMEOUT])
+            try:
+                return super().handle(*args, **options)
+            except OperationalError as exc:
+                if not is_lock_timeout(exc) or attempt == settings.MIGRATION_LOCK_RETRIES:
+                    raise
+                delay = settings.MIGRATION_LOCK_RETRY_DELAY * (attempt + 1)
+                self.stderr.write(f"Lock timeout ({exc.__cause__}), retrying in {delay:g}s...")
+                time.sleep(delay)
+            finally:
+                if connection.connection is not None and not connection.in_atomic_block:
+                    with connection.cursor() as cursor:
+                        cursor.execute("RESET lock_timeout")
+
+
+def is_lock_timeout(exc):
+    # psycopg.errors.LockNotAvailable
+    return getattr(exc.__cause__, "sqlstate", None) == "55P03"
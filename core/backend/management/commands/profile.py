@@ -0,0 +1,92 @@
+"""
+Take and combine sampling profiles (see core/backend/profiling.py).
+
+    python -m core.manage profile token                   # value for an X-Profile header
+    python -m core.manage profile workers                 # signal every worker with a heartbeat file
+    python -m core.manage profile workers --pids 12,13
+    python -m core.manage profile merge logs/profiles/*-worker.collapsed -o merged.collapsed
+    python -m core.manage profile merge logs/profiles -o merged.speedscope.json --format speedscope
+"""
+
+import os
+import signal
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backend.profiling import make_token, read_profile, write_collapsed, write_speedscope
+
+PROFILE_GLOBS = ("*.collapsed", "*.speedscope.json")
+
+
+class Command(BaseCommand):
+    help = "Create profiling tokens, profile gunicorn workers, merge profiles"
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest="subcommand", required=True)
+
+        token = subcommands.add_parser("token", help="Print a signed token for the X-Profile header")
+        token.add_argument("--label", default="cli")
+
+        workers = subcommands.add_parser("workers", help="Send PROFILING_SIGNAL to gunicorn workers")
+        workers.add_argument("--pids", help="Comma-separated PIDs (default: workers with a heartbeat file)")
+
+        merge = subcommands.add_parser("merge", help="Sum profiles into one")
+        merge.add_argument("paths", nargs="*", help=f"Profiles or directories (default: {settings.PROFILING_DIR})")
+        merge.add_argument("-o", "--output", required=True)
+        merge.add_argument("--format", choices=["collapsed", "speedscope"], default=None)
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['subcommand']}")(**options)
+
+    def handle_token(self, label, **options):
+        self.stdout.write(make_token(label))
+
+    def handle_workers(self, pids, **options):
+        if not settings.PROFILING_SIGNAL:
+            raise CommandError("PROFILING_SIGNAL is not set")
+        signum = getattr(signal, settings.PROFILING_SIGNAL)
+        if pids:
+            targets = [int(pid) for pid in pids.split(",")]
+        else:
+            # Only workers write heartbeat files, so the master never gets SIGUSR2
+            targets = sorted(int(path.stem) for path in Path(settings.HEARTBEAT_DIR).glob("*.beat"))
+        if not targets:
+            raise CommandError(f"No workers found in {settings.HEARTBEAT_DIR}, pass --pids")
+
+        for pid in targets:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                self.stderr.write(f"No process {pid}")
+            else:
+                self.stdout.write(f"Sent {settings.PROFILING_SIGNAL} to {pid}")
+        self.stdout.write(
+            f"Profiles are written to {settings.PROFILING_DIR} after {settings.PROFILING_SIGNAL_SECONDS}s "
+            "(signal again to stop early)"
+        )
+
+    def handle_merge(self, paths, output, format, **options):
+        files = []
+        for name in paths or [settings.PROFILING_DIR]:
+            path = Path(name)
+            if path.is_dir():
+                files.extend(sorted(match for pattern in PROFILE_GLOBS for match in path.glob(pattern)))
+            elif path.exists():
+                files.append(path)
+            else:
+                raise CommandError(f"No such profile: {name}")
+        if not files:
+            raise CommandError("No profiles to merge")
+
+        counts = Counter()
+        for path in files:
+            counts.update(read_profile(path))
+        fmt = format or ("speedscope" if output.endswith(".json") else "collapsed")
+        if fmt == "speedscope":
+            write_speedscope(counts, output, name=Path(output).name)
+        else:
+            write_collapsed(counts, output)
+        self.stdout.write(f"Merged {len(files)} profile(s), {counts.total()} samples, into {output}")
@@ -0,0 +1,112 @@
+"""
+Report the top statements from pg_stat_statements (see core/backend/querystats.py).
+
+    python -m core.manage query_report                      # top statements by total time, with call sites
+    python -m core.manage query_report --order mean --limit 10
+    python -m core.manage query_report --explain            # and index suggestions from their plans
+    python -m core.manage query_report --snapshot v42       # save the counters, at each deploy
+    python -m core.manage query_report --diff v41           # what got slower or is new since v41
+    python -m core.manage query_report --diff v41 v42       # between two snapshots
+    python -m core.manage query_report --create-extension   # CREATE EXTENSION pg_stat_statements
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.backend import querystats
+from core.backend.querystats import StatsUnavailable
+
+
+class Command(BaseCommand):
+    help = "Show the top statements from pg_stat_statements, index suggestions and regressions between snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument("--order", choices=sorted(querystats.ORDERS), default="total")
+        parser.add_argument("--limit", type=int, default=None, help="Statements shown (default: QUERY_REPORT_LIMIT)")
+        parser.add_argument("--explain", action="store_true", help="EXPLAIN the statements and suggest indexes")
+        parser.add_argument("--snapshot", metavar="NAME", help="Save the current counters as snapshot NAME")
+        parser.add_argument("--diff", nargs="+", metavar="NAME", help="Regressions since snapshot NAME [and NAME2]")
+        parser.add_argument("--create-extension", action="store_true", help="Create the pg_stat_statements extension")
+        parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        try:
+            if options["create_extension"]:
+                querystats.create_extension(connection)
+            if options["diff"] and len(options["diff"]) > 2:
+                raise CommandError("--diff takes one or two snapshot names")
+            if options["diff"] and len(options["diff"]) == 2:
+                current = querystats.load_snapshot(options["diff"][1])["statements"]
+            else:
+                current = querystats.read_statements(connection)
+        except (StatsUnavailable, FileNotFoundError, ValueError) as exc:
+            raise CommandError(exc) from exc
+
+        if options["snapshot"]:
+            path = querystats.save_snapshot(options["snapshot"], current)
+            self.stdout.write(f"Saved {len(current)} statement(s) to {path}")
+            return
+
+        if options["diff"]:
+            try:
+                before, after = querystats.windows(options["diff"][0], current)
+            except (StatsUnavailable, FileNotFoundError) as exc:
+                raise CommandError(exc) from exc
+            rows = querystats.regressions(before, after)[: options["limit"] or None]
+        else:
+            rows = querystats.top(current, options["order"], options["limit"])
+        if options["explain"]:
+            querystats.advise(connection, rows)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif options["diff"]:
+            self.write_regressions(rows)
+        else:
+            self.write_top(rows)
+
+    def write_top(self, rows):
+        self.stdout.write(f"{'total':>10} {'mean':>9} {'calls':>9} {'rows':>9} {'hit':>5}  call site / statement")
+        for row in rows:
+            hit = "-" if row["hit_ratio"] is None else f"{row['hit_ratio']:.0%}"
+            self.stdout.write(
+                f"{ms(row['total_ms']):>10} {ms(row['mean_ms']):>9} {row['calls']:>9} {row['rows']:>9} {hit:>5}  "
+                f"{site(row)}"
+            )
+            self.write_statement(row)
+
+    def write_regressions(self, rows):
+        if not rows:
+            self.stdout.write("No regressions")
+            return
+        self.stdout.write(f"{'before':>9} {'after':>9} {'change':>7} {'calls':>9}  call site / statement")
+        for row in rows:
+            before = "new" if row["before_ms"] is None else ms(row["before_ms"])
+            change = "" if row["change"] is None else f"x{row['change']:.1f}"
+            self.stdout.write(f"{before:>9} {ms(row['mean_ms']):>9} {change:>7} {row['calls']:>9}  {site(row)}")
+            self.write_statement(row)
+
+    def write_statement(self, row):
+        self.stdout.write(f"    {' '.join(querystats.TAG.sub('', row['query']).split())[:200]}")
+        for suggestion in row.get("suggestions") or ():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"    Seq scan of {suggestion['table']} (~{suggestion['rows']} rows) filtering "
+                    f"{suggestion['filter']}: {suggestion['sql']}"
+                )
+            )
+
+
+def ms(value):
+    return f"{value / 1000:.1f}s" if value >= 10_000 else f"{value:.1f}ms"
+
+
+def site(row):
+    if row["call_site"] is None:
+        return "-"
+    path, function = row["call_site"]
+    return f"{path} {function}()"
@@ -0,0 +1,246 @@
+"""
+Per-worker memory monitor: RSS tracking, tracemalloc diffs and recycling.
+
+Each gunicorn worker runs a daemon thread that samples its resident set size
+every MEMORY_SAMPLE_INTERVAL seconds and atomically rewrites
+MEMORY_DIR/<pid>.json with a report (current, baseline and peak RSS, recent
+samples, top growers). The baseline is taken after MEMORY_WARMUP_REQUESTS
+requests, once imports, connections and caches have settled, so growth is
+what the worker gained while serving traffic.
+
+With MEMORY_TRACEMALLOC, allocations are traced from start and every
+MEMORY_SNAPSHOT_INTERVAL seconds a snapshot is compared with the one taken
+at the baseline, grouped by allocation site (file:line). Tracing slows
+allocation-heavy code down and costs memory itself, so it is off by default:
+turn it on for the workers you're investigating.
+
+A worker that has grown by more than MEMORY_GROWTH_BUDGET MB sends itself
+SIGTERM, which a gunicorn worker handles by finishing its current request
+and exiting; the master starts a fresh one. That happens long before the
+cgroup OOM killer would take the worker down mid-request.
+
+`manage.py memory` and the staff-only /admin/memory/ page read the reports
+of every worker.
+"""
+
+import atexit
+import json
+import logging
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import request_finished
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_monitor = None
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # No procfs (macOS): the peak is the best we have; ru_maxrss is bytes there, KB on Linux
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def top_growers(snapshot, baseline, limit=10):
+    """The allocation sites that grew most between two tracemalloc snapshots."""
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ]
+    snapshot, baseline = snapshot.filter_traces(filters), baseline.filter_traces(filters)
+    growers = []
+    for stat in snapshot.compare_to(baseline, "lineno"):
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        growers.append(
+            {
+                "site": f"{frame.filename}:{frame.lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+            }
+        )
+        if len(growers) == limit:
+            break
+    return growers
+
+
+class MemoryMonitor:
+    def __init__(
+        self,
+        directory,
+        interval=30,
+        warmup_requests=50,
+        growth_budget=None,
+        trace=False,
+        snapshot_interval=300,
+        history=120,
+    ):
+        self.path = Path(directory) / f"{os.getpid()}.json"
+        self.interval = interval
+        self.warmup_requests = warmup_requests
+        self.growth_budget = growth_budget * MB if growth_budget else None
+        self.trace = trace
+        self.snapshot_interval = snapshot_interval
+        self.samples = deque(maxlen=history)  # (unix time, rss bytes)
+        self.started = time.time()
+        self.requests = 0
+        self.baseline = None  # RSS once warmed up
+        self.peak = 0
+        self.growers = []
+        self.recycling = False
+        self._baseline_snapshot = None
+        self._next_snapshot = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def request_finished(self, **kwargs):
+        self.requests += 1
+
+    @property
+    def growth(self):
+        if self.baseline is None or not self.samples:
+            return 0
+        return self.samples[-1][1] - self.baseline
+
+    def sample(self):
+        """Record the RSS, take tracemalloc snapshots when due, recycle when over budget."""
+        rss = current_rss()
+        now = time.monotonic()
+        self.samples.append((int(time.time()), rss))
+        self.peak = max(self.peak, rss)
+
+        if self.baseline is None:
+            if self.requests < self.warmup_requests:
+                return
+            self.baseline = rss
+            if self.trace and tracemalloc.is_tracing():
+                self._baseline_snapshot = tracemalloc.take_snapshot()
+                self._next_snapshot = now + self.snapshot_interval
+        elif self._baseline_snapshot is not None and now >= self._next_snapshot:
+            self.growers = top_growers(tracemalloc.take_snapshot(), self._baseline_snapshot)
+            self._next_snapshot = now + self.snapshot_interval
+
+        if self.growth_budget and self.growth > self.growth_budget and not self.recycling:
+            self.recycle()
+
+    def recycle(self):
+        self.recycling = True
+        logger.warning(
+            "Worker %d grew %.1fMB over its %.1fMB baseline after %d requests (budget %.1fMB), recycling",
+            os.getpid(),
+            self.growth / MB,
+            self.baseline / MB,
+            self.requests,
+            self.growth_budget / MB,
+        )
+        if self.growers:
+            logger.warning("Top growers: %s", ", ".join(f"{g['site']} +{g['size_diff_kb']}KB" for g in self.growers))
+        # Gunicorn workers stop accepting, finish the request in progress and exit on SIGTERM.
+        # Anything else (runserver, shell) would just die, so only log there.
+        if "gunicorn.workers.base" in sys.modules:
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    def report(self):
+        return {
+            "pid": os.getpid(),
+            "updated": int(time.time()),
+            "started": int(self.started),
+            "requests": self.requests,
+            "rss_mb": round(self.samples[-1][1] / MB, 1) if self.samples else None,
+            "baseline_mb": None if self.baseline is None else round(self.baseline / MB, 1),
+            "peak_mb": round(self.peak / MB, 1),
+            "growth_mb": round(self.growth / MB, 1),
+            "budget_mb": None if self.growth_budget is None else round(self.growth_budget / MB, 1),
+            "recycling": self.recycling,
+            "tracing": self._baseline_snapshot is not None,
+            "top_growers": self.growers,
+            "samples": [[at, round(rss / MB, 1)] for at, rss in self.samples],
+        }
+
+    def write(self):
+        """Sample and atomically replace the report file."""
+        self.sample()
+        report = self.report()
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(report))
+        os.replace(tmp_path, self.path)
+        return report
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.write()
+            except Exception:
+                logger.exception("Memory monitor failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(settings.MEMORY_TRACEMALLOC_FRAMES)
+        request_finished.connect(self.request_finished, weak=False, dispatch_uid="memory_request_finished")
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        request_finished.disconnect(dispatch_uid="memory_request_finished")
+        self.path.unlink(missing_ok=True)
+
+
+def read_reports(directory=None):
+    """Every worker's latest report, with `stale` set for workers that stopped updating theirs."""
+    directory = Path(directory or settings.MEMORY_DIR)
+    stale_after = 3 * settings.MEMORY_SAMPLE_INTERVAL
+    reports = []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        report["stale"] = time.time() - report["updated"] > stale_after
+        reports.append(report)
+    return reports
+
+
+def start_memory_monitor():
+    """
+    Start the memory monitor for this process if MEMORY_MONITOR_ENABLED.
+    Called from wsgi.py, which gunicorn imports in every worker (no --preload).
+    """
+    global _monitor
+
+    if not settings.MEMORY_MONITOR_ENABLED or _monitor is not None:
+        return _monitor
+
+    _monitor = MemoryMonitor(
+        settings.MEMORY_DIR,
+        interval=settings.MEMORY_SAMPLE_INTERVAL,
+        warmup_requests=settings.MEMORY_WARMUP_REQUESTS,
+        growth_budget=settings.MEMORY_GROWTH_BUDGET,
+        trace=settings.MEMORY_TRACEMALLOC,
+        snapshot_interval=settings.MEMORY_SNAPSHOT_INTERVAL,
+    )
+    _monitor.start()
+    return _monitor
@@ -0,0 +1 @@
+"""Project middleware (see MIDDLEWARE in core/backend/settings/base.py)."""
@@ -0,0 +1,214 @@
+"""
+Admission control: shed load with 503 + Retry-After before the backlog grows.
+
+With sync gunicorn workers an overloaded server doesn't refuse work, it
+queues connections in the listen backlog. Every request then waits longer
+than the last, most of them past the client's or GUNICORN_TIMEOUT's
+patience, and /health/ starts failing. AdmissionMiddleware sits first in
+the chain and answers requests it can't serve in time with a cheap 503,
+which drains the backlog instead of adding to it.
+
+Signals, per request:
+
+- queue time: how long the request waited before a worker picked it up,
+  from the X-Request-Start / X-Queue-Start header set by the proxy
+  (nginx `t=${msec}`, Heroku/ALB style milliseconds or microseconds).
+  Clients can send these headers too, so they're only read with
+  ADMISSION_TRUST_QUEUE_HEADER, when the proxy overwrites them. Otherwise
+  queue time runs from the accept time: when the WSGI handler received
+  the request (ACCEPTED_AT in the environ, see core.backend.handlers).
+  That only sees the wait inside a gevent worker, between accepting a
+  connection and a greenlet getting to run it.
+- load: requests in flight in this process plus the backlog implied by the
+  queue time (queue time / mean service time, Little's law).
+
+The admission limit is AIMD: every admitted request that waited longer than
+ADMISSION_TARGET_QUEUE_TIME cuts it by 10% (at most once per target
+interval, so one burst doesn't collapse it), every other admitted request
+raises it by 1/limit. Shed requests leave it alone, so a flood of them
+can't pin it at the minimum. A request is shed when its load exceeds the limit, or a
+fraction (ADMISSION_LOW_PRIORITY_SHARE) of it for ADMISSION_LOW_PRIORITY_PATHS,
+so low-priority traffic goes first. Requests that already waited
+ADMISSION_MAX_QUEUE_TIME are shed regardless: their client has most likely
+given up. ADMISSION_ALWAYS_ADMIT_PATHS (health probes) are never shed.
+
+A sync worker accepts a connection only when it's free, so the backlog
+waits in the kernel's listen queue, before the accept time: queue time is
+~0 and in-flight requests at most 1, and the limit is never reached. With
+sync workers the middleware therefore needs ADMISSION_TRUST_QUEUE_HEADER and
+a proxy that sets X-Request-Start; without them it disables itself (and
+`check --deploy` warns, performance.W007).
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+QUEUE_TIME_HEADERS = ("HTTP_X_REQUEST_START", "HTTP_X_QUEUE_START")
+ACCEPTED_AT = "core.accepted_at"  # environ key: time.time() when the WSGI handler received the request
+
+ALWAYS, NORMAL, LOW = "always", "normal", "low"
+
+
+def parse_request_start(value, now=None):
+    """
+    Seconds since the proxy received the request, from an X-Request-Start
+    value: `t=1760000000.123` (seconds) or a bare number in seconds,
+    milliseconds or microseconds. None if the value can't be parsed.
+    """
+    try:
+        started = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1_000_000
+    elif started > 1e11:
+        started /= 1000
+    now = time.time() if now is None else now
+    return max(now - started, 0.0)  # proxies' clocks can be slightly ahead
+
+
+def queue_time_observable():
+    """Whether this deployment can see queue time: a trusted proxy header, or gevent workers."""
+    return settings.ADMISSION_TRUST_QUEUE_HEADER or settings.GUNICORN_WORKER_CLASS == "gevent"
+
+
+class AdaptiveLimit:
+    """
+    AIMD admission limit shared by the threads of one process.
+
+    `load(queue_time)` is in-flight requests plus the backlog ahead of a
+    request that waited `queue_time`, in units of mean service time.
+    """
+
+    backoff = 0.9
+    smoothing = 0.1  # weight of the newest sample in the service time average
+
+    def __init__(self, initial, minimum, maximum, target_queue_time):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_queue_time = target_queue_time
+        self.inflight = 0
+        self.service_time = target_queue_time  # seconds, until measured
+        self.lock = threading.Lock()
+        self._next_decrease = 0.0
+
+    def load(self, queue_time):
+        return self.inflight + 1 + queue_time / self.service_time
+
+    def observe(self, queue_time):
+        """Adjust the limit from one request's queue time."""
+        if queue_time > self.target_queue_time:
+            now = time.monotonic()
+            if now >= self._next_decrease:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._next_decrease = now + self.target_queue_time
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def acquire(self, queue_time, share=1.0):
+        """Admit a request (True) or not (False); only admitted requests update the limit."""
+        with self.lock:
+            if self.load(queue_time) > self.limit * share:
+                return False
+            self.observe(queue_time)
+            self.inflight += 1
+            return True
+
+    def release(self, duration):
+        with self.lock:
+            self.inflight -= 1
+            self.service_time += self.smoothing * (max(duration, 1e-4) - self.service_time)
+
+
+class AdmissionMiddleware:
+    log_interval = 10.0  # seconds between "shed N requests" warnings
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL_ENABLED or not queue_time_observable():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.limit = AdaptiveLimit(
+            initial=settings.ADMISSION_INITIAL_LIMIT,
+            minimum=settings.ADMISSION_MIN_LIMIT,
+            maximum=settings.ADMISSION_MAX_LIMIT,
+            target_queue_time=settings.ADMISSION_TARGET_QUEUE_TIME,
+        )
+        self.max_queue_time = settings.ADMISSION_MAX_QUEUE_TIME
+        self.always_admit_paths = tuple(settings.ADMISSION_ALWAYS_ADMIT_PATHS)
+        self.low_priority_paths = tuple(settings.ADMISSION_LOW_PRIORITY_PATHS)
+        self.low_priority_share = settings.ADMISSION_LOW_PRIORITY_SHARE
+        self.retry_after = settings.ADMISSION_RETRY_AFTER
+        self.trust_queue_header = settings.ADMISSION_TRUST_QUEUE_HEADER
+        self.shed = 0
+        self._next_log = 0.0
+
+    def __call__(self, request):
+        priority = self.priority(request)
+        if priority == ALWAYS:
+            return self.get_response(request)
+
+        queue_time = self.queue_time(request)
+        share = self.low_priority_share if priority == LOW else 1.0
+        if queue_time > self.max_queue_time or not self.limit.acquire(queue_time, share):
+            return self.reject(request, queue_time)
+
+        started = time.monotonic()
+        try:
+            return self.get_response(request)
+        finally:
+            self.limit.release(time.monotonic() - started)
+
+    def priority(self, request):
+        path = request.path_info
+        if path.startswith(self.always_admit_paths):
+            return ALWAYS
+        if self.low_priority_paths and path.startswith(self.low_priority_paths):
+            return LOW
+        return NORMAL
+
+    def queue_time(self, request):
+        if self.trust_queue_header:
+            for header in QUEUE_TIME_HEADERS:
+                value = request.META.get(header)
+                if value:
+                    queue_time = parse_request_start(value)
+                    if queue_time is not None:
+                        return queue_time
+        accepted_at = request.META.get(ACCEPTED_AT)
+        if accepted_at is None:  # not served by core.backend.handlers (test client, ASGI)
+            return 0.0
+        return max(time.time() - accepted_at, 0.0)
+
+    def reject(self, request, queue_time):
+        self.shed += 1
+        now = time.monotonic()
+        if now >= self._next_log:
+            logger.warning(
+                "Admission control shed %d request(s), last %s after %.3fs queued (limit %.1f, in flight %d)",
+                self.shed,
+                request.path_info,
+                queue_time,
+                self.limit.limit,
+                self.limit.inflight,
+            )
+            self.shed = 0
+            self._next_log = now + self.log_interval
+
+        response = JsonResponse(
+            {
+                "error": "Service overloaded",
+                "detail": "The server is busy. Please try again later.",
+            },
+            status=503,
+        )
+        response["Retry-After"] = str(self.retry_after)
+        response._has_been_logged = True  # summarised above, not one django.request error per shed request
+        return response
@@ -0,0 +1,142 @@
+"""
+Declarative HTTP caching headers for the CDN / proxy in front of the app.
+
+A view's policy comes from the @cache_policy decorator, else from the
+longest CACHE_CONTROL_POLICIES prefix matching the request path:
+
+    @cache_policy(max_age=60, s_maxage=600, keys=["pages"])
+    def home_view(request):
+        ...
+
+    CACHE_CONTROL_POLICIES = {"/api/schema/": {"max_age": 300, "s_maxage": 3600, "keys": ["api-docs"]}}
+
+Options: `max_age` (browsers), `s_maxage` (shared caches, defaults to
+max_age), `stale_while_revalidate`, `stale_if_error` (seconds), `keys`
+(surrogate keys) and `private` (browsers only). A cacheable GET/HEAD response
+gets:
+
+    Cache-Control: public, max-age=60, s-maxage=600, stale-while-revalidate=30
+    Surrogate-Control: max-age=600, stale-while-revalidate=30
+    Surrogate-Key: pages blog.article/42
+
+The edge (Fastly, Akamai, Varnish with a few lines of VCL) reads and strips
+Surrogate-Control, so it can keep a page much longer than browsers do and
+serve it without reaching gunicorn; a purge (core/backend/purge.py) evicts
+it when the data behind it changes.
+Views add keys for what they render with add_surrogate_keys(request, article).
+
+Only shared responses are cached at the edge: when the response sets a
+cookie or varies on Cookie (it used the session, e.g. for request.user or
+a CSRF token), it's marked `private` and gets no surrogate headers. Responses
+that set their own Cache-Control, error responses other than 404/410 and
+other methods are left alone.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import has_vary_header
+
+from core.backend.purge import surrogate_key
+
+CACHEABLE_STATUS_CODES = {200, 203, 300, 301, 308, 404, 410}
+POLICY_OPTIONS = {"max_age", "s_maxage", "stale_while_revalidate", "stale_if_error", "keys", "private"}
+
+
+def cache_policy(**policy):
+    """Cache a view's responses according to `policy`, overriding CACHE_CONTROL_POLICIES."""
+    unknown = set(policy) - POLICY_OPTIONS
+    if unknown:
+        raise TypeError(f"Unknown cache policy option(s): {', '.join(sorted(unknown))}")
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            return view_func(*args, **kwargs)
+
+        wrapper.cache_policy = policy
+        return wrapper
+
+    return decorator
+
+
+def add_surrogate_keys(request, *objs):
+    """Tag the response to `request` with the surrogate keys of model instances or classes, or plain strings."""
+    keys = getattr(request, "surrogate_keys", None)
+    if keys is None:
+        keys = request.surrogate_keys = []
+    keys.extend(obj if isinstance(obj, str) else surrogate_key(obj) for obj in objs)
+
+
+def cache_control_header(policy, shared):
+    directives = ["public" if shared else "private", f"max-age={policy.get('max_age', 0)}"]
+    if shared:
+        directives.append(f"s-maxage={policy.get('s_maxage', policy.get('max_age', 0))}")
+    directives.extend(stale_directives(policy))
+    return ", ".join(directives)
+
+
+def stale_directives(policy):
+    return [
+        f"{name.replace('_', '-')}={policy[name]}"
+        for name in ("stale_while_revalidate", "stale_if_error")
+        if policy.get(name) is not None
+    ]
+
+
+class CacheControlMiddleware:
+    """Sets Cache-Control, Surrogate-Control and Surrogate-Key from the view's policy, see the module docstring."""
+
+    def __init__(self, get_response):
+        if not settings.CACHE_CONTROL_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.policies = sorted(settings.CACHE_CONTROL_POLICIES.items(), key=lambda item: len(item[0]), reverse=True)
+        for prefix, policy in self.policies:
+            unknown = set(policy) - POLICY_OPTIONS
+            if unknown:
+                raise TypeError(f"Unknown option(s) in CACHE_CONTROL_POLICIES[{prefix!r}]: {', '.join(unknown)}")
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        policy = getattr(view_func, "cache_policy", None)
+        if policy is not None:
+            request.cache_policy = policy
+
+    def policy_for(self, request):
+        policy = getattr(request, "cache_policy", None)
+        if policy is not None:
+            return policy
+        for prefix, policy in self.policies:
+            if request.path_info.startswith(prefix):
+                return policy
+        return None
+
+    def process_response(self, request, response):
+        if (
+            request.method not in ("GET", "HEAD")
+            or response.status_code not in CACHEABLE_STATUS_CODES
+            or response.has_header("Cache-Control")
+        ):
+            return response
+        policy = self.policy_for(request)
+        if policy is None:
+            return response
+
+        sets_cookie = response.cookies or response.has_header("Set-Cookie")
+        shared = not (policy.get("private") or sets_cookie or has_vary_header(response, "Cookie"))
+        response["Cache-Control"] = cache_control_header(policy, shared)
+        if not shared:
+            return response
+
+        response["Surrogate-Control"] = ", ".join(
+            [f"max-age={policy.get('s_maxage', policy.get('max_age', 0))}", *stale_directives(policy)]
+        )
+        keys = [*policy.get("keys", ()), *getattr(request, "surrogate_keys", ())]
+        if keys:
+            response["Surrogate-Key"] = " ".join(dict.fromkeys(keys))
+        return response
@@ -0,0 +1,347 @@
+"""
+Dynamic response compression (brotli, zstd, gzip) and conditional GET.
+
+CompressionMiddleware replaces Django's GZipMiddleware and
+ConditionalGetMiddleware for responses produced by views (WhiteNoise answers
+static file requests with pre-compressed files before they get here):
+
+1. GET/HEAD responses get a weak ETag computed from the uncompressed body
+   (unless the view set one or sent Cache-Control: no-store), and
+   If-None-Match / If-Modified-Since are answered with a 304 before any
+   compression work is done.
+2. The encoding is negotiated from Accept-Encoding (q-values honoured) in
+   COMPRESSION_ENCODINGS preference order, limited to the codecs installed:
+   gzip always, br with the `brotli` package, zstd with `zstandard`.
+   Levels come from COMPRESSION_LEVELS and are tuned for speed, not ratio.
+3. Bodies under COMPRESSION_MIN_SIZE, content types that don't compress,
+   responses that already have a Content-Encoding or Cache-Control:
+   no-transform are left alone. Streaming responses are compressed chunk by
+   chunk, flushing after each chunk so clients keep receiving data.
+
+BREACH: when a compressed response contains both a secret and text an
+attacker controls, the secret can be recovered from response sizes. Django
+masks the CSRF token per response, other secrets on authenticated pages are
+not. Compression is skipped for views decorated with @compress_exempt, paths
+under COMPRESSION_EXCLUDE_PATHS and, with COMPRESSION_BREACH_GUARD, HTML
+responses to requests that carry both a session cookie and user input (a
+query string or a request body).
+
+COMPRESSION_METRICS_HOOK is the dotted path of a callable(request, stats)
+called with a CompressionStats after each compressed response; for streaming
+responses once the stream has been consumed.
+"""
+
+import hashlib
+import logging
+import re
+import time
+import zlib
+from functools import lru_cache, wraps
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.utils.cache import cc_delim_re, get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.utils.module_loading import import_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_CONTENT_TYPE = re.compile(
+    r"^(text/|application/(json|javascript|xml|x-ndjson|[\w.-]+\+(json|xml))|image/svg\+xml)", re.IGNORECASE
+)
+# Event streams are read as they arrive; compression buffers break that in proxies
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class CompressionStats(NamedTuple):
+    encoding: str
+    original_bytes: int
+    compressed_bytes: int
+    cpu_seconds: float  # thread CPU time spent compressing
+    streaming: bool
+
+    @property
+    def saved_bytes(self):
+        return self.original_bytes - self.compressed_bytes
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level, mode=brotli.MODE_TEXT)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+COMPRESSORS = {
+    "br": BrotliCompressor if brotli else None,
+    "zstd": ZstdCompressor if zstandard else None,
+    "gzip": GzipCompressor,
+}
+
+
+def available_encodings(encodings):
+    """Filter `encodings` down to the ones whose codec is installed, keeping their order."""
+    unknown = set(encodings) - set(COMPRESSORS)
+    if unknown:
+        raise ImproperlyConfigured(f"Unknown COMPRESSION_ENCODINGS: {', '.join(sorted(unknown))}")
+    return tuple(encoding for encoding in encodings if COMPRESSORS[encoding])
+
+
+def parse_accept_encoding(header):
+    """Return {coding: q} for an Accept-Encoding header value."""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+@lru_cache(maxsize=256)
+def negotiate(header, encodings):
+    """
+    Pick the encoding to use for an Accept-Encoding `header`: the one with the
+    highest q-value, ties broken by the order of `encodings`. None if the
+    client accepts none of them.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_exempt(view_func):
+    """Mark a view's responses as never compressed (e.g. pages mixing secrets and reflected input)."""
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        return view_func(*args, **kwargs)
+
+    wrapper.compress_exempt = True
+    return wrapper
+
+
+def log_stats(request, stats):
+    """A COMPRESSION_METRICS_HOOK that logs every compressed response at DEBUG level."""
+    logger.debug(
+        "%s %s: %s %d -> %d bytes (%.2f ms CPU)",
+        request.method,
+        request.path,
+        stats.encoding,
+        stats.original_bytes,
+        stats.compressed_bytes,
+        stats.cpu_seconds * 1000,
+    )
+
+
+class CompressionMiddleware:
+    """Conditional GET followed by negotiated compression, see the module docstring."""
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.encodings = available_encodings(settings.COMPRESSION_ENCODINGS)
+        missing = [encoding for encoding in self.encodings if encoding not in settings.COMPRESSION_LEVELS]
+        if missing:
+            raise ImproperlyConfigured(f"COMPRESSION_LEVELS has no level for: {', '.join(missing)}")
+        self.levels = settings.COMPRESSION_LEVELS
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.exclude_paths = tuple(settings.COMPRESSION_EXCLUDE_PATHS)
+        self.breach_guard = settings.COMPRESSION_BREACH_GUARD
+        hook = settings.COMPRESSION_METRICS_HOOK
+        self.metrics_hook = import_string(hook) if hook else None
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, "compress_exempt", False):
+            request.compress_exempt = True
+
+    def process_response(self, request, response):
+        if request.method in ("GET", "HEAD"):
+            response = self.conditional_response(request, response)
+        if not self.is_compressible(request, response):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            self.compress_streaming(request, response, encoding)
+        elif not self.compress_content(request, response, encoding):
+            return response
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # The compressed body differs byte for byte from the identity one
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def conditional_response(self, request, response):
+        """ConditionalGetMiddleware, with a weak ETag so it holds for every encoding."""
+        if response.status_code == 200 and not response.streaming and not response.has_header("ETag"):
+            no_store = any(part.lower() == "no-store" for part in cc_delim_re.split(response.get("Cache-Control", "")))
+            if response.content and not no_store:
+                response.headers["ETag"] = "W/" + quote_etag(
+                    hashlib.md5(response.content, usedforsecurity=False).hexdigest()
+                )
+
+        etag = response.get("ETag")
+        last_modified = response.get("Last-Modified")
+        last_modified = last_modified and parse_http_date_safe(last_modified)
+        if etag or last_modified:
+            return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+        return response
+
+    def is_compressible(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return False
+        if not response.streaming and len(response.content) < self.min_size:
+            return False
+
+        content_type = response.get("Content-Type", "")
+        if not COMPRESSIBLE_CONTENT_TYPE.match(content_type) or content_type.startswith(UNCOMPRESSED_CONTENT_TYPES):
+            return False
+        if "no-transform" in response.get("Cache-Control", "").lower():
+            return False
+
+        if getattr(request, "compress_exempt", False) or request.path_info.startswith(self.exclude_paths):
+            return False
+        return not (self.breach_guard and self.reflects_input_with_secrets(request, content_type))
+
+    def reflects_input_with_secrets(self, request, content_type):
+        """HTML for a logged-in session that may echo attacker-controlled input."""
+        if not content_type.startswith("text/html"):
+            return False
+        has_input = bool(request.META.get("QUERY_STRING")) or request.method not in ("GET", "HEAD")
+        return has_input and settings.SESSION_COOKIE_NAME in request.COOKIES
+
+    def compress_content(self, request, response, encoding):
+        """Compress a regular response in place; False if it wasn't worth it."""
+        content = response.content
+        started = time.thread_time()
+        compressor = COMPRESSORS[encoding](self.levels[encoding])
+        compressed = compressor.compress(content) + compressor.finish()
+        cpu_seconds = time.thread_time() - started
+
+        if len(compressed) >= len(content):
+            return False
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        self.report(request, CompressionStats(encoding, len(content), len(compressed), cpu_seconds, False))
+        return True
+
+    def compress_streaming(self, request, response, encoding):
+        content = response.streaming_content
+        compressor = COMPRESSORS[encoding](self.levels[encoding])
+        stats = {"original": 0, "compressed": 0, "cpu": 0.0}
+
+        def process(chunk):
+            started = time.thread_time()
+            data = compressor.compress(chunk) + compressor.flush()
+            stats["cpu"] += time.thread_time() - started
+            stats["original"] += len(chunk)
+            stats["compressed"] += len(data)
+            return data
+
+        def finish():
+            data = compressor.finish()
+            stats["compressed"] += len(data)
+            self.report(
+                request, CompressionStats(encoding, stats["original"], stats["compressed"], stats["cpu"], True)
+            )
+            return data
+
+        if response.is_async:
+
+            async def compressed_content():
+                async for chunk in content:
+                    if data := process(chunk):
+                        yield data
+                yield finish()
+
+        else:
+
+            def compressed_content():
+                for chunk in content:
+                    if data := process(chunk):
+                        yield data
+                yield finish()
+
+        response.streaming_content = compressed_content()
+        # The compressed length isn't known until the stream has been sent
+        response.headers.pop("Content-Length", None)
+
+    def report(self, request, stats):
+        if self.metrics_hook is None:
+            return
+        try:
+            self.metrics_hook(request, stats)
+        except Exception:
+            logger.exception("COMPRESSION_METRICS_HOOK failed")
@@ -0,0 +1,242 @@
+"""
+Request deadlines, enforced in PostgreSQL and Redis.
+
+Gunicorn's --timeout SIGKILLs a worker that takes too long, but PostgreSQL
+keeps running the query the worker was waiting for, and a cache call made
+with 1s of budget left still waits for the full SOCKET_TIMEOUT. A
+DeadlineMiddleware request instead gets a deadline (REQUEST_DEADLINE seconds,
+REQUEST_DEADLINE_PATHS per path prefix, or @request_deadline(seconds) per
+view) that the layers below honour:
+
+- PostgreSQL: before a query, the time remaining is set as the
+  statement_timeout: `SET LOCAL` on the transaction (ATOMIC_REQUESTS), or
+  `SET` for the session in autocommit mode, reset when the request ends.
+  It's set once per transaction and again only when the value in force
+  would overshoot the deadline by more than 10% (at least 100ms), so most
+  requests pay one extra statement. PostgreSQL cancels the query itself
+  when the deadline passes.
+- Redis: with DeadlineConnectionPool (or DeadlineBlockingConnectionPool)
+  as the django-redis CONNECTION_POOL_CLASS, reads wait at most the time
+  remaining instead of SOCKET_TIMEOUT.
+- Anything else: call check() in long loops, or use remaining().
+
+A request whose view fails after its deadline has passed (a cancelled
+query, a cache timeout, DeadlineExceeded) gets a 504. The deadline covers
+the view and middleware, not the iteration of streaming responses.
+"""
+
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import cache, wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import JsonResponse
+from redis.connection import BlockingConnectionPool, Connection, ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+_deadline = ContextVar("request_deadline", default=None)  # time.monotonic() value
+
+IDLE = 0  # psycopg.pq.TransactionStatus.IDLE: no transaction open
+INERROR = 3  # psycopg.pq.TransactionStatus.INERROR: failed transaction, only ROLLBACK works
+QUERY_CANCELED = "57014"
+
+
+class DeadlineExceeded(Exception):
+    """The current request's deadline has passed."""
+
+
+def remaining():
+    """Seconds left before the current deadline (negative once passed), or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check():
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded by {-left:.3f}s")
+
+
+@contextmanager
+def deadline(seconds):
+    """Run the block with a deadline `seconds` from now, or the enclosing one if that is sooner."""
+    new = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(new if current is None else min(current, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_deadline(seconds):
+    """View decorator: give requests to this view `seconds` instead of REQUEST_DEADLINE."""
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            return view_func(*args, **kwargs)
+
+        wrapper.request_deadline = seconds
+        return wrapper
+
+    return decorator
+
+
+class StatementTimeout:
+    """
+    connection.execute_wrapper() that keeps PostgreSQL's statement_timeout
+    at the time remaining before the deadline.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.local = None  # ms, SET LOCAL in the open transaction
+        self.session = None  # ms, SET for the session (autocommit), reset after the request
+
+    def __call__(self, execute, sql, params, many, context):
+        left = remaining()
+        if left is not None:
+            if left <= 0:
+                raise DeadlineExceeded(f"Deadline exceeded by {-left:.3f}s before query")
+            self.apply(max(int(left * 1000), 1))  # 0 would disable the timeout
+        return execute(sql, params, many, context)
+
+    def apply(self, timeout):
+        pgconn = self.connection.connection
+        status = pgconn.info.transaction_status
+        if status == INERROR:
+            return
+        autocommit = self.connection.get_autocommit()
+        if autocommit:
+            in_force = self.session
+        else:
+            if status == IDLE:
+                self.local = None  # the query is about to open a new transaction
+            in_force = self.session if self.local is None else self.local
+        if in_force is not None and in_force - timeout <= max(100, timeout // 10):
+            return
+
+        # On the driver connection: going through a Django cursor would recurse into this wrapper
+        if autocommit:
+            pgconn.execute(f"SET statement_timeout = {timeout}")
+            self.session = timeout
+        else:
+            pgconn.execute(f"SET LOCAL statement_timeout = {timeout}")
+            self.local = timeout
+
+    def reset(self):
+        if self.session is not None and self.connection.connection is not None and self.connection.is_usable():
+            self.connection.connection.execute("RESET statement_timeout")
+
+
+class DeadlineConnectionMixin:
+    """Redis connection whose reads wait no longer than the current deadline allows."""
+
+    def send_command(self, *args, **kwargs):
+        check()
+        return super().send_command(*args, **kwargs)
+
+    def read_response(self, *args, **kwargs):
+        left = remaining()
+        if left is None or self._sock is None or (self.socket_timeout and left >= self.socket_timeout):
+            return super().read_response(*args, **kwargs)
+        self._sock.settimeout(max(left, 0.001))
+        try:
+            return super().read_response(*args, **kwargs)
+        finally:
+            if self._sock is not None:
+                self._sock.settimeout(self.socket_timeout)
+
+
+@cache
+def deadline_aware(connection_class):
+    return type(f"Deadline{connection_class.__name__}", (DeadlineConnectionMixin, connection_class), {})
+
+
+class DeadlineConnectionPool(ConnectionPool):
+    """
+    django-redis CONNECTION_POOL_CLASS applying DeadlineConnectionMixin to
+    the connection class chosen from the URL (TCP, TLS or Unix socket).
+    """
+
+    def __init__(self, connection_class=Connection, **kwargs):
+        super().__init__(connection_class=deadline_aware(connection_class), **kwargs)
+
+
+class DeadlineBlockingConnectionPool(BlockingConnectionPool):
+    """
+    DeadlineConnectionPool that waits (up to its `timeout`) for a free
+    connection instead of raising when all are in use. For gevent workers,
+    where many more requests than max_connections can be in flight.
+    """
+
+    def __init__(self, connection_class=Connection, **kwargs):
+        super().__init__(connection_class=deadline_aware(connection_class), **kwargs)
+
+
+class DeadlineMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_DEADLINE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.default = settings.REQUEST_DEADLINE
+        # Longest prefix first, so /api/exports/ wins over /api/
+        self.paths = sorted(settings.REQUEST_DEADLINE_PATHS.items(), key=lambda item: -len(item[0]))
+
+    def __call__(self, request):
+        request.deadline_started = time.monotonic()
+        token = _deadline.set(request.deadline_started + self.budget(request.path_info))
+        try:
+            with ExitStack() as stack:
+                timeouts = []
+                for connection in connections.all():
+                    if connection.vendor == "postgresql":
+                        timeouts.append(StatementTimeout(connection))
+                        stack.enter_context(connection.execute_wrapper(timeouts[-1]))
+                try:
+                    return self.get_response(request)
+                finally:
+                    for timeout in timeouts:
+                        timeout.reset()
+        finally:
+            _deadline.reset(token)
+
+    def budget(self, path):
+        for prefix, seconds in self.paths:
+            if path.startswith(prefix):
+                return seconds
+        return self.default
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        seconds = getattr(view_func, "request_deadline", None)
+        if seconds is not None:
+            _deadline.set(request.deadline_started + seconds)
+
+    def process_exception(self, request, exception):
+        left = remaining()
+        if not isinstance(exception, DeadlineExceeded) and (left is None or left > 0):
+            return None
+        cancelled = getattr(exception.__cause__, "sqlstate", None) == QUERY_CANCELED
+        logger.warning(
+            "Deadline exceeded: %s %s after %.3fs (%s)",
+            request.method,
+            request.path_info,
+            time.monotonic() - request.deadline_started,
+            "query cancelled" if cancelled else exception.__class__.__name__,
+        )
+        response = JsonResponse(
+            {
+                "error": "Deadline exceeded",
+                "detail": "The request took too long to process.",
+            },
+            status=504,
+        )
+        response._has_been_logged = True  # logged above
+        return response
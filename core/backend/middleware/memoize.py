@@ -0,0 +1,33 @@
+"""
+Request-scoped memoization: every request gets a fresh store for
+@request_cached functions, dropped when the response is returned
+(see core/general/utils/memoize.py).
+
+Works for sync and async views. The store covers the middleware below this
+one and the view, not the iteration of streaming responses.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from core.general.utils.memoize import request_scope
+
+
+class RequestCacheMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with request_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_scope():
+            return await self.get_response(request)
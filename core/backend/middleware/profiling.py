@@ -0,0 +1,56 @@
+"""
+Per-request sampling profiles, for staff.
+
+A request carrying a valid signed token, in the `X-Profile` header or the
+PROFILING_COOKIE set by the /admin/profiling/ toggle, is profiled by a
+Sampler watching the request's thread (see core/backend/profiling.py). The
+response's X-Profile header names the file written to PROFILING_DIR.
+Other requests pay one header and one cookie lookup.
+
+    curl -H "X-Profile: $(python -m core.manage profile token)" https://example.com/api/items/
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core.backend.green import native
+from core.backend.profiling import Sampler, check_token, write_profile
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie = settings.PROFILING_COOKIE
+        self.get_ident = native("_thread", "get_ident")  # the OS thread, also under gevent
+
+    def __call__(self, request):
+        token = request.META.get("HTTP_X_PROFILE") or request.COOKIES.get(self.cookie)
+        if not token or not check_token(token):
+            return self.get_response(request)
+
+        sampler = Sampler(thread_ids={self.get_ident()}).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            counts = sampler.stop()
+        try:
+            path = write_profile(counts, f"{request.method} {request.path_info}")
+        except OSError:
+            logger.exception("Writing the profile of %s %s failed", request.method, request.path_info)
+            return response
+        logger.info(
+            "Profiled %s %s: %d samples over %.3fs, %s",
+            request.method,
+            request.path_info,
+            sampler.samples,
+            sampler.elapsed,
+            path,
+        )
+        response["X-Profile"] = path.name
+        return response
@@ -0,0 +1,269 @@
+"""
+On-demand sampling profiler for live workers.
+
+A Sampler thread wakes every PROFILING_INTERVAL seconds, takes the stacks of
+the threads it watches from sys._current_frames() and counts identical
+stacks. Nothing runs, and nothing is hooked into the interpreter, unless a
+profile is being taken, so the profiler costs nothing when idle and a few
+percent of one core while sampling (the profiled code is never traced).
+
+Profiles are taken:
+
+- per request, by ProfilingMiddleware, for requests carrying a signed
+  token (`X-Profile` header, or the cookie set by the staff-only
+  /admin/profiling/ toggle); the response's X-Profile header names the file;
+- per worker, for PROFILING_SIGNAL_SECONDS, when the worker receives
+  PROFILING_SIGNAL (SIGUSR2 by default; send it to workers, never to the
+  gunicorn master, which upgrades its binary on SIGUSR2). A second signal
+  stops the profile early. `manage.py profile workers` signals every worker
+  that has a heartbeat file.
+
+Profiles are written to PROFILING_DIR as collapsed stacks
+(`frame;frame;frame count` per line, for flamegraph.pl, speedscope, etc.)
+or as speedscope JSON, per PROFILING_FORMAT. `manage.py profile merge`
+sums profiles from several workers into one.
+"""
+
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+from core.backend.green import native
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = "core.backend.profiling"
+FRAME_RE = re.compile(r"^(?P<name>.*) \((?P<file>.*):(?P<line>\d+)\)$")
+
+_signal_profile = None
+
+
+@lru_cache(maxsize=4096)
+def frame_label(code):
+    """`function (path:line)` for a code object, with paths relative to the project or site-packages."""
+    filename = code.co_filename
+    for prefix in (str(settings.BASE_DIR), *sys.path[1:]):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1 :]
+            break
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse(frame, root=None):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    if root:
+        labels.append(root)
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """
+    Sample the stacks of `thread_ids` (all other threads if None) every
+    `interval` seconds, from start() until stop() or `duration` seconds, and
+    call `on_finish(sampler)` from the sampling thread when done.
+
+    The sampling thread is a real OS thread even in gevent workers, where a
+    greenlet would only run when the code being profiled yields.
+    """
+
+    def __init__(self, interval=None, thread_ids=None, duration=None, on_finish=None):
+        self.interval = interval or settings.PROFILING_INTERVAL
+        self.thread_ids = thread_ids
+        self.duration = duration
+        self.on_finish = on_finish
+        self.counts = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self.ident = None
+        self._stopped = False
+        self._done = native("_thread", "allocate_lock")()
+
+    def sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()} if self.thread_ids is None else {}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.ident:
+                continue
+            if self.thread_ids is None:
+                self.counts[collapse(frame, root=names.get(thread_id, str(thread_id)))] += 1
+            elif thread_id in self.thread_ids:
+                self.counts[collapse(frame)] += 1
+        self.samples += 1
+
+    def _run(self):
+        sleep = native("time", "sleep")
+        deadline = None if self.duration is None else self.started + self.duration
+        try:
+            while not self._stopped:
+                sleep(self.interval)
+                if self._stopped:
+                    break
+                self.sample()
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+            self.elapsed = time.monotonic() - self.started
+            if self.on_finish is not None:
+                self.on_finish(self)
+        finally:
+            self._done.release()
+
+    def start(self):
+        self.started = time.monotonic()
+        self._done.acquire()
+        self.ident = native("_thread", "start_new_thread")(self._run, ())
+        return self
+
+    def stop(self):
+        self._stopped = True
+        return self.join()
+
+    def join(self):
+        with self._done:
+            return self.counts
+
+
+def profile_path(label, fmt=None):
+    fmt = fmt or settings.PROFILING_FORMAT
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-")[:60] or "profile"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    suffix = ".speedscope.json" if fmt == "speedscope" else ".collapsed"
+    return Path(settings.PROFILING_DIR) / f"{stamp}-{os.getpid()}-{slug}{suffix}"
+
+
+def write_collapsed(counts, path):
+    lines = [f"{stack} {count}\n" for stack, count in counts.most_common()]
+    Path(path).write_text("".join(lines))
+
+
+def write_speedscope(counts, path, name="profile"):
+    """Write `counts` as a speedscope "sampled" profile, weighted by sample count."""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in counts.most_common():
+        sample = []
+        for label in stack.split(";"):
+            if label not in index:
+                index[label] = len(frames)
+                match = FRAME_RE.match(label)
+                frame = {"name": label}
+                if match:
+                    frame = {"name": match["name"], "file": match["file"], "line": int(match["line"])}
+                frames.append(frame)
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(count)
+    document = {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "core.backend.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+    Path(path).write_text(json.dumps(document))
+
+
+def write_profile(counts, label, fmt=None):
+    """Write `counts` to a new file in PROFILING_DIR and return its path."""
+    fmt = fmt or settings.PROFILING_FORMAT
+    path = profile_path(label, fmt)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "speedscope":
+        write_speedscope(counts, path, name=label)
+    else:
+        write_collapsed(counts, path)
+    return path
+
+
+def read_profile(path):
+    """Read a collapsed-stack or speedscope file back into a Counter of stacks."""
+    path = Path(path)
+    counts = Counter()
+    if path.name.endswith(".json"):
+        document = json.loads(path.read_text())
+        frames = [
+            f"{frame['name']} ({frame['file']}:{frame['line']})" if "file" in frame else frame["name"]
+            for frame in document["shared"]["frames"]
+        ]
+        for profile in document["profiles"]:
+            for sample, weight in zip(profile["samples"], profile["weights"], strict=True):
+                counts[";".join(frames[index] for index in sample)] += int(weight)
+        return counts
+
+    for line in path.read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            counts[stack] += int(count)
+    return counts
+
+
+def make_token(label="staff"):
+    """A signed token enabling per-request profiling, valid for PROFILING_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(label)
+
+
+def check_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def toggle_signal_profile(signum=None, frame=None):
+    """Signal handler: profile every thread of this worker, or stop the running profile early."""
+    global _signal_profile
+
+    if _signal_profile is not None:
+        # Don't wait here: the sampler writes the file, and the handler interrupted the worker mid-request
+        _signal_profile._stopped = True
+        return
+    _signal_profile = Sampler(duration=settings.PROFILING_SIGNAL_SECONDS, on_finish=_finish_signal_profile).start()
+
+
+def _finish_signal_profile(sampler):
+    global _signal_profile
+
+    try:
+        path = write_profile(sampler.counts, "worker")
+        logger.info("Wrote worker profile %s (%d samples over %.1fs)", path, sampler.samples, sampler.elapsed)
+    except Exception:
+        logger.exception("Writing the worker profile failed")
+    finally:
+        _signal_profile = None
+
+
+def install_signal_handler():
+    """
+    Profile the worker on PROFILING_SIGNAL. Called from wsgi.py, which
+    gunicorn imports in every worker's main thread.
+    """
+    if not settings.PROFILING_ENABLED or not settings.PROFILING_SIGNAL:
+        return
+    try:
+        signal.signal(getattr(signal, settings.PROFILING_SIGNAL), toggle_signal_profile)
+    except ValueError:
+        logger.debug("Not in the main thread, profiling signal handler not installed")
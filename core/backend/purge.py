@@ -0,0 +1,176 @@
+"""
+Surrogate-key purges for the HTTP cache in front of the app (CDN, Varnish).
+
+Responses are tagged with a `Surrogate-Key` header by CacheControlMiddleware
+(core/backend/middleware/cache_control.py). A purge evicts every cached
+response carrying one of the purged keys:
+
+    from core.backend.purge import purge, surrogate_key
+
+    purge(surrogate_key(article), "home")  # after the transaction commits
+
+surrogate_key() names a model ("blog.article") or an instance
+("blog.article/42"). The models in CACHE_PURGE_MODELS purge both keys of an
+instance on post_save and post_delete; call track(Model) for others.
+
+Keys purged in a transaction are collected and sent once, after it commits.
+With CACHE_PURGE_QUEUE set, they're sent by a background task on that queue
+(core.tasks), retried if the purger fails; otherwise right away, in the
+committing thread.
+
+CACHE_PURGER picks where purges go:
+
+- LocalPurger keeps purged keys in `LocalPurger.purged`, for development and tests.
+- HTTPPurger sends one request per purge to a URL, with the keys in a header:
+  a local stand-in, or a proxy of your own.
+- VarnishPurger sends `PURGE` with an `xkey-purge` header to every Varnish
+  node, for the xkey vmod (copy `Surrogate-Key` into `xkey` in vcl_backend_response).
+- FastlyPurger calls Fastly's batch surrogate-key purge API.
+"""
+
+import json
+import logging
+import urllib.request
+from functools import cache, partial
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from core.tasks import task
+
+logger = logging.getLogger(__name__)
+
+
+def surrogate_key(obj):
+    """The surrogate key of a model class ("app.model") or of an instance ("app.model/pk")."""
+    label = obj._meta.label_lower
+    if isinstance(obj, type):
+        return label
+    return f"{label}/{obj.pk}"
+
+
+class Purger:
+    """Sends purges to an HTTP cache. Subclasses implement purge_keys()."""
+
+    def purge_keys(self, keys):
+        raise NotImplementedError
+
+
+class LocalPurger(Purger):
+    """Records purged keys in memory instead of sending them anywhere."""
+
+    purged = []  # one list of keys per purge, shared like django.core.mail.outbox
+
+    def purge_keys(self, keys):
+        logger.debug("Purging surrogate keys: %s", " ".join(keys))
+        LocalPurger.purged.append(list(keys))
+
+
+class HTTPPurger(Purger):
+    """Sends `method` requests to every URL in `urls`, with the keys space-separated in `header`."""
+
+    method = "POST"
+    header = "Surrogate-Key"
+
+    def __init__(self, urls, method=None, header=None, timeout=5.0, max_keys=256):
+        self.urls = [urls] if isinstance(urls, str) else list(urls)
+        self.method = method or self.method
+        self.header = header or self.header
+        self.timeout = timeout
+        self.max_keys = max_keys  # per request: proxies limit header sizes
+
+    def purge_keys(self, keys):
+        for start in range(0, len(keys), self.max_keys):
+            batch = " ".join(keys[start : start + self.max_keys])
+            for url in self.urls:
+                self.send(urllib.request.Request(url, method=self.method, headers={self.header: batch}))
+
+    def send(self, request):
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class VarnishPurger(HTTPPurger):
+    method = "PURGE"
+    header = "xkey-purge"
+
+
+class FastlyPurger(HTTPPurger):
+    """Fastly's batch surrogate-key purge; `soft` marks content stale instead of evicting it."""
+
+    API_URL = "https://api.fastly.com/service/{service_id}/purge"
+
+    def __init__(self, service_id, api_token, soft=True, timeout=5.0):
+        super().__init__(self.API_URL.format(service_id=service_id), timeout=timeout, max_keys=256)
+        self.api_token = api_token
+        self.soft = soft
+
+    def purge_keys(self, keys):
+        headers = {"Fastly-Key": self.api_token, "Content-Type": "application/json", "Accept": "application/json"}
+        if self.soft:
+            headers["Fastly-Soft-Purge"] = "1"
+        for start in range(0, len(keys), self.max_keys):
+            body = json.dumps({"surrogate_keys": keys[start : start + self.max_keys]}).encode()
+            self.send(urllib.request.Request(self.urls[0], data=body, method="POST", headers=headers))
+
+
+@cache
+def get_purger():
+    config = settings.CACHE_PURGER
+    return import_string(config["BACKEND"])(**config.get("OPTIONS", {}))
+
+
+def _pending_keys(using):
+    """Keys purged in the open transaction on `using`, sent by the first of its on_commit callbacks."""
+    connection = connections[using]
+    pending = getattr(connection, "cache_purge_pending", None)
+    if pending is None or (pending and not connection.in_atomic_block):
+        pending = connection.cache_purge_pending = set()  # sent or rolled back since
+    return pending
+
+
+def purge(*keys, using=DEFAULT_DB_ALIAS):
+    """Purge responses tagged with any of `keys`, once the transaction on `using` commits."""
+    _pending_keys(using).update(keys)
+    transaction.on_commit(partial(_committed, using), using=using)
+
+
+def _committed(using):
+    pending = connections[using].cache_purge_pending
+    keys = sorted(pending)
+    pending.clear()
+    if not keys:
+        return
+    if settings.CACHE_PURGE_QUEUE:
+        send_purge.enqueue([keys], queue=settings.CACHE_PURGE_QUEUE)
+        return
+    try:
+        send_purge(keys)
+    except Exception:
+        logger.exception("Purging %d surrogate key(s) failed", len(keys))
+
+
+@task(max_attempts=5, retry_backoff=10, atomic=False)
+def send_purge(keys):
+    get_purger().purge_keys(keys)
+    logger.info("Purged %d surrogate key(s)", len(keys))
+
+
+def _saved_or_deleted(sender, instance, using, **kwargs):
+    purge(surrogate_key(sender), surrogate_key(instance), using=using)
+
+
+def track(model):
+    """Purge a model's keys, and its instance's, whenever an instance is saved or deleted."""
+    uid = f"cache_purge:{model._meta.label}"
+    post_save.connect(_saved_or_deleted, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_saved_or_deleted, sender=model, weak=False, dispatch_uid=uid)
+
+
+def install():
+    """Track CACHE_PURGE_MODELS. Called from the backend AppConfig.ready()."""
+    for label in settings.CACHE_PURGE_MODELS:
+        track(apps.get_model(label))
@@ -0,0 +1,341 @@
+"""
+Query report from pg_stat_statements: top statements, their call sites,
+index suggestions and regressions between deploys.
+
+docker-compose.yaml preloads pg_stat_statements, which aggregates every
+statement PostgreSQL runs by fingerprint (queryid): calls, total and mean
+execution time, rows and buffer hits. `manage.py query_report` and the
+staff-only /admin/queries/ page show the top statements by total or mean time.
+
+Call sites: with QUERY_TAGGING_ENABLED, an execute wrapper appends the first
+project frame that ran the query as a comment:
+
+    SELECT ... FROM "tasks_task" WHERE ... /*file='core/tasks/worker.py:88',func='claim'*/
+
+PostgreSQL ignores comments when fingerprinting, so the statement text it keeps
+(and the report shows) carries the call site of its first execution; the same
+query run from elsewhere is counted under that one.
+
+Index suggestions: EXPLAIN (GENERIC_PLAN, PostgreSQL 16+, for statements with
+$n parameters) shows the plan without running the statement. A sequential scan
+with a filter on a table of QUERY_REPORT_SEQ_SCAN_ROWS rows or more, on columns
+no index starts with, suggests an index on them (add it with
+core.general.db.operations.AddIndexConcurrently).
+
+Regressions: the counters are cumulative, so a snapshot taken at each deploy
+(`query_report --snapshot <release>`, written to QUERY_SNAPSHOT_DIR) marks the
+end of a release's window. `query_report --diff <release>` compares the window
+that ended at that snapshot with the one since: statements whose mean time grew
+by QUERY_REPORT_REGRESSION_RATIO or more, and statements that are new.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from functools import cache
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.backends.signals import connection_created
+
+from core.general.db.lint import RowEstimates
+
+STATEMENTS_SQL = """
+    SELECT queryid, query, calls, total_exec_time, rows, shared_blks_hit, shared_blks_read
+    FROM pg_stat_statements
+    WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database()) AND queryid IS NOT NULL
+"""
+COUNTERS = ("calls", "total_ms", "rows", "blks_hit", "blks_read")
+ORDERS = {"total": "total_ms", "mean": "mean_ms", "calls": "calls"}
+
+TAG = re.compile(r"/\*file='(?P<file>[^']*)',func='(?P<func>[^']*)'\*/\s*$")
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+
+
+class StatsUnavailable(Exception):
+    """pg_stat_statements can't be read from this database."""
+
+
+# ==============================================================================
+# Call-site tagging
+# ==============================================================================
+
+
+@cache
+def in_project(filename):
+    root = f"{settings.BASE_DIR}{os.sep}"
+    return filename.startswith(root) and "site-packages" not in filename and filename != __file__
+
+
+def call_site():
+    """The innermost project frame on the stack, as a query comment; None if there's none."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if in_project(filename):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f"/*file='{path}:{frame.f_lineno}',func='{frame.f_code.co_name}'*/"
+        frame = frame.f_back
+    return None
+
+
+def tag_queries(execute, sql, params, many, context):
+    """connection.execute_wrapper() appending the call site, see the module docstring."""
+    site = call_site()
+    if site is not None and "%" not in site:
+        sql = f"{sql} {site}"
+    return execute(sql, params, many, context)
+
+
+def _tag_connection(sender, connection, **kwargs):
+    if connection.vendor == "postgresql" and tag_queries not in connection.execute_wrappers:
+        # First: execute_wrapper() context managers open around this pop the last wrapper on exit
+        connection.execute_wrappers.insert(0, tag_queries)
+
+
+def install():
+    """Tag queries if QUERY_TAGGING_ENABLED. Called from the backend AppConfig.ready()."""
+    if settings.QUERY_TAGGING_ENABLED:
+        connection_created.connect(_tag_connection, dispatch_uid="querystats:tag")
+
+
+def parse_call_site(query):
+    """The (file:line, function) tag of a statement's text, or None."""
+    match = TAG.search(query)
+    return (match["file"], match["func"]) if match else None
+
+
+# ==============================================================================
+# Statements and snapshots
+# ==============================================================================
+
+
+def create_extension(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_stat_statements")
+
+
+def read_statements(connection):
+    """The pg_stat_statements counters of the current database, by queryid."""
+    if connection.vendor != "postgresql":
+        raise StatsUnavailable(f"pg_stat_statements needs PostgreSQL, not {connection.vendor}")
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('pg_stat_statements') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            raise StatsUnavailable(
+                "The pg_stat_statements extension isn't installed: "
+                "run `manage.py query_report --create-extension` (needs shared_preload_libraries=pg_stat_statements)"
+            )
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(STATEMENTS_SQL)
+                rows = cursor.fetchall()
+        except DatabaseError as exc:  # e.g. loaded by CREATE EXTENSION but not preloaded
+            raise StatsUnavailable(str(exc).strip()) from exc
+    return {
+        str(queryid): {
+            "queryid": str(queryid),
+            "query": query,
+            "calls": calls,
+            "total_ms": total_ms,
+            "rows": rows_,
+            "blks_hit": blks_hit,
+            "blks_read": blks_read,
+        }
+        for queryid, query, calls, total_ms, rows_, blks_hit, blks_read in rows
+    }
+
+
+def with_means(statements):
+    """The statements as a list, with `mean_ms`, `hit_ratio` and `call_site` filled in."""
+    rows = []
+    for statement in statements.values():
+        calls, hit, read = statement["calls"], statement["blks_hit"], statement["blks_read"]
+        rows.append(
+            {
+                **statement,
+                "mean_ms": statement["total_ms"] / calls if calls else 0.0,
+                "hit_ratio": hit / (hit + read) if hit + read else None,
+                "call_site": parse_call_site(statement["query"]),
+            }
+        )
+    return rows
+
+
+def top(statements, order="total", limit=None):
+    """The `limit` statements with the highest total time, mean time or calls."""
+    key = ORDERS[order]
+    rows = sorted(with_means(statements), key=lambda row: row[key], reverse=True)
+    return rows[: limit or settings.QUERY_REPORT_LIMIT]
+
+
+def snapshot_path(name, directory=None):
+    if not re.fullmatch(r"[\w.-]+", name):
+        raise ValueError(f"Invalid snapshot name: {name!r}")
+    return Path(directory or settings.QUERY_SNAPSHOT_DIR) / f"{name}.json"
+
+
+def save_snapshot(name, statements, directory=None):
+    path = snapshot_path(name, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"name": name, "taken_at": time.time(), "statements": statements}))
+    os.replace(tmp, path)
+    return path
+
+
+def load_snapshot(name, directory=None):
+    return json.loads(snapshot_path(name, directory).read_text())
+
+
+def list_snapshots(directory=None):
+    """Every snapshot's name and time, oldest first."""
+    snapshots = []
+    for path in Path(directory or settings.QUERY_SNAPSHOT_DIR).glob("*.json"):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        snapshots.append({"name": snapshot["name"], "taken_at": snapshot["taken_at"]})
+    return sorted(snapshots, key=lambda snapshot: snapshot["taken_at"])
+
+
+def delta(after, before):
+    """The counters accumulated between two readings; a statement whose counters dropped was reset."""
+    window = {}
+    for queryid, statement in after.items():
+        previous = before.get(queryid)
+        if previous is not None and previous["calls"] <= statement["calls"]:
+            statement = {**statement, **{name: statement[name] - previous[name] for name in COUNTERS}}
+        if statement["calls"]:
+            window[queryid] = statement
+    return window
+
+
+def windows(name, current, directory=None):
+    """
+    The statements of the window that ended at snapshot `name` (since the
+    snapshot before it, or since the counters were reset) and of the window
+    from `name` to `current` (another snapshot's statements, or live ones).
+    """
+    snapshots = list_snapshots(directory)
+    names = [snapshot["name"] for snapshot in snapshots]
+    if name not in names:
+        raise StatsUnavailable(f"No snapshot named {name!r} in {directory or settings.QUERY_SNAPSHOT_DIR}")
+    ended = load_snapshot(name, directory)["statements"]
+    index = names.index(name)
+    earlier = load_snapshot(names[index - 1], directory)["statements"] if index else {}
+    return delta(ended, earlier), delta(current, ended)
+
+
+def regressions(before, after, ratio=None, min_calls=None):
+    """
+    Statements of `after` whose mean time grew by `ratio`, worst first, then
+    the new ones (or those that ran fewer than `min_calls` times before).
+    """
+    ratio = ratio or settings.QUERY_REPORT_REGRESSION_RATIO
+    min_calls = settings.QUERY_REPORT_MIN_CALLS if min_calls is None else min_calls
+    previous = {row["queryid"]: row for row in with_means(before)}
+    found = []
+    for row in with_means(after):
+        if row["calls"] < min_calls:
+            continue
+        old = previous.get(row["queryid"])
+        if old is None or old["calls"] < min_calls:
+            found.append({**row, "before_ms": None, "change": None})
+        elif row["mean_ms"] >= old["mean_ms"] * ratio:
+            found.append({**row, "before_ms": old["mean_ms"], "change": row["mean_ms"] / max(old["mean_ms"], 1e-6)})
+    # Slowdowns by the time they added, then new statements by their total time
+    return sorted(
+        found,
+        key=lambda row: (row["change"] is None, -(row["total_ms"] - row["calls"] * (row["before_ms"] or 0))),
+    )
+
+
+# ==============================================================================
+# Index suggestions
+# ==============================================================================
+
+
+def explain(connection, query):
+    """The JSON plan of `query` without running it, or None when it can't be explained."""
+    has_params = re.search(r"\$\d+", query) is not None
+    if not EXPLAINABLE.match(query) or (has_params and connection.pg_version < 160000):
+        return None
+    options = "FORMAT JSON, GENERIC_PLAN" if has_params else "FORMAT JSON"
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN ({options}) {query}")
+            plan = cursor.fetchone()[0]
+    except DatabaseError:
+        return None  # e.g. a temporary table or a statement that needs its parameters' types
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+class TableInfo:
+    """Row estimates, columns and index leading columns of tables, looked up once."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = RowEstimates(connection)
+        self._columns = {}
+
+    def columns(self, table):
+        """(column names, leading columns of the table's indexes)."""
+        if table not in self._columns:
+            with self.connection.cursor() as cursor:
+                introspection = self.connection.introspection
+                names = [column.name for column in introspection.get_table_description(cursor, table)]
+                constraints = introspection.get_constraints(cursor, table)
+            leading = {info["columns"][0] for info in constraints.values() if info["index"] and info["columns"]}
+            self._columns[table] = (names, leading)
+        return self._columns[table]
+
+
+def suggest_indexes(plan, tables, min_rows=None):
+    """Index suggestions for the filtered sequential scans of large tables in `plan`."""
+    min_rows = settings.QUERY_REPORT_SEQ_SCAN_ROWS if min_rows is None else min_rows
+    suggestions = []
+    for node in plan_nodes(plan):
+        if node.get("Node Type") != "Seq Scan" or "Filter" not in node:
+            continue
+        table = node["Relation Name"]
+        rows = tables.rows[table]
+        if rows is None or rows < min_rows:
+            continue
+        names, leading = tables.columns(table)
+        words = re.findall(r"\b\w+\b", re.sub(r"'(?:[^']|'')*'", "", node["Filter"]))  # identifiers, not literals
+        columns = list(dict.fromkeys(word for word in words if word in names))
+        if not columns or columns[0] in leading:
+            continue
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        suggestions.append(
+            {
+                "table": table,
+                "columns": columns,
+                "rows": rows,
+                "filter": node["Filter"],
+                "sql": f'CREATE INDEX CONCURRENTLY ON "{table}" ({quoted})',
+            }
+        )
+    return suggestions
+
+
+def advise(connection, statements):
+    """Attach `suggestions` (possibly empty) or None (unexplainable) to each statement row."""
+    tables = TableInfo(connection)
+    for row in statements:
+        plan = explain(connection, TAG.sub("", row["query"]))
+        row["suggestions"] = None if plan is None else suggest_indexes(plan, tables)
+    return statements
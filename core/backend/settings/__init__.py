@@ -7,15 +7,22 @@ Set DJANGO_SETTINGS_MODULE to one of:
 - core.backend.settings.test
 
 Or use the shortcut: set DJANGO_ENV=prod and this will route to the correct module.
+Settings loaded through the router also get local/ overlays, validation and the
+optional compiled snapshot (SETTINGS_SNAPSHOT=true), see loader.py.
 """
+
 import os
 
-# Allow shortcut: DJANGO_ENV=prod instead of full module path
-env = os.environ.get("DJANGO_ENV", "dev")
+from .loader import LOCAL_DIR, load_settings
 
-if env == "prod":
-    from .prod import *  # noqa: F403, F401
-elif env == "test":
-    from .test import *  # noqa: F403, F401
-else:  # dev is default
-    from .dev import *  # noqa: F403, F401
+# Importing a submodule directly (core.backend.settings.test under pytest) also
+# runs this file; only route when this package is the settings module
+if os.environ.get("DJANGO_SETTINGS_MODULE", __name__) == __name__:
+    # Allow shortcut: DJANGO_ENV=prod instead of full module path (dev is default)
+    snapshot = os.environ.get("SETTINGS_SNAPSHOT", "false").lower() == "true"
+    globals().update(
+        load_settings(
+            os.environ.get("DJANGO_ENV", "dev"),
+            snapshot_dir=os.environ.get("SETTINGS_SNAPSHOT_DIR", LOCAL_DIR / ".snapshots") if snapshot else None,
+        )
+    )
@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third-party apps
     "corsheaders",
     "rest_framework",
@@ -31,11 +32,24 @@ INSTALLED_APPS = [
     "django_extensions",
     # Project apps
     "core.backend.apps.BackendConfig",
+    "core.tasks.apps.TasksConfig",
 ]
 
 MIDDLEWARE = [
+    # First, so shed requests cost as little as possible
+    "core.backend.middleware.admission.AdmissionMiddleware",
+    # Before anything that queries the database or the cache
+    "core.backend.middleware.deadline.DeadlineMiddleware",
+    # Fresh @request_cached store per request, for everything below
+    "core.backend.middleware.memoize.RequestCacheMiddleware",
+    # Profiles everything below it for requests with a signed X-Profile token
+    "core.backend.middleware.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    # After WhiteNoise (static files are pre-compressed), before anything that touches the body
+    "core.backend.middleware.compression.CompressionMiddleware",
+    # Before SessionMiddleware, so it sees the Vary: Cookie of responses that used the session
+    "core.backend.middleware.cache_control.CacheControlMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -43,6 +57,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Turns Ratelimited exceptions into RATELIMIT_VIEW responses (429) instead of 403
+    "django_ratelimit.middleware.RatelimitMiddleware",
 ]
 
 ROOT_URLCONF = "core.backend.urls"
@@ -81,6 +97,20 @@ DATABASES = {
     }
 }
 
+# Gevent workers (GUNICORN_WORKER_CLASS=gevent, see core/backend/green.py) run up to
+# GUNICORN_WORKER_CONNECTIONS requests per worker at once. A persistent connection per
+# request greenlet would multiply PostgreSQL connections by that, so they share a pool
+# of at most DB_POOL_MAX_SIZE connections per worker instead.
+GUNICORN_WORKER_CLASS = env("GUNICORN_WORKER_CLASS", default="sync")
+GUNICORN_WORKER_CONNECTIONS = env.int("GUNICORN_WORKER_CONNECTIONS", default=100)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=10)
+DB_POOL_TIMEOUT = env.float("DB_POOL_TIMEOUT", default=10.0)  # seconds a request waits for a connection
+if GUNICORN_WORKER_CLASS == "gevent":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {"min_size": 2, "max_size": DB_POOL_MAX_SIZE, "timeout": DB_POOL_TIMEOUT},
+    }
+
 # Note: Django 5.2+ supports connection pooling via OPTIONS["pool"], but it's
 # incompatible with CONN_MAX_AGE (persistent connections). For a starter template,
 # persistent connections (CONN_MAX_AGE) are recommended as they're simpler and
@@ -92,6 +122,16 @@ DATABASES = {
 # 3. Add OPTIONS: {"pool": {"min_size": 2, "max_size": 10}}
 # See: https://docs.djangoproject.com/en/5.2/ref/databases/#postgresql-connection-pooling
 
+# AUTH_CACHED_BACKEND=true loads the session's user and its permissions through the
+# queryset cache (core.general.auth.CachedModelBackend). Its invalidation has to reach
+# every worker, so it needs QUERYSET_CACHE_ALIAS on a shared cache such as Redis
+# (check caches.E001), and that cache then holds password hashes
+AUTHENTICATION_BACKENDS = [
+    "core.general.auth.CachedModelBackend"
+    if env.bool("AUTH_CACHED_BACKEND", default=False)
+    else "django.contrib.auth.backends.ModelBackend"
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -172,7 +212,8 @@ REST_FRAMEWORK = {
     # Filtering
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        # Full-text/trigram search on PostgreSQL, icontains SearchFilter elsewhere
+        "core.general.api.filters.PostgresSearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
     # Throttling
@@ -201,6 +242,9 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
     "SERVE_INCLUDE_SCHEMA": False,
     "SCHEMA_PATH_PREFIX": "/api/",
+    # The docs are the same for everyone: skipping authentication keeps them off the
+    # session (no Vary: Cookie), so the CDN can cache them (CACHE_CONTROL_POLICIES)
+    "SERVE_AUTHENTICATION": [],
 }
 
 # Caching Configuration
@@ -215,7 +259,8 @@ CACHES = {
 
 # Django Ratelimit Configuration
 # https://django-ratelimit.readthedocs.io/
-RATELIMIT_ENABLE = True
+# Disabled by the benchmark runner for throughput scenarios
+RATELIMIT_ENABLE = env.bool("RATELIMIT_ENABLE", default=True)
 RATELIMIT_USE_CACHE = "default"  # Uses Django's cache backend
 RATELIMIT_VIEW = "core.backend.views.ratelimit_view"  # Custom view for rate limit exceeded
 
@@ -225,6 +270,284 @@ RATELIMIT_RATE_DEFAULT = "60/m"  # Default: 60 requests per minute
 RATELIMIT_RATE_API = "100/m"  # API endpoints: 100 requests per minute
 RATELIMIT_RATE_HEALTH = "120/m"  # Health checks: 120 requests per minute (higher for monitoring)
 
+# RATELIMIT_ENABLE=false also switches off DRF throttling (used by the benchmark runner)
+if not RATELIMIT_ENABLE:
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
+
+# ==============================================================================
+# QUERYSET CACHE
+# ==============================================================================
+
+# `Model.cached` querysets are served from QUERYSET_CACHE_ALIAS until a write to one
+# of their tables bumps its generation counter (see core/general/db/cache.py)
+QUERYSET_CACHE_ENABLED = env.bool("QUERYSET_CACHE_ENABLED", default=True)
+QUERYSET_CACHE_ALIAS = "default"
+QUERYSET_CACHE_TIMEOUT = env.int("QUERYSET_CACHE_TIMEOUT", default=300)  # seconds
+QUERYSET_CACHE_MAX_ROWS = 1000  # larger results are not stored
+# Models without their own CachedManager that get a `cached` manager
+QUERYSET_CACHE_MODELS = ["auth.User", "auth.Group", "auth.Permission", "contenttypes.ContentType"]
+# Log per-table hit ratios every N lookups in each process (0 disables)
+QUERYSET_CACHE_REPORT_EVERY = env.int("QUERYSET_CACHE_REPORT_EVERY", default=10000)
+
+# ==============================================================================
+# MIDDLEWARE FAST LANE & PROFILING
+# ==============================================================================
+
+# Requests whose path starts with one of these prefixes are served by a reduced
+# middleware stack without FAST_LANE_SKIP_MIDDLEWARE (WSGI only, see core.backend.handlers)
+FAST_LANE_PATHS = [
+    "/health/",
+    f"/{STATIC_URL}",
+]
+FAST_LANE_SKIP_MIDDLEWARE = [
+    "corsheaders.middleware.CorsMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "debug_toolbar.middleware.DebugToolbarMiddleware",
+]
+
+# Time each middleware's request and response phases separately.
+# Adds a Server-Timing header and logs per-path means every N requests.
+MIDDLEWARE_PROFILING = env.bool("MIDDLEWARE_PROFILING", default=False)
+MIDDLEWARE_PROFILING_REPORT_EVERY = env.int("MIDDLEWARE_PROFILING_REPORT_EVERY", default=500)
+
+# ==============================================================================
+# BACKGROUND TASKS
+# ==============================================================================
+
+# @task functions are queued in the tasks table and run by `manage.py run_workers`
+# (see core/tasks). Workers claim tasks with SELECT ... FOR UPDATE SKIP LOCKED.
+TASKS_QUEUES = ["default"]
+TASKS_WORKER_PROCESSES = env.int("TASKS_WORKER_PROCESSES", default=2)
+TASKS_BATCH_SIZE = 10  # tasks claimed per round trip; lower it for slow tasks
+TASKS_POLL_INTERVAL = 1.0  # seconds; on PostgreSQL, LISTEN/NOTIFY wakes workers sooner
+TASKS_MAX_ATTEMPTS = 3
+TASKS_RETRY_BACKOFF = 5  # seconds before the first retry, doubled per attempt
+TASKS_RETRY_BACKOFF_MAX = 3600
+# Tasks still running after this many seconds belong to a dead worker and are requeued;
+# keep it above your slowest task
+TASKS_STALE_AFTER = 600
+TASKS_DELETE_SUCCEEDED = True  # False keeps succeeded rows (status "succeeded")
+TASKS_METRICS_INTERVAL = 60  # seconds between throughput/lag reports
+# Callable(snapshot: dict) receiving each worker's throughput/lag report
+TASKS_METRICS_HOOK = None
+
+# ==============================================================================
+# RESPONSE COMPRESSION
+# ==============================================================================
+
+# Brotli/zstd/gzip compression and conditional GET (ETag/304) for view responses,
+# see core/backend/middleware/compression.py. br needs `brotli`, zstd `zstandard`;
+# encodings whose package isn't installed are skipped.
+COMPRESSION_ENABLED = env.bool("COMPRESSION_ENABLED", default=True)
+COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]  # server preference for equal q-values
+COMPRESSION_LEVELS = {"br": 4, "zstd": 3, "gzip": 5}  # tuned for speed over ratio
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=512)  # bytes
+# BREACH: never compress these path prefixes (views can also use @compress_exempt)
+COMPRESSION_EXCLUDE_PATHS = []
+# BREACH: skip HTML responses to requests with a session cookie and a query string or body
+COMPRESSION_BREACH_GUARD = True
+# Callable(request, stats) receiving a CompressionStats per compressed response,
+# e.g. "core.backend.middleware.compression.log_stats"
+COMPRESSION_METRICS_HOOK = None
+
+# ==============================================================================
+# HTTP CACHING (CDN / PROXY)
+# ==============================================================================
+
+# Cache-Control, Surrogate-Control and Surrogate-Key headers for the cache in front
+# of the app, see core/backend/middleware/cache_control.py. Views use @cache_policy;
+# these path prefixes apply to the others (longest prefix wins).
+CACHE_CONTROL_ENABLED = env.bool("CACHE_CONTROL_ENABLED", default=True)
+CACHE_CONTROL_POLICIES = {
+    # drf-spectacular schema and ReDoc change only on deploy (Swagger UI embeds a CSRF token: private)
+    "/api/schema/": {"max_age": 300, "s_maxage": 86400, "stale_while_revalidate": 60, "keys": ["api-docs"]},
+}
+# Where surrogate-key purges go (core/backend/purge.py): LocalPurger records them,
+# HTTPPurger / VarnishPurger / FastlyPurger send them
+CACHE_PURGER = {
+    "BACKEND": env("CACHE_PURGER_BACKEND", default="core.backend.purge.LocalPurger"),
+    "OPTIONS": env.json("CACHE_PURGER_OPTIONS", default={}),
+}
+# Send purges from a background task on this queue (retried), or inline after commit when empty
+CACHE_PURGE_QUEUE = env("CACHE_PURGE_QUEUE", default="")
+# Models whose saves and deletes purge "app.model" and "app.model/<pk>"
+CACHE_PURGE_MODELS = []
+
+# ==============================================================================
+# ADMISSION CONTROL
+# ==============================================================================
+
+# Shed requests with 503 + Retry-After when the server falls behind, instead of
+# letting them queue in the listen backlog (see core/backend/middleware/admission.py).
+# Queue time comes from the proxy's X-Request-Start header when it's trusted, else from
+# when the worker accepted the request. Sync workers only accept a request once they're
+# free, so they need the header: without ADMISSION_TRUST_QUEUE_HEADER the middleware
+# only runs under gevent workers (check performance.W007).
+ADMISSION_CONTROL_ENABLED = env.bool("ADMISSION_CONTROL_ENABLED", default=True)
+# Only when the proxy in front always overwrites X-Request-Start / X-Queue-Start:
+# clients can send them too, and a forged one would drive the limit down
+ADMISSION_TRUST_QUEUE_HEADER = env.bool("ADMISSION_TRUST_QUEUE_HEADER", default=False)
+ADMISSION_TARGET_QUEUE_TIME = env.float("ADMISSION_TARGET_QUEUE_TIME", default=0.1)  # seconds
+# Requests that waited this long are shed outright (keep it below GUNICORN_TIMEOUT)
+ADMISSION_MAX_QUEUE_TIME = env.float("ADMISSION_MAX_QUEUE_TIME", default=10.0)
+# Bounds of the adaptive limit on load (in-flight requests + queued backlog) per process
+ADMISSION_INITIAL_LIMIT = 20
+ADMISSION_MIN_LIMIT = 1
+ADMISSION_MAX_LIMIT = 200
+ADMISSION_ALWAYS_ADMIT_PATHS = ["/health/"]
+# Shed first: admitted only while load stays under this share of the limit
+ADMISSION_LOW_PRIORITY_PATHS = ["/admin/", "/api/schema/"]
+ADMISSION_LOW_PRIORITY_SHARE = 0.5
+ADMISSION_RETRY_AFTER = 5  # seconds
+
+# ==============================================================================
+# REQUEST DEADLINES
+# ==============================================================================
+
+# Each request gets a deadline that becomes PostgreSQL's statement_timeout and caps
+# Redis reads; requests that fail past it get a 504 (see core/backend/middleware/deadline.py).
+# Keep REQUEST_DEADLINE below GUNICORN_TIMEOUT so queries are cancelled before the worker is killed.
+REQUEST_DEADLINE_ENABLED = env.bool("REQUEST_DEADLINE_ENABLED", default=True)
+REQUEST_DEADLINE = env.float("REQUEST_DEADLINE", default=30.0)  # seconds
+# Path prefix -> seconds; views can use @request_deadline(seconds) instead
+REQUEST_DEADLINE_PATHS = {
+    "/health/": 5.0,
+}
+
+# ==============================================================================
+# SAMPLING PROFILER
+# ==============================================================================
+
+# Statistical profiles of live workers (see core/backend/profiling.py): per request
+# with a signed X-Profile token or the /admin/profiling/ toggle, per worker on
+# PROFILING_SIGNAL. Nothing is sampled unless a profile is requested.
+# `manage.py profile token|workers|merge` creates tokens, signals workers and merges profiles.
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=True)
+PROFILING_DIR = env("PROFILING_DIR", default=str(BASE_DIR / "logs" / "profiles"))
+PROFILING_INTERVAL = env.float("PROFILING_INTERVAL", default=0.005)  # seconds between samples
+PROFILING_FORMAT = env("PROFILING_FORMAT", default="collapsed")  # "collapsed" or "speedscope"
+# Sent to workers, never the gunicorn master (SIGUSR2 upgrades its binary); "" disables it
+PROFILING_SIGNAL = env("PROFILING_SIGNAL", default="SIGUSR2")
+PROFILING_SIGNAL_SECONDS = env.int("PROFILING_SIGNAL_SECONDS", default=30)
+PROFILING_TOKEN_MAX_AGE = 3600  # seconds a profiling token or cookie stays valid
+PROFILING_COOKIE = "profile"
+
+# ==============================================================================
+# HEARTBEAT
+# ==============================================================================
+
+# Each worker writes HEARTBEAT_DIR/<pid>.beat every HEARTBEAT_INTERVAL seconds
+# for scripts/healthcheck.sh (see core/backend/heartbeat.py). Enabled in prod.py.
+HEARTBEAT_ENABLED = env.bool("HEARTBEAT_ENABLED", default=False)
+HEARTBEAT_DIR = env("HEARTBEAT_DIR", default="/tmp/heartbeat")
+HEARTBEAT_INTERVAL = env.int("HEARTBEAT_INTERVAL", default=10)
+# The database and cache are checked less often than the file is refreshed
+HEARTBEAT_CHECK_INTERVAL = env.int("HEARTBEAT_CHECK_INTERVAL", default=60)
+# A worker with a request running longer than this reports "stuck"
+HEARTBEAT_STUCK_AFTER = env.int("HEARTBEAT_STUCK_AFTER", default=30)
+
+# ==============================================================================
+# MEMORY MONITOR
+# ==============================================================================
+
+# Each worker samples its RSS every MEMORY_SAMPLE_INTERVAL seconds into
+# MEMORY_DIR/<pid>.json (see core/backend/memory.py; `manage.py memory`,
+# /admin/memory/) and recycles itself once it has grown MEMORY_GROWTH_BUDGET MB
+# past its post-warmup baseline. Enabled in prod.py.
+MEMORY_MONITOR_ENABLED = env.bool("MEMORY_MONITOR_ENABLED", default=False)
+MEMORY_DIR = env("MEMORY_DIR", default="/tmp/memory")
+MEMORY_SAMPLE_INTERVAL = env.int("MEMORY_SAMPLE_INTERVAL", default=30)  # seconds
+MEMORY_WARMUP_REQUESTS = env.int("MEMORY_WARMUP_REQUESTS", default=50)  # before the baseline is taken
+# MB of growth over the baseline before a worker recycles; 0 disables recycling
+MEMORY_GROWTH_BUDGET = env.int("MEMORY_GROWTH_BUDGET", default=256)
+# Trace allocations to report the top growing sites; slows allocation-heavy code down
+MEMORY_TRACEMALLOC = env.bool("MEMORY_TRACEMALLOC", default=False)
+MEMORY_TRACEMALLOC_FRAMES = 1
+MEMORY_SNAPSHOT_INTERVAL = env.int("MEMORY_SNAPSHOT_INTERVAL", default=300)  # seconds between diffs
+
+# ==============================================================================
+# WRITE BUFFER
+# ==============================================================================
+
+# WriteBuffer.add() queues rows in memory; a flusher thread per worker writes them
+# in batches with COPY (PostgreSQL) or bulk_create(), see core/general/db/buffer.py.
+# Rows still unwritten at shutdown are spilled to WRITE_BUFFER_DIR and replayed.
+WRITE_BUFFER_ENABLED = env.bool("WRITE_BUFFER_ENABLED", default=True)
+WRITE_BUFFER_METHOD = env("WRITE_BUFFER_METHOD", default="copy")  # copy or bulk_create
+WRITE_BUFFER_BATCH_SIZE = env.int("WRITE_BUFFER_BATCH_SIZE", default=1000)  # rows that trigger a flush
+WRITE_BUFFER_FLUSH_INTERVAL = env.float("WRITE_BUFFER_FLUSH_INTERVAL", default=1.0)  # seconds
+WRITE_BUFFER_MAX_ROWS = env.int("WRITE_BUFFER_MAX_ROWS", default=10000)  # per buffer and worker
+WRITE_BUFFER_TIMEOUT = env.float("WRITE_BUFFER_TIMEOUT", default=0.1)  # seconds add() waits for room
+WRITE_BUFFER_DIR = env("WRITE_BUFFER_DIR", default="/tmp/write-buffer")
+WRITE_BUFFER_SHUTDOWN_TIMEOUT = env.float("WRITE_BUFFER_SHUTDOWN_TIMEOUT", default=10.0)
+
+# ==============================================================================
+# ONLINE MIGRATIONS
+# ==============================================================================
+
+# `migrate` (also on boot) first lints the pending migrations for operations that
+# lock a table while it's serving traffic, see core/general/db/lint.py: an Error
+# on tables PostgreSQL estimates at MIGRATION_LINT_LARGE_TABLE_ROWS rows or more
+# stops the migration, smaller ones only warn.
+MIGRATION_LINT_ENABLED = env.bool("MIGRATION_LINT_ENABLED", default=True)
+MIGRATION_LINT_LARGE_TABLE_ROWS = env.int("MIGRATION_LINT_LARGE_TABLE_ROWS", default=100_000)
+# A DDL statement waiting for a lock blocks every query queued behind it: give up
+# after MIGRATION_LOCK_TIMEOUT and retry the migration MIGRATION_LOCK_RETRIES
+# times, waiting MIGRATION_LOCK_RETRY_DELAY seconds longer each time.
+MIGRATION_LOCK_TIMEOUT = env("MIGRATION_LOCK_TIMEOUT", default="5s")  # PostgreSQL lock_timeout; "0" disables
+MIGRATION_LOCK_RETRIES = env.int("MIGRATION_LOCK_RETRIES", default=5)
+MIGRATION_LOCK_RETRY_DELAY = env.float("MIGRATION_LOCK_RETRY_DELAY", default=2.0)
+
+# ==============================================================================
+# QUERY REPORT (pg_stat_statements)
+# ==============================================================================
+
+# `manage.py query_report` and /admin/queries/ show the top statements from
+# pg_stat_statements, index suggestions from their plans and regressions since a
+# deploy's snapshot (see core/backend/querystats.py). QUERY_TAGGING_ENABLED
+# appends each query's call site as a comment, so statements lead back to code.
+QUERY_TAGGING_ENABLED = env.bool("QUERY_TAGGING_ENABLED", default=True)
+QUERY_SNAPSHOT_DIR = env("QUERY_SNAPSHOT_DIR", default=str(BASE_DIR / "local" / "query-snapshots"))
+QUERY_REPORT_LIMIT = 20  # statements per list
+QUERY_REPORT_REGRESSION_RATIO = env.float("QUERY_REPORT_REGRESSION_RATIO", default=1.5)  # mean time growth
+QUERY_REPORT_MIN_CALLS = 10  # in both windows, for a mean time to count
+QUERY_REPORT_SEQ_SCAN_ROWS = 10_000  # smaller tables are fine to scan
+
+# ==============================================================================
+# IMAGE VARIANTS
+# ==============================================================================
+
+# Named resized variants of uploaded images (requires Pillow), generated off the
+# request path and stored content-addressed under MEDIA_ROOT/IMAGE_VARIANTS_DIR,
+# then served as static files (see core/general/variants.py). Generated on
+# IMAGE_VARIANTS_QUEUE by `run_workers` when set, else in a pool of
+# IMAGE_VARIANTS_PROCESSES processes per web worker; `manage.py image_variants`
+# backfills existing uploads.
+IMAGE_VARIANTS = {
+    "thumbnail": {"width": 320, "height": 320, "crop": True, "format": "webp", "quality": 80},
+    "medium": {"width": 1024, "format": "webp", "quality": 82},
+}
+IMAGE_VARIANTS_DIR = "variants"  # under MEDIA_ROOT
+IMAGE_VARIANTS_QUEUE = env("IMAGE_VARIANTS_QUEUE", default="")
+IMAGE_VARIANTS_PROCESSES = env.int("IMAGE_VARIANTS_PROCESSES", default=2)
+IMAGE_VARIANTS_MAX_PENDING = 100  # images waiting in a worker's pool; more aren't scheduled
+IMAGE_VARIANTS_MAX_PIXELS = 40_000_000  # larger originals are refused (decompression bombs)
+IMAGE_VARIANTS_REDIRECT_MAX_AGE = 3600  # /images/ redirects to generated variants
+
+# ==============================================================================
+# BENCHMARKS
+# ==============================================================================
+
+# Routes /bench/io/, the I/O-bound endpoint of the benchmark suite's `io` and
+# `io-gevent` scenarios: BENCHMARK_IO_QUERIES queries that each wait
+# BENCHMARK_IO_SECONDS in PostgreSQL. Never enable it in production.
+BENCHMARK_VIEWS = env.bool("BENCHMARK_VIEWS", default=False)
+BENCHMARK_IO_QUERIES = env.int("BENCHMARK_IO_QUERIES", default=5)
+BENCHMARK_IO_SECONDS = env.float("BENCHMARK_IO_SECONDS", default=0.01)
+
 # ==============================================================================
 # LOGGING
 # ==============================================================================
@@ -1,17 +1,17 @@
 """Development settings."""
-from .base import *  # noqa: F403, F401
-import environ
+
 import sys
+from copy import deepcopy
 
-env = environ.Env()
+from core.general.utils.collections import update_dict_with_dict
+
+from .base import *  # noqa: F403, F401
+from .base import env  # one environ.Env() shared by all settings modules
 
 # Development SECRET_KEY
 # Best practice: Set in .env file to avoid sharing keys between developers
 # If not set, falls back to insecure default (with warning)
-SECRET_KEY = env(
-    "SECRET_KEY",
-    default="django-insecure-y87e+4vt0b040c7_d2snx&@n1mf91#!1ose!ieimfgl2s9+*ev"
-)
+SECRET_KEY = env("SECRET_KEY", default="django-insecure-y87e+4vt0b040c7_d2snx&@n1mf91#!1ose!ieimfgl2s9+*ev")
 
 # Warn if using default SECRET_KEY
 if SECRET_KEY == "django-insecure-y87e+4vt0b040c7_d2snx&@n1mf91#!1ose!ieimfgl2s9+*ev":
@@ -22,7 +22,7 @@ if SECRET_KEY == "django-insecure-y87e+4vt0b040c7_d2snx&@n1mf91#!1ose!ieimfgl2s9
         "     SECRET_KEY='django-insecure-<your-unique-key-here>'\n"
         "   Generate one with:\n"
         "     python -c 'from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())'\n",
-        file=sys.stderr
+        file=sys.stderr,
     )
 
 # Enable debug mode
@@ -31,11 +31,16 @@ DEBUG = True
 # Allow all hosts in development
 ALLOWED_HOSTS = ["*"]
 
+# No Cache-Control headers: browsers would keep serving stale pages while you edit them
+CACHE_CONTROL_ENABLED = env.bool("CACHE_CONTROL_ENABLED", default=False)
+
 # CORS - Allow all origins in development
 CORS_ALLOW_ALL_ORIGINS = True
 
 # Django Debug Toolbar
-INSTALLED_APPS += [  # noqa: F405
+# Build new values instead of mutating base.py's (shared with the other environments)
+INSTALLED_APPS = [  # noqa: F405
+    *INSTALLED_APPS,  # noqa: F405
     "debug_toolbar",
 ]
 
@@ -54,11 +59,16 @@ DEBUG_TOOLBAR_CONFIG = {
 }
 
 # Colored logging for development
-LOGGING["formatters"]["colored"] = {  # noqa: F405
-    "()": "colorlog.ColoredFormatter",
-    "format": "%(log_color)s%(asctime)s - %(levelname)s - %(name)s - %(bold_white)s%(message)s",
-}
-
-LOGGING["root"]["level"] = "DEBUG"  # noqa: F405
-LOGGING["handlers"]["console"]["level"] = "DEBUG"  # noqa: F405
-LOGGING["handlers"]["console"]["formatter"] = "colored"  # noqa: F405
+LOGGING = update_dict_with_dict(
+    deepcopy(LOGGING),  # noqa: F405
+    {
+        "formatters": {
+            "colored": {
+                "()": "colorlog.ColoredFormatter",
+                "format": "%(log_color)s%(asctime)s - %(levelname)s - %(name)s - %(bold_white)s%(message)s",
+            },
+        },
+        "root": {"level": "DEBUG"},
+        "handlers": {"console": {"level": "DEBUG", "formatter": "colored"}},
+    },
+)
@@ -0,0 +1,210 @@
+"""
+Settings loader used by the DJANGO_ENV router (core/backend/settings/__init__.py).
+
+Layers, in order:
+
+1. The environment module (dev.py, prod.py or test.py, each built on base.py).
+2. local/settings.py, then local/settings.<environment>.py, if present. Overlay
+   files are plain Python that can read the settings loaded so far. Any
+   UPPERCASE name they assign is merged in with update_dict_with_dict, so a
+   dict setting only needs the keys it changes:
+
+       LOGGING = {"root": {"level": "WARNING"}}
+
+The result is validated and frozen once: top-level lists become tuples, so
+nothing can mutate a list shared with another settings module. Overlays (and
+anything else extending a list setting) build a new sequence instead, which
+works on lists and tuples alike; `INSTALLED_APPS += [...]` raises TypeError
+on a tuple:
+
+    INSTALLED_APPS = (*INSTALLED_APPS, "debug_toolbar")
+
+With SETTINGS_SNAPSHOT=true the frozen result is pickled to
+SETTINGS_SNAPSHOT_DIR, keyed on a hash of the settings/overlay sources and
+the environment variables they reference. Later processes with the same key (manage.py
+invocations, gunicorn restarts) load the snapshot instead of importing and
+re-evaluating the settings modules. Settings that cannot be pickled (such as
+the debug toolbar's lambda in dev.py) disable the snapshot for that
+environment.
+"""
+
+import contextlib
+import copy
+import hashlib
+import importlib
+import logging
+import os
+import pickle
+import re
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+from core.general.utils.collections import update_dict_with_dict
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENTS = ("dev", "prod", "test")
+
+SETTINGS_DIR = Path(__file__).resolve().parent
+LOCAL_DIR = SETTINGS_DIR.parent.parent.parent / "local"
+
+ENV_NAME_RE = re.compile(r"""["']([A-Z][A-Z0-9_]*)["']""")
+
+# Must be non-empty strings
+REQUIRED_STRINGS = ("SECRET_KEY", "ROOT_URLCONF")
+
+
+def is_setting(name):
+    return name.isupper() and not name.startswith("_")
+
+
+def module_settings(module):
+    """Return the settings defined by (or star-imported into) a module."""
+    return {name: getattr(module, name) for name in dir(module) if is_setting(name)}
+
+
+def overlay_paths(environment, local_dir=LOCAL_DIR):
+    candidates = [Path(local_dir) / "settings.py", Path(local_dir) / f"settings.{environment}.py"]
+    return [path for path in candidates if path.is_file()]
+
+
+def apply_overlay(settings, path):
+    """
+    Execute an overlay file against the current settings and merge every
+    setting it assigns into `settings`.
+    """
+    namespace = {**settings, "__file__": str(path), "__name__": "local_settings"}
+    exec(compile(path.read_text(), str(path), "exec"), namespace)  # noqa: S102
+
+    changes = {
+        name: value
+        for name, value in namespace.items()
+        if is_setting(name) and (name not in settings or value is not settings[name])
+    }
+    return update_dict_with_dict(settings, changes)
+
+
+def validate(settings):
+    errors = []
+    for name in REQUIRED_STRINGS:
+        value = settings.get(name)
+        if not isinstance(value, str) or not value:
+            errors.append(f"{name} must be a non-empty string (got {value!r})")
+
+    for name in ("INSTALLED_APPS", "MIDDLEWARE"):
+        value = settings.get(name, [])
+        if not isinstance(value, (list, tuple)) or not all(isinstance(item, str) for item in value):
+            errors.append(f"{name} must be a list of dotted paths")
+        elif len(set(value)) != len(value):
+            duplicates = sorted({item for item in value if value.count(item) > 1})
+            errors.append(f"{name} contains duplicates: {', '.join(duplicates)}")
+
+    if "default" not in settings.get("DATABASES", {}):
+        errors.append("DATABASES must define a 'default' database")
+
+    if errors:
+        raise ImproperlyConfigured("Invalid settings:\n  " + "\n  ".join(errors))
+
+
+def freeze(settings):
+    return {name: tuple(value) if isinstance(value, list) else value for name, value in settings.items()}
+
+
+def source_files(environment, local_dir=LOCAL_DIR):
+    return [SETTINGS_DIR / "base.py", SETTINGS_DIR / f"{environment}.py", *overlay_paths(environment, local_dir)]
+
+
+def referenced_variables(paths):
+    """
+    Names of the environment variables the settings sources can read: every
+    UPPERCASE string literal, e.g. env("POSTGRES_DB") or os.environ.get("DJANGO_ENV").
+    Shell noise such as PWD or SHLVL is left out of the snapshot key this way.
+    """
+    names = set()
+    for path in paths:
+        names.update(ENV_NAME_RE.findall(path.read_text()))
+    return names
+
+
+def snapshot_key(environment, local_dir=LOCAL_DIR, environ=None):
+    """Hash of everything the settings are computed from."""
+    environ = os.environ if environ is None else environ
+    sources = source_files(environment, local_dir)
+    digest = hashlib.sha256(environment.encode())
+    for name in sorted(referenced_variables(sources)):
+        digest.update(f"\0{name}={environ.get(name)}".encode())
+    for path in sources:
+        digest.update(b"\0" + str(path).encode() + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def read_snapshot(path):
+    try:
+        with open(path, "rb") as snapshot:
+            return pickle.load(snapshot)  # noqa: S301 - written by write_snapshot, mode 0600
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning("Ignoring unreadable settings snapshot %s", path, exc_info=True)
+        return None
+
+
+def write_snapshot(path, settings):
+    try:
+        data = pickle.dumps(settings)
+    except Exception as exc:
+        logger.info("Settings are not picklable (%s); not writing a snapshot", exc)
+        return False
+
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as snapshot:
+            snapshot.write(data)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        # A read-only or full filesystem: the settings still load, just not from a snapshot
+        logger.warning("Can't write the settings snapshot %s (%s); continuing without it", path, exc)
+        with contextlib.suppress(OSError):
+            tmp_path.unlink(missing_ok=True)
+        return False
+
+    # Snapshots of this environment with an older key are dead weight
+    prefix = path.name.rsplit(".", 2)[0]
+    for stale in path.parent.glob(f"{prefix}.*.pickle"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return True
+
+
+def compile_settings(environment, local_dir=LOCAL_DIR):
+    """Import the environment module, apply local overlays, validate and freeze."""
+    if environment not in ENVIRONMENTS:
+        raise ImproperlyConfigured(f"DJANGO_ENV must be one of {', '.join(ENVIRONMENTS)} (got {environment!r})")
+
+    module = importlib.import_module(f"{__package__}.{environment}")
+    # Deep copy so overlays can't mutate values shared with the module
+    settings = copy.deepcopy(module_settings(module))
+    for path in overlay_paths(environment, local_dir):
+        settings = apply_overlay(settings, path)
+
+    validate(settings)
+    return freeze(settings)
+
+
+def load_settings(environment, local_dir=LOCAL_DIR, snapshot_dir=None):
+    """
+    Return the settings for `environment`, from a snapshot in `snapshot_dir`
+    when one matches the current environment and sources.
+    """
+    if snapshot_dir is None:
+        return compile_settings(environment, local_dir)
+
+    path = Path(snapshot_dir) / f"settings.{environment}.{snapshot_key(environment, local_dir)}.pickle"
+    settings = read_snapshot(path)
+    if settings is None:
+        settings = compile_settings(environment, local_dir)
+        write_snapshot(path, settings)
+    return settings
@@ -1,9 +1,14 @@
 """Production settings - override in local deployment."""
-from .base import *  # noqa: F403, F401
-import environ
+
 import sys
+from copy import deepcopy
+
+import environ
 
-env = environ.Env()
+from core.general.utils.collections import update_dict_with_dict
+
+from .base import *  # noqa: F403, F401
+from .base import env  # one environ.Env() shared by all settings modules
 
 # SECURITY WARNING: keep the secret key used in production secret!
 try:
@@ -15,7 +20,7 @@ except environ.ImproperlyConfigured:
         "  export SECRET_KEY='your-secret-key-here'\n"
         "\nGenerate a secure key with:\n"
         "  python -c 'from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())'\n",
-        file=sys.stderr
+        file=sys.stderr,
     )
     sys.exit(1)
 
@@ -26,7 +31,7 @@ if len(SECRET_KEY) < 50:
         f"Production SECRET_KEY should be at least 50 characters for security.\n"
         f"Generate a new one with:\n"
         f"  python -c 'from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())'\n",
-        file=sys.stderr
+        file=sys.stderr,
     )
     sys.exit(1)
 
@@ -42,7 +47,7 @@ if not ALLOWED_HOSTS:
         "\n⚠️  WARNING: ALLOWED_HOSTS is empty in production!\n"
         "Set it in your .env file or environment:\n"
         "  export ALLOWED_HOSTS='yourdomain.com,www.yourdomain.com'\n",
-        file=sys.stderr
+        file=sys.stderr,
     )
 
 # Security Settings - Enable in production
@@ -62,6 +67,12 @@ CSRF_COOKIE_SECURE = env.bool("CSRF_COOKIE_SECURE", default=False)
 # CSRF Trusted Origins
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
 
+# JSON only: the browsable API renders full HTML pages for browser requests
+REST_FRAMEWORK = update_dict_with_dict(
+    deepcopy(REST_FRAMEWORK),  # noqa: F405
+    {"DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"]},
+)
+
 # Redis Cache Configuration (if REDIS_URL is set)
 redis_url = env("REDIS_URL", default=None)
 if redis_url:
@@ -73,6 +84,13 @@ if redis_url:
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
                 "SOCKET_CONNECT_TIMEOUT": 5,
                 "SOCKET_TIMEOUT": 5,
+                # Reads wait at most the time left before the request's deadline. Gevent workers
+                # run more requests than max_connections at once, so they wait for a free connection
+                "CONNECTION_POOL_CLASS": (
+                    "core.backend.middleware.deadline.DeadlineBlockingConnectionPool"
+                    if GUNICORN_WORKER_CLASS == "gevent"  # noqa: F405
+                    else "core.backend.middleware.deadline.DeadlineConnectionPool"
+                ),
                 "CONNECTION_POOL_KWARGS": {
                     "max_connections": 50,
                     "retry_on_timeout": True,
@@ -82,6 +100,12 @@ if redis_url:
         }
     }
 
+# Worker heartbeat files for the Docker HEALTHCHECK (scripts/healthcheck.sh)
+HEARTBEAT_ENABLED = env.bool("HEARTBEAT_ENABLED", default=True)
+
+# Per-worker RSS reports and recycling past MEMORY_GROWTH_BUDGET (core/backend/memory.py)
+MEMORY_MONITOR_ENABLED = env.bool("MEMORY_MONITOR_ENABLED", default=True)
+
 # Production logging (console only for Docker/cloud)
 LOGGING = {  # noqa: F405
     "version": 1,
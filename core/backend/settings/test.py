@@ -1,4 +1,9 @@
 """Test settings."""
+
+from copy import deepcopy
+
+from core.general.utils.collections import update_dict_with_dict
+
 from .base import *  # noqa: F403, F401
 
 # Test SECRET_KEY (never use in production!)
@@ -14,13 +19,20 @@ DATABASES = {  # noqa: F405
 
 DEBUG = True
 
-# Colored logging for test output
-LOGGING["formatters"]["colored"] = {  # noqa: F405
-    "()": "colorlog.ColoredFormatter",
-    "format": "%(log_color)s%(asctime)s %(levelname)s %(name)s %(bold_white)s%(message)s",
-}
+# Write buffered rows right away, in the test's transaction
+WRITE_BUFFER_ENABLED = False
 
-# Set debug logging for tests
-LOGGING["root"]["level"] = "DEBUG"  # noqa: F405
-LOGGING["handlers"]["console"]["level"] = "DEBUG"  # noqa: F405
-LOGGING["handlers"]["console"]["formatter"] = "colored"  # noqa: F405
+# Colored, debug-level logging for test output
+LOGGING = update_dict_with_dict(
+    deepcopy(LOGGING),  # noqa: F405
+    {
+        "formatters": {
+            "colored": {
+                "()": "colorlog.ColoredFormatter",
+                "format": "%(log_color)s%(asctime)s %(levelname)s %(name)s %(bold_white)s%(message)s",
+            },
+        },
+        "root": {"level": "DEBUG"},
+        "handlers": {"console": {"level": "DEBUG", "formatter": "colored"}},
+    },
+)
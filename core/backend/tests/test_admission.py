@@ -0,0 +1,169 @@
+"""Tests for the admission control middleware."""
+
+import time
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.backend.middleware.admission import ACCEPTED_AT, AdaptiveLimit, AdmissionMiddleware, parse_request_start
+
+
+def queued(path="/", seconds=0.0):
+    """A request the proxy received `seconds` ago."""
+    return RequestFactory().get(path, HTTP_X_REQUEST_START=f"t={time.time() - seconds:.3f}")
+
+
+@pytest.fixture
+def middleware(settings):
+    settings.ADMISSION_INITIAL_LIMIT = 4
+    settings.ADMISSION_TARGET_QUEUE_TIME = 0.1
+    settings.ADMISSION_TRUST_QUEUE_HEADER = True
+    return AdmissionMiddleware(lambda request: HttpResponse("ok"))
+
+
+class TestParseRequestStart:
+    """Tests for reading queue time from X-Request-Start."""
+
+    @pytest.mark.parametrize(
+        "value",
+        ["t=1760000000.250", "1760000000.250", "1760000000250", "t=1760000000250000"],
+    )
+    def test_units(self, value):
+        assert parse_request_start(value, now=1760000001.0) == pytest.approx(0.75)
+
+    def test_clock_skew_and_garbage(self):
+        assert parse_request_start("t=1760000002", now=1760000001.0) == 0.0
+        assert parse_request_start("yesterday", now=1760000001.0) is None
+
+
+class TestAdaptiveLimit:
+    """Tests for the AIMD limit."""
+
+    def test_additive_increase(self):
+        limit = AdaptiveLimit(initial=4, minimum=1, maximum=5, target_queue_time=0.1)
+
+        for _ in range(20):
+            limit.observe(0.0)
+
+        assert limit.limit == 5
+
+    def test_multiplicative_decrease_once_per_interval(self):
+        limit = AdaptiveLimit(initial=10, minimum=1, maximum=20, target_queue_time=60)
+
+        limit.observe(61)
+        limit.observe(61)
+
+        assert limit.limit == pytest.approx(9)
+
+    def test_backlog_counts_as_load(self):
+        limit = AdaptiveLimit(initial=4, minimum=1, maximum=20, target_queue_time=1)
+        limit.service_time = 0.01
+
+        assert limit.acquire(0.02)  # 1 + 2 requests ahead
+        assert limit.inflight == 1
+        assert not limit.acquire(0.05)
+
+        limit.release(0.01)
+        assert limit.inflight == 0
+
+
+class TestAdmissionMiddleware:
+    """Tests for shedding requests."""
+
+    def test_admits_without_queue_time(self, middleware):
+        assert middleware(RequestFactory().get("/")).status_code == 200
+
+    def test_sheds_deep_backlog_with_retry_after(self, middleware):
+        middleware.limit.service_time = 0.01
+
+        response = middleware(queued(seconds=0.5))
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "5"
+        assert middleware.limit.inflight == 0
+
+    def test_low_priority_paths_are_shed_first(self, middleware):
+        middleware.limit.service_time = 0.05
+
+        assert middleware(queued("/api/items/", seconds=0.1)).status_code == 200
+        assert middleware(queued("/admin/", seconds=0.1)).status_code == 503
+
+    def test_health_probes_are_always_admitted(self, middleware):
+        assert middleware(queued("/health/", seconds=60)).status_code == 200
+
+    def test_requests_past_max_queue_time_are_shed(self, middleware):
+        middleware.limit.limit = middleware.limit.maximum
+
+        assert middleware(queued(seconds=11)).status_code == 503
+
+    def test_limit_recovers(self, middleware):
+        middleware.limit.service_time = 1.0
+        assert middleware(queued(seconds=0.5)).status_code == 200
+        assert middleware.limit.limit < 4
+
+        for _ in range(10):
+            middleware(RequestFactory().get("/"))
+
+        assert middleware.limit.limit > 4
+
+    def test_shed_requests_leave_the_limit_alone(self, middleware):
+        middleware.limit.service_time = 0.01
+
+        for _ in range(5):
+            assert middleware(queued(seconds=0.5)).status_code == 503
+
+        assert middleware.limit.limit == 4
+
+    def test_untrusted_queue_header_is_ignored(self, middleware):
+        middleware.trust_queue_header = False
+        middleware.limit.service_time = 0.01
+
+        assert middleware(queued(seconds=5)).status_code == 200
+        assert middleware.limit.limit > 4
+
+    def test_queue_time_from_accept_time(self, middleware):
+        middleware.trust_queue_header = False
+        request = queued(seconds=5)
+        request.META[ACCEPTED_AT] = time.time() - 0.5
+
+        assert middleware.queue_time(request) == pytest.approx(0.5, abs=0.05)
+
+    def test_sheds_only_through_the_queue_header(self, middleware):
+        # A sync worker: requests are accepted the moment the worker is free, one at a time
+        middleware.trust_queue_header = False
+        middleware.limit.service_time = 0.01
+        for _ in range(50):
+            request = queued(seconds=5)
+            request.META[ACCEPTED_AT] = time.time()
+            assert middleware(request).status_code == 200
+
+        middleware.trust_queue_header = True
+        assert middleware(queued(seconds=0.5)).status_code == 503
+
+    def test_needs_the_queue_header_under_sync_workers(self, settings):
+        settings.ADMISSION_TRUST_QUEUE_HEADER = False
+        settings.GUNICORN_WORKER_CLASS = "sync"
+        with pytest.raises(MiddlewareNotUsed):
+            AdmissionMiddleware(lambda request: HttpResponse())
+
+        settings.GUNICORN_WORKER_CLASS = "gevent"
+        assert AdmissionMiddleware(lambda request: HttpResponse())
+
+    def test_releases_on_exceptions(self, settings):
+        def view(request):
+            raise RuntimeError
+
+        settings.ADMISSION_TRUST_QUEUE_HEADER = True
+        middleware = AdmissionMiddleware(view)
+
+        with pytest.raises(RuntimeError):
+            middleware(RequestFactory().get("/"))
+        assert middleware.limit.inflight == 0
+
+    def test_disabled(self, settings):
+        settings.ADMISSION_CONTROL_ENABLED = False
+
+        with pytest.raises(MiddlewareNotUsed):
+            AdmissionMiddleware(lambda request: HttpResponse())
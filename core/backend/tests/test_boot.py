@@ -0,0 +1,106 @@
+"""Tests for the container boot orchestrator."""
+
+import pytest
+from django.db import OperationalError, connections
+
+from core.backend import boot
+
+
+class TestWaitForDatabase:
+    """Tests for the exponential-backoff database wait."""
+
+    def test_backoff_until_ready(self, mocker):
+        sleep = mocker.patch("core.backend.boot.time.sleep")
+        mocker.patch.object(
+            connections["default"],
+            "ensure_connection",
+            side_effect=[OperationalError("down"), OperationalError("down"), OperationalError("down"), None],
+        )
+
+        attempts = boot.wait_for_database(timeout=60, initial_delay=0.5, max_delay=1.5)
+
+        assert attempts == 4
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0, 1.5]
+
+    def test_gives_up_after_timeout(self, mocker):
+        mocker.patch("core.backend.boot.time.sleep")
+        mocker.patch.object(connections["default"], "ensure_connection", side_effect=OperationalError("down"))
+
+        with pytest.raises(OperationalError):
+            boot.wait_for_database(timeout=0)
+
+
+@pytest.mark.django_db
+class TestMigrations:
+    """Tests for skipping migrate when the database is up to date."""
+
+    def test_migration_files_found_without_loader(self):
+        names = boot.migration_files()
+        assert ("auth", "0001_initial") in names
+        assert ("contenttypes", "0002_remove_content_type_name") in names
+
+    def test_fingerprint_is_order_independent(self):
+        names = [("auth", "0001_initial"), ("admin", "0001_initial")]
+        assert boot.migration_fingerprint(names) == boot.migration_fingerprint(reversed(names))
+        assert boot.migration_fingerprint(names) != boot.migration_fingerprint(names[:1])
+
+    def test_up_to_date_database_skips_migrate(self, mocker):
+        call_command = mocker.patch("django.core.management.call_command")
+        timer = boot.BootTimer()
+
+        boot.run_migrate(timer)
+
+        call_command.assert_not_called()
+        assert timer.phases[0][2].startswith("up to date")
+
+    def test_pending_migration_runs_migrate(self, mocker):
+        call_command = mocker.patch("django.core.management.call_command")
+        mocker.patch("core.backend.boot.migration_files", return_value=[("backend", "0001_initial")])
+        timer = boot.BootTimer()
+
+        boot.run_migrate(timer)
+
+        call_command.assert_called_once_with("migrate", interactive=False, verbosity=1)
+        assert timer.phases[0][2].startswith("applied 1")
+
+
+class TestPrepare:
+    """Tests for the boot steps and the timing report."""
+
+    def test_skip_flags(self, monkeypatch, mocker):
+        for flag in ("SKIP_DB_WAIT", "SKIP_COLLECTSTATIC", "SKIP_MIGRATIONS"):
+            monkeypatch.setenv(flag, "true")
+        wait = mocker.patch("core.backend.boot.wait_for_database")
+        timer = boot.BootTimer()
+
+        boot.prepare(timer)
+
+        wait.assert_not_called()
+        assert [status for _, _, status in timer.phases] == [
+            "skipped (SKIP_DB_WAIT)",
+            "skipped (SKIP_COLLECTSTATIC)",
+            "skipped (SKIP_MIGRATIONS)",
+        ]
+
+    def test_steps_run_concurrently_and_are_reported(self, monkeypatch, mocker):
+        monkeypatch.setenv("SKIP_DB_WAIT", "true")
+        monkeypatch.delenv("SKIP_COLLECTSTATIC", raising=False)
+        monkeypatch.delenv("SKIP_MIGRATIONS", raising=False)
+        collectstatic = mocker.patch("core.backend.boot.run_collectstatic")
+        migrate = mocker.patch("core.backend.boot.run_migrate")
+        timer = boot.BootTimer()
+
+        boot.prepare(timer)
+
+        collectstatic.assert_called_once_with(timer)
+        migrate.assert_called_once_with(timer)
+        assert "total" in timer.report()
+
+    def test_failed_step_is_raised(self, monkeypatch, mocker):
+        monkeypatch.setenv("SKIP_DB_WAIT", "true")
+        monkeypatch.setenv("SKIP_MIGRATIONS", "true")
+        monkeypatch.delenv("SKIP_COLLECTSTATIC", raising=False)
+        mocker.patch("core.backend.boot.run_collectstatic", side_effect=RuntimeError("disk full"))
+
+        with pytest.raises(RuntimeError, match="disk full"):
+            boot.prepare(boot.BootTimer())
@@ -0,0 +1,153 @@
+"""Tests for the HTTP caching headers and surrogate-key purges."""
+
+import json
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+
+from core.backend import purge as purges
+from core.backend.middleware.cache_control import CacheControlMiddleware, add_surrogate_keys, cache_policy
+from core.backend.purge import FastlyPurger, LocalPurger, VarnishPurger, purge, surrogate_key
+from core.tasks.models import Task
+
+
+def respond(request, view=None, response=None):
+    """Run `request` through the middleware, with `view`'s policy if given."""
+    middleware = CacheControlMiddleware(lambda request: response or HttpResponse("ok"))
+    if view is not None:
+        middleware.process_view(request, view, (), {})
+    return middleware(request)
+
+
+@pytest.fixture
+def purged(settings):
+    settings.CACHE_PURGER = {"BACKEND": "core.backend.purge.LocalPurger"}
+    settings.CACHE_PURGE_QUEUE = ""
+    purges.get_purger.cache_clear()
+    LocalPurger.purged.clear()
+    yield LocalPurger.purged
+    purges.get_purger.cache_clear()
+
+
+class TestCacheControlMiddleware:
+    """Tests for emitting Cache-Control, Surrogate-Control and Surrogate-Key."""
+
+    def test_view_policy(self):
+        @cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=30, keys=["pages"])
+        def view(request):
+            add_surrogate_keys(request, Group, Group(pk=7), "pages")
+
+        request = RequestFactory().get("/")
+        view(request)
+        response = respond(request, view)
+
+        assert response["Cache-Control"] == "public, max-age=60, s-maxage=600, stale-while-revalidate=30"
+        assert response["Surrogate-Control"] == "max-age=600, stale-while-revalidate=30"
+        assert response["Surrogate-Key"] == "pages auth.group auth.group/7"
+
+    def test_longest_prefix_policy(self, settings):
+        settings.CACHE_CONTROL_POLICIES = {"/api/": {"max_age": 10}, "/api/schema/": {"max_age": 300}}
+
+        assert respond(RequestFactory().get("/api/schema/redoc/"))["Cache-Control"] == (
+            "public, max-age=300, s-maxage=300"
+        )
+        assert respond(RequestFactory().get("/api/items/"))["Cache-Control"] == "public, max-age=10, s-maxage=10"
+        assert not respond(RequestFactory().get("/health/")).has_header("Cache-Control")
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            pytest.param(HttpResponse(headers={"Vary": "Cookie"}), id="varies on cookie"),
+            pytest.param(HttpResponse(headers={"Set-Cookie": "csrftoken=x"}), id="sets a cookie"),
+        ],
+    )
+    def test_session_responses_are_private(self, settings, response):
+        settings.CACHE_CONTROL_POLICIES = {"/": {"max_age": 60, "keys": ["pages"]}}
+
+        response = respond(RequestFactory().get("/"), response=response)
+
+        assert response["Cache-Control"] == "private, max-age=60"
+        assert not response.has_header("Surrogate-Control") and not response.has_header("Surrogate-Key")
+
+    @pytest.mark.parametrize(
+        "request_, response",
+        [
+            pytest.param(RequestFactory().post("/"), HttpResponse(), id="POST"),
+            pytest.param(RequestFactory().get("/"), HttpResponse(status=500), id="server error"),
+            pytest.param(RequestFactory().get("/"), HttpResponse(headers={"Cache-Control": "no-store"}), id="own"),
+        ],
+    )
+    def test_left_alone(self, settings, request_, response):
+        settings.CACHE_CONTROL_POLICIES = {"/": {"max_age": 60}}
+
+        assert respond(request_, response=response).get("Cache-Control") == response.get("Cache-Control")
+
+    def test_unknown_option(self):
+        with pytest.raises(TypeError):
+            cache_policy(maxage=60)
+
+    def test_disabled(self, settings):
+        settings.CACHE_CONTROL_ENABLED = False
+        with pytest.raises(MiddlewareNotUsed):
+            CacheControlMiddleware(lambda request: HttpResponse())
+
+    @pytest.mark.django_db
+    def test_home_page_is_cached_at_the_edge(self):
+        response = Client().get("/")
+
+        assert response["Cache-Control"].startswith("public, max-age=60, s-maxage=600")
+        assert response["Surrogate-Key"] == "pages"
+
+
+@pytest.mark.django_db
+class TestPurge:
+    """Tests for sending surrogate-key purges."""
+
+    def test_purged_once_after_commit(self, purged, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            purge("pages")
+            purge("pages", surrogate_key(Group))
+            assert purged == []
+
+        assert purged == [["auth.group", "pages"]]
+
+    def test_tracked_model(self, purged, django_capture_on_commit_callbacks):
+        purges.track(Group)
+        try:
+            with django_capture_on_commit_callbacks(execute=True):
+                group = Group.objects.create(name="editors")
+        finally:
+            post_save.disconnect(sender=Group, dispatch_uid="cache_purge:auth.Group")
+            post_delete.disconnect(sender=Group, dispatch_uid="cache_purge:auth.Group")
+
+        assert purged == [["auth.group", f"auth.group/{group.pk}"]]
+
+    def test_queued(self, purged, settings, django_capture_on_commit_callbacks):
+        settings.CACHE_PURGE_QUEUE = "default"
+        with django_capture_on_commit_callbacks(execute=True):
+            purge("pages")
+
+        task = Task.objects.get()
+        assert (task.name, task.args) == ("core.backend.purge.send_purge", [["pages"]])
+        assert purged == []
+
+    def test_varnish_and_fastly_requests(self, mocker):
+        send = mocker.patch("core.backend.purge.HTTPPurger.send")
+
+        VarnishPurger(["http://varnish-1/", "http://varnish-2/"]).purge_keys(["pages", "auth.group"])
+        FastlyPurger("service", "token").purge_keys(["pages"])
+
+        varnish_1, varnish_2, fastly = (call.args[0] for call in send.call_args_list)
+        assert (varnish_1.method, varnish_1.full_url, varnish_1.get_header("Xkey-purge")) == (
+            "PURGE",
+            "http://varnish-1/",
+            "pages auth.group",
+        )
+        assert varnish_2.full_url == "http://varnish-2/"
+        assert fastly.full_url == "https://api.fastly.com/service/service/purge"
+        assert fastly.get_header("Fastly-key") == "token"
+        assert json.loads(fastly.data) == {"surrogate_keys": ["pages"]}
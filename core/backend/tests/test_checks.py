@@ -1,15 +1,27 @@
 """Tests for custom Django system checks."""
-import pytest
+
+import sys
+
 from django.conf import settings
 from django.core.checks import Error, Warning
 from django.test import override_settings
 
 from core.backend.checks import (
-    check_secret_key_strength,
+    check_admission_queue_time,
+    check_atomic_requests_exemptions,
+    check_browsable_api_renderer,
+    check_cache_configuration,
+    check_cached_auth_backend,
+    check_cached_template_loader,
+    check_connection_pooling,
     check_debug_in_production,
+    check_debug_toolbar_installed,
+    check_gevent_worker,
+    check_ratelimit_cache,
+    check_secret_key_strength,
     check_security_middleware,
     check_sqlite_in_production,
-    check_cache_configuration,
+    check_sync_file_logging,
 )
 
 
@@ -81,10 +93,7 @@ class TestSecurityMiddlewareChecks:
 class TestDatabaseChecks:
     """Tests for database configuration validation."""
 
-    @override_settings(
-        DEBUG=False,
-        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3"}}
-    )
+    @override_settings(DEBUG=False, DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3"}})
     def test_sqlite_in_production(self):
         """SQLite in production should raise error."""
         errors = check_sqlite_in_production(app_configs=None)
@@ -92,19 +101,13 @@ class TestDatabaseChecks:
         assert errors[0].id == "database.E001"
         assert "SQLite" in errors[0].msg
 
-    @override_settings(
-        DEBUG=False,
-        DATABASES={"default": {"ENGINE": "django.db.backends.postgresql"}}
-    )
+    @override_settings(DEBUG=False, DATABASES={"default": {"ENGINE": "django.db.backends.postgresql"}})
     def test_postgresql_in_production(self):
         """PostgreSQL in production should pass."""
         errors = check_sqlite_in_production(app_configs=None)
         assert len(errors) == 0
 
-    @override_settings(
-        DEBUG=True,
-        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3"}}
-    )
+    @override_settings(DEBUG=True, DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3"}})
     def test_sqlite_in_development(self):
         """SQLite in development should pass."""
         errors = check_sqlite_in_production(app_configs=None)
@@ -114,10 +117,7 @@ class TestDatabaseChecks:
 class TestCacheChecks:
     """Tests for cache configuration validation."""
 
-    @override_settings(
-        DEBUG=False,
-        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
-    )
+    @override_settings(DEBUG=False, CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
     def test_locmem_cache_in_production(self):
         """Local memory cache in production should raise warning."""
         warnings = check_cache_configuration(app_configs=None)
@@ -125,30 +125,250 @@ class TestCacheChecks:
         assert warnings[0].id == "caches.W001"
         assert "local memory cache" in warnings[0].msg.lower()
 
-    @override_settings(
-        DEBUG=False,
-        CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
-    )
+    @override_settings(DEBUG=False, CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
     def test_dummy_cache_in_production(self):
         """Dummy cache in production should raise warning."""
         warnings = check_cache_configuration(app_configs=None)
         assert len(warnings) == 1
         assert warnings[0].id == "caches.W001"
 
-    @override_settings(
-        DEBUG=False,
-        CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
-    )
+    @override_settings(DEBUG=False, CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}})
     def test_redis_cache_in_production(self):
         """Redis cache in production should pass."""
         warnings = check_cache_configuration(app_configs=None)
         assert len(warnings) == 0
 
-    @override_settings(
-        DEBUG=True,
-        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
-    )
+    @override_settings(DEBUG=True, CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
     def test_locmem_cache_in_development(self):
         """Local memory cache in development should pass."""
         warnings = check_cache_configuration(app_configs=None)
         assert len(warnings) == 0
+
+    @override_settings(
+        AUTHENTICATION_BACKENDS=["core.general.auth.CachedModelBackend"],
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    )
+    def test_cached_auth_backend_on_locmem(self):
+        """The cached auth backend on a per-process cache should raise error."""
+        errors = check_cached_auth_backend(app_configs=None)
+        assert len(errors) == 1
+        assert errors[0].id == "caches.E001"
+
+    @override_settings(
+        AUTHENTICATION_BACKENDS=["core.general.auth.CachedModelBackend"],
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}},
+    )
+    def test_cached_auth_backend_on_redis(self):
+        """The cached auth backend on a shared cache should pass."""
+        assert check_cached_auth_backend(app_configs=None) == []
+
+    def test_model_backend_by_default(self):
+        """The default ModelBackend needs no shared cache."""
+        assert settings.AUTHENTICATION_BACKENDS == ["django.contrib.auth.backends.ModelBackend"]
+        assert check_cached_auth_backend(app_configs=None) == []
+
+
+class TestPerformanceChecks:
+    """Tests for deploy-time performance checks."""
+
+    @override_settings(
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 600, "OPTIONS": {"pool": True}}
+        }
+    )
+    def test_conn_max_age_with_pool(self):
+        """CONN_MAX_AGE combined with a connection pool should raise error."""
+        errors = check_connection_pooling(app_configs=None)
+        assert len(errors) == 1
+        assert isinstance(errors[0], Error)
+        assert errors[0].id == "performance.E001"
+
+    @override_settings(
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 0, "OPTIONS": {"pool": True}}
+        }
+    )
+    def test_pool_without_conn_max_age(self):
+        """Connection pool alone should pass."""
+        assert check_connection_pooling(app_configs=None) == []
+
+    @override_settings(DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "ATOMIC_REQUESTS": True}})
+    def test_atomic_requests_with_exempt_view(self):
+        """The non-atomic health check counts as a read-only exemption."""
+        assert check_atomic_requests_exemptions(app_configs=None) == []
+
+    @override_settings(DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "ATOMIC_REQUESTS": True}})
+    def test_atomic_requests_without_exempt_views(self, mocker):
+        """ATOMIC_REQUESTS with no exempt view should raise warning."""
+        mocker.patch("core.backend.checks._iter_url_callbacks", return_value=[lambda request: None])
+        warnings = check_atomic_requests_exemptions(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W001"
+
+    @override_settings(
+        DEBUG=False,
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {"loaders": ["django.template.loaders.filesystem.Loader"]},
+            }
+        ],
+    )
+    def test_uncached_template_loaders(self):
+        """Explicit loaders without the cached loader should raise warning."""
+        warnings = check_cached_template_loader(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W002"
+
+    @override_settings(
+        DEBUG=False,
+        TEMPLATES=[
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "loaders": [
+                        ("django.template.loaders.cached.Loader", ["django.template.loaders.filesystem.Loader"])
+                    ]
+                },
+            }
+        ],
+    )
+    def test_cached_template_loaders(self):
+        """Cached loader wrapping other loaders should pass."""
+        assert check_cached_template_loader(app_configs=None) == []
+
+    def test_default_template_loaders(self):
+        """Default loaders (cached automatically by Django) should pass."""
+        with override_settings(DEBUG=False):
+            assert check_cached_template_loader(app_configs=None) == []
+
+    def test_browsable_api_in_production(self):
+        """Browsable API renderer with DEBUG=False should raise warning."""
+        rest_framework = {"DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.BrowsableAPIRenderer"]}
+        with override_settings(DEBUG=False, REST_FRAMEWORK=rest_framework):
+            warnings = check_browsable_api_renderer(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W003"
+
+    def test_json_renderer_in_production(self):
+        """JSON-only rendering in production should pass."""
+        rest_framework = {"DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"]}
+        with override_settings(DEBUG=False, REST_FRAMEWORK=rest_framework):
+            assert check_browsable_api_renderer(app_configs=None) == []
+
+    @override_settings(
+        DEBUG=False,
+        RATELIMIT_USE_CACHE="default",
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    )
+    def test_locmem_ratelimit_cache(self, monkeypatch):
+        """LocMemCache rate limit store with several workers should raise warning."""
+        monkeypatch.delenv("GUNICORN_WORKERS", raising=False)
+        warnings = check_ratelimit_cache(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W004"
+
+        monkeypatch.setenv("GUNICORN_WORKERS", "1")
+        assert check_ratelimit_cache(app_configs=None) == []
+
+    @override_settings(
+        DEBUG=False,
+        RATELIMIT_USE_CACHE="default",
+        CACHES={"default": {"BACKEND": "django_redis.cache.RedisCache"}},
+    )
+    def test_redis_ratelimit_cache(self):
+        """Shared Redis rate limit store should pass."""
+        assert check_ratelimit_cache(app_configs=None) == []
+
+    @override_settings(
+        ADMISSION_CONTROL_ENABLED=True, ADMISSION_TRUST_QUEUE_HEADER=False, GUNICORN_WORKER_CLASS="sync"
+    )
+    def test_admission_control_without_queue_header(self):
+        """Admission control under sync workers without a trusted queue header should raise warning."""
+        warnings = check_admission_queue_time(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W007"
+
+        with override_settings(ADMISSION_TRUST_QUEUE_HEADER=True):
+            assert check_admission_queue_time(app_configs=None) == []
+        with override_settings(GUNICORN_WORKER_CLASS="gevent"):
+            assert check_admission_queue_time(app_configs=None) == []
+
+    def test_file_logging_in_production(self):
+        """File log handlers in production should raise warning."""
+        logging_config = {
+            "handlers": {
+                "console": {"class": "logging.StreamHandler"},
+                "file": {"class": "logging.handlers.RotatingFileHandler", "filename": "x.log"},
+            }
+        }
+        with override_settings(DEBUG=False, LOGGING=logging_config):
+            warnings = check_sync_file_logging(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W005"
+        assert "'file'" in warnings[0].msg
+
+    def test_file_logging_in_development(self):
+        """File log handlers in development should pass."""
+        with override_settings(DEBUG=True):
+            assert check_sync_file_logging(app_configs=None) == []
+
+    def test_debug_toolbar_installed(self, mocker):
+        """debug_toolbar in INSTALLED_APPS should raise warning."""
+        mocker.patch.object(settings, "INSTALLED_APPS", ["django.contrib.admin", "debug_toolbar"])
+        warnings = check_debug_toolbar_installed(app_configs=None)
+        assert len(warnings) == 1
+        assert warnings[0].id == "performance.W006"
+
+    def test_debug_toolbar_not_installed(self, mocker):
+        """No debug_toolbar should pass."""
+        mocker.patch.object(settings, "INSTALLED_APPS", ["django.contrib.admin"])
+        assert check_debug_toolbar_installed(app_configs=None) == []
+
+
+class TestGeventChecks:
+    """Tests for the gevent worker checks."""
+
+    POSTGRES = {"ENGINE": "django.db.backends.postgresql", "NAME": "app"}
+    REDIS = {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": "redis://localhost:6379/0"}
+
+    @override_settings(GUNICORN_WORKER_CLASS="sync")
+    def test_sync_workers(self):
+        """Sync workers skip the gevent checks."""
+        assert check_gevent_worker(app_configs=None) == []
+
+    @override_settings(GUNICORN_WORKER_CLASS="gevent", DATABASES={"default": POSTGRES}, CACHES={"default": REDIS})
+    def test_unpooled_connections(self, mocker):
+        """Unpooled PostgreSQL and a non-blocking Redis pool should raise warnings."""
+        mocker.patch("importlib.util.find_spec", return_value=object())
+        ids = [warning.id for warning in check_gevent_worker(app_configs=None)]
+        assert ids == ["gevent.W001", "gevent.W002"]
+
+    @override_settings(
+        GUNICORN_WORKER_CLASS="gevent",
+        DATABASES={"default": {**POSTGRES, "OPTIONS": {"pool": {"max_size": 10}}}},
+        CACHES={
+            "default": {
+                **REDIS,
+                "OPTIONS": {
+                    "CONNECTION_POOL_CLASS": "core.backend.middleware.deadline.DeadlineBlockingConnectionPool"
+                },
+            }
+        },
+    )
+    def test_pooled_connections(self, mocker, monkeypatch):
+        """Pooled connections pass; C extensions that block the hub raise warnings."""
+        mocker.patch("importlib.util.find_spec", return_value=object())
+        assert check_gevent_worker(app_configs=None) == []
+
+        monkeypatch.setitem(sys.modules, "psycopg2", object())
+        warnings = check_gevent_worker(app_configs=None)
+        assert [warning.id for warning in warnings] == ["gevent.W003"]
+        assert "psycopg2" in warnings[0].msg
+
+    @override_settings(GUNICORN_WORKER_CLASS="gevent")
+    def test_gevent_not_installed(self, mocker):
+        """gevent workers without gevent should raise an error."""
+        mocker.patch("importlib.util.find_spec", return_value=None)
+        errors = check_gevent_worker(app_configs=None)
+        assert [error.id for error in errors] == ["gevent.E001"]
@@ -0,0 +1,196 @@
+"""Tests for the compression / conditional GET middleware."""
+
+import asyncio
+import gzip
+import json
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from core.backend.middleware.compression import CompressionMiddleware, compress_exempt, negotiate
+
+BODY = json.dumps([{"id": index, "name": f"item {index}"} for index in range(200)])
+
+
+def make_middleware(response):
+    """A middleware instance whose view returns `response` (or calls it, if callable)."""
+    return CompressionMiddleware(lambda request: response() if callable(response) else response)
+
+
+def get(path="/items/", encoding="gzip", **extra):
+    return RequestFactory().get(path, HTTP_ACCEPT_ENCODING=encoding, **extra)
+
+
+@pytest.fixture
+def stats(settings):
+    """Collect the stats passed to COMPRESSION_METRICS_HOOK."""
+    settings.COMPRESSION_METRICS_HOOK = f"{__name__}.record_stats"
+    record_stats.calls = []
+    return record_stats.calls
+
+
+def record_stats(request, stats):
+    record_stats.calls.append(stats)
+
+
+class TestNegotiate:
+    """Tests for choosing an encoding from Accept-Encoding."""
+
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("gzip, deflate, br, zstd", "br"),
+            ("gzip;q=1.0, br;q=0.5", "gzip"),
+            ("br;q=0, gzip", "gzip"),
+            ("*", "br"),
+            ("*;q=0.1, gzip;q=0.5", "gzip"),
+            ("identity", None),
+            ("", None),
+            ("gzip;q=bogus", None),
+        ],
+    )
+    def test_q_values_and_server_preference(self, header, expected):
+        assert negotiate(header, ("br", "zstd", "gzip")) == expected
+
+    def test_only_available_encodings(self):
+        assert negotiate("br, gzip", ("gzip",)) == "gzip"
+
+
+class TestCompression:
+    """Tests for compressing regular and streaming responses."""
+
+    def test_gzip(self, stats):
+        request = get()
+        response = make_middleware(HttpResponse(BODY, content_type="application/json"))(request)
+
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert response["ETag"].startswith('W/"')
+        assert int(response["Content-Length"]) == len(response.content) < len(BODY)
+        assert gzip.decompress(response.content).decode() == BODY
+
+        [stat] = stats
+        assert (stat.encoding, stat.original_bytes, stat.compressed_bytes) == (
+            "gzip",
+            len(BODY),
+            len(response.content),
+        )
+        assert stat.saved_bytes > 0 and not stat.streaming
+
+    def test_brotli(self):
+        brotli = pytest.importorskip("brotli")
+        response = make_middleware(HttpResponse(BODY, content_type="application/json"))(get(encoding="br, gzip"))
+
+        assert response["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content).decode() == BODY
+
+    def test_streaming(self, stats):
+        chunks = [BODY[:1000], BODY[1000:]]
+        response = make_middleware(lambda: StreamingHttpResponse(chunks, content_type="text/csv"))(get())
+
+        assert response["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response
+        assert not stats  # reported once the stream has been consumed
+        assert gzip.decompress(b"".join(response.streaming_content)).decode() == BODY
+        assert stats[0].original_bytes == len(BODY) and stats[0].streaming
+
+    def test_async_streaming(self):
+        async def chunks():
+            yield BODY.encode()
+
+        response = make_middleware(lambda: StreamingHttpResponse(chunks(), content_type="application/x-ndjson"))(get())
+
+        async def consume():
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        assert gzip.decompress(asyncio.run(consume())).decode() == BODY
+
+    @pytest.mark.parametrize(
+        "response",
+        [
+            pytest.param(JsonResponse({"status": "ok"}), id="below min size"),
+            pytest.param(HttpResponse(BODY, content_type="image/png"), id="binary content type"),
+            pytest.param(HttpResponse(BODY, content_type="text/event-stream"), id="event stream"),
+            pytest.param(HttpResponse(BODY, headers={"Content-Encoding": "br"}), id="already encoded"),
+            pytest.param(HttpResponse(BODY, headers={"Cache-Control": "no-transform"}), id="no-transform"),
+        ],
+    )
+    def test_left_alone(self, response, stats):
+        content = response.content
+
+        assert make_middleware(response)(get()).content == content
+        assert not stats
+
+    def test_client_without_accept_encoding(self):
+        response = make_middleware(HttpResponse(BODY))(get(encoding=""))
+
+        assert "Content-Encoding" not in response
+        assert response["Vary"] == "Accept-Encoding"
+
+    def test_disabled(self, settings):
+        settings.COMPRESSION_ENABLED = False
+        with pytest.raises(MiddlewareNotUsed):
+            make_middleware(HttpResponse(BODY))
+
+
+class TestBreachExclusions:
+    """Responses that may mix secrets with reflected input are never compressed."""
+
+    def test_session_html_with_query_string(self, settings):
+        request = get("/search/?q=token", HTTP_COOKIE=f"{settings.SESSION_COOKIE_NAME}=abc")
+        response = make_middleware(HttpResponse(BODY))(request)
+
+        assert "Content-Encoding" not in response
+
+    def test_anonymous_html_with_query_string_is_compressed(self):
+        response = make_middleware(HttpResponse(BODY))(get("/search/?q=token"))
+
+        assert response["Content-Encoding"] == "gzip"
+
+    def test_excluded_path(self, settings):
+        settings.COMPRESSION_EXCLUDE_PATHS = ["/admin/"]
+        response = make_middleware(HttpResponse(BODY))(get("/admin/users/"))
+
+        assert "Content-Encoding" not in response
+
+    def test_compress_exempt_view(self):
+        view = compress_exempt(lambda request: HttpResponse(BODY))
+        middleware = make_middleware(HttpResponse(BODY))
+        request = get()
+
+        middleware.process_view(request, view, (), {})
+
+        assert "Content-Encoding" not in middleware(request)
+
+
+class TestConditionalGet:
+    """Tests for ETags and 304 responses."""
+
+    def test_if_none_match_skips_compression(self, stats):
+        middleware = make_middleware(lambda: HttpResponse(BODY))
+        etag = middleware(get())["ETag"]
+
+        response = middleware(get(HTTP_IF_NONE_MATCH=etag))
+
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+        assert len(stats) == 1
+
+    def test_strong_etag_from_view_is_weakened(self):
+        response = make_middleware(HttpResponse(BODY, headers={"ETag": '"v1"'}))(get())
+
+        assert response["ETag"] == 'W/"v1"'
+
+    def test_no_store_gets_no_etag(self):
+        response = make_middleware(HttpResponse(BODY, headers={"Cache-Control": "no-store"}))(get())
+
+        assert "ETag" not in response
+
+    def test_post_is_not_conditional(self):
+        request = RequestFactory().post("/items/", HTTP_ACCEPT_ENCODING="gzip")
+        response = make_middleware(HttpResponse(BODY, content_type="application/json"))(request)
+
+        assert "ETag" not in response
+        assert response["Content-Encoding"] == "gzip"
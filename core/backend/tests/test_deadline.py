@@ -0,0 +1,222 @@
+"""Tests for request deadlines."""
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.backend.middleware import deadline as deadlines
+from core.backend.middleware.deadline import (
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    StatementTimeout,
+    deadline_aware,
+    request_deadline,
+)
+
+IDLE, INTRANS, INERROR = 0, 2, 3
+
+
+class FakeDriverConnection:
+    def __init__(self):
+        self.info = type("Info", (), {"transaction_status": IDLE})()
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(sql)
+        if sql.startswith("SET LOCAL"):
+            self.info.transaction_status = INTRANS
+
+
+class FakeConnection:
+    """Just enough of a Django DatabaseWrapper for StatementTimeout."""
+
+    def __init__(self, autocommit=False):
+        self.connection = FakeDriverConnection()
+        self.autocommit = autocommit
+
+    def get_autocommit(self):
+        return self.autocommit
+
+    def is_usable(self):
+        return True
+
+
+class FakeSocket:
+    def __init__(self):
+        self.timeout = 5
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+
+class FakeRedisConnection:
+    socket_timeout = 5
+
+    def __init__(self):
+        self._sock = FakeSocket()
+        self.sent = []
+
+    def send_command(self, *args):
+        self.sent.append(args)
+
+    def read_response(self):
+        return self._sock.timeout
+
+
+def execute(sql, params, many, context):
+    return sql
+
+
+class TestDeadline:
+    """Tests for the deadline context."""
+
+    def test_no_deadline(self):
+        assert deadlines.remaining() is None
+        deadlines.check()
+
+    def test_nested_deadlines_only_tighten(self):
+        with deadlines.deadline(10):
+            with deadlines.deadline(60):
+                assert 9 < deadlines.remaining() <= 10
+            with deadlines.deadline(1):
+                assert deadlines.remaining() <= 1
+        assert deadlines.remaining() is None
+
+    def test_check(self):
+        with deadlines.deadline(-1), pytest.raises(DeadlineExceeded):
+            deadlines.check()
+
+
+class TestStatementTimeout:
+    """Tests for keeping statement_timeout at the time remaining."""
+
+    def test_set_local_once_per_transaction(self):
+        connection = FakeConnection()
+        wrapper = StatementTimeout(connection)
+
+        with deadlines.deadline(10):
+            assert wrapper(execute, "SELECT 1", None, False, {}) == "SELECT 1"
+            wrapper(execute, "SELECT 2", None, False, {})
+
+        assert len(connection.connection.statements) == 1
+        assert connection.connection.statements[0].startswith("SET LOCAL statement_timeout = ")
+        assert 9000 < int(connection.connection.statements[0].rsplit(" ", 1)[1]) <= 10000
+
+    def test_tightened_when_the_value_in_force_overshoots(self):
+        connection = FakeConnection()
+        wrapper = StatementTimeout(connection)
+
+        with deadlines.deadline(10):
+            wrapper(execute, "SELECT 1", None, False, {})
+        with deadlines.deadline(2):
+            wrapper(execute, "SELECT 2", None, False, {})
+
+        assert len(connection.connection.statements) == 2
+
+    def test_new_transaction_sets_it_again(self):
+        connection = FakeConnection()
+        wrapper = StatementTimeout(connection)
+
+        with deadlines.deadline(10):
+            wrapper(execute, "SELECT 1", None, False, {})
+            connection.connection.info.transaction_status = IDLE  # committed
+            wrapper(execute, "SELECT 2", None, False, {})
+
+        assert len(connection.connection.statements) == 2
+
+    def test_autocommit_sets_the_session_and_resets_it(self):
+        connection = FakeConnection(autocommit=True)
+        wrapper = StatementTimeout(connection)
+
+        with deadlines.deadline(10):
+            wrapper(execute, "SELECT 1", None, False, {})
+            wrapper(execute, "SELECT 2", None, False, {})
+        wrapper.reset()
+
+        statements = connection.connection.statements
+        assert statements[0].startswith("SET statement_timeout = ")
+        assert statements[1:] == ["RESET statement_timeout"]
+
+    def test_failed_transaction_and_no_deadline(self):
+        connection = FakeConnection()
+        wrapper = StatementTimeout(connection)
+
+        wrapper(execute, "SELECT 1", None, False, {})
+        connection.connection.info.transaction_status = INERROR
+        with deadlines.deadline(10):
+            wrapper(execute, "SELECT 2", None, False, {})
+        wrapper.reset()
+
+        assert connection.connection.statements == []
+
+    def test_expired_deadline_raises_before_the_query(self):
+        wrapper = StatementTimeout(FakeConnection())
+
+        with deadlines.deadline(-1), pytest.raises(DeadlineExceeded):
+            wrapper(execute, "SELECT 1", None, False, {})
+
+
+class TestRedisConnection:
+    """Tests for deadline-aware redis connections."""
+
+    def test_reads_are_capped_by_the_deadline(self):
+        connection = deadline_aware(FakeRedisConnection)()
+
+        assert connection.read_response() == 5
+        with deadlines.deadline(0.5):
+            assert connection.read_response() <= 0.5
+        assert connection._sock.timeout == 5
+
+    def test_commands_are_not_sent_after_the_deadline(self):
+        connection = deadline_aware(FakeRedisConnection)()
+
+        with deadlines.deadline(-1), pytest.raises(DeadlineExceeded):
+            connection.send_command("GET", "key")
+        assert connection.sent == []
+
+
+class TestDeadlineMiddleware:
+    """Tests for per-request deadlines and 504s."""
+
+    def budget_seen(self, path, settings):
+        settings.REQUEST_DEADLINE = 30
+        settings.REQUEST_DEADLINE_PATHS = {"/api/": 10, "/api/exports/": 120}
+        middleware = DeadlineMiddleware(lambda request: HttpResponse(str(deadlines.remaining())))
+        return float(middleware(RequestFactory().get(path)).content)
+
+    @pytest.mark.parametrize(("path", "budget"), [("/", 30), ("/api/items/", 10), ("/api/exports/items/", 120)])
+    def test_budget_by_path(self, path, budget, settings):
+        assert budget - 1 < self.budget_seen(path, settings) <= budget
+        assert deadlines.remaining() is None
+
+    def test_view_decorator(self):
+        @request_deadline(2)
+        def view(request):
+            return HttpResponse(str(deadlines.remaining()))
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+
+        middleware = DeadlineMiddleware(get_response)
+
+        assert float(middleware(RequestFactory().get("/")).content) <= 2
+
+    def test_failures_past_the_deadline_are_504(self):
+        request = RequestFactory().get("/")
+        middleware = DeadlineMiddleware(lambda request: HttpResponse())
+        request.deadline_started = 0
+
+        with deadlines.deadline(-1):
+            assert middleware.process_exception(request, OperationalError()).status_code == 504
+        with deadlines.deadline(10):
+            assert middleware.process_exception(request, OperationalError()) is None
+            assert middleware.process_exception(request, DeadlineExceeded()).status_code == 504
+
+    def test_disabled(self, settings):
+        settings.REQUEST_DEADLINE_ENABLED = False
+
+        with pytest.raises(MiddlewareNotUsed):
+            DeadlineMiddleware(lambda request: HttpResponse())
@@ -0,0 +1,43 @@
+"""Tests for the gevent worker mode helpers."""
+
+import _thread
+import sys
+import time
+
+import pytest
+
+from core.backend import green
+
+
+class TestGreen:
+    """Tests for selecting and patching gevent workers."""
+
+    def test_sync_workers_are_not_patched(self, monkeypatch, mocker):
+        pytest.importorskip("gevent")
+        patch_all = mocker.patch("gevent.monkey.patch_all")
+        monkeypatch.delenv("GUNICORN_WORKER_CLASS", raising=False)
+
+        assert not green.enabled()
+        assert green.patch() is False
+        patch_all.assert_not_called()
+
+    def test_gevent_workers_are_patched_once(self, monkeypatch, mocker):
+        pytest.importorskip("gevent")
+        patch_all = mocker.patch("gevent.monkey.patch_all")
+        mocker.patch("gevent.monkey.is_module_patched", side_effect=[False, True])
+        monkeypatch.setenv("GUNICORN_WORKER_CLASS", "gevent")
+
+        assert green.patch() is True
+        assert green.patch() is True
+        patch_all.assert_called_once()
+
+    def test_gevent_workers_without_gevent(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "gevent", None)
+        monkeypatch.setenv("GUNICORN_WORKER_CLASS", "gevent")
+
+        with pytest.raises(ImportError, match="GUNICORN_WORKER_CLASS=gevent requires gevent"):
+            green.patch()
+
+    def test_native_without_patching(self):
+        assert green.native("_thread", "get_ident") is _thread.get_ident
+        assert green.native("time", "sleep") is time.sleep
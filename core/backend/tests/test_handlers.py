@@ -0,0 +1,111 @@
+"""Tests for the fast-lane WSGI handler and middleware profiler."""
+
+from unittest.mock import Mock
+
+import pytest
+from django.test import RequestFactory, override_settings
+
+from core.backend.handlers import VIEW_LABEL, FastLaneWSGIHandler, MiddlewareProfiler
+
+pytestmark = pytest.mark.django_db
+
+
+def call(handler, path):
+    """Call a WSGI handler and return (status, headers, body)."""
+    captured = {}
+
+    def start_response(status, headers, exc_info=None):
+        captured["status"] = status
+        captured["headers"] = dict(headers)
+
+    body = b"".join(handler(RequestFactory().get(path).environ, start_response))
+    return captured.get("status"), captured.get("headers", {}), body
+
+
+class TestFastLaneRouting:
+    """Tests for routing requests between the full and fast lanes."""
+
+    def test_fast_lane_skips_stateful_middleware(self, settings):
+        handler = FastLaneWSGIHandler()
+
+        assert handler.middleware_paths == settings.MIDDLEWARE
+        for middleware in settings.FAST_LANE_SKIP_MIDDLEWARE:
+            assert middleware not in handler.fast_lane.middleware_paths
+        assert "django.middleware.security.SecurityMiddleware" in handler.fast_lane.middleware_paths
+
+    def test_health_check_uses_fast_lane(self):
+        handler = FastLaneWSGIHandler()
+        handler.fast_lane = Mock(return_value=[b""])
+
+        call(handler, "/health/")
+
+        handler.fast_lane.assert_called_once()
+
+    def test_other_paths_use_full_lane(self):
+        handler = FastLaneWSGIHandler()
+        handler.fast_lane = Mock(return_value=[b""])
+
+        status, _, _ = call(handler, "/")
+
+        handler.fast_lane.assert_not_called()
+        assert status.startswith("200")
+
+    def test_health_check_response_on_fast_lane(self):
+        status, headers, body = call(FastLaneWSGIHandler(), "/health/")
+
+        assert status.startswith("200")
+        assert b'"healthy"' in body
+        assert "Set-Cookie" not in headers
+        assert "Server-Timing" not in headers
+
+    @override_settings(FAST_LANE_PATHS=[])
+    def test_fast_lane_disabled(self):
+        handler = FastLaneWSGIHandler()
+        handler.fast_lane = Mock(return_value=[b""])
+
+        call(handler, "/health/")
+
+        handler.fast_lane.assert_not_called()
+
+
+class TestMiddlewareProfiling:
+    """Tests for per-middleware request/response phase timing."""
+
+    @override_settings(MIDDLEWARE_PROFILING=True, ADMISSION_TRUST_QUEUE_HEADER=True)  # every middleware in use
+    def test_server_timing_header(self, settings):
+        handler = FastLaneWSGIHandler()
+
+        _, headers, _ = call(handler, "/")
+
+        timing = headers["Server-Timing"]
+        assert 'desc="SecurityMiddleware"' in timing
+        assert 'desc="SessionMiddleware response"' in timing
+        assert f'desc="{VIEW_LABEL}"' in timing
+        assert handler.profiler.requests["/"] == 1
+        assert set(handler.profiler.totals["/"]) == {*settings.MIDDLEWARE, VIEW_LABEL}
+
+    @override_settings(MIDDLEWARE_PROFILING=True, MIDDLEWARE_PROFILING_REPORT_EVERY=1)
+    def test_periodic_report(self, caplog):
+        handler = FastLaneWSGIHandler()
+
+        with caplog.at_level("INFO", logger="core.backend.handlers"):
+            call(handler, "/health/")
+
+        assert "Middleware timings for /health/ (fast lane, 1 requests" in caplog.text
+
+    def test_phases_split_request_and_response(self):
+        profiler = MiddlewareProfiler("full")
+        profiler.labels = {0: VIEW_LABEL, 1: "inner", 2: "outer"}
+        profiler.outer_depth = 2
+        marks = {2: [0.0, 10.0], 1: [1.0, 8.0], 0: [3.0, 6.0]}
+
+        assert profiler.phases(marks) == [("outer", 1.0, 2.0), ("inner", 2.0, 2.0), (VIEW_LABEL, 3.0, 0.0)]
+
+    def test_phases_short_circuit(self):
+        profiler = MiddlewareProfiler("full")
+        profiler.labels = {0: VIEW_LABEL, 1: "inner", 2: "outer"}
+        profiler.outer_depth = 2
+        # "outer" answered without calling the rest of the chain
+        marks = {2: [0.0, 4.0]}
+
+        assert profiler.phases(marks) == [("outer", 4.0, 0.0)]
@@ -0,0 +1,126 @@
+"""Tests for the worker heartbeat and the shell health probe."""
+
+import os
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+
+from core.backend.heartbeat import Heartbeat
+
+HEALTHCHECK = Path(settings.BASE_DIR) / "scripts" / "healthcheck.sh"
+
+
+def failing_check():
+    raise ConnectionError("down")
+
+
+def probe(directory, max_age=30):
+    env = {**os.environ, "HEARTBEAT_DIR": str(directory), "HEARTBEAT_MAX_AGE": str(max_age)}
+    return subprocess.run(["/bin/sh", str(HEALTHCHECK)], env=env, capture_output=True, text=True)
+
+
+@pytest.mark.django_db
+class TestHeartbeat:
+    """Tests for the status line written by each worker."""
+
+    def test_ok(self, tmp_path):
+        heartbeat = Heartbeat(tmp_path)
+
+        line = heartbeat.beat()
+
+        assert line.startswith("ok ")
+        assert "database=ok cache=ok inflight=0.0" in line
+        assert heartbeat.path.read_text() == line
+        assert not heartbeat.path.with_suffix(".tmp").exists()
+
+    def test_failed_dependency(self, tmp_path):
+        heartbeat = Heartbeat(tmp_path, checks={"database": failing_check})
+        assert heartbeat.beat().startswith("fail ")
+        assert "database=error" in heartbeat.path.read_text()
+
+    def test_dependencies_checked_every_check_interval(self, tmp_path):
+        calls = []
+        heartbeat = Heartbeat(tmp_path, checks={"database": lambda: calls.append(1)}, check_interval=60)
+
+        heartbeat.beat()
+        heartbeat.beat()
+        assert calls == [1]
+
+        heartbeat._next_check = 0.0
+        heartbeat.beat()
+        assert calls == [1, 1]
+
+    def test_stuck_request(self, tmp_path):
+        heartbeat = Heartbeat(tmp_path, stuck_after=5, checks={})
+        heartbeat.request_started()
+        heartbeat._inflight[next(iter(heartbeat._inflight))] -= 10
+
+        assert heartbeat.beat().startswith("stuck ")
+
+        heartbeat.request_finished()
+        assert heartbeat.beat().startswith("ok ")
+
+
+def live_pids(count):
+    """PIDs of processes running for the duration of the test: this one and its parent."""
+    return [os.getpid(), os.getppid()][:count]
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+class TestHealthcheckScript:
+    """Tests for scripts/healthcheck.sh."""
+
+    def test_fresh_ok_heartbeat(self, tmp_path):
+        (tmp_path / f"{os.getpid()}.beat").write_text("ok 0 database=ok cache=ok inflight=0.0\n")
+        assert probe(tmp_path).returncode == 0
+
+    def test_one_stuck_worker_fails(self, tmp_path):
+        stuck, healthy = live_pids(2)
+        (tmp_path / f"{stuck}.beat").write_text("stuck 0 database=ok cache=ok inflight=90.0\n")
+        (tmp_path / f"{healthy}.beat").write_text("ok 0 database=ok cache=ok inflight=0.0\n")
+
+        result = probe(tmp_path)
+
+        assert result.returncode == 1
+        assert f"worker {stuck}: stuck" in result.stderr
+
+    def test_dead_workers_are_cleaned_up(self, tmp_path, dead_pid):
+        dead = tmp_path / f"{dead_pid}.beat"
+        dead.write_text("stuck 0 database=ok cache=ok inflight=90.0\n")
+        (tmp_path / f"{os.getpid()}.beat").write_text("ok 0 database=ok cache=ok inflight=0.0\n")
+
+        assert probe(tmp_path).returncode == 0
+        assert not dead.exists()
+
+    def test_stale_heartbeat(self, tmp_path):
+        beat = tmp_path / f"{os.getpid()}.beat"
+        beat.write_text("ok 0 database=ok cache=ok inflight=0.0\n")
+        stale = time.time() - 120
+        os.utime(beat, (stale, stale))
+
+        result = probe(tmp_path)
+
+        assert result.returncode == 1
+        assert "older than 30s" in result.stderr
+
+    def test_failing_heartbeat(self, tmp_path):
+        (tmp_path / f"{os.getpid()}.beat").write_text("fail 0 database=error cache=ok inflight=0.0\n")
+
+        result = probe(tmp_path)
+
+        assert result.returncode == 1
+        assert "database=error" in result.stderr
+
+    def test_no_heartbeat_files(self, tmp_path):
+        result = probe(tmp_path / "missing")
+        assert result.returncode == 1
+        assert "no live worker heartbeat" in result.stderr
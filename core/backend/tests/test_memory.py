@@ -0,0 +1,127 @@
+"""Tests for the per-worker memory monitor."""
+
+import json
+import signal
+import sys
+import time
+import tracemalloc
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from core.backend import memory
+from core.backend.memory import MB, MemoryMonitor, read_reports
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """Control the RSS the monitor sees, in MB."""
+    value = {"mb": 100}
+    monkeypatch.setattr(memory, "current_rss", lambda: value["mb"] * MB)
+    return value
+
+
+@pytest.fixture
+def monitor(tmp_path, rss):
+    return MemoryMonitor(tmp_path, warmup_requests=2, growth_budget=50)
+
+
+class TestMemoryMonitor:
+    """Tests for RSS tracking and recycling."""
+
+    def test_current_rss(self):
+        assert memory.current_rss() > 10 * MB
+
+    def test_baseline_after_warmup(self, monitor, rss):
+        monitor.write()
+        assert monitor.baseline is None
+
+        monitor.request_finished()
+        monitor.request_finished()
+        rss["mb"] = 120
+        monitor.write()
+        rss["mb"] = 130
+        report = monitor.write()
+
+        assert report["baseline_mb"] == 120
+        assert report["growth_mb"] == 10
+        assert report["peak_mb"] == 130
+        assert [mb for _, mb in report["samples"]] == [100, 120, 130]
+        assert json.loads(monitor.path.read_text()) == report
+
+    def test_recycles_once_over_budget(self, monitor, rss, mocker):
+        kill = mocker.patch("os.kill")
+        mocker.patch.dict("sys.modules", {"gunicorn.workers.base": object()})
+        monitor.requests = 2
+        monitor.write()
+
+        rss["mb"] = 151
+        monitor.write()
+        monitor.write()
+
+        assert monitor.recycling
+        kill.assert_called_once_with(mocker.ANY, signal.SIGTERM)
+
+    def test_no_recycling_outside_gunicorn_or_without_budget(self, tmp_path, rss, mocker, monkeypatch):
+        kill = mocker.patch("os.kill")
+        monkeypatch.delitem(sys.modules, "gunicorn.workers.base", raising=False)
+        unbounded = MemoryMonitor(tmp_path, warmup_requests=0, growth_budget=0)
+        bounded = MemoryMonitor(tmp_path, warmup_requests=0, growth_budget=50)
+        unbounded.write()
+        bounded.write()
+
+        rss["mb"] = 1000
+        unbounded.write()
+        bounded.write()
+
+        assert not unbounded.recycling
+        assert bounded.recycling
+        kill.assert_not_called()
+
+    def test_top_growers(self, tmp_path):
+        was_tracing = tracemalloc.is_tracing()
+        tracemalloc.start()
+        try:
+            monitor = MemoryMonitor(tmp_path, warmup_requests=0, trace=True, snapshot_interval=0)
+            monitor.write()
+            leak = [bytearray(1024) for _ in range(1000)]
+            report = monitor.write()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        assert leak
+        assert report["tracing"]
+        assert "core/backend/tests/test_memory.py" in report["top_growers"][0]["site"]
+        assert report["top_growers"][0]["size_diff_kb"] >= 1000
+
+
+class TestMemoryReports:
+    """Tests for reading every worker's report."""
+
+    def test_stale_reports_and_command(self, monitor, settings, tmp_path):
+        settings.MEMORY_DIR = str(tmp_path)
+        settings.MEMORY_SAMPLE_INTERVAL = 30
+        monitor.write()
+        stale = {**monitor.report(), "pid": 1, "updated": int(time.time()) - 600}
+        (tmp_path / "1.json").write_text(json.dumps(stale))
+
+        assert [(report["pid"], report["stale"]) for report in read_reports()] == [
+            (1, True),
+            (monitor.report()["pid"], False),
+        ]
+
+        out = StringIO()
+        call_command("memory", stdout=out)
+        assert "stale" in out.getvalue()
+        assert "warming up" in out.getvalue()
+        assert "Total RSS of live workers: 100.0MB" in out.getvalue()
+
+    @pytest.mark.django_db
+    def test_admin_endpoint(self, admin_client, client, monitor, settings, tmp_path):
+        settings.MEMORY_DIR = str(tmp_path)
+        monitor.write()
+
+        assert client.get("/admin/memory/").status_code == 302
+        assert admin_client.get("/admin/memory/").json()["workers"][0]["rss_mb"] == 100
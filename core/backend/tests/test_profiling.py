@@ -0,0 +1,165 @@
+"""Tests for the sampling profiler."""
+
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from io import StringIO
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.backend import profiling
+from core.backend.middleware.profiling import ProfilingMiddleware
+from core.backend.profiling import Sampler, check_token, make_token, read_profile, write_profile
+
+
+def busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+@pytest.fixture
+def profiles(settings, tmp_path):
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_INTERVAL = 0.001
+    return tmp_path
+
+
+class TestSampler:
+    """Tests for sampling thread stacks."""
+
+    def test_samples_the_watched_thread(self, profiles):
+        sampler = Sampler(thread_ids={threading.get_ident()}).start()
+        busy(0.05)
+        counts = sampler.stop()
+
+        assert sampler.samples > 0
+        assert any("busy (core/backend/tests/test_profiling.py:" in stack for stack in counts)
+        assert all(stack.split(";")[-1].startswith("busy") for stack in counts if "busy" in stack)
+
+    def test_all_threads_are_rooted_at_the_thread_name(self, profiles):
+        sampler = Sampler(duration=0.02).start()
+        counts = sampler.join()
+
+        assert any(stack.startswith("MainThread;") for stack in counts)
+        assert not any(stack.startswith("profiler;") for stack in counts)
+
+
+class TestProfileFiles:
+    """Tests for writing and reading profiles."""
+
+    counts = Counter({"main (app.py:1);handler (app.py:10)": 3, "main (app.py:1)": 1})
+
+    @pytest.mark.parametrize(("fmt", "suffix"), [("collapsed", ".collapsed"), ("speedscope", ".speedscope.json")])
+    def test_round_trip(self, profiles, fmt, suffix):
+        path = write_profile(self.counts, "GET /api/items/", fmt=fmt)
+
+        assert path.parent == profiles
+        assert path.name.endswith(f"-GET-api-items{suffix}")
+        assert read_profile(path) == self.counts
+
+    def test_merge_command(self, profiles):
+        write_profile(self.counts, "worker", fmt="collapsed")
+        write_profile(self.counts, "worker", fmt="speedscope")
+        output = profiles / "merged.out"
+        out = StringIO()
+
+        call_command("profile", "merge", "-o", str(output), stdout=out)
+
+        assert "Merged 2 profile(s), 8 samples" in out.getvalue()
+        assert read_profile(output) == self.counts + self.counts
+
+
+class TestTokens:
+    """Tests for signed profiling tokens."""
+
+    def test_tokens(self, settings):
+        assert check_token(make_token())
+        assert not check_token(make_token() + "x")
+        assert not check_token("")
+
+        settings.PROFILING_TOKEN_MAX_AGE = -1
+        assert not check_token(make_token())
+
+
+class TestProfilingMiddleware:
+    """Tests for per-request profiles."""
+
+    def view(self, request):
+        busy(0.02)
+        return HttpResponse()
+
+    def test_profiles_requests_with_a_token(self, profiles):
+        middleware = ProfilingMiddleware(self.view)
+
+        response = middleware(RequestFactory().get("/api/items/", HTTP_X_PROFILE=make_token()))
+
+        assert (profiles / response["X-Profile"]).exists()
+        assert any("TestProfilingMiddleware.view" in stack for stack in read_profile(profiles / response["X-Profile"]))
+
+    def test_cookie(self, profiles, settings):
+        request = RequestFactory().get("/")
+        request.COOKIES[settings.PROFILING_COOKIE] = make_token()
+
+        assert "X-Profile" in ProfilingMiddleware(self.view)(request)
+
+    def test_requests_without_a_valid_token_are_not_profiled(self, profiles):
+        middleware = ProfilingMiddleware(self.view)
+
+        assert "X-Profile" not in middleware(RequestFactory().get("/"))
+        assert "X-Profile" not in middleware(RequestFactory().get("/", HTTP_X_PROFILE="staff:forged"))
+        assert list(profiles.iterdir()) == []
+
+    def test_disabled(self, settings):
+        settings.PROFILING_ENABLED = False
+
+        with pytest.raises(MiddlewareNotUsed):
+            ProfilingMiddleware(self.view)
+
+
+class TestSignalProfile:
+    """Tests for profiling a whole worker on a signal."""
+
+    def test_signal_starts_and_stops_a_profile(self, profiles, settings):
+        settings.PROFILING_SIGNAL_SECONDS = 60
+        previous = signal.signal(signal.SIGUSR2, profiling.toggle_signal_profile)
+        try:
+            os.kill(os.getpid(), signal.SIGUSR2)
+            busy(0.05)
+            os.kill(os.getpid(), signal.SIGUSR2)
+            for _ in range(100):
+                if profiling._signal_profile is None:
+                    break
+                time.sleep(0.01)
+        finally:
+            signal.signal(signal.SIGUSR2, previous)
+
+        [path] = profiles.glob("*-worker.collapsed")
+        assert any(stack.startswith("MainThread;") for stack in read_profile(path))
+
+
+@pytest.mark.django_db
+class TestProfilingToggle:
+    """Tests for the staff-only /admin/profiling/ toggle."""
+
+    def test_staff_only(self, client):
+        assert client.post("/admin/profiling/").status_code == 302
+        assert "profile" not in client.cookies
+
+    def test_toggle(self, admin_client, settings):
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        assert b"Profiling is off" in admin_client.get("/admin/profiling/").content
+        admin_client.post("/admin/profiling/")
+        assert check_token(admin_client.cookies[settings.PROFILING_COOKIE].value)
+
+        admin_client.post("/admin/profiling/")
+        assert admin_client.cookies[settings.PROFILING_COOKIE].value == ""
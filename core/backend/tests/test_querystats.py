@@ -0,0 +1,164 @@
+"""Tests for the pg_stat_statements query report."""
+
+import json
+from io import StringIO
+from unittest.mock import Mock
+
+import pytest
+from django.core.management import call_command
+
+from core.backend import querystats
+from core.backend.querystats import StatsUnavailable
+
+
+def statement(queryid, calls, total_ms, query="SELECT 1"):
+    return {
+        "queryid": queryid,
+        "query": query,
+        "calls": calls,
+        "total_ms": total_ms,
+        "rows": calls,
+        "blks_hit": 9 * calls,
+        "blks_read": calls,
+    }
+
+
+@pytest.fixture
+def snapshots(settings, tmp_path):
+    settings.QUERY_SNAPSHOT_DIR = str(tmp_path)
+    return tmp_path
+
+
+class TestTagging:
+    """Tests for the call-site comments."""
+
+    def test_call_site_is_appended(self):
+        execute = Mock()
+
+        querystats.tag_queries(execute, "SELECT 1", None, False, {})
+
+        sql = execute.call_args.args[0]
+        path, function = querystats.parse_call_site(sql)
+        assert sql.startswith("SELECT 1 /*file='core/backend/tests/test_querystats.py:")
+        assert path.startswith("core/backend/tests/test_querystats.py:")
+        assert function == "test_call_site_is_appended"
+
+    def test_installed_first_and_once(self):
+        other = Mock()
+        connection = Mock(vendor="postgresql", execute_wrappers=[other])
+
+        querystats._tag_connection(None, connection)
+        querystats._tag_connection(None, connection)
+
+        assert connection.execute_wrappers == [querystats.tag_queries, other]
+
+    def test_other_databases_are_not_tagged(self):
+        connection = Mock(vendor="sqlite", execute_wrappers=[])
+        querystats._tag_connection(None, connection)
+        assert connection.execute_wrappers == []
+
+
+class TestReport:
+    """Tests for ranking statements and comparing snapshots."""
+
+    def test_top(self):
+        statements = {"1": statement("1", 1000, 500.0), "2": statement("2", 2, 300.0)}
+
+        assert [row["queryid"] for row in querystats.top(statements, "total")] == ["1", "2"]
+        by_mean = querystats.top(statements, "mean", limit=1)
+        assert [(row["queryid"], row["mean_ms"], row["hit_ratio"]) for row in by_mean] == [("2", 150.0, 0.9)]
+
+    def test_regressions_since_snapshot(self, snapshots):
+        querystats.save_snapshot("v1", {"1": statement("1", 100, 100.0), "2": statement("2", 100, 100.0)})
+        querystats.save_snapshot(
+            "v2", {"1": statement("1", 200, 200.0), "2": statement("2", 200, 200.0), "3": statement("3", 5, 1.0)}
+        )
+        current = {
+            "1": statement("1", 300, 500.0),  # 3ms a call since v2, 1ms before
+            "2": statement("2", 300, 300.0),
+            "3": statement("3", 50, 100.0),
+            "4": statement("4", 20, 40.0),
+        }
+
+        before, after = querystats.windows("v2", current)
+        assert before["1"]["calls"] == 100 and after["1"]["total_ms"] == 300.0
+        regressions = querystats.regressions(before, after)
+
+        # 3 had too few calls before v2 to compare: it counts as new
+        assert [(row["queryid"], row["change"]) for row in regressions] == [
+            ("1", pytest.approx(3.0)),
+            ("3", None),
+            ("4", None),
+        ]
+
+    def test_reset_counters(self):
+        window = querystats.delta({"1": statement("1", 5, 10.0)}, {"1": statement("1", 50, 100.0)})
+        assert window["1"]["calls"] == 5
+
+    def test_snapshot_names(self, snapshots):
+        with pytest.raises(ValueError):
+            querystats.save_snapshot("../v1", {})
+        with pytest.raises(StatsUnavailable):
+            querystats.windows("v1", {})
+
+    def test_index_suggestions(self):
+        plan = {
+            "Node Type": "Aggregate",
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "tasks_task", "Filter": "((worker)::text = 'queue'::text)"},
+                {"Node Type": "Seq Scan", "Relation Name": "tasks_task", "Filter": "((queue)::text = $1)"},
+                {"Node Type": "Seq Scan", "Relation Name": "small", "Filter": "(id = $1)"},
+            ],
+        }
+        tables = Mock(rows={"tasks_task": 50000, "small": 10})
+        tables.columns.return_value = (["id", "queue", "worker"], {"queue"})
+
+        suggestions = querystats.suggest_indexes(plan, tables)
+
+        # 'queue' in the literal isn't a column; queue already leads an index; small is small
+        assert [(suggestion["columns"], suggestion["sql"]) for suggestion in suggestions] == [
+            (["worker"], 'CREATE INDEX CONCURRENTLY ON "tasks_task" ("worker")')
+        ]
+
+
+class TestQueryReportCommand:
+    """Tests for `manage.py query_report` and /admin/queries/."""
+
+    @pytest.fixture
+    def statements(self, mocker):
+        query = "SELECT * FROM tasks_task WHERE id = $1 /*file='core/tasks/worker.py:88',func='claim'*/"
+        statements = {"1": statement("1", 10, 25.0, query)}
+        mocker.patch("core.backend.querystats.read_statements", return_value=statements)
+        return statements
+
+    def test_top_statements(self, statements):
+        out = StringIO()
+        call_command("query_report", stdout=out)
+
+        assert "core/tasks/worker.py:88 claim()" in out.getvalue()
+        assert "SELECT * FROM tasks_task WHERE id = $1\n" in out.getvalue()
+
+    def test_snapshot_and_diff(self, statements, snapshots):
+        call_command("query_report", snapshot="v1", stdout=StringIO())
+        statements["1"] = statement("1", 30, 225.0, statements["1"]["query"])
+
+        out = StringIO()
+        call_command("query_report", diff=["v1"], json=True, stdout=out)
+
+        [row] = json.loads(out.getvalue())
+        assert (row["before_ms"], row["mean_ms"]) == (2.5, 10.0)
+
+    def test_unavailable(self):
+        with pytest.raises(Exception, match="needs PostgreSQL"):
+            call_command("query_report", stdout=StringIO())
+
+    @pytest.mark.django_db
+    def test_admin_page(self, admin_client, statements, settings):
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        response = admin_client.get("/admin/queries/")
+
+        assert response.status_code == 200
+        assert b"core/tasks/worker.py:88" in response.content
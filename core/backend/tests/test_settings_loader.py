@@ -0,0 +1,103 @@
+"""Tests for the layered settings loader."""
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from core.backend.settings import loader
+
+
+def write_overlay(directory, name, source):
+    path = directory / name
+    path.write_text(source)
+    return path
+
+
+class TestCompileSettings:
+    """Tests for layering the environment module and local/ overlays."""
+
+    def test_without_overlays(self, tmp_path):
+        settings = loader.compile_settings("test", local_dir=tmp_path)
+
+        assert settings["DATABASES"]["default"]["ENGINE"] == "django.db.backends.sqlite3"
+        assert isinstance(settings["INSTALLED_APPS"], tuple)
+        assert "debug_toolbar" not in settings["INSTALLED_APPS"]
+
+    def test_overlays_merge_dicts_in_order(self, tmp_path):
+        write_overlay(tmp_path, "settings.py", 'LOGGING = {"root": {"level": "WARNING"}}\nFEATURE_FLAG = "all"\n')
+        write_overlay(
+            tmp_path,
+            "settings.test.py",
+            'LOGGING = {"root": {"level": "ERROR"}}\nINSTALLED_APPS = [*INSTALLED_APPS, "extra_app"]\n',
+        )
+
+        settings = loader.compile_settings("test", local_dir=tmp_path)
+
+        assert settings["LOGGING"]["root"] == {"handlers": ["console", "file"], "level": "ERROR"}
+        assert settings["LOGGING"]["handlers"]["console"]["formatter"] == "colored"
+        assert settings["FEATURE_FLAG"] == "all"
+        assert settings["INSTALLED_APPS"][-1] == "extra_app"
+
+    def test_overlays_do_not_touch_module_values(self, tmp_path):
+        from core.backend.settings import test as test_settings
+
+        write_overlay(tmp_path, "settings.py", 'LOGGING["root"]["level"] = "CRITICAL"\n')
+
+        assert loader.compile_settings("test", local_dir=tmp_path)["LOGGING"]["root"]["level"] == "CRITICAL"
+        assert test_settings.LOGGING["root"]["level"] == "DEBUG"
+
+    def test_invalid_overlay(self, tmp_path):
+        write_overlay(tmp_path, "settings.py", 'SECRET_KEY = ""\nMIDDLEWARE = [*MIDDLEWARE, MIDDLEWARE[0]]\n')
+
+        with pytest.raises(ImproperlyConfigured) as excinfo:
+            loader.compile_settings("test", local_dir=tmp_path)
+
+        assert "SECRET_KEY must be a non-empty string" in str(excinfo.value)
+        duplicate = "core.backend.middleware.admission.AdmissionMiddleware"
+        assert f"MIDDLEWARE contains duplicates: {duplicate}" in str(excinfo.value)
+
+    def test_unknown_environment(self, tmp_path):
+        with pytest.raises(ImproperlyConfigured, match="DJANGO_ENV must be one of"):
+            loader.compile_settings("staging", local_dir=tmp_path)
+
+
+class TestSnapshot:
+    """Tests for the compiled settings snapshot."""
+
+    def test_snapshot_is_reused(self, tmp_path, mocker):
+        snapshot_dir = tmp_path / "snapshots"
+        first = loader.load_settings("test", local_dir=tmp_path, snapshot_dir=snapshot_dir)
+        compile_settings = mocker.patch.object(loader, "compile_settings")
+
+        second = loader.load_settings("test", local_dir=tmp_path, snapshot_dir=snapshot_dir)
+
+        compile_settings.assert_not_called()
+        assert second == first
+        (snapshot,) = snapshot_dir.iterdir()
+        assert snapshot.stat().st_mode & 0o777 == 0o600
+
+    def test_key_tracks_referenced_variables_and_overlays(self, tmp_path):
+        key = loader.snapshot_key("test", tmp_path, environ={"POSTGRES_DB": "a"})
+
+        assert loader.snapshot_key("test", tmp_path, environ={"POSTGRES_DB": "a", "PWD": "/tmp"}) == key
+        assert loader.snapshot_key("test", tmp_path, environ={"POSTGRES_DB": "b"}) != key
+        write_overlay(tmp_path, "settings.test.py", "DEBUG = False\n")
+        assert loader.snapshot_key("test", tmp_path, environ={"POSTGRES_DB": "a"}) != key
+
+    def test_stale_snapshots_are_removed(self, tmp_path):
+        stale = tmp_path / "settings.test.0000000000000000.pickle"
+        stale.write_bytes(b"")
+
+        loader.write_snapshot(tmp_path / "settings.test.1111111111111111.pickle", {"DEBUG": True})
+
+        assert [path.name for path in tmp_path.iterdir()] == ["settings.test.1111111111111111.pickle"]
+
+    def test_unpicklable_settings_are_not_written(self, tmp_path):
+        assert loader.write_snapshot(tmp_path / "settings.dev.key.pickle", {"CALLBACK": lambda request: True}) is False
+        assert not list(tmp_path.iterdir())
+
+    def test_unwritable_snapshot_dir(self, tmp_path):
+        (tmp_path / "snapshots").write_text("")  # a file where the directory should be
+
+        settings = loader.load_settings("test", local_dir=tmp_path, snapshot_dir=tmp_path / "snapshots" / "dir")
+
+        assert settings["SECRET_KEY"]
@@ -10,8 +10,13 @@ from drf_spectacular.views import (
 from . import views
 
 urlpatterns = [
+    # Before admin.site.urls, whose catch-all would 404 it
+    path("admin/profiling/", views.profiling_toggle, name="profiling_toggle"),
+    path("admin/memory/", views.memory_report, name="memory_report"),
+    path("admin/queries/", views.query_report, name="query_report"),
     path("admin/", admin.site.urls),
     path("health/", views.health_check, name="health_check"),
+    path("images/<str:variant>/<path:name>", views.image_variant, name="image_variant"),
     path("", views.home_view, name="home"),
     # API documentation
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -19,6 +24,9 @@ urlpatterns = [
     path("api/schema/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
 ]
 
+if settings.BENCHMARK_VIEWS:
+    urlpatterns.append(path("bench/io/", views.io_benchmark, name="io_benchmark"))
+
 if settings.DEBUG:
     # Django Debug Toolbar
     try:
@@ -1,27 +1,42 @@
 import logging
 
 from django.conf import settings
-from django.db import connection
-from django.http import JsonResponse
-from django.shortcuts import render
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django_ratelimit.decorators import ratelimit
 
+from core.backend import querystats
+from core.backend.memory import read_reports
+from core.backend.middleware.cache_control import cache_policy
+from core.backend.profiling import check_token, make_token
+from core.general import variants
+
 logger = logging.getLogger(__name__)
 
 
+@cache_policy(max_age=60, s_maxage=600, stale_while_revalidate=30, keys=["pages"])
 @ratelimit(key="ip", rate=settings.RATELIMIT_RATE_DEFAULT, method="GET")
 def home_view(request):
     """
     Home page view with rate limiting.
     Rate limit configured in settings.RATELIMIT_RATE_DEFAULT (default: 60/m).
+    Cached by the CDN for 10 minutes (purge the "pages" key to refresh it),
+    so the rate limit only applies to requests that reach gunicorn.
     """
     context = {}
     return render(request, "pages/home.html", context)
 
 
 @csrf_exempt
+@transaction.non_atomic_requests
 @require_http_methods(["GET", "HEAD"])
 @ratelimit(key="ip", rate=settings.RATELIMIT_RATE_HEALTH, method="GET")
 def health_check(request):
@@ -36,6 +51,7 @@ def health_check(request):
     Rate limit configured in settings.RATELIMIT_RATE_HEALTH (default: 120/m).
     Higher rate limit than normal views to accommodate monitoring systems.
     Only GET and HEAD methods are allowed for security.
+    Read-only, so it is exempt from ATOMIC_REQUESTS (no BEGIN/COMMIT per probe).
     Returns JSON with status and database connectivity.
     """
     try:
@@ -69,6 +85,43 @@ def health_check(request):
         )
 
 
+@transaction.non_atomic_requests
+@require_http_methods(["GET"])
+def io_benchmark(request):
+    """
+    I/O-bound endpoint for the benchmark suite, routed only with BENCHMARK_VIEWS.
+    Spends its time waiting on PostgreSQL, where gevent workers serve other requests.
+    """
+    with connection.cursor() as cursor:
+        for _ in range(settings.BENCHMARK_IO_QUERIES):
+            cursor.execute("SELECT pg_sleep(%s)", [settings.BENCHMARK_IO_SECONDS])
+    return JsonResponse({"queries": settings.BENCHMARK_IO_QUERIES})
+
+
+@transaction.non_atomic_requests
+@require_http_methods(["GET", "HEAD"])
+def image_variant(request, variant, name):
+    """
+    Redirect to `variant` of the upload `name` once it's generated; until then
+    schedule its generation and redirect to the original (see core.general.variants).
+    """
+    if variant not in settings.IMAGE_VARIANTS or not variants.is_image(name):
+        raise Http404("No such image variant")
+    try:
+        generated = variants.variant_name(name, variant)
+    except (FileNotFoundError, NotADirectoryError, SuspiciousFileOperation):
+        raise Http404("No such image") from None
+
+    if default_storage.exists(generated):
+        response = redirect(default_storage.url(generated))
+        patch_cache_control(response, public=True, max_age=settings.IMAGE_VARIANTS_REDIRECT_MAX_AGE)
+    else:
+        variants.schedule(name)
+        response = redirect(default_storage.url(name))
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
 def ratelimit_view(request, exception):
     """
     Custom view for rate limit exceeded responses.
@@ -81,3 +134,77 @@ def ratelimit_view(request, exception):
         },
         status=429,
     )
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def profiling_toggle(request):
+    """
+    Turn per-request profiling on or off for the current browser.
+    Sets or clears the signed PROFILING_COOKIE read by ProfilingMiddleware.
+    """
+    enabled = check_token(request.COOKIES.get(settings.PROFILING_COOKIE, ""))
+    if request.method == "GET":
+        context = {
+            **admin.site.each_context(request),
+            "title": "Request profiling",
+            "enabled": enabled,
+            "directory": settings.PROFILING_DIR,
+        }
+        return render(request, "admin/profiling.html", context)
+
+    response = redirect(request.path)
+    if enabled:
+        response.delete_cookie(settings.PROFILING_COOKIE)
+    else:
+        response.set_cookie(
+            settings.PROFILING_COOKIE,
+            make_token(request.user.get_username()),
+            max_age=settings.PROFILING_TOKEN_MAX_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def memory_report(request):
+    """
+    Memory reports of every worker (RSS, growth over baseline, top growing
+    allocation sites), as written by core.backend.memory.
+    """
+    return JsonResponse({"workers": read_reports()})
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def query_report(request):
+    """
+    Top statements from pg_stat_statements by total and mean time, with their
+    call sites; ?explain=1 adds index suggestions, ?diff=<snapshot> shows the
+    regressions since a snapshot (see core.backend.querystats).
+    """
+    context = {
+        **admin.site.each_context(request),
+        "title": "Query report",
+        "snapshots": querystats.list_snapshots(),
+        "diff": request.GET.get("diff", ""),
+        "explain": request.GET.get("explain") == "1",
+    }
+    try:
+        statements = querystats.read_statements(connection)
+        if context["diff"]:
+            before, after = querystats.windows(context["diff"], statements)
+            context["regressions"] = querystats.regressions(before, after)
+        else:
+            context["by_total"] = querystats.top(statements, "total")
+            context["by_mean"] = querystats.top(statements, "mean")
+    except querystats.StatsUnavailable as exc:
+        context["error"] = str(exc)
+    else:
+        if context["explain"]:
+            for rows in (context.get("by_total"), context.get("by_mean"), context.get("regressions")):
+                querystats.advise(connection, rows or [])
+    return render(request, "admin/query_report.html", context)
@@ -2,6 +2,14 @@
 WSGI config for backend project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+With GUNICORN_WORKER_CLASS=gevent the standard library is monkey-patched
+before anything else is imported (see core.backend.green).
+The handler routes FAST_LANE_PATHS through a reduced middleware stack
+(see core.backend.handlers) and starts the worker heartbeat used by the
+container health probe (see core.backend.heartbeat), the memory monitor
+(see core.backend.memory), the PROFILING_SIGNAL handler (see
+core.backend.profiling) and the write buffer flushers (see
+core.general.db.buffer).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
@@ -9,8 +17,32 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from core.backend import green
+
+# Before Django is imported (see core.backend.green); a no-op for sync workers
+green.patch()
+
+import django  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from core.backend.handlers import FastLaneWSGIHandler  # noqa: E402
+from core.backend.heartbeat import start_heartbeat  # noqa: E402
+from core.backend.memory import start_memory_monitor  # noqa: E402
+from core.backend.profiling import install_signal_handler  # noqa: E402
+from core.general.db.buffer import start_write_buffers  # noqa: E402
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.backend.settings")
 
-application = get_wsgi_application()
+django.setup(set_prefix=False)
+
+if green.enabled():
+    # Refuse to serve from a worker that would block the gevent hub (gevent.E* checks)
+    call_command("check", tags=["gevent"])
+
+application = FastLaneWSGIHandler()
+
+# Gunicorn imports this module in every worker, so each one gets its own heartbeat and monitor
+start_heartbeat()
+start_memory_monitor()
+install_signal_handler()
+start_write_buffers()
@@ -0,0 +1,142 @@
+"""
+Admin base class for changelists over large tables.
+
+    from core.general.admin import PerformanceModelAdmin
+
+    @admin.register(Order)
+    class OrderAdmin(PerformanceModelAdmin):
+        list_display = ["id", "customer", "customer__country", "total"]
+        search_fields = ["reference", "customer__email"]
+
+PerformanceAdminMixin (mixed into PerformanceModelAdmin, or into another
+ModelAdmin such as UserAdmin) changes the stock changelist in four ways:
+
+- Counting: show_full_result_count is off, which drops the second COUNT(*)
+  over the unfiltered table, and EstimatedCountPaginator counts exactly only
+  up to `exact_count_limit` rows; past that it uses pg_class.reltuples
+  (unfiltered) or the planner's row estimate (filtered).
+- Deep pages: past `deferred_join_offset` rows a page first selects only the
+  primary keys (OFFSET over an index) and then loads those rows by key.
+- N+1: when `list_select_related` isn't set, it's derived from the foreign
+  key (and `fk__field`) entries of `list_display`, including nullable ones
+  that Django's default select_related() skips.
+- Search: terms shorter than `search_min_length` don't query at all (the
+  autocomplete widgets search on every keystroke), and `search_fields`
+  without a lookup prefix match with istartswith ("^") instead of
+  icontains, so a btree index on UPPER(column) can serve them. Set
+  `search_default_lookup = ""` to go back to icontains.
+"""
+
+import json
+
+from django.contrib import admin, messages
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.utils.functional import cached_property
+
+SEARCH_PREFIXES = ("^", "=", "@")
+
+
+def estimate_count(queryset):
+    """
+    PostgreSQL's estimate of the number of rows in `queryset`: reltuples for
+    an unfiltered table, the planner's row estimate otherwise. None on
+    other databases or when the table has never been analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    if not queryset.query.where and not queryset.query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] >= 0 else None
+
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Exact counts for small results, PostgreSQL estimates for large ones."""
+
+    exact_count_limit = 10_000
+    deferred_join_offset = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+
+        # Counting at most limit + 1 rows stays cheap however large the table is
+        bounded = queryset.order_by()[: self.exact_count_limit + 1].count()
+        if bounded <= self.exact_count_limit:
+            return bounded
+        estimate = estimate_count(queryset)
+        return max(bounded, estimate) if estimate is not None else queryset.count()
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if not isinstance(self.object_list, QuerySet) or bottom < self.deferred_join_offset:
+            return super().page(number)
+
+        # Late row lookup: walk the OFFSET over primary keys only, then fetch the page's rows
+        pks = list(self.object_list.values_list("pk", flat=True)[bottom : bottom + self.per_page])
+        return self._get_page(self.object_list.filter(pk__in=pks), number, self)
+
+
+class PerformanceAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_min_length = 3
+    search_default_lookup = "^"
+
+    def get_list_select_related(self, request):
+        if self.list_select_related is not False:
+            return self.list_select_related
+        return self.related_lookups(self.get_list_display(request)) or False
+
+    def related_lookups(self, list_display):
+        """The foreign key paths followed by `list_display` entries, for select_related()."""
+        lookups = []
+        for name in list_display:
+            if not isinstance(name, str) or hasattr(self, name):
+                continue  # callables and ModelAdmin methods can't be inspected
+            model, path = self.model, []
+            for part in name.split(LOOKUP_SEP):
+                try:
+                    field = model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    break
+                if not (field.many_to_one or field.one_to_one):
+                    break
+                path.append(part)
+                model = field.related_model
+            lookup = LOOKUP_SEP.join(path)
+            if lookup and lookup not in lookups:
+                lookups.append(lookup)
+        return lookups
+
+    def get_search_fields(self, request):
+        return [
+            field if field.startswith(SEARCH_PREFIXES) else f"{self.search_default_lookup}{field}"
+            for field in super().get_search_fields(request)
+        ]
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term and len(term) < self.search_min_length:
+            match = getattr(request, "resolver_match", None)
+            if match and match.url_name and match.url_name.endswith("_changelist"):
+                messages.info(request, f"Enter at least {self.search_min_length} characters to search.")
+            return queryset.none(), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class PerformanceModelAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    pass
@@ -0,0 +1,36 @@
+"""
+JSON renderer and parser built on pydantic-core.
+
+PydanticJSONRenderer serializes response data (including the pydantic models
+produced by core.general.api.serializers) straight to JSON bytes in Rust.
+Anything pydantic-core doesn't know how to serialize (lazy translation
+strings, querysets) goes through DRF's own JSONEncoder.
+"""
+
+import pydantic_core
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class PydanticJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        ret = pydantic_core.to_json(data, indent=indent, fallback=JSONEncoder().default)
+        # Same as JSONRenderer: U+2028/U+2029 are valid JSON but not valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class PydanticJSONParser(JSONParser):
+    renderer_class = PydanticJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return pydantic_core.from_json(stream.read() if stream else b"", allow_inf_nan=False)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from None
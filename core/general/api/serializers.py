@@ -0,0 +1,135 @@
+"""
+DRF serializer adapter for pydantic v2 models.
+
+PydanticSerializer.of(ItemIn, ItemOut) returns a serializer class that can be
+used anywhere DRF expects one (serializer_class, get_serializer, many=True,
+pagination). Input is validated by pydantic and output objects (ORM
+instances, dicts, models) are converted with from_attributes, both through a
+cached TypeAdapter, so a list of N items is validated in one call instead of
+N * fields Python-level field calls.
+
+`.data` holds pydantic model instances rather than dicts; render it with
+core.general.api.renderers.PydanticJSONRenderer, which serializes models
+straight to JSON bytes. `.validated_data` is a model instance; `.save()`
+passes it to create()/update() as a dict, like DRF does.
+
+Validation errors are reported as {"<dotted.location>": ["message", ...]}.
+"""
+
+from functools import cache
+
+from drf_spectacular.extensions import OpenApiSerializerExtension
+from drf_spectacular.plumbing import ResolvedComponent
+from pydantic import BaseModel, TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+from pydantic.json_schema import model_json_schema
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.settings import api_settings
+
+
+@cache
+def type_adapter(type_):
+    """Building a TypeAdapter compiles a validator/serializer; do it once per type."""
+    return TypeAdapter(type_)
+
+
+def validation_error(exc):
+    """Convert a pydantic ValidationError into a DRF ValidationError."""
+    detail = {}
+    for error in exc.errors(include_url=False):
+        key = ".".join(str(part) for part in error["loc"]) or api_settings.NON_FIELD_ERRORS_KEY
+        detail.setdefault(key, []).append(ErrorDetail(error["msg"], code=error["type"]))
+    return ValidationError(detail)
+
+
+class PydanticListSerializer(serializers.ListSerializer):
+    """Validates and converts the whole list with a single list[Model] adapter."""
+
+    def to_internal_value(self, data):
+        try:
+            return type_adapter(list[self.child.model]).validate_python(data)
+        except PydanticValidationError as exc:
+            raise validation_error(exc) from None
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, "all") else data
+        return type_adapter(list[self.child.output_model]).validate_python(list(iterable), from_attributes=True)
+
+    def save(self, **kwargs):
+        validated_data = [{**item.model_dump(), **kwargs} for item in self.validated_data]
+        self.instance = self.create(validated_data)
+        return self.instance
+
+
+class PydanticSerializer(serializers.BaseSerializer):
+    """
+    Serializer backed by a pydantic `model` (input) and `output_model`
+    (output, defaults to `model`). Create subclasses with `of()`.
+    """
+
+    model = None
+    output_model = None
+
+    class Meta:
+        list_serializer_class = PydanticListSerializer
+
+    @classmethod
+    def of(cls, model, output_model=None):
+        return _serializer_class(cls, model, output_model or model)
+
+    def to_internal_value(self, data):
+        try:
+            return type_adapter(self.model).validate_python(data)
+        except PydanticValidationError as exc:
+            raise validation_error(exc) from None
+
+    def to_representation(self, instance):
+        if isinstance(instance, self.output_model):
+            return instance
+        return type_adapter(self.output_model).validate_python(instance, from_attributes=True)
+
+    def save(self, **kwargs):
+        # BaseSerializer.save() unpacks validated_data as a mapping, which a model isn't
+        assert hasattr(self, "_errors"), "You must call `.is_valid()` before calling `.save()`."
+        assert not self.errors, "You cannot call `.save()` on a serializer with invalid data."
+
+        validated_data = {**self.validated_data.model_dump(), **kwargs}
+        if self.instance is not None:
+            self.instance = self.update(self.instance, validated_data)
+        else:
+            self.instance = self.create(validated_data)
+        return self.instance
+
+
+@cache
+def _serializer_class(base, model, output_model):
+    if not (issubclass(model, BaseModel) and issubclass(output_model, BaseModel)):
+        raise TypeError("PydanticSerializer.of() expects pydantic BaseModel subclasses")
+    name = f"{model.__name__}Serializer"
+    return type(name, (base,), {"model": model, "output_model": output_model, "__module__": base.__module__})
+
+
+class PydanticSerializerExtension(OpenApiSerializerExtension):
+    """
+    Document PydanticSerializer subclasses with pydantic's own JSON schema:
+    the input model for requests, the output model for responses.
+    """
+
+    target_class = "core.general.api.serializers.PydanticSerializer"
+    match_subclasses = True
+
+    def _model(self, direction):
+        return self.target.model if direction == "request" else self.target.output_model
+
+    def get_name(self, auto_schema, direction):
+        return self._model(direction).__name__
+
+    def map_serializer(self, auto_schema, direction):
+        mode = "validation" if direction == "request" else "serialization"
+        schema = model_json_schema(self._model(direction), ref_template="#/components/schemas/{model}", mode=mode)
+        for name, sub_schema in schema.pop("$defs", {}).items():
+            auto_schema.registry.register_on_missing(
+                ResolvedComponent(name=name, type=ResolvedComponent.SCHEMA, object=name, schema=sub_schema)
+            )
+        return schema
@@ -0,0 +1,41 @@
+"""
+Authentication backend that loads users and permissions through the
+queryset cache (see core.general.db.cache).
+
+ModelBackend queries the user on every authenticated request and the
+user's permissions on the first permission check of every request. With the
+user, group and permission tables tracked (QUERYSET_CACHE_MODELS) those
+queries are served from the cache until one of the tables is written to.
+Cached users include their password hash, so the cache must be as private as
+the database. It must also be shared by every process (Redis, not LocMem):
+otherwise a deactivation, password change or revoked permission only reaches
+the worker that made it, and the others keep the old user (and its sessions)
+for QUERYSET_CACHE_TIMEOUT. The caches.E001 check refuses a per-process cache.
+Opt in with AUTH_CACHED_BACKEND=true.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+
+
+def _cached(model):
+    return getattr(model, "cached", model._default_manager)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        user_model = get_user_model()
+        try:
+            user = _cached(user_model).get(pk=user_id)
+        except user_model.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    def _get_user_permissions(self, user_obj):
+        user_permissions_field = get_user_model()._meta.get_field("user_permissions")
+        return _cached(Permission).filter(**{user_permissions_field.related_query_name(): user_obj})
+
+    def _get_group_permissions(self, user_obj):
+        user_groups_field = get_user_model()._meta.get_field("groups")
+        return _cached(Permission).filter(**{f"group__{user_groups_field.related_query_name()}": user_obj})
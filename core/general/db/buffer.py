@@ -0,0 +1,287 @@
+"""
+Buffered bulk writes for high-volume rows (events, audit trails, page views).
+
+    from core.general.db.buffer import WriteBuffer
+
+    page_views = WriteBuffer(PageView)
+
+    def article(request, slug):
+        page_views.add(path=request.path, user_id=request.user.pk)
+        ...
+
+add() appends the row to an in-memory buffer and returns: no query, and
+nothing in the request transaction. In each gunicorn worker a flusher thread
+(started from wsgi.py) writes the buffer out once it holds WRITE_BUFFER_BATCH_SIZE
+rows or every WRITE_BUFFER_FLUSH_INTERVAL seconds, with PostgreSQL COPY or
+bulk_create(). Without a flusher (management commands, task workers, tests)
+add() writes a full batch itself, and the rest when the process exits. Either
+way no signals are sent and save() isn't called, as with bulk_create().
+
+Rows live outside the request transaction: they are written even if the
+request rolls back, and a few seconds late. Use them for data that can be
+late and can't be lost to a rollback, not for data the response depends on.
+
+Backpressure: the buffer holds at most WRITE_BUFFER_MAX_ROWS rows. When it's
+full, because the database is slow or down, add() waits up to
+WRITE_BUFFER_TIMEOUT seconds for room, then raises BufferFull. Callers that can
+drop rows check `buffer.pressure` (0.0 - 1.0) first.
+
+On a graceful shutdown (gunicorn's SIGTERM, max_requests, the memory monitor)
+the flusher writes what's left. Rows that still can't be written are spilled
+to WRITE_BUFFER_DIR as JSON lines and written by the next process that starts
+a flusher for the model.
+
+With WRITE_BUFFER_ENABLED = False add() writes each row right away, inside
+the caller's transaction (test settings).
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import Counter, deque
+from pathlib import Path
+
+from django.conf import settings
+from django.core import serializers
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+_buffers = weakref.WeakSet()
+_started = False  # start_write_buffers() ran in this process
+
+
+class BufferFull(Exception):
+    """The write buffer stayed full for longer than its timeout."""
+
+
+class WriteBuffer:
+    def __init__(
+        self,
+        model,
+        *,
+        max_rows=None,
+        batch_size=None,
+        flush_interval=None,
+        timeout=None,
+        method=None,
+        using=DEFAULT_DB_ALIAS,
+    ):
+        self.model = model
+        self.max_rows = max_rows or settings.WRITE_BUFFER_MAX_ROWS
+        self.batch_size = batch_size or settings.WRITE_BUFFER_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WRITE_BUFFER_FLUSH_INTERVAL
+        self.timeout = settings.WRITE_BUFFER_TIMEOUT if timeout is None else timeout
+        self.method = method or settings.WRITE_BUFFER_METHOD
+        self.using = using
+        self.stats = Counter()  # added, written, rejected, failed_flushes
+        self._reset()
+        _buffers.add(self)
+        if _started:
+            self.start()
+
+    def _reset(self):
+        self._rows = deque()
+        self._changed = threading.Condition()  # guards _rows
+        self._flushing = threading.Lock()  # one writer at a time
+        self._stopping = False
+        self._thread = None
+
+    def __repr__(self):
+        return f"<WriteBuffer {self.model._meta.label}: {len(self._rows)}/{self.max_rows} rows>"
+
+    @property
+    def pressure(self):
+        """How full the buffer is, from 0.0 to 1.0."""
+        return min(1.0, len(self._rows) / self.max_rows)
+
+    def add(self, obj=None, /, **fields):
+        """
+        Buffer a row: a model instance or its field values. Raises BufferFull
+        when the buffer has no room within WRITE_BUFFER_TIMEOUT seconds.
+        """
+        if obj is None:
+            obj = self.model(**fields)
+        if not settings.WRITE_BUFFER_ENABLED:
+            self._write([obj])
+            self.stats["added"] += 1
+            self.stats["written"] += 1
+            return
+
+        with self._changed:
+            if len(self._rows) >= self.max_rows:
+                self._changed.notify_all()
+                if not self._changed.wait_for(lambda: len(self._rows) < self.max_rows, self.timeout):
+                    self.stats["rejected"] += 1
+                    raise BufferFull(f"{self!r} stayed full for {self.timeout}s")
+            self._rows.append(obj)
+            self.stats["added"] += 1
+            full_batch = len(self._rows) >= self.batch_size
+            if full_batch:
+                self._changed.notify_all()
+        if full_batch and self._thread is None:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered row now, in the calling thread. Returns the number of rows written."""
+        written = 0
+        with self._flushing:
+            while True:
+                with self._changed:
+                    batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                    self._changed.notify_all()  # room for add() calls waiting on a full buffer
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    with self._changed:
+                        self._rows.extendleft(reversed(batch))
+                    self.stats["failed_flushes"] += 1
+                    raise
+                written += len(batch)
+                self.stats["written"] += len(batch)
+
+    def _write(self, objs):
+        connection = connections[self.using]
+        meta = self.model._meta
+        if self.method == "copy" and connection.vendor == "postgresql" and not meta.parents:
+            self._copy(objs, connection)
+        else:
+            self.model._base_manager.using(self.using).bulk_create(objs, batch_size=self.batch_size)
+
+    def _copy(self, objs, connection):
+        meta = self.model._meta
+        fields = [field for field in meta.concrete_fields if field is not meta.auto_field and not field.generated]
+        quote = connection.ops.quote_name
+        sql = f"COPY {quote(meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) FROM STDIN"
+        with connection.cursor() as cursor, cursor.copy(sql) as copy:
+            for obj in objs:
+                copy.write_row([field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields])
+
+    def _run(self):
+        replay_spilled(self)
+        while True:
+            with self._changed:
+                self._changed.wait_for(
+                    lambda: self._stopping or len(self._rows) >= self.batch_size, self.flush_interval
+                )
+                stopping = self._stopping
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing %r failed", self)
+                if stopping:
+                    return
+                time.sleep(self.flush_interval)  # the database is struggling: don't hammer it
+            finally:
+                close_old_connections()
+            if stopping:
+                return
+
+    def start(self):
+        """Start the flusher thread (idempotent) and write rows spilled by earlier processes."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"write-buffer:{self.model._meta.label}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        Stop the flusher after a last flush, and spill the rows that couldn't be
+        written. Returns the number of rows spilled.
+        """
+        thread = self._thread
+        if thread is not None:
+            with self._changed:
+                self._stopping = True
+                self._changed.notify_all()
+            thread.join(timeout)
+        if self._rows and (thread is None or not thread.is_alive()):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing %r on shutdown failed", self)
+        return spill(self)
+
+
+def spill(buffer):
+    """Move the buffer's rows to a file in WRITE_BUFFER_DIR. Returns the number of rows spilled."""
+    with buffer._changed:
+        rows = list(buffer._rows)
+        buffer._rows.clear()
+    if not rows:
+        return 0
+    path = Path(settings.WRITE_BUFFER_DIR) / f"{buffer.model._meta.label_lower}.{os.getpid()}.{time.time_ns()}.jsonl"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(serializers.serialize("jsonl", rows))
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.exception("Spilling %d row(s) of %s failed; they are lost", len(rows), buffer.model._meta.label)
+        return 0
+    logger.warning("Spilled %d unwritten row(s) of %s to %s", len(rows), buffer.model._meta.label, path)
+    return len(rows)
+
+
+def replay_spilled(buffer):
+    """Write the rows earlier processes spilled for the buffer's model. Returns the number written."""
+    directory = Path(settings.WRITE_BUFFER_DIR)
+    written = 0
+    for path in sorted(directory.glob(f"{buffer.model._meta.label_lower}.*.jsonl")):
+        claimed = path.with_suffix(f".{os.getpid()}.replaying")
+        try:
+            os.replace(path, claimed)  # another worker may be replaying it already
+        except FileNotFoundError:
+            continue
+        try:
+            objs = [item.object for item in serializers.deserialize("jsonl", claimed.read_text())]
+            for start in range(0, len(objs), buffer.batch_size):
+                buffer._write(objs[start : start + buffer.batch_size])
+        except Exception:
+            logger.exception("Replaying %s failed; will retry on the next start", path)
+            os.replace(claimed, path)
+            continue
+        claimed.unlink()
+        written += len(objs)
+        logger.info("Replayed %d spilled row(s) of %s from %s", len(objs), buffer.model._meta.label, path)
+    return written
+
+
+def start_write_buffers():
+    """
+    Start a flusher thread for every write buffer of this process, and for
+    those created later. Called from wsgi.py, which gunicorn imports in every
+    worker (no --preload).
+    """
+    global _started
+
+    if not settings.WRITE_BUFFER_ENABLED or _started:
+        return
+    _started = True
+    for buffer in list(_buffers):
+        buffer.start()
+
+
+def stop_write_buffers():
+    """Flush, or spill, every write buffer of this process. Runs at interpreter exit."""
+    deadline = time.monotonic() + settings.WRITE_BUFFER_SHUTDOWN_TIMEOUT
+    for buffer in list(_buffers):
+        buffer.stop(timeout=max(0.0, deadline - time.monotonic()))
+
+
+def _after_fork_in_child():
+    global _started
+
+    # The parent's rows are the parent's to write; its flusher threads didn't survive the fork
+    _started = False
+    for buffer in list(_buffers):
+        buffer._reset()
+
+
+atexit.register(stop_write_buffers)
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,293 @@
+"""
+Cached querysets, invalidated through per-table generation counters.
+
+    from core.general.db.cache import CachedManager
+
+    class Country(models.Model):
+        ...
+        objects = models.Manager()
+        cached = CachedManager()
+
+    Country.cached.filter(continent="EU")  # one query per QUERYSET_CACHE_TIMEOUT, until a write
+
+Models the project doesn't define (auth.User, auth.Permission, ...) get a
+`cached` manager from QUERYSET_CACHE_MODELS.
+
+Every table has a generation counter in the cache. A cached result is keyed
+on its SQL, parameters and result shape plus the generations of every table
+the SQL mentions, so bumping one counter orphans every result read from that
+table. The orphaned entries expire on their own.
+
+post_save, post_delete and m2m_changed bump the counters of the cached models
+and the models they relate to, and so do the CachedQuerySet's update(),
+bulk_create() and bulk_update(). In a transaction the bump waits for the
+commit. Until then, queries over the tables the transaction wrote skip the
+cache, so they see its own writes and keep them out of the cache. Writes that
+send no signal (`objects.update()`, raw SQL) need an explicit
+invalidate(Model). Queries over tables nothing keeps counters for, and
+SELECT ... FOR UPDATE, skip the cache.
+
+Counters live in the QUERYSET_CACHE_ALIAS cache, so invalidation reaches
+every process that shares it, such as Redis in prod.py. A LocMem cache is
+per process: there, only the process that wrote sees the write before
+QUERYSET_CACHE_TIMEOUT.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from functools import cache, partial
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "qc:gen:{}"
+RESULT_KEY = "qc:{}"
+QUOTED_NAME_RE = re.compile(r'"([^"]+)"')
+MISS = object()
+
+_tracked = {}  # db_table -> model whose writes bump the table's generation
+_stats = defaultdict(Counter)  # db_table -> hits/misses/bypassed
+_lookups = 0
+_next_warning = 0.0
+
+
+def get_cache():
+    return caches[settings.QUERYSET_CACHE_ALIAS]
+
+
+def _tables(model):
+    meta = model._meta.concrete_model._meta
+    return {meta.db_table, *(parent._meta.db_table for parent in meta.get_parent_list())}
+
+
+@cache
+def _known_tables():
+    return {model._meta.db_table for model in apps.get_models(include_auto_created=True)}
+
+
+def _dirty_tables(using):
+    """Tables written by the open transaction on `using`, whose generations are bumped on commit."""
+    connection = connections[using]
+    dirty = getattr(connection, "queryset_cache_dirty", None)
+    if dirty is None or (dirty and not connection.in_atomic_block):
+        dirty = connection.queryset_cache_dirty = set()  # committed or rolled back since
+    return dirty
+
+
+def _warn(message):
+    global _next_warning
+
+    now = time.monotonic()
+    if now >= _next_warning:
+        logger.warning(message, exc_info=True)
+        _next_warning = now + 60
+
+
+def bump(tables):
+    """Move the generation of `tables` on, orphaning every result cached from them."""
+    store = get_cache()
+    for table in tables:
+        key = GENERATION_KEY.format(table)
+        try:
+            try:
+                store.incr(key)
+            except ValueError:
+                # Never read or evicted: a fresh counter must not repeat an old generation
+                store.set(key, time.time_ns(), None)
+        except Exception:
+            _warn("Queryset cache unavailable, generation not bumped")
+
+
+def invalidate(*models, using=DEFAULT_DB_ALIAS):
+    """Orphan the cached results that read from the tables of `models`, once the transaction commits."""
+    tables = set().union(*(_tables(model) for model in models))
+    if connections[using].in_atomic_block:
+        _dirty_tables(using).update(tables)
+        transaction.on_commit(partial(_committed, tables, using), using=using)
+    else:
+        bump(tables)
+
+
+def _committed(tables, using):
+    bump(tables)
+    _dirty_tables(using).difference_update(tables)
+
+
+def _saved_or_deleted(sender, using, **kwargs):
+    invalidate(sender, using=using)
+
+
+def _m2m_changed(sender, action, using, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate(sender, using=using)
+
+
+def _related_models(model):
+    related = {model, *model._meta.get_parent_list()}
+    for field in model._meta.get_fields(include_hidden=True):
+        if not field.is_relation or field.related_model is None:
+            continue
+        related.add(field.related_model)
+        through = getattr(field, "through", None) or getattr(field.remote_field, "through", None)
+        if field.many_to_many and through is not None:
+            related.add(through)
+    return {model._meta.concrete_model for model in related if not isinstance(model, str)}
+
+
+def track(model):
+    """Keep generation counters for `model`'s tables and those of the models it relates to."""
+    for related in _related_models(model):
+        table = related._meta.db_table
+        if table in _tracked:
+            continue
+        _tracked[table] = related
+        uid = f"queryset_cache:{related._meta.label}"
+        post_save.connect(_saved_or_deleted, sender=related, weak=False, dispatch_uid=uid)
+        post_delete.connect(_saved_or_deleted, sender=related, weak=False, dispatch_uid=uid)
+        if related._meta.auto_created:
+            m2m_changed.connect(_m2m_changed, sender=related, weak=False, dispatch_uid=uid)
+
+
+def install():
+    """
+    Add a `cached` manager to QUERYSET_CACHE_MODELS and track every model
+    with a CachedManager. Called from the backend AppConfig.ready().
+    """
+    for label in settings.QUERYSET_CACHE_MODELS:
+        model = apps.get_model(label)
+        if not isinstance(getattr(model, "cached", None), CachedManager):
+            # An inherited default manager (User.objects) would lose to one added to the model itself
+            model._meta.default_manager_name = model._meta.default_manager.name
+            model.add_to_class("cached", CachedManager())
+    for model in apps.get_models():
+        if any(isinstance(manager, CachedManager) for manager in model._meta.managers):
+            track(model)
+
+
+def _record(table, outcome):
+    global _lookups
+
+    _stats[table][outcome] += 1
+    _lookups += 1
+    every = settings.QUERYSET_CACHE_REPORT_EVERY
+    if every and _lookups % every == 0:
+        logger.info(
+            "Queryset cache: %s",
+            ", ".join(f"{table} {entry['hit_ratio']:.0%} of {entry['lookups']}" for table, entry in stats().items()),
+        )
+
+
+def stats():
+    """Hits, misses, bypassed lookups and hit ratio per model table, for this process."""
+    report = {}
+    for table, counts in sorted(_stats.items()):
+        cacheable = counts["hits"] + counts["misses"]
+        report[table] = {
+            "hits": counts["hits"],
+            "misses": counts["misses"],
+            "bypassed": counts["bypassed"],
+            "lookups": cacheable + counts["bypassed"],
+            "hit_ratio": counts["hits"] / cacheable if cacheable else 0.0,
+        }
+    return report
+
+
+def reset_stats():
+    global _lookups
+
+    _stats.clear()
+    _lookups = 0
+
+
+class CachedQuerySet(models.QuerySet):
+    """QuerySet whose rows and count() come from the cache while its tables are unchanged."""
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._cached("rows", lambda: list(self._iterable_class(self)))
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached("count", super().count)
+
+    def _cached(self, kind, fetch):
+        table = self.model._meta.db_table
+        if not settings.QUERYSET_CACHE_ENABLED or self.query.select_for_update:
+            return fetch()
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return fetch()
+        tables = set(QUOTED_NAME_RE.findall(sql)) & _known_tables()
+        if not tables.issubset(_tracked) or tables & _dirty_tables(self.db):
+            _record(table, "bypassed")
+            return fetch()
+
+        store = get_cache()
+        try:
+            generations = self._generations(store, sorted(tables))
+            shape = (self.model._meta.label, self._iterable_class.__name__, self._fields)
+            digest = hashlib.sha1(repr((self.db, kind, shape, sql, params, generations)).encode()).hexdigest()
+            key = RESULT_KEY.format(digest)
+            result = store.get(key, MISS)
+        except Exception:
+            _warn("Queryset cache unavailable, querying the database")
+            return fetch()
+        if result is not MISS:
+            _record(table, "hits")
+            return result
+
+        _record(table, "misses")
+        result = fetch()
+        if kind != "rows" or len(result) <= settings.QUERYSET_CACHE_MAX_ROWS:
+            try:
+                store.set(key, result, settings.QUERYSET_CACHE_TIMEOUT)
+            except Exception:
+                _warn("Queryset cache unavailable, result not stored")
+        return result
+
+    def _generations(self, store, tables):
+        keys = [GENERATION_KEY.format(table) for table in tables]
+        found = store.get_many(keys)
+        for key in keys:
+            if key not in found:
+                store.add(key, time.time_ns(), None)
+                found[key] = store.get(key)
+        return [found[key] for key in keys]
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        invalidate(self.model, using=self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        invalidate(self.model, using=self.db)
+        return created
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        invalidate(self.model, using=self.db)
+        return rows
+
+    bulk_update.alters_data = True
+
+
+class CachedManager(models.Manager.from_queryset(CachedQuerySet)):
+    pass
@@ -0,0 +1,319 @@
+"""
+Lock-aware linting of migrations before they run against a live database.
+
+Most schema changes take an ACCESS EXCLUSIVE lock on their table: no reads
+or writes until they finish. That's a moment for adding a nullable column,
+but building an index, validating a constraint or rewriting a table holds it
+for as long as the table takes to scan, and every request touching the table
+queues behind it (and blocks the lock for those behind them). lint() finds
+these operations in the pending migrations:
+
+    migrations.E001  AddIndex: CREATE INDEX blocks writes for the whole build
+    migrations.E002  AddField / AlterField that creates an index (db_index, unique, ForeignKey)
+    migrations.E003  AddConstraint: validates every row under ACCESS EXCLUSIVE
+    migrations.E004  AlterField changing the column type: rewrites the table
+    migrations.E005  AlterField making a column NOT NULL: scans the table
+    migrations.W006  RunPython in a migration that also changes the schema:
+                     the data migration runs while holding the schema locks
+    migrations.W007  RunSQL with CREATE INDEX, ADD CONSTRAINT, SET NOT NULL, ALTER COLUMN TYPE
+                     or a generated STORED column
+    migrations.E008  Adding a generated STORED column: rewrites the table
+    migrations.W009  RunPython in an app whose tables already exist (and that creates
+                     none): the data migration updates them in one transaction,
+                     holding its row locks until the end
+
+The raw SQL operations of core/general/db/search.py (AddSearchVector,
+AddTrigramIndex) are linted from the SQL they'd run, under the same rules.
+
+E001-E005 and E008 are Errors when PostgreSQL estimates the table at
+MIGRATION_LINT_LARGE_TABLE_ROWS rows or more, Warnings (W001-W005) when it's
+smaller or the size is unknown; W006, W007 and W009 are always Warnings. Tables that don't exist yet, or are created
+by the same migration, are empty and never flagged. core/general/db/operations.py
+has the replacements; a migration that knows better lists the rules to skip:
+
+    class Migration(migrations.Migration):
+        lint_ignore = ["add-index"]  # a lookup table with a handful of rows
+
+The `migrations` system check runs lint() before `migrate` applies anything,
+including the `migrate` run by boot.py (see core/backend/management/commands/migrate.py);
+`manage.py lint_migrations` lints on demand or in CI.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddConstraintNotValid, AddIndexConcurrently
+from django.core.checks import Error, Warning
+from django.db import migrations
+from django.db.migrations.executor import MigrationExecutor
+
+from core.general.db.search import PostgresOnlyOperation
+
+RULES = {
+    "add-index": (1, "use core.general.db.operations.AddIndexConcurrently in a migration with atomic = False"),
+    "field-index": (
+        2,
+        "add the field with db_index=False / db_constraint=False first, then AddIndexConcurrently "
+        "(and AddConstraintNotValid + ValidateConstraint for foreign keys)",
+    ),
+    "add-constraint": (
+        3,
+        "use AddConstraintNotValid, then ValidateConstraint in a separate transaction (atomic = False); "
+        "for a UniqueConstraint, build a unique index with AddIndexConcurrently first",
+    ),
+    "alter-type": (4, "add a new column, backfill it with BatchedBackfill, then switch over in code"),
+    "set-not-null": (
+        5,
+        "add a CHECK (column IS NOT NULL) with AddConstraintNotValid and ValidateConstraint first; "
+        "PostgreSQL 12+ then sets NOT NULL without a scan",
+    ),
+    "mixed-runpython": (6, "move the data migration to its own migration, or use BatchedBackfill with atomic = False"),
+    "run-sql": (7, "use CONCURRENTLY / NOT VALID, or the operations in core.general.db.operations"),
+    "rewrite-table": (8, "add the column in a maintenance window, or before the table grows"),
+    "run-python": (9, "update existing rows with BatchedBackfill in a migration with atomic = False"),
+}
+ADVISORY_RULES = {"mixed-runpython", "run-sql", "run-python"}  # always warnings: the table can't be known
+
+SQL_RULES = {  # rule -> the blocking statements it covers
+    "add-index": r"\bCREATE\s+(UNIQUE\s+)?INDEX\s+(?!CONCURRENTLY)",
+    "add-constraint": r"\bADD\s+CONSTRAINT\b(?!.*\bNOT\s+VALID\b)",
+    "set-not-null": r"\bSET\s+NOT\s+NULL\b",
+    "alter-type": r"\bALTER\s+COLUMN\s+\w+\s+(SET\s+DATA\s+)?TYPE\b",
+    "rewrite-table": r"\bGENERATED\s+ALWAYS\s+AS\b(?=.*\bSTORED\b)",
+}
+SQL_RULES = {rule: re.compile(pattern, re.IGNORECASE | re.DOTALL) for rule, pattern in SQL_RULES.items()}
+BLOCKING_SQL = re.compile("|".join(pattern.pattern for pattern in SQL_RULES.values()), re.IGNORECASE | re.DOTALL)
+SCHEMA_OPERATIONS = (
+    migrations.CreateModel,
+    migrations.DeleteModel,
+    migrations.AddField,
+    migrations.AlterField,
+    migrations.RemoveField,
+    migrations.RenameField,
+    migrations.AddIndex,
+    migrations.RemoveIndex,
+    migrations.AddConstraint,
+    migrations.RemoveConstraint,
+)
+
+
+@dataclass
+class Finding:
+    rule: str
+    migration: object
+    operation: object
+    table: str | None
+    message: str
+    rows: int | None = None  # PostgreSQL's estimate; None when unknown
+
+    def is_error(self, large_table_rows):
+        return self.rule not in ADVISORY_RULES and self.rows is not None and self.rows >= large_table_rows
+
+    def to_check_message(self, large_table_rows):
+        number, hint = RULES[self.rule]
+        level, letter = (Error, "E") if self.is_error(large_table_rows) else (Warning, "W")
+        size = f" (~{self.rows} rows)" if self.rows is not None else ""
+        return level(
+            f"{self.message}{size}",
+            hint=f"{hint}, or add {self.rule!r} to the migration's lint_ignore",
+            obj=self.migration,
+            id=f"migrations.{letter}{number:03}",
+        )
+
+
+def lint(connection, all_migrations=False):
+    """
+    Return the Findings for the migrations `migrate` would apply on `connection`,
+    or for every migration when `all_migrations` is set.
+    """
+    executor = MigrationExecutor(connection)
+    loader = executor.loader
+    if all_migrations:
+        plan = []
+        for leaf in loader.graph.leaf_nodes():
+            plan.extend(key for key in loader.graph.forwards_plan(leaf) if key not in plan)
+        migration_list = [loader.graph.nodes[key] for key in plan]
+        existing_tables = None  # lint as if every table already held data
+    else:
+        migration_list = [
+            migration for migration, backwards in executor.migration_plan(loader.graph.leaf_nodes()) if not backwards
+        ]
+        existing_tables = set(connection.introspection.table_names())
+
+    findings = []
+    row_estimates = RowEstimates(connection)
+    for migration in migration_list:
+        ignored = set(getattr(migration, "lint_ignore", ()))
+        state = loader.project_state((migration.app_label, migration.name), at_end=False)
+        for finding in lint_migration(connection, migration, state, existing_tables):
+            if finding.rule in ignored:
+                continue
+            if finding.table is not None:
+                if existing_tables is not None and finding.table not in existing_tables:
+                    continue  # created earlier in the plan: empty when this runs
+                finding.rows = row_estimates[finding.table]
+            findings.append(finding)
+    return findings
+
+
+def lint_migration(connection, migration, state, existing_tables=None):
+    """
+    Yield the Findings for a migration's operations, applying them to `state`,
+    the project state before it. `existing_tables` are the tables in the
+    database, None to treat every table in `state` as existing.
+    """
+    app_label = migration.app_label
+    created = {  # models created by this migration: empty, nothing to lock
+        (app_label, operation.name_lower)
+        for operation in migration.operations
+        if isinstance(operation, migrations.CreateModel)
+    }
+    changes_schema = any(
+        isinstance(operation, SCHEMA_OPERATIONS) and model_key(app_label, operation) not in created
+        for operation in migration.operations
+    )
+    has_data = any(  # the app's tables this migration finds in place
+        key not in created and (existing_tables is None or table_name(model_state) in existing_tables)
+        for key, model_state in state.models.items()
+        if key[0] == app_label
+    )
+
+    for operation in migration.operations:
+        key = model_key(app_label, operation)
+        if key not in created and key in state.models:
+            if isinstance(operation, PostgresOnlyOperation):
+                yield from lint_sql_operation(connection, migration, operation, state)
+            else:
+                yield from lint_operation(connection, migration, operation, state.models[key])
+
+        if isinstance(operation, migrations.RunPython):
+            if changes_schema:
+                message = "RunPython runs in the same migration as schema changes"
+                yield Finding("mixed-runpython", migration, operation, None, message)
+            elif has_data and not created and in_transaction(migration, operation):  # else filling new tables
+                message = f"RunPython runs in one transaction over the existing tables of {app_label}"
+                yield Finding("run-python", migration, operation, None, message)
+        elif isinstance(operation, migrations.RunSQL):
+            sql = operation.sql if isinstance(operation.sql, str) else " ".join(map(str, operation.sql))
+            match = BLOCKING_SQL.search(sql)
+            if match:
+                statement = " ".join(match.group(0).split()).upper()
+                yield Finding("run-sql", migration, operation, None, f"RunSQL runs a blocking {statement}")
+
+        operation.state_forwards(app_label, state)
+
+
+def model_key(app_label, operation):
+    name = getattr(operation, "model_name_lower", None) or getattr(operation, "name_lower", None)
+    if name is None and isinstance(operation, PostgresOnlyOperation):
+        name = operation.model_name.lower()
+    return app_label, name or ""
+
+
+def in_transaction(migration, operation):
+    return operation.atomic if operation.atomic is not None else migration.atomic
+
+
+def table_name(model_state):
+    return model_state.options.get("db_table") or f"{model_state.app_label}_{model_state.name_lower}"
+
+
+def lint_sql_operation(connection, migration, operation, state):
+    """Yield the Findings for the PostgreSQL statements a PostgresOnlyOperation would run."""
+    model = state.apps.get_model(migration.app_label, operation.model_name)
+    table = model._meta.db_table
+    name = operation.__class__.__name__
+    for sql in operation.forwards_sql(model, connection.ops.quote_name):
+        for rule, pattern in SQL_RULES.items():
+            match = pattern.search(sql)
+            if match is None:
+                continue
+            if rule == "rewrite-table":
+                message = f"{name} adds a generated STORED column and rewrites {table}"
+            else:
+                message = f"{name} runs a blocking {' '.join(match.group(0).split()).upper()} on {table}"
+            yield Finding(rule, migration, operation, table, message)
+
+
+def lint_operation(connection, migration, operation, model_state):
+    """Yield the Findings for an operation on the existing model described by `model_state`."""
+    table = table_name(model_state)
+
+    def finding(rule, message):
+        return Finding(rule, migration, operation, table, message)
+
+    if isinstance(operation, migrations.AddIndex) and not isinstance(operation, AddIndexConcurrently):
+        yield finding("add-index", f"AddIndex {operation.index.name} blocks writes to {table}")
+    elif isinstance(operation, migrations.AddConstraint) and not isinstance(operation, AddConstraintNotValid):
+        yield finding("add-constraint", f"AddConstraint {operation.constraint.name} locks {table} to validate it")
+    elif isinstance(operation, migrations.AddField):
+        if creates_index(None, operation.field):
+            yield finding("field-index", f"AddField {operation.name} builds an index on {table}")
+    elif isinstance(operation, migrations.AlterField):
+        old, new = model_state.fields[operation.name], operation.field
+        if creates_index(old, new):
+            yield finding("field-index", f"AlterField {operation.name} builds an index on {table}")
+        if rewrites_column(connection, old, new):
+            yield finding(
+                "alter-type",
+                f"AlterField {operation.name} changes {old.db_type(connection)} to {new.db_type(connection)} "
+                f"and rewrites {table}",
+            )
+        if old.null and not new.null:
+            yield finding("set-not-null", f"AlterField {operation.name} scans {table} to SET NOT NULL")
+
+
+def creates_index(old, new):
+    """Whether altering `old` (None when added) into `new` creates an index."""
+
+    def indexed(field):
+        if field is None or field.many_to_many:
+            return False  # a ManyToManyField adds a table of its own
+        return bool(field.db_index or field.unique or (field.remote_field and field.db_constraint))
+
+    return indexed(new) and not indexed(old) and not new.primary_key
+
+
+VARCHAR = re.compile(r"varchar\((\d+)\)")
+
+
+def rewrites_column(connection, old, new):
+    """Whether the column type change rewrites the table (widening a varchar, or to text, doesn't)."""
+    if old.is_relation or new.is_relation:
+        return False  # the type follows the target's primary key, unresolved in migration state
+    old_type, new_type = old.db_type(connection), new.db_type(connection)
+    if old_type == new_type or old_type is None or new_type is None:
+        return False
+    old_varchar, new_varchar = VARCHAR.fullmatch(old_type), VARCHAR.fullmatch(new_type)
+    if old_varchar and (new_type == "text" or (new_varchar and int(new_varchar[1]) >= int(old_varchar[1]))):
+        return False
+    return True
+
+
+class RowEstimates(dict):
+    """PostgreSQL's row estimate per table (pg_class.reltuples), looked up once; None elsewhere or if never analyzed."""
+
+    def __init__(self, connection):
+        super().__init__()
+        self.connection = connection
+
+    def __missing__(self, table):
+        rows = None
+        if self.connection.vendor == "postgresql":
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)",
+                    [self.connection.ops.quote_name(table)],
+                )
+                row = cursor.fetchone()
+            if row is not None and row[0] >= 0:
+                rows = int(row[0])
+        self[table] = rows
+        return rows
+
+
+def check_migrations(connection):
+    """The `migrations` system check for `connection`, see core/backend/checks.py."""
+    large_table_rows = settings.MIGRATION_LINT_LARGE_TABLE_ROWS
+    return [finding.to_check_message(large_table_rows) for finding in lint(connection)]
@@ -0,0 +1,187 @@
+"""
+Migration operations that don't stall a live PostgreSQL database.
+
+`migrate` runs on boot against the database that's serving traffic (see
+core/backend/boot.py), so a migration must not hold a lock that blocks
+reads or writes for longer than a moment. core/general/db/lint.py flags the
+operations that do; these are their replacements:
+
+    from core.general.db import operations as online
+
+    class Migration(migrations.Migration):
+        atomic = False  # CONCURRENTLY and batched backfills can't run in a transaction
+
+        operations = [
+            online.AddIndexConcurrently("task", models.Index(fields=["worker"], name="tasks_task_worker_idx")),
+            online.AddConstraintNotValid("task", models.CheckConstraint(condition=..., name="...")),
+            online.ValidateConstraint("task", "..."),
+            online.BatchedBackfill("task", values={"worker": ""}, filter=Q(worker__isnull=True)),
+        ]
+
+- AddIndexConcurrently / RemoveIndexConcurrently build and drop indexes
+  without blocking writes. A build interrupted by lock_timeout or a deploy
+  leaves an INVALID index behind; the next run drops and rebuilds it.
+- AddConstraintNotValid adds a check constraint that only applies to new
+  rows, taking its ACCESS EXCLUSIVE lock for a moment; ValidateConstraint
+  then checks the existing rows while allowing reads and writes.
+- BatchedBackfill updates existing rows in primary key order, one short
+  transaction per batch, instead of one UPDATE that locks the whole table.
+- RunPostgreSQL runs raw SQL for what the ORM can't express on every
+  database, like an index with a PostgreSQL operator class.
+
+On other databases (the SQLite test database) they fall back to the plain
+operation (RunPostgreSQL does nothing), so the same migrations apply everywhere.
+"""
+
+import time
+
+from django.contrib.postgres import operations as postgres
+from django.db import NotSupportedError, transaction
+from django.db.migrations.operations import AddConstraint, AddIndex, RemoveIndex, RunSQL
+from django.db.migrations.operations.base import Operation
+from django.db.models import Q
+
+
+def is_postgresql(schema_editor):
+    return schema_editor.connection.vendor == "postgresql"
+
+
+def index_is_valid(schema_editor, name):
+    """True for a usable index called `name`, False for an INVALID leftover, None when there's none."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", [schema_editor.quote_name(name)]
+        )
+        row = cursor.fetchone()
+    return None if row is None else row[0]
+
+
+class AddIndexConcurrently(postgres.AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY, resuming after an interrupted build. Needs `atomic = False`."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        self._ensure_not_in_transaction(schema_editor)
+        valid = index_is_valid(schema_editor, self.index.name)
+        if valid:
+            return  # built by an earlier run that didn't get to record the migration
+        if valid is False:
+            schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(self.index.name)}")
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(postgres.RemoveIndexConcurrently):
+    """DROP INDEX CONCURRENTLY. Needs `atomic = False`."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return RemoveIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return RemoveIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class AddConstraintNotValid(postgres.AddConstraintNotValid):
+    """A check constraint enforced for new rows only, until ValidateConstraint."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if not is_postgresql(schema_editor):
+            return AddConstraint.database_forwards(self, app_label, schema_editor, from_state, to_state)
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class ValidateConstraint(postgres.ValidateConstraint):
+    """Check existing rows against a NOT VALID constraint under a SHARE UPDATE EXCLUSIVE lock."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class RunPostgreSQL(RunSQL):
+    """RunSQL on PostgreSQL only; the SQL doesn't touch the migration state."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class BatchedBackfill(Operation):
+    """
+    Set `values` (field name -> value or expression) on the rows matching
+    `filter`, `batch_size` rows per transaction, pausing `pause` seconds
+    between batches. Needs `atomic = False` on PostgreSQL.
+    """
+
+    reduces_to_sql = False
+    reversible = True
+    atomic = False
+    elidable = True
+
+    def __init__(self, model_name, values, filter=None, batch_size=1000, pause=0.0):
+        self.model_name = model_name
+        self.values = values
+        self.filter = filter
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def deconstruct(self):
+        kwargs = {"model_name": self.model_name, "values": self.values}
+        if self.filter is not None:
+            kwargs["filter"] = self.filter
+        if self.batch_size != 1000:
+            kwargs["batch_size"] = self.batch_size
+        if self.pause:
+            kwargs["pause"] = self.pause
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        connection = schema_editor.connection
+        if is_postgresql(schema_editor) and connection.in_atomic_block:
+            raise NotSupportedError(
+                "BatchedBackfill commits every batch; set atomic = False on the migration "
+                "(one transaction would lock every row it updates until the end)."
+            )
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(connection.alias, model):
+            return
+        condition = self.filter if self.filter is not None else Q()
+        rows = model._base_manager.using(connection.alias).filter(condition).order_by("pk")
+        last_pk = None
+        while True:
+            batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            pks = list(batch.values_list("pk", flat=True)[: self.batch_size])
+            if not pks:
+                return
+            with transaction.atomic(using=connection.alias):
+                # re-checks the filter: rows may have changed since they were listed
+                rows.filter(pk__in=pks).update(**self.values)
+            last_pk = pks[-1]
+            if self.pause:
+                time.sleep(self.pause)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        pass  # the backfilled values are left in place
+
+    def describe(self):
+        return f"Backfill {', '.join(self.values)} on {self.model_name} in batches of {self.batch_size}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"backfill_{self.model_name.lower()}_{'_'.join(self.values)}"
@@ -0,0 +1,220 @@
+"""
+Migration operations for PostgreSQL full-text and trigram search.
+
+The operations are no-ops on other database vendors so the same migrations
+apply cleanly to the SQLite test database. Typical usage in a migration:
+
+    from core.general.db.search import search_index_operations
+
+    operations = [
+        *search_index_operations(
+            "article",
+            vector_fields=[("title", "A"), ("body", "B")],
+            trigram_fields=["title"],
+        ),
+    ]
+
+The generated `search_vector` column is not declared on the model; the
+`PostgresSearchFilter` backend references it by name.
+
+Locks: adding the generated STORED column rewrites the table under an ACCESS
+EXCLUSIVE lock, which blocks reads and writes for as long as the rewrite
+takes, and a plain CREATE INDEX blocks writes while it builds. With
+`concurrently=True`, in a migration with `atomic = False`, the indexes are
+built without blocking writes:
+
+    class Migration(migrations.Migration):
+        atomic = False
+
+        operations = search_index_operations("article", [("title", "A")], trigram_fields=["title"], concurrently=True)
+
+The rewrite can't be avoided, so add search to a large table in a
+maintenance window, or before it grows. The migration linter
+(core/general/db/lint.py) flags both.
+"""
+
+import re
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import NotSupportedError
+from django.db.migrations.operations.base import Operation
+
+from core.general.db.operations import index_is_valid
+
+SEARCH_WEIGHTS = ("A", "B", "C", "D")
+_IDENTIFIER_RE = re.compile(r"^\w+$")
+
+
+def _validate_identifier(value, what):
+    if not _IDENTIFIER_RE.match(value):
+        raise ValueError(f"Invalid {what}: {value!r}")
+    return value
+
+
+class PostgresOnlyOperation(Operation):
+    """
+    Base class for raw SQL operations that only apply to PostgreSQL.
+    Subclasses implement forwards_sql()/backwards_sql() for a concrete model.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+    concurrently = False  # builds its index with CONCURRENTLY: can't run in a transaction
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _execute(self, app_label, schema_editor, state, build_sql, forwards=False):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        if self.concurrently and schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                f"{self.__class__.__name__}(concurrently=True) can't run in a transaction; "
+                "set atomic = False on the migration."
+            )
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if forwards and self.concurrently and index_is_valid(schema_editor, self.get_index_name(model)) is False:
+            # Left INVALID by an interrupted build, which CREATE INDEX IF NOT EXISTS would skip
+            schema_editor.execute(self.drop_index_sql(model, schema_editor.quote_name))
+        for sql in build_sql(model, schema_editor.quote_name):
+            schema_editor.execute(sql)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, to_state, self.forwards_sql, forwards=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._execute(app_label, schema_editor, from_state, self.backwards_sql)
+
+    def create_index_sql(self, model, quote_name, using):
+        name, table = quote_name(self.get_index_name(model)), quote_name(model._meta.db_table)
+        if self.concurrently:
+            return f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING {using}"
+        return f"CREATE INDEX {name} ON {table} USING {using}"
+
+    def drop_index_sql(self, model, quote_name):
+        concurrently = "CONCURRENTLY " if self.concurrently else ""
+        return f"DROP INDEX {concurrently}IF EXISTS {quote_name(self.get_index_name(model))}"
+
+
+class AddSearchVector(PostgresOnlyOperation):
+    """
+    Add a stored generated `tsvector` column and a GIN index over it.
+
+    `fields` is a list of field names or `(field_name, weight)` tuples where
+    weight is one of A-D (default D). Adding the column rewrites the table under
+    ACCESS EXCLUSIVE; `concurrently` only spares writes during the index build.
+    """
+
+    def __init__(
+        self, model_name, fields, column="search_vector", config="english", index_name=None, concurrently=False
+    ):
+        self.model_name = model_name
+        self.concurrently = concurrently
+        self.fields = [tuple(field) if isinstance(field, list | tuple) else (field, "D") for field in fields]
+        self.column = _validate_identifier(column, "column name")
+        self.config = _validate_identifier(config, "text search config")
+        self.index_name = index_name
+        for _, weight in self.fields:
+            if weight not in SEARCH_WEIGHTS:
+                raise ValueError(f"Invalid search weight {weight!r}, expected one of {SEARCH_WEIGHTS}")
+
+    def deconstruct(self):
+        kwargs = {"model_name": self.model_name, "fields": self.fields}
+        if self.column != "search_vector":
+            kwargs["column"] = self.column
+        if self.config != "english":
+            kwargs["config"] = self.config
+        if self.index_name:
+            kwargs["index_name"] = self.index_name
+        if self.concurrently:
+            kwargs["concurrently"] = True
+        return self.__class__.__qualname__, [], kwargs
+
+    def get_index_name(self, model):
+        return self.index_name or f"{model._meta.db_table}_{self.column}_gin"[:63]
+
+    def vector_expression(self, model, quote_name):
+        parts = []
+        for field_name, weight in self.fields:
+            column = quote_name(model._meta.get_field(field_name).column)
+            parts.append(
+                f"setweight(to_tsvector('{self.config}'::regconfig, coalesce({column}::text, '')), '{weight}')"
+            )
+        return " || ".join(parts)
+
+    def forwards_sql(self, model, quote_name):
+        table = quote_name(model._meta.db_table)
+        column = quote_name(self.column)
+        return [
+            f"ALTER TABLE {table} ADD COLUMN {column} tsvector "
+            f"GENERATED ALWAYS AS ({self.vector_expression(model, quote_name)}) STORED",
+            self.create_index_sql(model, quote_name, f"GIN ({column})"),
+        ]
+
+    def backwards_sql(self, model, quote_name):
+        return [
+            self.drop_index_sql(model, quote_name),
+            f"ALTER TABLE {quote_name(model._meta.db_table)} DROP COLUMN IF EXISTS {quote_name(self.column)}",
+        ]
+
+    def describe(self):
+        return f"Add search vector {self.column} to {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.column}"
+
+
+class AddTrigramIndex(PostgresOnlyOperation):
+    """
+    Add a GIN `gin_trgm_ops` index on a text field for `trigram_similar` lookups.
+    Requires the pg_trgm extension (see `TrigramExtension`). The build blocks
+    writes to the table unless `concurrently` (in a migration with atomic = False).
+    """
+
+    def __init__(self, model_name, field, index_name=None, concurrently=False):
+        self.model_name = model_name
+        self.field = field
+        self.index_name = index_name
+        self.concurrently = concurrently
+
+    def deconstruct(self):
+        kwargs = {"model_name": self.model_name, "field": self.field}
+        if self.index_name:
+            kwargs["index_name"] = self.index_name
+        if self.concurrently:
+            kwargs["concurrently"] = True
+        return self.__class__.__qualname__, [], kwargs
+
+    def get_index_name(self, model):
+        return self.index_name or f"{model._meta.db_table}_{self.field}_trgm"[:63]
+
+    def forwards_sql(self, model, quote_name):
+        column = quote_name(model._meta.get_field(self.field).column)
+        return [self.create_index_sql(model, quote_name, f"GIN ({column} gin_trgm_ops)")]
+
+    def backwards_sql(self, model, quote_name):
+        return [self.drop_index_sql(model, quote_name)]
+
+    def describe(self):
+        return f"Add trigram index on {self.model_name}.{self.field}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_{self.field}_trgm"
+
+
+def search_index_operations(
+    model_name, vector_fields, trigram_fields=(), column="search_vector", config="english", concurrently=False
+):
+    """
+    Build the operations needed by `PostgresSearchFilter` for one model.
+    `concurrently` builds the indexes without blocking writes (atomic = False).
+    """
+    operations = [AddSearchVector(model_name, vector_fields, column=column, config=config, concurrently=concurrently)]
+    if trigram_fields:
+        operations.insert(0, TrigramExtension())
+        operations.extend(AddTrigramIndex(model_name, field, concurrently=concurrently) for field in trigram_fields)
+    return operations
@@ -1,8 +1,19 @@
 import pytest
 from django.test import override_settings
 
+from core.general.utils import memoize
+
 
 @pytest.fixture(autouse=True)
 def test_settings(settings):
-    with override_settings(SECRET_KEY="secret_key_for_testing",):
+    with override_settings(
+        SECRET_KEY="secret_key_for_testing",
+    ):
         yield
+
+
+@pytest.fixture(autouse=True)
+def clear_memoized():
+    """Don't let @ttl_cached values leak from one test to the next."""
+    yield
+    memoize.clear_all()
@@ -0,0 +1,115 @@
+"""Tests for the large-table admin base class."""
+
+import pytest
+from django.contrib import admin
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.models import Permission, User
+
+from core.general.admin import EstimatedCountPaginator, PerformanceModelAdmin, estimate_count
+from core.tasks.models import Task
+
+pytestmark = pytest.mark.django_db
+
+
+class SmallPaginator(EstimatedCountPaginator):
+    exact_count_limit = 3
+    deferred_join_offset = 2
+
+
+@pytest.fixture
+def users():
+    return User.objects.bulk_create(User(username=f"user{i}") for i in range(7))
+
+
+class TestEstimatedCountPaginator:
+    """Tests for bounded counts and deep pages."""
+
+    def test_small_results_are_counted_exactly(self, users):
+        assert EstimatedCountPaginator(User.objects.order_by("id"), 2).count == 7
+
+    def test_large_results_fall_back_to_exact_count_without_estimates(self, users, django_assert_num_queries):
+        paginator = SmallPaginator(User.objects.order_by("id"), 2)
+
+        # SQLite has no row estimates: bounded count, then the full count
+        with django_assert_num_queries(2):
+            assert paginator.count == 7
+        assert estimate_count(User.objects.all()) is None
+
+    def test_lists_are_counted_as_usual(self):
+        assert SmallPaginator(list(range(10)), 2).count == 10
+
+    def test_deep_pages_select_keys_first(self, users, django_assert_num_queries):
+        paginator = SmallPaginator(User.objects.order_by("id"), 2)
+        paginator.count  # noqa: B018
+
+        with django_assert_num_queries(2):
+            page = paginator.page(3)
+            assert [user.username for user in page] == ["user4", "user5"]
+        assert page.has_next() and page.has_previous()
+
+    def test_first_pages_are_unchanged(self, users):
+        page = SmallPaginator(User.objects.order_by("id"), 2).page(1)
+
+        assert [user.username for user in page] == ["user0", "user1"]
+
+
+class TestPerformanceModelAdmin:
+    """Tests for derived select_related and search."""
+
+    def admin_for(self, model, **attrs):
+        model_admin = type("Admin", (PerformanceModelAdmin,), attrs)
+        return model_admin(model, admin.site)
+
+    def test_select_related_from_list_display(self, rf):
+        model_admin = self.admin_for(
+            LogEntry,
+            list_display=["action_time", "user", "user__username", "content_type__app_label", "object_repr", "who"],
+            who=lambda self, obj: obj.user,
+        )
+
+        assert model_admin.get_list_select_related(rf.get("/")) == ["user", "content_type"]
+
+    def test_nested_select_related(self, rf):
+        model_admin = self.admin_for(Permission, list_display=["name", "content_type__app_label"])
+
+        assert model_admin.get_list_select_related(rf.get("/")) == ["content_type"]
+
+    def test_explicit_select_related_wins(self, rf):
+        model_admin = self.admin_for(LogEntry, list_display=["user"], list_select_related=["content_type"])
+
+        assert model_admin.get_list_select_related(rf.get("/")) == ["content_type"]
+
+    def test_no_relations(self, rf):
+        model_admin = self.admin_for(User, list_display=["username"])
+
+        assert model_admin.get_list_select_related(rf.get("/")) is False
+
+    def test_search_fields_default_to_prefix_lookups(self, rf):
+        model_admin = self.admin_for(User, search_fields=["username", "=email", "@first_name"])
+
+        assert model_admin.get_search_fields(rf.get("/")) == ["^username", "=email", "@first_name"]
+
+    def test_short_search_terms_return_nothing(self, users, rf):
+        model_admin = self.admin_for(User, search_fields=["username"])
+        request = rf.get("/")
+
+        queryset, _ = model_admin.get_search_results(request, User.objects.all(), "us")
+        assert not queryset.exists()
+
+        queryset, _ = model_admin.get_search_results(request, User.objects.all(), "user1")
+        assert list(queryset.values_list("username", flat=True)) == ["user1"]
+
+    def test_changelist(self, admin_client, settings):
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+        Task.objects.bulk_create(Task(name=f"app.tasks.job{i}") for i in range(5))
+
+        response = admin_client.get("/admin/tasks/task/", {"q": "ap"})
+        assert response.status_code == 200
+        assert "at least 3 characters" in response.content.decode()
+
+        response = admin_client.get("/admin/tasks/task/", {"q": "app.tasks"})
+        assert response.context["cl"].result_count == 5
+        assert response.context["cl"].full_result_count is None
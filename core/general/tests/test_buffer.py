@@ -0,0 +1,91 @@
+"""Tests for the buffered bulk-write pipeline."""
+
+import time
+
+import pytest
+from django.db import OperationalError
+
+from core.general.db.buffer import BufferFull, WriteBuffer, replay_spilled
+from core.tasks.models import Task
+
+
+@pytest.fixture
+def buffered(settings, tmp_path):
+    settings.WRITE_BUFFER_ENABLED = True
+    settings.WRITE_BUFFER_DIR = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestWriteBuffer:
+    """Tests for buffering, flushing and spilling rows."""
+
+    def test_disabled_writes_right_away(self):
+        WriteBuffer(Task).add(name="audit.login")
+
+        assert Task.objects.get().name == "audit.login"
+
+    def test_full_batches_are_written_together(self, buffered, django_assert_num_queries):
+        buffer = WriteBuffer(Task, batch_size=3)
+
+        with django_assert_num_queries(0):
+            buffer.add(name="event.1")
+            buffer.add(Task(name="event.2", args=[2]))
+        with django_assert_num_queries(1):
+            buffer.add(name="event.3")
+        buffer.add(name="event.4")
+        assert Task.objects.count() == 3
+
+        assert buffer.flush() == 1
+        assert sorted(Task.objects.values_list("name", flat=True)) == ["event.1", "event.2", "event.3", "event.4"]
+        assert Task.objects.get(name="event.2").args == [2]
+        assert buffer.stats["written"] == 4
+
+    def test_backpressure(self, buffered):
+        buffer = WriteBuffer(Task, max_rows=2, timeout=0)
+        buffer.add(name="event.1")
+        assert buffer.pressure == 0.5
+        buffer.add(name="event.2")
+
+        with pytest.raises(BufferFull):
+            buffer.add(name="event.3")
+        assert buffer.pressure == 1.0
+        assert buffer.stats["rejected"] == 1
+
+        buffer.flush()
+        buffer.add(name="event.3")
+        assert buffer.pressure == 0.5
+
+    def test_unwritten_rows_are_spilled_and_replayed(self, buffered, mocker):
+        buffer = WriteBuffer(Task)
+        buffer.add(name="event.1")
+        buffer.add(name="event.2")
+        write = mocker.patch.object(buffer, "_write", side_effect=OperationalError("down"))
+
+        with pytest.raises(OperationalError):
+            buffer.flush()
+        assert buffer.pressure > 0  # put back for the next flush
+        assert buffer.stop() == 2
+        assert len(list(buffered.glob("tasks.task.*.jsonl"))) == 1
+        assert not Task.objects.exists()
+
+        mocker.stop(write)
+        assert replay_spilled(WriteBuffer(Task)) == 2
+        assert sorted(Task.objects.values_list("name", flat=True)) == ["event.1", "event.2"]
+        assert not list(buffered.iterdir())
+
+    def test_flusher_thread(self, buffered, mocker):
+        buffer = WriteBuffer(Task, batch_size=2, flush_interval=0.5)
+        write = mocker.patch.object(buffer, "_write")
+        buffer.start()
+        try:
+            buffer.add(name="event.1")
+            buffer.add(name="event.2")
+            buffer.add(name="event.3")  # written on the interval
+            deadline = time.monotonic() + 5
+            while buffer.stats["written"] < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            assert buffer.stop(timeout=5) == 0
+
+        assert [len(call.args[0]) for call in write.call_args_list] == [2, 1]
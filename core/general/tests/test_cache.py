@@ -0,0 +1,183 @@
+"""Tests for cached querysets and their invalidation."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import transaction
+
+from core.general.auth import CachedModelBackend
+from core.general.db import cache as querysets
+from core.general.db.cache import CachedManager, invalidate
+
+# Another worker: invalidates User in the file-based cache at argv[1], as its writes would
+INVALIDATE_IN_ANOTHER_PROCESS = """
+import sys
+
+import django
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=["django.contrib.auth", "django.contrib.contenttypes"],
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": sys.argv[1]}},
+    QUERYSET_CACHE_ALIAS="default",
+)
+django.setup()
+
+from django.contrib.auth.models import User
+from core.general.db.cache import invalidate
+
+invalidate(User)
+"""
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    querysets.reset_stats()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def committed(django_capture_on_commit_callbacks):
+    """Run writes as if their transaction committed, so generations are bumped."""
+    return lambda: django_capture_on_commit_callbacks(execute=True)
+
+
+@pytest.mark.django_db
+class TestCachedQuerySet:
+    """Tests for serving querysets from the cache."""
+
+    def test_installed_on_auth_models(self):
+        assert isinstance(User.cached, CachedManager)
+        assert User._default_manager is User.objects
+
+    def test_rows_and_counts_are_cached(self, committed, django_assert_num_queries):
+        with committed():
+            User.objects.create(username="alice")
+
+        for queries in (3, 0):
+            with django_assert_num_queries(queries):
+                assert [user.username for user in User.cached.filter(username="alice")] == ["alice"]
+                assert User.cached.get(username="alice").username == "alice"
+                assert User.cached.filter(username__startswith="a").count() == 1
+
+        assert querysets.stats()["auth_user"]["hit_ratio"] == pytest.approx(0.5)
+
+    def test_result_shape_is_part_of_the_key(self, committed):
+        with committed():
+            User.objects.create(username="alice")
+
+        assert list(User.cached.values_list("username", flat=True)) == ["alice"]
+        assert list(User.cached.values("username")) == [{"username": "alice"}]
+        assert list(User.cached.values_list("username")) == [("alice",)]
+
+    def test_save_invalidates_on_commit(self, committed, django_assert_num_queries):
+        with committed():
+            user = User.objects.create(username="alice")
+        assert User.cached.get(pk=user.pk).first_name == ""
+
+        with committed():
+            user.first_name = "Alice"
+            user.save()
+
+        with django_assert_num_queries(1):
+            assert User.cached.get(pk=user.pk).first_name == "Alice"
+
+    def test_uncommitted_writes_bypass_the_cache(self, committed, django_assert_num_queries):
+        with committed():
+            user = User.objects.create(username="alice")
+        User.cached.get(pk=user.pk)
+
+        with transaction.atomic():
+            User.objects.filter(pk=user.pk).update(first_name="Alice")
+            invalidate(User)
+            with django_assert_num_queries(1):
+                assert User.cached.get(pk=user.pk).first_name == "Alice"
+
+        assert querysets.stats()["auth_user"]["bypassed"] >= 1
+
+    def test_delete_and_queryset_writes_invalidate(self, committed):
+        with committed():
+            alice, bob = User.objects.create(username="alice"), User.objects.create(username="bob")
+        assert User.cached.count() == 2
+
+        with committed():
+            bob.delete()
+        assert User.cached.count() == 1
+
+        with committed():
+            User.cached.filter(pk=alice.pk).update(first_name="Alice")
+        assert User.cached.get().first_name == "Alice"
+
+    def test_m2m_changes_invalidate_joins(self, committed):
+        with committed():
+            user = User.objects.create(username="alice")
+            group = Group.objects.create(name="editors")
+        assert list(Group.cached.filter(user=user)) == []
+
+        with committed():
+            user.groups.add(group)
+
+        assert list(Group.cached.filter(user=user)) == [group]
+
+    def test_select_for_update_is_not_cached(self, django_assert_num_queries):
+        User.objects.create(username="alice")
+
+        with transaction.atomic(), django_assert_num_queries(2):
+            list(User.cached.select_for_update())
+            list(User.cached.select_for_update())
+
+    def test_disabled(self, settings, django_assert_num_queries):
+        settings.QUERYSET_CACHE_ENABLED = False
+
+        with django_assert_num_queries(2):
+            list(User.cached.all())
+            list(User.cached.all())
+
+
+@pytest.mark.django_db
+class TestCachedModelBackend:
+    """Tests for loading users and permissions through the cache."""
+
+    def test_permissions_and_user(self, committed, django_assert_num_queries):
+        permission = Permission.objects.get(codename="view_user")
+        with committed():
+            user = User.objects.create(username="alice")
+            group = Group.objects.create(name="viewers")
+            group.permissions.add(permission)
+            user.groups.add(group)
+        backend = CachedModelBackend()
+
+        assert backend.get_all_permissions(backend.get_user(user.pk)) == {"auth.view_user"}
+        with django_assert_num_queries(0):
+            assert backend.get_all_permissions(backend.get_user(user.pk)) == {"auth.view_user"}
+
+        with committed():
+            group.permissions.remove(permission)
+        assert backend.get_all_permissions(backend.get_user(user.pk)) == set()
+
+    def test_invalidation_reaches_other_processes(self, committed, settings, tmp_path):
+        settings.CACHES = {
+            **settings.CACHES,
+            "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+        }
+        settings.QUERYSET_CACHE_ALIAS = "shared"
+        with committed():
+            user = User.objects.create(username="alice")
+        backend = CachedModelBackend()
+        assert backend.get_user(user.pk) == user
+
+        User.objects.filter(pk=user.pk).update(is_active=False)  # sends no signal: this process bumps nothing
+        assert backend.get_user(user.pk) == user
+        subprocess.run(
+            [sys.executable, "-c", INVALIDATE_IN_ANOTHER_PROCESS, str(tmp_path)],
+            check=True,
+            cwd=Path(__file__).resolve().parents[3],
+        )
+
+        assert backend.get_user(user.pk) is None
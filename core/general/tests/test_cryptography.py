@@ -0,0 +1,96 @@
+"""Tests for Ed25519 keys, signatures and batch verification."""
+
+import pytest
+
+pytest.importorskip("nacl")
+
+from core.general.utils import cryptography  # noqa: E402
+from core.general.utils.cryptography import (  # noqa: E402
+    generate_key_pair,
+    generate_key_pairs,
+    get_public_key,
+    get_verify_key,
+    sign,
+    verify,
+    verify_batch,
+)
+
+
+@pytest.fixture
+def key_pair():
+    return generate_key_pair()
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """Use the process pool for tiny inputs."""
+    monkeypatch.setattr(cryptography, "PARALLEL_THRESHOLD", 2)
+    monkeypatch.setattr(cryptography, "CHUNK_SIZE", 2)
+
+
+class TestKeys:
+    """Tests for key pair generation."""
+
+    def test_hex_key_pair(self, key_pair):
+        assert len(key_pair.private) == len(key_pair.public) == 64
+        assert get_public_key(key_pair.private) == key_pair.public
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_generate_key_pairs(self, small_batches, processes):
+        pairs = generate_key_pairs(5, processes=processes)
+
+        assert len(pairs) == len({pair.private for pair in pairs}) == 5
+        assert all(get_public_key(pair.private) == pair.public for pair in pairs)
+
+
+class TestSignatures:
+    """Tests for signing and verifying single messages."""
+
+    def test_round_trip(self, key_pair):
+        signature = sign("hello", key_pair.private)
+
+        assert len(signature) == 128
+        assert verify("hello", signature, key_pair.public)
+        assert verify(b"hello", signature, key_pair.public)
+
+    def test_rejects_other_message_or_key(self, key_pair):
+        signature = sign("hello", key_pair.private)
+
+        assert not verify("hello!", signature, key_pair.public)
+        assert not verify("hello", signature, generate_key_pair().public)
+
+    @pytest.mark.parametrize(
+        "signature, public_key",
+        [
+            ("AB" * 64, None),  # uppercase hex
+            ("ab" * 63, None),  # too short
+            (None, "zz" * 32),  # not hex
+        ],
+    )
+    def test_malformed_hex(self, key_pair, signature, public_key):
+        signature = signature or sign("hello", key_pair.private)
+        with pytest.raises(ValueError):
+            verify("hello", signature, public_key or key_pair.public)
+
+    def test_verify_keys_are_cached(self, key_pair):
+        get_verify_key.cache_clear()
+        signature = sign("hello", key_pair.private)
+
+        for _ in range(3):
+            verify("hello", signature, key_pair.public)
+
+        assert get_verify_key.cache_info().hits == 2
+
+
+class TestVerifyBatch:
+    """Tests for verifying many signatures at once."""
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_results_keep_input_order(self, small_batches, key_pair, processes):
+        items = [(f"message {i}", sign(f"message {i}", key_pair.private), key_pair.public) for i in range(5)]
+        items[3] = ("tampered", items[3][1], key_pair.public)
+
+        assert verify_batch(items, processes=processes) == [True, True, True, False, True]
+
+    def test_empty(self):
+        assert verify_batch([]) == []
@@ -0,0 +1,119 @@
+"""Tests for streaming NDJSON/CSV exports."""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from pydantic import BaseModel, ConfigDict
+from rest_framework import generics, serializers
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+
+from core.general.api.mixins import PydanticViewMixin, StreamingExportMixin
+
+pytestmark = pytest.mark.django_db
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username", "is_staff"]
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+    date_joined: datetime
+
+
+class UserExport(StreamingExportMixin, generics.ListAPIView):
+    queryset = User.objects.order_by("id")
+    serializer_class = UserSerializer
+    permission_classes = [AllowAny]
+    filterset_fields = ["is_staff"]
+    export_chunk_size = 2
+
+
+class UserValuesExport(UserExport):
+    export_fields = ["id", "username", "is_staff"]
+
+
+class PydanticUserExport(PydanticViewMixin, UserExport):
+    response_model = UserOut
+
+
+class SmallBlocksUserExport(UserExport):
+    export_buffer_size = 64
+
+
+def export(view, query):
+    response = view.as_view()(APIRequestFactory().get(f"/api/users/{query}"))
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+@pytest.fixture
+def users():
+    return [User.objects.create(username=f"user{index}", is_staff=index % 2 == 0) for index in range(5)]
+
+
+class TestStreamingExport:
+    """Tests for StreamingExportMixin."""
+
+    @pytest.mark.parametrize("view", [UserExport, UserValuesExport])
+    def test_ndjson_is_filtered(self, users, view):
+        response = export(view, "?export=ndjson&is_staff=true")
+
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert response["Content-Disposition"] == 'attachment; filename="users.ndjson"'
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        assert rows == [{"id": user.id, "username": user.username, "is_staff": True} for user in users[::2]]
+
+    @pytest.mark.parametrize("view", [UserExport, UserValuesExport])
+    def test_csv(self, users, view):
+        response = export(view, "?export=csv")
+
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        assert rows[0] == ["id", "username", "is_staff"]
+        assert rows[1:] == [[str(user.id), user.username, str(user.is_staff)] for user in users]
+
+    def test_pydantic_response_model(self, users):
+        response = export(PydanticUserExport, "?export=ndjson")
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        assert [row["username"] for row in rows] == [user.username for user in users]
+        assert set(rows[0]) == {"id", "username", "email", "date_joined"}
+
+    def test_empty_csv_has_header(self):
+        response = export(UserValuesExport, "?export=csv")
+
+        assert b"".join(response.streaming_content) == b"id,username,is_staff\r\n"
+
+    def test_reads_with_iterator_in_buffered_blocks(self, users, mocker):
+        iterator = mocker.spy(QuerySet, "iterator")
+
+        blocks = list(export(SmallBlocksUserExport, "?export=ndjson").streaming_content)
+
+        iterator.assert_called_once_with(mocker.ANY, chunk_size=2)
+        assert 1 < len(blocks) < len(users)
+
+    def test_unknown_format(self):
+        response = export(UserExport, "?export=xml")
+
+        assert response.status_code == 400
+        assert "export" in response.data
+
+    def test_without_export_param_lists_pages(self, users):
+        response = export(UserExport, "")
+
+        assert response.status_code == 200
+        assert response.data["count"] == 5
@@ -0,0 +1,165 @@
+"""Tests for image variants: rendering, the /images/ view and the backfill command."""
+
+import os
+from io import StringIO
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from django.core.management import call_command  # noqa: E402
+
+from core.backend.management.commands.image_variants import originals  # noqa: E402
+from core.general import variants  # noqa: E402
+from core.general.utils import images  # noqa: E402
+
+SPECS = {
+    "thumbnail": images.validate_spec("thumbnail", {"width": 32, "height": 32, "crop": True}),
+    "medium": images.validate_spec("medium", {"width": 100, "format": "jpeg"}),
+}
+
+
+def make_image(path, size=(400, 200), mode="RGB"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    Image.new(mode, size, "red").save(path)
+    return path
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage", "OPTIONS": {"location": str(tmp_path)}},
+    }
+    settings.IMAGE_VARIANTS = {"thumbnail": {"width": 32, "height": 32, "crop": True}}
+    return tmp_path
+
+
+class TestRenderVariants:
+    """Tests for decoding an original once into its variants."""
+
+    def test_sizes_and_paths(self, tmp_path):
+        source = make_image(str(tmp_path / "photo.png"))
+
+        digest, written = images.render_variants(source, str(tmp_path), SPECS)
+
+        assert written == [images.variant_path(digest, name, spec) for name, spec in SPECS.items()]
+        assert written[0].startswith(f"variants/{digest[:2]}/{digest}/thumbnail-")
+        with Image.open(tmp_path / written[0]) as thumbnail, Image.open(tmp_path / written[1]) as medium:
+            assert (thumbnail.format, thumbnail.size) == ("WEBP", (32, 32))
+            assert (medium.format, medium.size) == ("JPEG", (100, 50))
+
+    def test_existing_variants_are_skipped(self, tmp_path):
+        source = make_image(str(tmp_path / "photo.png"))
+        images.render_variants(source, str(tmp_path), SPECS)
+
+        assert images.render_variants(source, str(tmp_path), SPECS)[1] == []
+        assert len(images.render_variants(source, str(tmp_path), SPECS, force=True)[1]) == 2
+
+    def test_transparent_original_to_jpeg(self, tmp_path):
+        source = make_image(str(tmp_path / "logo.png"), mode="RGBA")
+        _, written = images.render_variants(source, str(tmp_path), {"medium": SPECS["medium"]})
+        with Image.open(tmp_path / written[0]) as medium:
+            assert medium.mode == "RGB"
+
+    def test_decompression_bomb(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", Image.MAX_IMAGE_PIXELS)
+        source = make_image(str(tmp_path / "photo.png"))  # 80,000 pixels: Pillow alone would only warn
+
+        with pytest.raises(Image.DecompressionBombError, match="exceeds limit of 50000 pixels"):
+            images.render_variants(source, str(tmp_path), SPECS, max_pixels=50_000)
+
+    def test_pool_starts_fresh_processes(self, monkeypatch):
+        monkeypatch.setattr(images, "_pool", None)
+        pool = images.get_pool(2)
+        try:
+            assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            pool.shutdown()
+
+    def test_invalid_specs(self):
+        with pytest.raises(ValueError, match="needs a width and a height"):
+            images.validate_spec("bad", {"width": 10, "crop": True})
+        with pytest.raises(ValueError, match="Unknown option"):
+            images.validate_spec("bad", {"width": 10, "size": 3})
+
+    def test_needed_size(self):
+        # Cropping a panorama to 32x32 needs it 128px wide, more than the 100px medium
+        assert images.needed_size((4000, 1000), SPECS.values()) == (128, 32)
+        assert images.needed_size((4000, 2000), SPECS.values()) == (100, 50)
+
+
+class TestImageVariantView:
+    """Tests for /images/<variant>/<name>."""
+
+    def test_missing_variant_is_scheduled(self, client, media, mocker):
+        make_image(str(media / "avatars" / "a.png"))
+        schedule = mocker.patch("core.general.variants.schedule")
+
+        response = client.get("/images/thumbnail/avatars/a.png")
+
+        assert response.status_code == 302
+        assert response["Location"] == "/media/avatars/a.png"
+        assert response["Cache-Control"] == "no-cache"
+        schedule.assert_called_once_with("avatars/a.png")
+        assert variants.variant_url("avatars/a.png", "thumbnail") == "/images/thumbnail/avatars/a.png"
+
+    def test_nothing_is_scheduled_without_pillow(self, media, mocker, monkeypatch, caplog):
+        make_image(str(media / "avatars" / "a.png"))
+        mocker.patch("core.general.variants.has_pillow", return_value=False)
+        monkeypatch.setattr(variants, "_warned_no_pillow", False)
+
+        assert variants.schedule("avatars/a.png") is False
+        assert variants.schedule("avatars/a.png") is False
+        assert [record.message for record in caplog.records if "Pillow" in record.message] == [
+            "Pillow isn't installed: image variants are not generated, originals are served instead"
+        ]
+
+    def test_generated_variant(self, client, media, settings):
+        make_image(str(media / "avatars" / "a.png"))
+        [written] = variants.generate("avatars/a.png")
+
+        response = client.get("/images/thumbnail/avatars/a.png")
+
+        assert response["Location"] == f"/media/{written}"
+        assert response["Cache-Control"] == f"public, max-age={settings.IMAGE_VARIANTS_REDIRECT_MAX_AGE}"
+        assert variants.variant_url("avatars/a.png", "thumbnail") == f"/media/{written}"
+
+    @pytest.mark.parametrize(
+        "url", ["/images/huge/avatars/a.png", "/images/thumbnail/avatars/b.png", "/images/thumbnail/notes.txt"]
+    )
+    def test_not_found(self, client, media, url):
+        make_image(str(media / "avatars" / "a.png"))
+        (media / "notes.txt").write_text("")
+        assert client.get(url).status_code == 404
+
+
+class TestImageVariantsCommand:
+    """Tests for `manage.py image_variants`."""
+
+    def test_backfill(self, media):
+        for name in ("b.png", "a/1.jpg", "a/2.gif"):
+            make_image(str(media / name))
+        (media / "a" / "notes.txt").write_text("")
+
+        out = StringIO()
+        call_command("image_variants", processes=1, stdout=out)
+
+        assert "3 image(s), 3 variant(s) written, 0 error(s)" in out.getvalue()
+        assert originals(str(media)) == ["a/1.jpg", "a/2.gif", "b.png"]  # variants aren't originals
+        assert not (media / "variants" / ".backfill-checkpoint").exists()
+
+    def test_resumes_after_checkpoint(self, media):
+        for name in ("a.png", "b.png"):
+            make_image(str(media / name))
+        (media / "c.png").write_bytes(b"not an image")
+        (media / "variants").mkdir()
+        (media / "variants" / ".backfill-checkpoint").write_text("a.png")
+
+        out, err = StringIO(), StringIO()
+        call_command("image_variants", processes=1, stdout=out, stderr=err)
+
+        assert "Resuming after a.png" in out.getvalue()
+        assert "2 image(s), 1 variant(s) written, 1 error(s)" in out.getvalue()
+        assert err.getvalue().startswith("c.png: UnidentifiedImageError")
@@ -0,0 +1,155 @@
+"""Tests for request-scoped and process-wide memoization."""
+
+import asyncio
+import threading
+from unittest.mock import Mock
+
+import pytest
+from django.test import RequestFactory
+
+from core.backend.middleware.memoize import RequestCacheMiddleware
+from core.general.utils import memoize
+from core.general.utils.memoize import CacheInfo, request_cached, request_scope, ttl_cached
+
+
+class TestRequestCached:
+    """Tests for @request_cached and RequestCacheMiddleware."""
+
+    def test_once_per_scope(self):
+        compute = Mock(side_effect=lambda user_id, full=False: (user_id, full))
+        cached = request_cached(compute)
+
+        with request_scope():
+            assert cached(1) == cached(1) == (1, False)
+            cached(1, full=True)
+        with request_scope():
+            cached(1)
+
+        assert compute.call_count == 3
+
+    def test_outside_a_scope(self):
+        compute = Mock(return_value=1)
+        cached = request_cached(compute)
+
+        cached()
+        cached()
+
+        assert compute.call_count == 2
+
+    def test_middleware(self):
+        compute = request_cached(Mock(side_effect=lambda: object()))
+
+        def view(request):
+            return compute() is compute()
+
+        middleware = RequestCacheMiddleware(view)
+        assert middleware(RequestFactory().get("/")) is True
+        assert memoize._store.get() is None
+
+    def test_async_calls_share_one_task(self):
+        calls = []
+
+        @request_cached
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key * 2
+
+        async def view(request):
+            return await asyncio.gather(fetch(1), fetch(1), fetch(2))
+
+        middleware = RequestCacheMiddleware(view)
+        assert asyncio.run(middleware(RequestFactory().get("/"))) == [2, 2, 4]
+        assert calls == [1, 2]
+
+
+class TestTTLCached:
+    """Tests for @ttl_cached."""
+
+    def test_lru_and_stats(self):
+        calls = []
+
+        @ttl_cached(maxsize=2)
+        def cached(key):
+            calls.append(key)
+            return key
+
+        cached(1), cached(2), cached(1), cached(3)  # 3 evicts 2, the least recently used
+        cached(1), cached(2)
+
+        assert calls == [1, 2, 3, 2]
+        assert cached.cache_info() == CacheInfo(hits=2, misses=4, evictions=2, expirations=0, maxsize=2, size=2)
+        assert memoize.stats()[f"{__name__}.{cached.__qualname__}"] == cached.cache_info()
+
+    def test_expiry_and_invalidate(self):
+        compute = Mock(side_effect=lambda key: key)
+        cached = ttl_cached(ttl=10)(compute)
+        now = [0.0]
+        cached.cache.clock = lambda: now[0]
+
+        cached("a")
+        now[0] = 9.0
+        cached("a")
+        now[0] = 10.0
+        cached("a")
+        cached.invalidate("a")
+        cached("a")
+
+        assert compute.call_count == 3
+        assert cached.cache_info().expirations == 1
+
+    def test_failures_are_not_cached(self):
+        compute = Mock(side_effect=[ValueError, 1])
+        cached = ttl_cached(compute)
+
+        with pytest.raises(ValueError):
+            cached()
+        assert cached() == 1
+
+    def test_single_flight_threads(self):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        @ttl_cached(single_flight=True)
+        def slow(key):
+            calls.append(key)
+            started.set()
+            release.wait(5)
+            return key
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow("k"))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert calls == ["k"] and results == ["k"] * 4
+        assert slow.cache.key_locks == {}
+
+    def test_single_flight_coroutines(self):
+        calls = []
+
+        @ttl_cached(single_flight=True)
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        async def main():
+            return await asyncio.gather(*(fetch("k") for _ in range(5)))
+
+        assert asyncio.run(main()) == ["k"] * 5
+        assert calls == ["k"]
+
+    def test_cleared_when_settings_change(self, settings):
+        compute = Mock(return_value=1)
+        cached = ttl_cached(compute)
+
+        cached()
+        settings.QUERY_REPORT_LIMIT = 5
+        cached()
+
+        assert compute.call_count == 2
@@ -0,0 +1,163 @@
+"""Tests for the migration linter and the online migration operations."""
+
+from unittest.mock import Mock
+
+import pytest
+from django.apps import apps
+from django.core.checks import Error, Warning
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.db import connection, migrations, models
+from django.db.migrations.state import ProjectState
+from django.db.models import Q
+
+from core.backend.checks import check_migration_locks
+from core.general.db import operations as online
+from core.general.db.lint import Finding, lint, lint_migration
+from core.general.db.search import AddSearchVector, AddTrigramIndex
+from core.tasks.models import Task
+
+
+def lint_operations(*operations):
+    migration = type("Migration", (migrations.Migration,), {"operations": list(operations)})("0099_x", "tasks")
+    return [finding.rule for finding in lint_migration(connection, migration, ProjectState.from_apps(apps))]
+
+
+class TestLint:
+    """Tests for finding operations that lock a live table."""
+
+    @pytest.mark.parametrize(
+        "operation, rules",
+        [
+            pytest.param(migrations.AddIndex("task", models.Index(fields=["worker"], name="w_idx")), ["add-index"]),
+            pytest.param(
+                migrations.AddField("task", "tag", models.CharField(max_length=8, db_index=True)), ["field-index"]
+            ),
+            pytest.param(migrations.AddField("task", "note", models.TextField(null=True)), [], id="nullable column"),
+            pytest.param(
+                migrations.AddConstraint("task", models.CheckConstraint(condition=Q(attempts__gte=0), name="c")),
+                ["add-constraint"],
+            ),
+            pytest.param(migrations.AlterField("task", "attempts", models.BigIntegerField()), ["alter-type"]),
+            pytest.param(migrations.AlterField("task", "name", models.TextField()), [], id="varchar to text"),
+            pytest.param(migrations.AlterField("task", "started_at", models.DateTimeField()), ["set-not-null"]),
+            pytest.param(migrations.RunSQL("CREATE INDEX i ON tasks_task (worker)"), ["run-sql"]),
+            pytest.param(migrations.RunSQL("CREATE INDEX CONCURRENTLY i ON tasks_task (worker)"), []),
+            pytest.param(AddSearchVector("task", ["name"]), ["rewrite-table", "add-index"], id="search vector"),
+            pytest.param(AddTrigramIndex("task", "name"), ["add-index"], id="trigram index"),
+            pytest.param(AddTrigramIndex("task", "name", concurrently=True), [], id="concurrent trigram index"),
+            pytest.param(migrations.RunPython(migrations.RunPython.noop), ["run-python"]),
+            pytest.param(migrations.RunPython(migrations.RunPython.noop, atomic=False), [], id="non-atomic RunPython"),
+            pytest.param(
+                online.AddIndexConcurrently("task", models.Index(fields=["worker"], name="w_idx")), [], id="online"
+            ),
+            pytest.param(
+                online.AddConstraintNotValid("task", models.CheckConstraint(condition=Q(attempts__gte=0), name="c")),
+                [],
+                id="not valid",
+            ),
+        ],
+    )
+    def test_rules(self, operation, rules):
+        assert lint_operations(operation) == rules
+
+    def test_new_tables_are_not_flagged(self):
+        rules = lint_operations(
+            migrations.CreateModel("Event", [("id", models.AutoField(primary_key=True))]),
+            migrations.AddIndex("event", models.Index(fields=["id"], name="e_idx")),
+            migrations.RunPython(migrations.RunPython.noop),
+        )
+        assert rules == []
+
+    def test_data_migration_on_missing_tables(self):
+        migration = type("Migration", (migrations.Migration,), {})("0099_x", "tasks")
+        migration.operations = [migrations.RunPython(migrations.RunPython.noop)]
+        state = ProjectState.from_apps(apps)
+        assert list(lint_migration(connection, migration, state, existing_tables=set())) == []
+
+    def test_data_migration_with_schema_changes(self):
+        assert lint_operations(
+            migrations.AddField("task", "note", models.TextField(null=True)),
+            migrations.RunPython(migrations.RunPython.noop),
+        ) == ["mixed-runpython"]
+
+    def test_severity_follows_table_size(self):
+        finding = Finding("add-index", Mock(), None, "tasks_task", "AddIndex blocks writes")
+
+        assert type(finding.to_check_message(1000)) is Warning  # size unknown
+        finding.rows = 999
+        assert finding.to_check_message(1000).id == "migrations.W001"
+        finding.rows = 1000
+        message = finding.to_check_message(1000)
+        assert (type(message), message.id) == (Error, "migrations.E001")
+
+    @pytest.mark.django_db
+    def test_nothing_pending(self):
+        assert lint(connection) == []
+        assert check_migration_locks(None, databases=None) == []
+
+    @pytest.mark.django_db
+    def test_migrate_stops_on_errors(self, mocker):
+        finding = Finding("add-index", Mock(), None, "tasks_task", "AddIndex blocks writes", rows=10**6)
+        mocker.patch("core.general.db.lint.lint", return_value=[finding])
+        migrate = mocker.patch("django.db.migrations.executor.MigrationExecutor.migrate")
+
+        with pytest.raises(SystemCheckError, match="migrations.E001"):
+            call_command("migrate", verbosity=0)
+        migrate.assert_not_called()
+
+
+class TestOnlineOperations:
+    """The online operations fall back to the plain ones outside PostgreSQL."""
+
+    @pytest.mark.django_db(transaction=True)
+    def test_add_index_concurrently(self):
+        operation = online.AddIndexConcurrently("task", models.Index(fields=["worker"], name="tasks_task_worker_test"))
+        state = ProjectState.from_apps(apps)
+        new_state = state.clone()
+        operation.state_forwards("tasks", new_state)
+
+        def indexes():
+            with connection.cursor() as cursor:
+                return connection.introspection.get_constraints(cursor, "tasks_task")
+
+        with connection.schema_editor() as editor:
+            operation.database_forwards("tasks", editor, state, new_state)
+        assert "tasks_task_worker_test" in indexes()
+        with connection.schema_editor() as editor:
+            operation.database_backwards("tasks", editor, new_state, state)
+        assert "tasks_task_worker_test" not in indexes()
+
+    @pytest.mark.django_db
+    def test_batched_backfill(self, django_assert_num_queries):
+        Task.objects.bulk_create([Task(name=f"event.{i}", worker="") for i in range(5)] + [Task(name="other")])
+        operation = online.BatchedBackfill(
+            "task", {"worker": "backfilled"}, filter=Q(name__startswith="event."), batch_size=2
+        )
+        state = ProjectState.from_apps(apps)
+
+        # 3 batches of (select, update) in a savepoint each, and the empty select that ends it
+        with django_assert_num_queries(3 * 4 + 1):
+            operation.database_forwards("tasks", Mock(connection=connection), state, state)
+
+        assert Task.objects.filter(worker="backfilled").count() == 5
+        assert Task.objects.get(name="other").worker != "backfilled"
+        assert operation.deconstruct() == (
+            "BatchedBackfill",
+            [],
+            {
+                "model_name": "task",
+                "values": {"worker": "backfilled"},
+                "filter": Q(name__startswith="event."),
+                "batch_size": 2,
+            },
+        )
+
+    @pytest.mark.django_db
+    def test_run_postgresql(self):
+        operation = online.RunPostgreSQL("CREATE INDEX x ON tasks_task (UPPER(name) text_pattern_ops)", "DROP INDEX x")
+        state = ProjectState.from_apps(apps)
+        editor = Mock(connection=connection)
+        operation.database_forwards("tasks", editor, state, state)
+        operation.database_backwards("tasks", editor, state, state)
+        editor.execute.assert_not_called()
@@ -0,0 +1,122 @@
+"""Tests for the PostgreSQL search filter backend and migration operations."""
+
+from unittest.mock import Mock
+
+import pytest
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from rest_framework import generics
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.general.api.filters import PostgresSearchFilter
+from core.general.db.search import AddSearchVector, AddTrigramIndex, search_index_operations
+
+
+class UserSearchView(generics.ListAPIView):
+    queryset = User.objects.all()
+    search_fields = ["username", "first_name"]
+    search_vector_column = "search_vector"
+    trigram_fields = ["username"]
+
+
+def search(term):
+    request = Request(APIRequestFactory().get("/", {"search": term}))
+    return PostgresSearchFilter().filter_queryset(request, User.objects.all(), UserSearchView())
+
+
+def quote(name):
+    return f'"{name}"'
+
+
+@pytest.mark.django_db
+class TestPostgresSearchFilterFallback:
+    """On non-PostgreSQL databases the filter behaves like DRF's SearchFilter."""
+
+    def test_icontains_fallback(self):
+        User.objects.create(username="alice", first_name="Alice")
+        User.objects.create(username="bob", first_name="Robert")
+
+        results = search("LIC")
+
+        assert [user.username for user in results] == ["alice"]
+        assert "search_rank" not in results.query.annotations
+
+    def test_empty_search_returns_queryset_unchanged(self):
+        User.objects.create(username="alice")
+        assert search("").count() == 1
+
+
+class TestSearchOperations:
+    """Tests for the search migration operations."""
+
+    def test_search_vector_sql(self):
+        operation = AddSearchVector("user", [("username", "A"), "first_name"], config="simple")
+        statements = operation.forwards_sql(User, quote)
+
+        assert statements[0] == (
+            'ALTER TABLE "auth_user" ADD COLUMN "search_vector" tsvector GENERATED ALWAYS AS ('
+            "setweight(to_tsvector('simple'::regconfig, coalesce(\"username\"::text, '')), 'A') || "
+            "setweight(to_tsvector('simple'::regconfig, coalesce(\"first_name\"::text, '')), 'D')) STORED"
+        )
+        assert statements[1] == 'CREATE INDEX "auth_user_search_vector_gin" ON "auth_user" USING GIN ("search_vector")'
+        assert (
+            operation.backwards_sql(User, quote)[1] == 'ALTER TABLE "auth_user" DROP COLUMN IF EXISTS "search_vector"'
+        )
+
+    def test_trigram_index_sql(self):
+        statements = AddTrigramIndex("user", "username").forwards_sql(User, quote)
+        assert statements == [
+            'CREATE INDEX "auth_user_username_trgm" ON "auth_user" USING GIN ("username" gin_trgm_ops)'
+        ]
+
+    def test_concurrent_indexes(self):
+        vector = AddSearchVector("user", ["username"], concurrently=True)
+        trigram = AddTrigramIndex("user", "username", concurrently=True)
+
+        assert vector.forwards_sql(User, quote)[1] == (
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "auth_user_search_vector_gin" '
+            'ON "auth_user" USING GIN ("search_vector")'
+        )
+        assert trigram.forwards_sql(User, quote)[0].startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+        assert trigram.backwards_sql(User, quote) == ['DROP INDEX CONCURRENTLY IF EXISTS "auth_user_username_trgm"']
+        assert trigram.deconstruct()[2] == {"model_name": "user", "field": "username", "concurrently": True}
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"fields": [("username", "E")]},
+            {"fields": ["username"], "config": "english'); DROP TABLE x; --"},
+            {"fields": ["username"], "column": "bad column"},
+        ],
+    )
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            AddSearchVector("user", **kwargs)
+
+    def test_deconstruct(self):
+        name, args, kwargs = AddSearchVector("user", ["username"], config="simple").deconstruct()
+        assert name == "AddSearchVector"
+        assert kwargs == {"model_name": "user", "fields": [("username", "D")], "config": "simple"}
+
+    def test_search_index_operations(self):
+        operations = search_index_operations("user", ["username"], trigram_fields=["username", "email"])
+        assert [type(operation) for operation in operations] == [
+            TrigramExtension,
+            AddSearchVector,
+            AddTrigramIndex,
+            AddTrigramIndex,
+        ]
+
+    def test_noop_on_other_vendors(self):
+        state = ProjectState.from_apps(apps)
+        schema_editor = Mock(connection=connection)
+
+        AddSearchVector("user", ["username"]).database_forwards("auth", schema_editor, state, state)
+        AddTrigramIndex("user", "username").database_backwards("auth", schema_editor, state, state)
+
+        assert connection.vendor == "sqlite"
+        schema_editor.execute.assert_not_called()
@@ -0,0 +1,156 @@
+"""Tests for the pydantic serializer adapter, renderer and view mixin."""
+
+import json
+from datetime import datetime
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import path
+from django.utils.translation import gettext_lazy
+from drf_spectacular.generators import SchemaGenerator
+from pydantic import BaseModel, ConfigDict, Field
+from rest_framework import generics
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIRequestFactory
+
+from core.general.api.mixins import PydanticViewMixin
+from core.general.api.renderers import PydanticJSONRenderer
+from core.general.api.serializers import PydanticSerializer, type_adapter
+
+
+class UserIn(BaseModel):
+    username: str = Field(min_length=1, max_length=150)
+    email: str = ""
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+    date_joined: datetime
+
+
+class UserList(PydanticViewMixin, generics.ListCreateAPIView):
+    queryset = User.objects.order_by("id")
+    permission_classes = [AllowAny]
+    request_model = UserIn
+    response_model = UserOut
+
+    def perform_create(self, serializer):
+        serializer.instance = User.objects.create(**serializer.validated_data.model_dump())
+
+
+def call(method, data=None, **kwargs):
+    factory = APIRequestFactory()
+    if method == "get":
+        request = factory.get("/api/users/")
+    else:
+        request = factory.post("/api/users/", data, **kwargs)
+    response = UserList.as_view()(request)
+    response.render()
+    return response
+
+
+@pytest.mark.django_db
+class TestPydanticView:
+    """Tests for a generic view declaring pydantic request/response models."""
+
+    def test_list_is_paginated_and_rendered(self):
+        User.objects.create(username="alice", email="alice@example.com")
+        User.objects.create(username="bob")
+
+        response = call("get")
+
+        body = json.loads(response.content)
+        assert response.status_code == 200
+        assert body["count"] == 2
+        assert [user["username"] for user in body["results"]] == ["alice", "bob"]
+        assert set(body["results"][0]) == {"id", "username", "email", "date_joined"}
+
+    def test_create_validates_with_request_model_and_answers_with_response_model(self):
+        response = call("post", json.dumps({"username": "carol"}), content_type="application/json")
+
+        body = json.loads(response.content)
+        assert response.status_code == 201
+        assert body["username"] == "carol"
+        assert body["id"] == User.objects.get(username="carol").id
+
+    def test_validation_errors(self):
+        response = call("post", json.dumps({"username": "", "email": 3}), content_type="application/json")
+
+        body = json.loads(response.content)
+        assert response.status_code == 400
+        assert set(body) == {"username", "email"}
+        assert not User.objects.exists()
+
+    def test_malformed_json(self):
+        response = call("post", "{not json", content_type="application/json")
+        assert response.status_code == 400
+        assert "JSON parse error" in json.loads(response.content)["detail"]
+
+
+class TestPydanticSerializer:
+    """Tests for the serializer adapter outside of a view."""
+
+    def test_classes_and_adapters_are_cached(self):
+        assert PydanticSerializer.of(UserIn, UserOut) is PydanticSerializer.of(UserIn, UserOut)
+        assert type_adapter(list[UserOut]) is type_adapter(list[UserOut])
+
+    def test_many_converts_orm_objects_in_one_list(self):
+        users = [User(id=index, username=f"user{index}", date_joined=datetime(2025, 1, 1)) for index in range(3)]
+
+        data = PydanticSerializer.of(UserOut)(users, many=True).data
+
+        assert [user.username for user in data] == ["user0", "user1", "user2"]
+        assert all(isinstance(user, UserOut) for user in data)
+
+    def test_many_save_passes_dicts(self, mocker):
+        serializer = PydanticSerializer.of(UserIn)(data=[{"username": "a"}, {"username": "b"}], many=True)
+        create = mocker.patch.object(serializer, "create", return_value=[])
+
+        assert serializer.is_valid(), serializer.errors
+        serializer.save(is_staff=True)
+
+        create.assert_called_once_with(
+            [{"username": "a", "email": "", "is_staff": True}, {"username": "b", "email": "", "is_staff": True}]
+        )
+
+    def test_many_errors_use_item_index(self):
+        serializer = PydanticSerializer.of(UserIn)(data=[{"username": "a"}, {}], many=True)
+        assert not serializer.is_valid()
+        assert list(serializer.errors) == ["1.username"]
+
+    def test_rejects_non_pydantic_models(self):
+        with pytest.raises(TypeError):
+            PydanticSerializer.of(dict)
+
+
+class TestPydanticJSONRenderer:
+    """Tests for rendering with pydantic-core."""
+
+    def test_models_and_drf_fallbacks(self):
+        rendered = PydanticJSONRenderer().render(
+            {"user": UserIn(username="a"), "message": gettext_lazy("Not found."), "text": "a\u2028b"}
+        )
+        assert rendered == b'{"user":{"username":"a","email":""},"message":"Not found.","text":"a\\u2028b"}'
+
+    def test_none(self):
+        assert PydanticJSONRenderer().render(None) == b""
+
+
+class TestSchema:
+    """drf-spectacular documents pydantic views from the models."""
+
+    def test_components_from_models(self):
+        generator = SchemaGenerator(patterns=[path("api/users/", UserList.as_view())])
+        schema = generator.get_schema(request=None, public=True)
+
+        operation = schema["paths"]["/api/users/"]
+        assert operation["post"]["requestBody"]["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/UserIn"
+        }
+        results = schema["components"]["schemas"]["PaginatedUserOutList"]["properties"]["results"]
+        assert results["items"] == {"$ref": "#/components/schemas/UserOut"}
+        assert schema["components"]["schemas"]["UserOut"]["required"] == ["id", "username", "email", "date_joined"]
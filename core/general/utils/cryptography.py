@@ -0,0 +1,171 @@
+"""
+Ed25519 key pairs, signatures and batch verification with hex-encoded I/O.
+
+Keys and signatures are lowercase hex strings validated with
+core.general.utils.types.hexstr: 64 characters for signing (private) and
+verify (public) keys, 128 for signatures. Messages are bytes or str (UTF-8).
+
+Decoded verify keys are kept in an LRU cache, so verifying many signatures from
+the same accounts only decodes each key once. verify_batch() and
+generate_key_pairs() split large inputs across a process pool.
+
+Requires PyNaCl (optional dependency, see pyproject.toml).
+"""
+
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import NamedTuple
+
+from pydantic import TypeAdapter
+
+from core.general.utils.types import hexstr
+
+try:
+    from nacl.exceptions import BadSignatureError
+    from nacl.signing import SigningKey, VerifyKey
+except ImportError:  # pragma: no cover - optional dependency
+    BadSignatureError = SigningKey = VerifyKey = None
+
+KEY_LENGTH = 64  # hex characters (32 bytes)
+SIGNATURE_LENGTH = 128  # hex characters (64 bytes)
+
+VERIFY_KEY_CACHE_SIZE = 4096
+
+# Below this many items the process pool costs more than it saves
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 1000
+
+_hexstr_adapter = TypeAdapter(hexstr)
+_pool = None
+
+
+class KeyPair(NamedTuple):
+    private: str  # signing key
+    public: str  # verify key, used as the account number
+
+
+def _require_nacl():
+    if SigningKey is None:
+        raise ImportError("Ed25519 support requires PyNaCl: uncomment pynacl in pyproject.toml and `poetry install`")
+
+
+def _validate_hex(value, length, name):
+    _hexstr_adapter.validate_python(value)
+    if len(value) != length:
+        raise ValueError(f"{name} must be {length} hex characters, got {len(value)}")
+    return value
+
+
+def _message_bytes(message):
+    return message.encode() if isinstance(message, str) else message
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _get_pool(processes):
+    global _pool
+    if _pool is None or _pool._max_workers != processes:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=processes)
+    return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+
+
+def _use_pool(count, processes):
+    return processes != 1 and count >= PARALLEL_THRESHOLD
+
+
+def generate_key_pair():
+    _require_nacl()
+    signing_key = SigningKey.generate()
+    return KeyPair(private=signing_key.encode().hex(), public=signing_key.verify_key.encode().hex())
+
+
+def _generate_key_pairs(count):
+    _require_nacl()
+    seeds = os.urandom(32 * count)
+    pairs = []
+    for offset in range(0, 32 * count, 32):
+        seed = seeds[offset : offset + 32]
+        pairs.append(KeyPair(private=seed.hex(), public=SigningKey(seed).verify_key.encode().hex()))
+    return pairs
+
+
+def generate_key_pairs(count, processes=None):
+    """
+    Generate `count` key pairs. Seeds come from one os.urandom() call per
+    chunk; large counts are split across `processes` workers (default: CPU
+    count, 1 disables the pool).
+    """
+    if not _use_pool(count, processes):
+        return _generate_key_pairs(count)
+
+    sizes = [min(CHUNK_SIZE, count - start) for start in range(0, count, CHUNK_SIZE)]
+    pool = _get_pool(processes or os.cpu_count())
+    return [pair for chunk in pool.map(_generate_key_pairs, sizes) for pair in chunk]
+
+
+def get_public_key(private_key):
+    _require_nacl()
+    _validate_hex(private_key, KEY_LENGTH, "Signing key")
+    return SigningKey(bytes.fromhex(private_key)).verify_key.encode().hex()
+
+
+def sign(message, private_key):
+    """Return the hex signature of `message`."""
+    _require_nacl()
+    _validate_hex(private_key, KEY_LENGTH, "Signing key")
+    return SigningKey(bytes.fromhex(private_key)).sign(_message_bytes(message)).signature.hex()
+
+
+@lru_cache(maxsize=VERIFY_KEY_CACHE_SIZE)
+def get_verify_key(public_key):
+    """Decode (and cache) the verify key for a hex public key."""
+    _require_nacl()
+    _validate_hex(public_key, KEY_LENGTH, "Public key")
+    return VerifyKey(bytes.fromhex(public_key))
+
+
+def verify(message, signature, public_key):
+    """
+    Return True if `signature` is a valid signature of `message` by
+    `public_key`, False if it isn't. Malformed hex raises ValueError.
+    """
+    _validate_hex(signature, SIGNATURE_LENGTH, "Signature")
+    try:
+        get_verify_key(public_key).verify(_message_bytes(message), bytes.fromhex(signature))
+    except BadSignatureError:
+        return False
+    return True
+
+
+def _verify_many(items):
+    return [verify(message, signature, public_key) for message, signature, public_key in items]
+
+
+def verify_batch(items, processes=None):
+    """
+    Verify (message, signature, public_key) triples, returning a list of
+    booleans in the same order. Large batches are split across `processes`
+    workers (default: CPU count, 1 disables the pool); each worker keeps its
+    own verify key cache.
+    """
+    items = list(items)
+    if not _use_pool(len(items), processes):
+        return _verify_many(items)
+
+    pool = _get_pool(processes or os.cpu_count())
+    return [result for chunk in pool.map(_verify_many, _chunks(items, CHUNK_SIZE)) for result in chunk]
@@ -0,0 +1,184 @@
+"""
+Resized variants of images, decoded once and stored content-addressed.
+
+A variant spec names a size and an output format:
+
+    {"width": 320, "height": 320, "crop": True, "format": "webp", "quality": 80}
+
+`width` and/or `height` bound the variant, which is never upscaled; with
+`crop` and both set it's cut to exactly that size around the center instead. `format` is
+one of FORMATS (default webp), `quality` the encoder's 1-100 (default 82).
+
+render_variants() reads an original, decodes it once (JPEGs straight at the
+scale the largest variant needs, via draft()) and writes every variant that's
+missing to
+
+    <root>/<directory>/<digest[:2]>/<digest>/<variant>-<spec fingerprint>.<ext>
+
+where digest is the SHA-256 of the original's bytes: identical uploads share
+their variants, a replaced original gets new ones, and changing a spec
+changes its fingerprint so stale variants are never served. Existing
+variants are skipped, so it's safe to run again after an interruption.
+
+This module doesn't touch Django, so render_variants() can run in a process
+pool (see get_pool(), which starts its processes fresh rather than forking
+the threaded web worker). Requires Pillow (optional dependency, see pyproject.toml).
+"""
+
+import atexit
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = ImageOps = None
+
+SPEC_OPTIONS = {"width", "height", "crop", "format", "quality"}
+FORMATS = {"webp": "webp", "jpeg": "jpg", "png": "png", "avif": "avif"}  # format -> extension
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff", ".avif"}
+
+_pool = None
+
+
+def has_pillow():
+    return Image is not None
+
+
+def _require_pillow():
+    if Image is None:
+        raise ImportError("Image variants require Pillow: uncomment pillow in pyproject.toml and `poetry install`")
+
+
+def validate_spec(name, spec):
+    """`spec` with its defaults filled in; ValueError if it's invalid."""
+    unknown = set(spec) - SPEC_OPTIONS
+    if unknown:
+        raise ValueError(f"Unknown option(s) in image variant {name!r}: {', '.join(sorted(unknown))}")
+    spec = {"width": None, "height": None, "crop": False, "format": "webp", "quality": 82, **spec}
+    if not (spec["width"] or spec["height"]):
+        raise ValueError(f"Image variant {name!r} needs a width or a height")
+    if spec["crop"] and not (spec["width"] and spec["height"]):
+        raise ValueError(f"Image variant {name!r} needs a width and a height to crop")
+    if spec["format"] not in FORMATS:
+        raise ValueError(f"Image variant {name!r} has an unknown format {spec['format']!r}")
+    return spec
+
+
+def spec_fingerprint(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def content_digest(path):
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+
+def variant_path(digest, name, spec, directory="variants"):
+    """The variant's path relative to the root, see the module docstring."""
+    return f"{directory}/{digest[:2]}/{digest}/{name}-{spec_fingerprint(spec)}.{FORMATS[spec['format']]}"
+
+
+def render_variants(source, root, specs, directory="variants", force=False, max_pixels=None):
+    """
+    Write the variants of the image file `source` (name -> validated spec) that
+    don't exist yet under `root`, decoding it once. Returns (digest, [written
+    paths relative to root]). `max_pixels` refuses larger images
+    (Image.DecompressionBombError) before decoding them; None keeps Pillow's
+    default.
+    """
+    data = Path(source).read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    targets = {name: variant_path(digest, name, spec, directory) for name, spec in specs.items()}
+    missing = [name for name, path in targets.items() if force or not os.path.exists(os.path.join(root, path))]
+    if not missing:
+        return digest, []
+
+    _require_pillow()
+    if max_pixels is not None:
+        Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(BytesIO(data)) as image:
+        # Pillow itself only raises above twice MAX_IMAGE_PIXELS (and merely warns below)
+        if max_pixels is not None and image.width * image.height > max_pixels:
+            raise Image.DecompressionBombError(
+                f"Image size ({image.width * image.height} pixels) exceeds limit of {max_pixels} pixels"
+            )
+        image.draft(None, needed_size(image.size, [specs[name] for name in missing]))
+        decoded = ImageOps.exif_transpose(image)  # loads the pixels, upright
+    if decoded.mode not in ("RGB", "RGBA", "L", "LA"):  # palette, CMYK, 16-bit: resample in RGB(A)
+        decoded = decoded.convert("RGBA" if decoded.has_transparency_data else "RGB")
+    for name in missing:
+        save(resize(decoded, specs[name]), os.path.join(root, targets[name]), specs[name])
+    return digest, [targets[name] for name in missing]
+
+
+def render_variants_safely(*args, **kwargs):
+    """render_variants(), returning (digest, written, error message) instead of raising: for pool.map()."""
+    try:
+        return (*render_variants(*args, **kwargs), None)
+    except Exception as exc:
+        return None, [], f"{type(exc).__name__}: {exc}"
+
+
+def needed_size(size, specs):
+    """The smallest decoded size every spec can be resized from."""
+    width, height = size
+    needed_width = needed_height = 1
+    for spec in specs:
+        if spec["crop"]:
+            scale = max(spec["width"] / width, spec["height"] / height)
+        else:
+            scale = min(
+                spec["width"] / width if spec["width"] else math.inf,
+                spec["height"] / height if spec["height"] else math.inf,
+            )
+        needed_width = max(needed_width, math.ceil(width * min(scale, 1)))
+        needed_height = max(needed_height, math.ceil(height * min(scale, 1)))
+    return needed_width, needed_height
+
+
+def resize(image, spec):
+    if spec["crop"]:
+        return ImageOps.fit(image, (spec["width"], spec["height"]), Image.Resampling.LANCZOS)
+    resized = image.copy()
+    resized.thumbnail((spec["width"] or image.width, spec["height"] or image.height), Image.Resampling.LANCZOS, 3.0)
+    return resized
+
+
+def save(image, path, spec):
+    """Encode `image` to `path` atomically: a variant that exists is complete."""
+    if spec["format"] == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")  # no alpha in JPEG
+    options = {"quality": spec["quality"]}
+    if spec["format"] == "jpeg":
+        options.update(optimize=True, progressive=True)
+    elif spec["format"] == "webp":
+        options["method"] = 4  # the encoder's speed/size trade-off, 6 is slowest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    image.save(tmp, format=spec["format"].upper(), **options)
+    os.replace(tmp, path)
+
+
+def get_pool(processes):
+    global _pool
+    if _pool is None or _pool._max_workers != processes:
+        if _pool is not None:
+            _pool.shutdown()
+        # Forking a web worker copies its threads' locks mid-use (the admission
+        # controller, gevent, DB pools): start the processes from a clean interpreter
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
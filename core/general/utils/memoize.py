@@ -0,0 +1,263 @@
+"""
+Memoization within a request and across requests.
+
+    from core.general.utils.memoize import request_cached, ttl_cached
+
+    @request_cached
+    def permissions_of(user_id):  # once per request and user, however many serializers ask
+        ...
+
+    @ttl_cached(maxsize=256, ttl=300)
+    def exchange_rate(currency):  # once per 5 minutes and currency, in each process
+        ...
+
+@request_cached results live in a store that exists for one request: the
+RequestCacheMiddleware (core/backend/middleware/memoize.py) opens it with
+request_scope(), and tasks or commands can do the same around a unit of work.
+Outside a scope the function simply runs. The store is a ContextVar, so it
+follows the request into async views and gevent greenlets.
+
+@ttl_cached is a process-wide LRU: at most `maxsize` results, each kept `ttl`
+seconds (None: until evicted). The wrapper has cache_info() (hits, misses,
+evictions, expirations and size), cache_clear() and invalidate(*args,
+**kwargs) for one entry. Each process has its own copy, so use the Django
+cache for values every process must agree on.
+
+With single_flight=True, concurrent misses on one key wait for the first
+caller instead of computing the value again: other threads and greenlets
+block on a per-key lock, other coroutines await the first caller's task.
+
+Arguments must be hashable, and results are shared: don't mutate them.
+Under pytest every cache is cleared between tests and when a setting changes
+(see core.backend.apps), so memoized state doesn't leak from one test to the next.
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import NamedTuple
+
+_store = ContextVar("request_cache", default=None)
+_caches = weakref.WeakSet()  # every ttl_cached wrapper, for clear_all() and stats()
+MISS = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    maxsize: int
+    size: int
+
+
+def _key(args, kwargs):
+    return (args, tuple(sorted(kwargs.items()))) if kwargs else args
+
+
+@contextmanager
+def request_scope():
+    """Memoize @request_cached calls within the block, in a fresh store."""
+    token = _store.set({})
+    try:
+        yield
+    finally:
+        _store.reset(token)
+
+
+def request_cached(func):
+    """Compute `func` once per arguments within the current request_scope()."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            store = _store.get()
+            if store is None:
+                return await func(*args, **kwargs)
+            key = (func, _key(args, kwargs))
+            task = store.get(key)
+            if task is None:
+                # The task, not its result: concurrent awaits in the request share one call
+                task = store[key] = asyncio.ensure_future(func(*args, **kwargs))
+            try:
+                return await asyncio.shield(task)
+            except Exception:
+                if store.get(key) is task:  # a failure isn't memoized, like in the sync version
+                    del store[key]
+                raise
+
+    else:
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            store = _store.get()
+            if store is None:
+                return func(*args, **kwargs)
+            key = (func, _key(args, kwargs))
+            value = store.get(key, MISS)
+            if value is MISS:
+                value = store[key] = func(*args, **kwargs)
+            return value
+
+    return wrapper
+
+
+class TTLCache:
+    """The LRU of a @ttl_cached function; thread-safe."""
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires, value), least recently used first
+        self.lock = threading.Lock()
+        self.key_locks = {}  # key -> [lock, waiters], for single-flight
+        self.tasks = {}  # key -> (loop, task), for single-flight coroutines
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > self.clock():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return MISS
+
+    def peek(self, key):
+        """The live value of `key` or MISS, without touching the LRU order or the stats."""
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or (entry[0] is not None and entry[0] <= self.clock()):
+            return MISS
+        return entry[1]
+
+    def set(self, key, value):
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.reset_stats()
+
+    def info(self):
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.expirations, self.maxsize, len(self.entries))
+
+    @contextmanager
+    def key_lock(self, key):
+        """Hold the lock of `key`, shared by the threads computing it."""
+        with self.lock:
+            entry = self.key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.key_locks[key]
+
+
+def ttl_cached(func=None, *, maxsize=128, ttl=60.0, single_flight=False):
+    """
+    Memoize `func` in this process: at most `maxsize` results, for `ttl`
+    seconds each (None: no expiry). Use bare or with options.
+    """
+    if func is None:
+        return lambda func: ttl_cached(func, maxsize=maxsize, ttl=ttl, single_flight=single_flight)
+    cache = TTLCache(maxsize, ttl)
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _key(args, kwargs)
+            value = cache.get(key)
+            if value is not MISS:
+                return value
+            if not single_flight:
+                value = await func(*args, **kwargs)
+                cache.set(key, value)
+                return value
+            loop = asyncio.get_running_loop()
+            running = cache.tasks.get(key)
+            if running is None or running[0] is not loop:
+                running = cache.tasks[key] = (loop, loop.create_task(compute(key, args, kwargs)))
+            return await asyncio.shield(running[1])
+
+        async def compute(key, args, kwargs):
+            try:
+                value = await func(*args, **kwargs)
+                cache.set(key, value)
+                return value
+            finally:
+                if cache.tasks.get(key, (None,))[0] is asyncio.get_running_loop():  # not another loop's
+                    del cache.tasks[key]
+
+    else:
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _key(args, kwargs)
+            value = cache.get(key)
+            if value is not MISS:
+                return value
+            if single_flight:
+                with cache.key_lock(key):
+                    value = cache.peek(key)  # computed by the caller we waited for
+                    if value is not MISS:
+                        return value
+                    value = func(*args, **kwargs)
+                    cache.set(key, value)
+                    return value
+            value = func(*args, **kwargs)
+            cache.set(key, value)
+            return value
+
+    wrapper.cache = cache
+    wrapper.cache_info = cache.info
+    wrapper.cache_clear = cache.clear
+    wrapper.invalidate = lambda *args, **kwargs: cache.pop(_key(args, kwargs))
+    _caches.add(wrapper)
+    return wrapper
+
+
+def stats():
+    """{dotted function name: CacheInfo} of every @ttl_cached function."""
+    return {f"{wrapper.__module__}.{wrapper.__qualname__}": wrapper.cache_info() for wrapper in list(_caches)}
+
+
+def clear_all():
+    """Empty every @ttl_cached function's cache and the current request store."""
+    for wrapper in list(_caches):
+        wrapper.cache_clear()
+    store = _store.get()
+    if store is not None:
+        store.clear()
@@ -0,0 +1,148 @@
+"""
+Image variants of MEDIA_ROOT uploads, named in IMAGE_VARIANTS:
+
+    IMAGE_VARIANTS = {
+        "thumbnail": {"width": 320, "height": 320, "crop": True, "format": "webp", "quality": 80},
+        "medium": {"width": 1024, "format": "webp"},
+    }
+
+    from core.general.variants import variant_url
+
+    variant_url(profile.avatar.name, "thumbnail")
+
+Variants are generated off the request path, never in the worker serving it:
+on IMAGE_VARIANTS_QUEUE by a task worker (core.tasks) when it's set, else in
+a pool of IMAGE_VARIANTS_PROCESSES processes per worker. Each original is
+decoded once for all its variants, which are stored content-addressed under
+MEDIA_ROOT/IMAGE_VARIANTS_DIR (see core/general/utils/images.py) and from then
+on served as static files, like the originals.
+
+variant_url() is the variant's media URL once it exists. Until then it's
+/images/<variant>/<name>, a view that schedules the generation and redirects
+to the original; once the variant exists it redirects to the variant.
+`manage.py image_variants` generates the variants of every upload.
+
+Needs MEDIA_ROOT on the local filesystem (FileSystemStorage) and Pillow;
+without Pillow nothing is scheduled and the originals are served.
+"""
+
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from core.general.utils.images import (
+    IMAGE_SUFFIXES,
+    content_digest,
+    get_pool,
+    has_pillow,
+    render_variants,
+    validate_spec,
+    variant_path,
+)
+from core.tasks import task
+
+logger = logging.getLogger(__name__)
+
+_in_flight = set()  # this worker's futures in the process pool
+_warned_no_pillow = False
+
+
+def variant_specs():
+    """The validated IMAGE_VARIANTS."""
+    return {name: validate_spec(name, spec) for name, spec in settings.IMAGE_VARIANTS.items()}
+
+
+def is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_SUFFIXES
+
+
+def original_digest(name):
+    """SHA-256 of an original, cached until the file changes."""
+    path = default_storage.path(name)
+    stat = os.stat(path)
+    # Hashed: cache keys can't hold spaces or be arbitrarily long
+    key = f"image-digest:{hashlib.sha1(name.encode()).hexdigest()}:{stat.st_mtime_ns}:{stat.st_size}"
+    return cache.get_or_set(key, lambda: content_digest(path), timeout=None)
+
+
+def variant_name(name, variant):
+    """The storage name of `variant` of the original `name`, generated or not."""
+    spec = variant_specs()[variant]
+    return variant_path(original_digest(name), variant, spec, settings.IMAGE_VARIANTS_DIR)
+
+
+def variant_url(name, variant):
+    """The variant's media URL once it's generated, else the URL of the view that generates it."""
+    generated = variant_name(name, variant)
+    if default_storage.exists(generated):
+        return default_storage.url(generated)
+    return reverse("image_variant", args=[variant, name])
+
+
+def generate(name, force=False):
+    """Write the missing variants of `name` in this process; returns the storage names written."""
+    _, written = render_variants(
+        default_storage.path(name),
+        settings.MEDIA_ROOT,
+        variant_specs(),
+        settings.IMAGE_VARIANTS_DIR,
+        force=force,
+        max_pixels=settings.IMAGE_VARIANTS_MAX_PIXELS,
+    )
+    return written
+
+
+@task(max_attempts=3, atomic=False)
+def generate_image_variants(name):
+    written = generate(name)
+    logger.info("Generated %d image variant(s) of %s", len(written), name)
+
+
+def schedule(name):
+    """
+    Generate the variants of `name` in the background, unless that's already
+    scheduled. Returns False when it isn't scheduled: already in progress, or
+    the process pool has IMAGE_VARIANTS_MAX_PENDING images waiting, or
+    Pillow isn't installed.
+    """
+    global _warned_no_pillow
+    if not has_pillow():
+        if not _warned_no_pillow:
+            _warned_no_pillow = True
+            logger.warning("Pillow isn't installed: image variants are not generated, originals are served instead")
+        return False
+    if settings.IMAGE_VARIANTS_QUEUE:
+        # Requests for the same missing variant arrive in bursts; one task each minute is enough
+        if not cache.add(f"image-variants:{original_digest(name)}", 1, timeout=60):
+            return False
+        generate_image_variants.enqueue([name], queue=settings.IMAGE_VARIANTS_QUEUE)
+        return True
+
+    _in_flight.difference_update([future for future in _in_flight if future.done()])
+    if any(future.image_name == name for future in _in_flight):
+        return False
+    if len(_in_flight) >= settings.IMAGE_VARIANTS_MAX_PENDING:
+        logger.warning("Image variant pool is full, not scheduling %s", name)
+        return False
+    future = get_pool(settings.IMAGE_VARIANTS_PROCESSES).submit(
+        render_variants,
+        default_storage.path(name),
+        settings.MEDIA_ROOT,
+        variant_specs(),
+        settings.IMAGE_VARIANTS_DIR,
+        max_pixels=settings.IMAGE_VARIANTS_MAX_PIXELS,
+    )
+    future.image_name = name
+    future.add_done_callback(_log_failure)
+    _in_flight.add(future)
+    return True
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Generating image variants of %s failed", future.image_name, exc_info=future.exception())
@@ -0,0 +1,20 @@
+"""
+PostgreSQL-backed background tasks.
+
+    from core.tasks import task
+
+    @task(queue="emails", max_attempts=5)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.delay(user.id)
+
+`.delay()` inserts a row into the tasks table on the current connection, so
+inside a request (ATOMIC_REQUESTS) the task is only visible to workers once
+the request commits and disappears if it rolls back. Workers are started
+with `python -m core.manage run_workers` (see core.tasks.worker).
+"""
+
+from core.tasks.registry import task
+
+__all__ = ["task"]
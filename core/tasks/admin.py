@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.contrib import admin
+from django.utils import timezone
+
+from core.general.admin import PerformanceModelAdmin
+from core.tasks.models import Task
+
+
+class QueueListFilter(admin.SimpleListFilter):
+    """Queue filter from TASKS_QUEUES, instead of a SELECT DISTINCT over the whole table."""
+
+    title = "queue"
+    parameter_name = "queue"
+
+    def lookups(self, request, model_admin):
+        return [(queue, queue) for queue in settings.TASKS_QUEUES]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(queue=self.value())
+        return queryset
+
+
+@admin.register(Task)
+class TaskAdmin(PerformanceModelAdmin):
+    list_display = ["id", "name", "queue", "status", "priority", "attempts", "run_after", "enqueued_at", "worker"]
+    list_filter = ["status", QueueListFilter]
+    search_fields = ["name"]  # prefix search served by tasks_task_name_upper_idx
+    readonly_fields = ["enqueued_at", "started_at", "finished_at", "worker", "last_error"]
+    ordering = ["-id"]
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected tasks now")
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=Task.Status.RUNNING).update(
+            status=Task.Status.QUEUED, run_after=timezone.now(), attempts=0, last_error=""
+        )
+        self.message_user(request, f"Requeued {updated} task(s).")
@@ -0,0 +1,10 @@
+"""
+AppConfig for the background task queue.
+"""
+
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core.tasks"
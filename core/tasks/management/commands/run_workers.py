@@ -0,0 +1,55 @@
+"""
+Run background task workers.
+
+    python -m core.manage run_workers                       # TASKS_WORKER_PROCESSES processes
+    python -m core.manage run_workers --processes 4 --queues default,emails
+    python -m core.manage run_workers --stats               # queue depth and lag, then exit
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.backend.boot import env_flag, wait_for_database
+from core.tasks.queue import queue_stats
+from core.tasks.worker import run_workers
+
+
+class Command(BaseCommand):
+    help = "Run background task workers (SELECT ... FOR UPDATE SKIP LOCKED)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=settings.TASKS_WORKER_PROCESSES)
+        parser.add_argument("--queues", help="Comma-separated queues (default: TASKS_QUEUES)")
+        parser.add_argument("--batch-size", type=int, default=settings.TASKS_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=settings.TASKS_POLL_INTERVAL)
+        parser.add_argument("--stats", action="store_true", help="Print queue depth and lag, then exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.print_stats()
+            return
+
+        if not env_flag("SKIP_DB_WAIT"):
+            wait_for_database(timeout=float(os.environ.get("DB_WAIT_TIMEOUT", "60")))
+        queues = options["queues"].split(",") if options["queues"] else settings.TASKS_QUEUES
+        self.stdout.write(f"Starting {options['processes']} worker(s) on queues: {', '.join(queues)}")
+        run_workers(
+            processes=options["processes"],
+            queues=queues,
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+        )
+
+    def print_stats(self):
+        stats = queue_stats()
+        if not stats:
+            self.stdout.write("No tasks.")
+            return
+        self.stdout.write(f"{'queue':<20} {'queued':>8} {'running':>8} {'failed':>8} {'lag':>10}")
+        for name, counts in sorted(stats.items()):
+            self.stdout.write(
+                f"{name:<20} {counts.get('queued', 0):>8} {counts.get('running', 0):>8} "
+                f"{counts.get('failed', 0):>8} {counts['lag']:>9.1f}s"
+            )
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from core.general.db import operations as online
+
+INDEX = "tasks_task_name_upper_idx"
+
+
+class Migration(migrations.Migration):
+    atomic = False  # CREATE INDEX CONCURRENTLY can't run in a transaction
+
+    dependencies = [("tasks", "0001_initial")]
+
+    operations = [
+        # Serves the admin's UPPER(name) LIKE 'PREFIX%' search; text_pattern_ops is PostgreSQL-only.
+        # The migration is only recorded once the index is built, so the DROP only ever removes
+        # the INVALID leftover of an interrupted build.
+        online.RunPostgreSQL(
+            sql=[
+                f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}",
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX} ON tasks_task (UPPER(name) text_pattern_ops)",
+            ],
+            reverse_sql=f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX}",
+        ),
+    ]
@@ -0,0 +1,132 @@
+"""
+Queue operations on the tasks table.
+
+Workers claim ready tasks with `SELECT ... FOR UPDATE SKIP LOCKED`, so any
+number of worker processes (on any number of hosts) can pull from the same
+queues without blocking on, or double-claiming, each other's rows. A claimed
+task is marked `running` in the claiming transaction and run afterwards,
+outside of it; its outcome is written back with a single UPDATE (or DELETE).
+
+On PostgreSQL every enqueue also sends a NOTIFY on CHANNEL. Notifications
+are delivered when the enqueuing transaction commits, so idle workers
+LISTENing on it wake up as soon as a task becomes visible instead of waiting
+for the next poll.
+"""
+
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from core.tasks.models import Task
+
+CHANNEL = "core_tasks"
+
+
+def notify(queue, using):
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, queue])
+
+
+def enqueue(name, args, kwargs, *, queue="default", priority=0, max_attempts=None, run_after=None):
+    task = Task.objects.create(
+        name=name,
+        queue=queue,
+        args=list(args),
+        kwargs=kwargs,
+        priority=priority,
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        run_after=run_after or timezone.now(),
+    )
+    notify(queue, router.db_for_write(Task))
+    return task
+
+
+def claim(queues, limit, worker):
+    """Mark up to `limit` ready tasks as running by `worker` and return them, highest priority first."""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=Task.Status.QUEUED, queue__in=queues, run_after__lte=now)
+            .order_by("-priority", "run_after", "id")[:limit]
+        )
+        if tasks:
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+                status=Task.Status.RUNNING, started_at=now, worker=worker, attempts=F("attempts") + 1
+            )
+
+    for task in tasks:
+        task.status = Task.Status.RUNNING
+        task.started_at = now
+        task.worker = worker
+        task.attempts += 1
+    return tasks
+
+
+def release(tasks):
+    """Put claimed tasks that were never started back in the queue (worker shutting down)."""
+    Task.objects.filter(pk__in=[task.pk for task in tasks], status=Task.Status.RUNNING).update(
+        status=Task.Status.QUEUED, started_at=None, worker="", attempts=F("attempts") - 1
+    )
+
+
+def complete(task):
+    if settings.TASKS_DELETE_SUCCEEDED:
+        Task.objects.filter(pk=task.pk).delete()
+    else:
+        Task.objects.filter(pk=task.pk).update(status=Task.Status.SUCCEEDED, finished_at=timezone.now())
+
+
+def retry_delay(attempts, backoff):
+    """Exponential backoff: `backoff` seconds after the first attempt, doubling, plus up to 10% jitter."""
+    delay = min(backoff * 2 ** (attempts - 1), settings.TASKS_RETRY_BACKOFF_MAX)
+    return timedelta(seconds=delay * (1 + random.random() / 10))
+
+
+def fail(task, error, retry_in=None):
+    """Record a failed attempt: requeue the task after `retry_in` (a timedelta), or mark it failed."""
+    now = timezone.now()
+    if retry_in is not None:
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.Status.QUEUED, run_after=now + retry_in, worker="", last_error=error
+        )
+    else:
+        Task.objects.filter(pk=task.pk).update(status=Task.Status.FAILED, finished_at=now, last_error=error)
+
+
+def requeue_stale(stale_after):
+    """
+    Recover tasks left `running` for longer than `stale_after` seconds by a
+    worker that died: requeue them, or fail those out of attempts.
+    Returns the number of tasks recovered.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(status=Task.Status.RUNNING, started_at__lt=now - timedelta(seconds=stale_after))
+    error = f"Worker lost: still running after {stale_after}s"
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Task.Status.FAILED, finished_at=now, last_error=error
+    )
+    requeued = stale.update(status=Task.Status.QUEUED, run_after=now, worker="", last_error=error)
+    return failed + requeued
+
+
+def queue_stats():
+    """
+    Return {queue: {"queued": n, "running": n, "failed": n, ..., "lag": seconds}}
+    where lag is how long the oldest ready task has been waiting.
+    """
+    now = timezone.now()
+    stats = {}
+    for row in Task.objects.values("queue", "status").annotate(count=Count("id")).order_by():
+        stats.setdefault(row["queue"], {"lag": 0.0})[row["status"]] = row["count"]
+
+    ready = Task.objects.filter(status=Task.Status.QUEUED, run_after__lte=now)
+    for row in ready.values("queue").annotate(oldest=Min("run_after")).order_by():
+        stats[row["queue"]]["lag"] = (now - row["oldest"]).total_seconds()
+    return stats
@@ -0,0 +1,84 @@
+"""
+The @task decorator and the registry workers use to find task functions.
+
+Tasks are registered under their dotted path (module.qualname). Workers
+import every installed app's `tasks` module on start-up and fall back to
+importing a task's module on first use, so the name stored in the queue is
+all that's needed to run it.
+"""
+
+from functools import update_wrapper
+
+from django.conf import settings
+from django.utils.module_loading import autodiscover_modules, import_string
+
+registry = {}
+
+
+class TaskFunction:
+    """A function decorated with @task. Calling it runs it inline."""
+
+    def __init__(self, func, queue=None, priority=0, max_attempts=None, retry_backoff=None, atomic=True):
+        update_wrapper(self, func)
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.queue = queue or "default"
+        self.priority = priority
+        self.max_attempts = max_attempts or settings.TASKS_MAX_ATTEMPTS
+        self.retry_backoff = retry_backoff if retry_backoff is not None else settings.TASKS_RETRY_BACKOFF
+        self.atomic = atomic  # run in a transaction, rolled back when the task raises
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<task {self.name}>"
+
+    def delay(self, *args, **kwargs):
+        """Queue a call with JSON-serializable arguments; returns the Task row."""
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, *, run_after=None, priority=None, queue=None):
+        """Queue a call; `run_after` (datetime) delays it, `priority`/`queue` override the defaults."""
+        from core.tasks.queue import enqueue
+
+        return enqueue(
+            self.name,
+            args,
+            kwargs or {},
+            queue=queue or self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_after=run_after,
+        )
+
+
+def task(func=None, **options):
+    """
+    Register a function as a background task. Use bare or with options:
+    `queue`, `priority`, `max_attempts`, `retry_backoff` (seconds, doubled
+    per attempt) and `atomic`.
+    """
+    if func is None:
+        return lambda func: task(func, **options)
+    task_function = TaskFunction(func, **options)
+    registry[task_function.name] = task_function
+    return task_function
+
+
+def autodiscover():
+    """Import the `tasks` module of every installed app."""
+    autodiscover_modules("tasks")
+
+
+def get_task(name):
+    """Return the registered TaskFunction called `name`, importing its module if needed."""
+    if name not in registry:
+        try:
+            import_string(name)
+        except ImportError:
+            pass
+    try:
+        return registry[name]
+    except KeyError:
+        raise LookupError(f"Task {name!r} is not registered") from None
@@ -0,0 +1,235 @@
+"""Tests for the background task queue."""
+
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from core.tasks import queue, task
+from core.tasks.models import Task
+from core.tasks.registry import get_task
+from core.tasks.worker import Worker
+
+pytestmark = pytest.mark.django_db
+
+calls = []
+
+
+@task
+def record(value):
+    calls.append(value)
+
+
+@task(queue="slow", priority=5, max_attempts=2, retry_backoff=10)
+def explode():
+    raise RuntimeError("boom")
+
+
+@task
+def create_user_then_explode(username):
+    User.objects.create(username=username)
+    raise RuntimeError("boom")
+
+
+@task
+def lookup_fails():
+    return {}["missing"]
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.fixture
+def worker():
+    return Worker(queues=["default", "slow"], batch_size=10, poll_interval=0.01, name="test-worker")
+
+
+class TestEnqueue:
+    """Tests for @task and queueing calls."""
+
+    def test_delay_inserts_a_row(self):
+        queued = record.delay("hello")
+
+        assert queued.name == record.name == f"{record.__module__}.record"
+        assert (queued.queue, queued.status, queued.args, queued.kwargs) == ("default", "queued", ["hello"], {})
+        assert queued.max_attempts == 3
+
+    def test_decorator_options(self):
+        queued = explode.delay()
+
+        assert (queued.queue, queued.priority, queued.max_attempts) == ("slow", 5, 2)
+
+    def test_calling_the_task_runs_it_inline(self):
+        record("now")
+
+        assert calls == ["now"]
+        assert not Task.objects.exists()
+
+    def test_unknown_task(self):
+        with pytest.raises(LookupError):
+            get_task("core.tasks.tests.missing")
+
+
+class TestClaim:
+    """Tests for claiming ready tasks."""
+
+    def test_priority_then_age_and_only_ready_tasks(self):
+        first = record.delay(1)
+        urgent = record.enqueue([2], priority=10)
+        record.enqueue([3], run_after=timezone.now() + timedelta(hours=1))
+        record.enqueue([4], queue="other")
+
+        claimed = queue.claim(["default"], 10, "w1")
+
+        assert [claimed_task.pk for claimed_task in claimed] == [urgent.pk, first.pk]
+        assert Task.objects.filter(status="running", worker="w1", attempts=1).count() == 2
+
+    def test_claimed_tasks_are_not_claimed_again(self):
+        record.delay(1)
+
+        assert len(queue.claim(["default"], 10, "w1")) == 1
+        assert queue.claim(["default"], 10, "w2") == []
+
+    def test_release(self):
+        record.delay(1)
+        claimed = queue.claim(["default"], 10, "w1")
+
+        queue.release(claimed)
+
+        assert Task.objects.filter(status="queued", attempts=0, worker="").count() == 1
+
+
+class TestWorker:
+    """Tests for running tasks."""
+
+    def test_success_deletes_the_row(self, worker):
+        record.delay("a")
+        record.delay("b")
+
+        assert worker.run_once() == 2
+        assert calls == ["a", "b"]
+        assert not Task.objects.exists()
+        assert worker.stats.outcomes["succeeded"] == 2
+
+    def test_success_keeps_row_when_configured(self, worker, settings):
+        settings.TASKS_DELETE_SUCCEEDED = False
+        record.delay("a")
+
+        worker.run_once()
+
+        assert Task.objects.get().status == "succeeded"
+
+    def test_retry_with_backoff_then_fail(self, worker):
+        queued = explode.delay()
+
+        worker.run_once()
+        queued.refresh_from_db()
+        assert (queued.status, queued.attempts) == ("queued", 1)
+        assert queued.run_after > timezone.now() + timedelta(seconds=9)
+        assert "RuntimeError: boom" in queued.last_error
+
+        Task.objects.update(run_after=timezone.now())
+        worker.run_once()
+        queued.refresh_from_db()
+        assert (queued.status, queued.attempts) == ("failed", 2)
+        assert worker.stats.outcomes == {"succeeded": 0, "retried": 1, "failed": 1}
+
+    def test_task_transaction_is_rolled_back(self, worker):
+        create_user_then_explode.delay("ghost")
+
+        worker.run_once()
+
+        assert not User.objects.filter(username="ghost").exists()
+
+    def test_unregistered_task_fails_without_retry(self, worker):
+        Task.objects.create(name="core.tasks.tests.missing")
+
+        worker.run_once()
+
+        assert Task.objects.get().status == "failed"
+
+    def test_task_whose_module_fails_to_import_fails_without_retry(self, worker, mocker):
+        mocker.patch("core.tasks.registry.import_string", side_effect=SyntaxError("broken module"))
+        Task.objects.create(name="core.tasks.tests.broken.task")
+        record.delay("after")
+
+        assert worker.run_once() == 2
+
+        assert Task.objects.get(name="core.tasks.tests.broken.task").status == "failed"
+        assert calls == ["after"]
+        assert worker.stats.outcomes["failed"] == 1
+
+    def test_lookup_errors_in_a_task_are_retried(self, worker):
+        queued = lookup_fails.delay()
+
+        worker.run_once()
+
+        queued.refresh_from_db()
+        assert (queued.status, queued.attempts) == ("queued", 1)
+
+    def test_stop_releases_the_rest_of_the_batch(self, worker, mocker):
+        record.delay("a")
+        record.delay("b")
+        mocker.patch.object(worker, "execute", side_effect=lambda queued: worker.stop())
+
+        assert worker.run_once() == 1
+        assert Task.objects.filter(status="queued").count() == 1
+
+    def test_empty_queue_waits(self, worker, mocker):
+        sleep = mocker.patch("core.tasks.worker.time.sleep")
+
+        assert worker.run_once() == 0
+        sleep.assert_called_once_with(0.01)
+
+    def test_metrics_hook(self, worker, mocker):
+        hook = worker.metrics_hook = mocker.Mock()
+        record.delay("a")
+        worker.run_once()
+
+        worker.report()
+
+        snapshot = hook.call_args.args[0]
+        assert snapshot["processed"] == snapshot["succeeded"] == 1
+        assert snapshot["worker"] == "test-worker"
+        assert snapshot["lag_max"] >= 0
+
+
+class TestMaintenance:
+    """Tests for recovering tasks and queue statistics."""
+
+    def test_requeue_stale(self):
+        record.delay(1)
+        explode.delay()
+        queue.claim(["default", "slow"], 10, "dead-worker")
+        Task.objects.update(started_at=timezone.now() - timedelta(hours=1))
+        Task.objects.filter(name=explode.name).update(attempts=2)
+
+        assert queue.requeue_stale(600) == 2
+        assert dict(Task.objects.values_list("name", "status")) == {record.name: "queued", explode.name: "failed"}
+
+    def test_retry_delay_doubles_and_is_capped(self, settings):
+        settings.TASKS_RETRY_BACKOFF_MAX = 30
+
+        delays = [queue.retry_delay(attempt, 5).total_seconds() for attempt in (1, 2, 3, 10)]
+
+        for delay, expected in zip(delays, [5, 10, 20, 30], strict=True):
+            assert expected <= delay <= expected * 1.1
+
+    def test_queue_stats_and_command(self):
+        record.delay(1)
+        Task.objects.update(run_after=timezone.now() - timedelta(seconds=30))
+        explode.delay()
+        queue.claim(["slow"], 10, "w1")
+
+        stats = queue.queue_stats()
+        out = StringIO()
+        call_command("run_workers", "--stats", stdout=out)
+
+        assert stats["default"]["queued"] == 1 and stats["default"]["lag"] >= 30
+        assert stats["slow"] == {"running": 1, "lag": 0.0}
+        assert "default" in out.getvalue() and "slow" in out.getvalue()
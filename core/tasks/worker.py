@@ -0,0 +1,233 @@
+"""
+Task workers and the multi-process supervisor behind `run_workers`.
+
+Each Worker loops: claim up to TASKS_BATCH_SIZE ready tasks (core.tasks.queue),
+run them one by one, write back the outcome, and when the queues are empty
+wait for a NOTIFY (PostgreSQL) or TASKS_POLL_INTERVAL seconds. A task that
+raises is retried with exponential backoff until it runs out of attempts.
+SIGTERM/SIGINT finish the running task, put the rest of the batch back and
+exit.
+
+run_workers() forks `processes` workers and restarts any that die. Every
+worker reports its throughput and queue lag (time between a task becoming
+ready and being claimed) every TASKS_METRICS_INTERVAL seconds, to the log and
+to TASKS_METRICS_HOOK.
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from core.tasks import queue
+from core.tasks.registry import autodiscover, get_task
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerStats:
+    """Counters for one metrics interval."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.outcomes = {"succeeded": 0, "retried": 0, "failed": 0}
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.busy = 0.0
+
+    def record(self, outcome, lag, duration):
+        self.outcomes[outcome] += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.busy += duration
+
+    def snapshot(self, worker):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        processed = sum(self.outcomes.values())
+        return {
+            "worker": worker,
+            "processed": processed,
+            **self.outcomes,
+            "throughput": processed / elapsed,  # tasks per second
+            "lag_mean": self.lag_total / processed if processed else 0.0,
+            "lag_max": self.lag_max,
+            "utilization": self.busy / elapsed,
+        }
+
+
+class Worker:
+    def __init__(self, queues=None, batch_size=None, poll_interval=None, name=None):
+        self.queues = list(queues or settings.TASKS_QUEUES)
+        self.batch_size = batch_size or settings.TASKS_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.TASKS_POLL_INTERVAL
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        self.stats = WorkerStats()
+        hook = settings.TASKS_METRICS_HOOK
+        self.metrics_hook = import_string(hook) if hook else None
+        self._listening_on = None
+        self._next_maintenance = 0.0
+
+    def stop(self, *args):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        autodiscover()
+        logger.info("Worker %s started on queues %s", self.name, ", ".join(self.queues))
+
+        while not self.stopping:
+            self.run_once()
+        self.report()
+        logger.info("Worker %s stopped", self.name)
+
+    def run_once(self):
+        """Claim and run one batch, or wait for work. Returns the number of tasks run."""
+        self.maintain()
+        tasks = queue.claim(self.queues, self.batch_size, self.name)
+        if not tasks:
+            self.wait()
+            return 0
+
+        for index, task in enumerate(tasks):
+            if self.stopping:
+                queue.release(tasks[index:])
+                return index
+            self.execute(task)
+        return len(tasks)
+
+    def execute(self, task):
+        lag = (task.started_at - task.run_after).total_seconds()
+        started = time.monotonic()
+        try:
+            task_function = get_task(task.name)
+        except Exception:
+            # Unregistered, or its module raises on import: retrying won't help
+            logger.error("Task %s can't be loaded, failing it", task, exc_info=True)
+            queue.fail(task, traceback.format_exc())
+            self.stats.record("failed", lag, time.monotonic() - started)
+            return
+
+        try:
+            if task_function.atomic:
+                with transaction.atomic():
+                    task_function.func(*task.args, **task.kwargs)
+            else:
+                task_function.func(*task.args, **task.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            if task.attempts >= task.max_attempts:
+                logger.error("Task %s failed permanently after %d attempt(s)", task, task.attempts, exc_info=True)
+                queue.fail(task, error)
+                outcome = "failed"
+            else:
+                backoff = task_function.retry_backoff
+                logger.warning("Task %s failed (attempt %d/%d), retrying", task, task.attempts, task.max_attempts)
+                queue.fail(task, error, retry_in=queue.retry_delay(task.attempts, backoff))
+                outcome = "retried"
+        else:
+            queue.complete(task)
+            outcome = "succeeded"
+        self.stats.record(outcome, lag, time.monotonic() - started)
+
+    def wait(self):
+        """Sleep until a task is enqueued (PostgreSQL LISTEN) or for the poll interval."""
+        if connection.vendor != "postgresql":
+            time.sleep(self.poll_interval)
+            return
+
+        connection.ensure_connection()
+        if self._listening_on is not connection.connection:
+            # New (or reconnected) connection: LISTEN is per session
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {queue.CHANNEL}")
+            self._listening_on = connection.connection
+        for _ in connection.connection.notifies(timeout=self.poll_interval, stop_after=1):
+            pass
+
+    def maintain(self):
+        """Periodic housekeeping: stale connections, crashed workers' tasks, metrics."""
+        now = time.monotonic()
+        if now < self._next_maintenance:
+            return
+        self._next_maintenance = now + settings.TASKS_METRICS_INTERVAL
+
+        connection.close_if_unusable_or_obsolete()
+        recovered = queue.requeue_stale(settings.TASKS_STALE_AFTER)
+        if recovered:
+            logger.warning("Recovered %d task(s) from workers that stopped responding", recovered)
+        if now - self.stats.started >= settings.TASKS_METRICS_INTERVAL:
+            self.report()
+
+    def report(self):
+        snapshot = self.stats.snapshot(self.name)
+        self.stats = WorkerStats()
+        logger.info(
+            "Worker %s: %d tasks (%.1f/s), %d succeeded, %d retried, %d failed, lag mean %.3fs max %.3fs, %.0f%% busy",
+            snapshot["worker"],
+            snapshot["processed"],
+            snapshot["throughput"],
+            snapshot["succeeded"],
+            snapshot["retried"],
+            snapshot["failed"],
+            snapshot["lag_mean"],
+            snapshot["lag_max"],
+            snapshot["utilization"] * 100,
+        )
+        if self.metrics_hook is not None:
+            try:
+                self.metrics_hook(snapshot)
+            except Exception:
+                logger.exception("TASKS_METRICS_HOOK failed")
+
+
+def _worker_process(options):
+    Worker(**options).run()
+
+
+def run_workers(processes=1, **options):
+    """
+    Run `processes` workers: in this process when 1, otherwise as forked
+    children that are restarted when they die, until SIGTERM/SIGINT.
+    """
+    if processes == 1:
+        Worker(**options).run()
+        return
+
+    # Children must not share the parent's database connections
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    children = {}
+    stopping = False
+
+    def stop(*args):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        for slot in range(processes):
+            child = children.get(slot)
+            if child is not None and child.is_alive():
+                continue
+            if child is not None:
+                logger.warning("Worker process %s exited with code %s, restarting", child.pid, child.exitcode)
+            children[slot] = context.Process(target=_worker_process, args=(options,), daemon=False)
+            children[slot].start()
+        time.sleep(1)
+
+    for child in children.values():
+        if child.is_alive():
+            child.terminate()  # SIGTERM: finish the current task, then exit
+    for child in children.values():
+        child.join()
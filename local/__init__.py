@@ -2,13 +2,17 @@
 Local settings package.
 
 This directory contains environment-specific Django settings that should NOT be committed to git.
-Files in this directory override the base settings in core/backend/settings/.
+Overlay files here are layered over core/backend/settings/ by the settings loader
+(core/backend/settings/loader.py) when settings are selected through DJANGO_ENV:
 
-Usage:
-    - Copy templates from core/backend/settings/templates/ to this directory
-    - Customize with your local/environment-specific values
-    - Never commit these files (they're in .gitignore)
+    local/settings.py          - applied to every environment
+    local/settings.<env>.py    - applied to DJANGO_ENV=<env> only (dev, prod, test)
 
-Example:
-    cp core/backend/settings/templates/settings.dev.py local/settings.dev.py
+Overlays can read the settings loaded so far; dict settings are merged key by key.
+
+Example (local/settings.dev.py):
+    LOGGING = {"root": {"level": "INFO"}}
+    INSTALLED_APPS = [*INSTALLED_APPS, "my_scratch_app"]
+
+Compiled settings snapshots (SETTINGS_SNAPSHOT=true) are written to local/.snapshots/.
 """
@@ -2,62 +2,14 @@
 
 set -e
 
-RUN_MANAGE_PY='python -m core.manage'
-
-# Environment variables for controlling startup behavior
-SKIP_MIGRATIONS=${SKIP_MIGRATIONS:-false}
-SKIP_COLLECTSTATIC=${SKIP_COLLECTSTATIC:-false}
-
-echo '========================================'
-echo 'Waiting for PostgreSQL to be ready...'
-echo '========================================'
-
-# Wait for database to be ready with retry limit
-RETRIES=30
-until PGPASSWORD="${POSTGRES_PASSWORD}" psql \
-    -h "${POSTGRES_HOST}" \
-    -U "${POSTGRES_USER}" \
-    -d "${POSTGRES_DB}" \
-    -c '\q' 2>/dev/null; do
-  RETRIES=$((RETRIES-1))
-  if [ $RETRIES -eq 0 ]; then
-    echo "❌ Failed to connect to PostgreSQL after 30 attempts (60 seconds)"
-    echo "Please check your database configuration and ensure PostgreSQL is running."
-    echo "Connection details: host=${POSTGRES_HOST}, user=${POSTGRES_USER}, db=${POSTGRES_DB}"
-    exit 1
-  fi
-  echo "PostgreSQL is unavailable - sleeping ($RETRIES attempts remaining)"
-  sleep 2
-done
-
-echo '✓ PostgreSQL is ready!'
-echo ''
-
-# Collectstatic (can be skipped for faster restarts)
-if [ "$SKIP_COLLECTSTATIC" = "true" ]; then
-  echo "⏭  Skipping collectstatic (SKIP_COLLECTSTATIC=true)"
-else
-  echo '========================================'
-  echo 'Collecting static files...'
-  echo '========================================'
-  $RUN_MANAGE_PY collectstatic --no-input
-  echo ''
-fi
-
-# Migrations (can be skipped for zero-downtime deployments)
-if [ "$SKIP_MIGRATIONS" = "true" ]; then
-  echo "⏭  Skipping migrations (SKIP_MIGRATIONS=true)"
-else
-  echo '========================================'
-  echo 'Running database migrations...'
-  echo '========================================'
-  $RUN_MANAGE_PY migrate --no-input
-  echo ''
-fi
-
-echo '========================================'
-echo 'Starting application server...'
-echo '========================================'
+# Waiting for the database, collectstatic and migrate are handled by the boot
+# orchestrator (core/backend/boot.py), which honours these flags:
+#   SKIP_DB_WAIT=true        - don't wait for PostgreSQL (e.g. the local benchmark runner)
+#   SKIP_COLLECTSTATIC=true  - skip collectstatic for faster restarts
+#   SKIP_MIGRATIONS=true     - skip migrations (zero-downtime deployments)
+# `migrate` refuses pending migrations that would lock a large table (see
+# core/general/db/lint.py, MIGRATION_LINT_*) and retries on lock timeouts.
+#   DB_WAIT_TIMEOUT=60       - give up waiting for PostgreSQL after this many seconds
 
 # Calculate optimal worker count based on available resources
 # Formula: (2 * CPU cores) + 1, with memory-aware capping
@@ -79,10 +31,12 @@ if [ -z "$GUNICORN_WORKERS" ]; then
   fi
 
   # If memory limit is set and numeric, calculate max workers
-  # Assume 150MB per worker (conservative estimate)
+  # GUNICORN_WORKER_MEMORY_MB: 150MB per worker unless measured; `python -m core.manage memory`
+  # shows workers' real peak RSS (their growth is capped by MEMORY_GROWTH_BUDGET)
+  WORKER_MEMORY_MB=${GUNICORN_WORKER_MEMORY_MB:-150}
   if [ "$MEMORY_LIMIT" != "max" ] && [ "$MEMORY_LIMIT" -gt 0 ] 2>/dev/null; then
     MEMORY_MB=$((MEMORY_LIMIT / 1024 / 1024))
-    MAX_WORKERS=$((MEMORY_MB / 150))
+    MAX_WORKERS=$((MEMORY_MB / WORKER_MEMORY_MB))
 
     if [ $MAX_WORKERS -lt $OPTIMAL_WORKERS ]; then
       echo "⚠️  Memory limit detected: ${MEMORY_MB}MB"
@@ -103,11 +57,27 @@ if [ -z "$GUNICORN_WORKERS" ]; then
   echo "ℹ️  Auto-detected ${CPU_CORES} CPU cores, using ${GUNICORN_WORKERS} workers"
 fi
 
-# Use gunicorn for production (better than daphne for WSGI)
-exec gunicorn core.backend.wsgi:application \
-    --bind 0.0.0.0:8000 \
+# GUNICORN_WORKER_CLASS=gevent serves up to GUNICORN_WORKER_CONNECTIONS concurrent
+# requests per worker, for I/O-bound endpoints (see core/backend/green.py)
+GUNICORN_WORKER_CLASS=${GUNICORN_WORKER_CLASS:-sync}
+WORKER_ARGS="--worker-class ${GUNICORN_WORKER_CLASS}"
+if [ "$GUNICORN_WORKER_CLASS" = "gevent" ]; then
+  # gevent is an optional dependency: fail here rather than in every worker
+  if ! python -c "import gevent" 2>/dev/null; then
+    echo "❌ GUNICORN_WORKER_CLASS=gevent but gevent isn't installed in this image:" >&2
+    echo "   uncomment gevent in pyproject.toml and rebuild, or unset GUNICORN_WORKER_CLASS" >&2
+    exit 1
+  fi
+  WORKER_ARGS="$WORKER_ARGS --worker-connections ${GUNICORN_WORKER_CONNECTIONS:-100}"
+fi
+export GUNICORN_WORKER_CLASS
+
+# Run the boot steps, then start gunicorn in the same Python process
+# (gunicorn is better than daphne for WSGI)
+exec python -m core.backend.boot \
+    --bind ${GUNICORN_BIND:-0.0.0.0:8000} \
     --workers ${GUNICORN_WORKERS} \
-    --worker-class sync \
+    ${WORKER_ARGS} \
     --timeout ${GUNICORN_TIMEOUT:-60} \
     --access-logfile - \
     --error-logfile - \
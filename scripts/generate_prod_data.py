@@ -1,6 +1,16 @@
+"""
+Generate production secrets and accounts.
+
+Usage:
+    PYTHONPATH=. python scripts/generate_prod_data.py                  # one account + SECRET_KEY
+    PYTHONPATH=. python scripts/generate_prod_data.py --accounts 5000  # CSV of accounts + SECRET_KEY
+"""
+
+import argparse
+
 from django.core.management.utils import get_random_secret_key
 
-from core.general.utils.cryptography import generate_key_pair
+from core.general.utils.cryptography import generate_key_pair, generate_key_pairs
 
 
 def generate_account():
@@ -9,12 +19,25 @@ def generate_account():
     print(f"Account Number: {key_pair.public}")
 
 
+def generate_accounts(count):
+    print("account_number,signing_key")
+    for key_pair in generate_key_pairs(count):
+        print(f"{key_pair.public},{key_pair.private}")
+
+
 def generate_secret_key():
     secret_key = get_random_secret_key()
     print(f"SECRET_KEY: {secret_key}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate production secrets and accounts.")
+    parser.add_argument("--accounts", type=int, default=1, help="Number of accounts (more than 1 prints CSV)")
+    args = parser.parse_args()
+
     print()
-    generate_account()
+    if args.accounts > 1:
+        generate_accounts(args.accounts)
+    else:
+        generate_account()
     generate_secret_key()
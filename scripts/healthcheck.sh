@@ -0,0 +1,46 @@
+#!/bin/sh
+# Container health probe backed by the in-app heartbeat (core/backend/heartbeat.py).
+#
+# Healthy when every live worker's heartbeat file is fresher than
+# HEARTBEAT_MAX_AGE seconds and reports "ok": one worker that's stuck on a
+# request, can't reach a dependency or stopped beating at all fails the probe
+# even while its siblings are fine. Files left behind by workers that died
+# (SIGKILL skips their cleanup) are removed. Costs a few stat() calls instead
+# of a Python interpreter plus an HTTP request and a DB query.
+
+HEARTBEAT_DIR=${HEARTBEAT_DIR:-/tmp/heartbeat}
+HEARTBEAT_MAX_AGE=${HEARTBEAT_MAX_AGE:-30}
+
+now=$(date +%s)
+healthy=0
+problem=""
+
+for beat in "$HEARTBEAT_DIR"/*.beat; do
+  [ -f "$beat" ] || continue
+  pid=$(basename "$beat" .beat)
+  if ! kill -0 "$pid" 2>/dev/null && [ ! -d "/proc/$pid" ]; then
+    rm -f "$beat"
+    continue
+  fi
+  age=$((now - $(stat -c %Y "$beat")))
+  if [ "$age" -gt "$HEARTBEAT_MAX_AGE" ]; then
+    problem="worker $pid heartbeat older than ${HEARTBEAT_MAX_AGE}s"
+    break
+  fi
+  read -r status _ < "$beat"
+  if [ "$status" != "ok" ]; then
+    problem="worker $pid: $(cat "$beat")"
+    break
+  fi
+  healthy=$((healthy + 1))
+done
+
+if [ -n "$problem" ]; then
+  echo "HEALTHCHECK: $problem" >&2
+  exit 1
+fi
+if [ "$healthy" -eq 0 ]; then
+  echo "HEALTHCHECK: no live worker heartbeat in $HEARTBEAT_DIR" >&2
+  exit 1
+fi
+exit 0